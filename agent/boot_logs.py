@@ -0,0 +1,195 @@
+"""Per-container boot log ring buffers.
+
+Console connects used to fetch the container's log tail each time and
+send it one WebSocket frame per line; readiness probes re-read up to 500
+lines of logs on every poll. Instead, each container of interest gets a
+single follower thread streaming its logs into a bounded ring buffer
+(boot_log_buffer_lines). Consoles get the tail as one pre-rendered chunk,
+and probes search the buffered text.
+
+A follower starts on first use: it loads the current tail, then follows
+new output (deduplicating the overlap by docker timestamp) until the
+container stops. At most boot_log_max_containers buffers are kept; the
+least recently used is dropped (and its follower stopped) beyond that.
+Readiness polling pins a container's buffer until the node is ready, so
+a large deploy never evicts a booting node and loses its boot banner;
+pinned buffers may exceed the cap until their container stops.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+import docker
+
+from agent.config import settings
+
+logger = logging.getLogger(__name__)
+
+BOOT_LOG_HEADER = "\r\n\x1b[90m--- Boot Log ---\x1b[0m\r\n"
+BOOT_LOG_FOOTER = "\x1b[90m--- Connecting to CLI ---\x1b[0m\r\n\r\n"
+
+
+def _strip_timestamp(line: str) -> str:
+    # "2024-05-01T10:00:00.123456789Z message"
+    _, _, message = line.partition(" ")
+    return message
+
+
+class BootLog:
+    """Ring buffer of one container's recent log lines."""
+
+    def __init__(self, container_name: str, max_lines: int):
+        self.container_name = container_name
+        self._lines: deque[str] = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._rendered: tuple[int, int, str | None] | None = None  # (version, tail, block)
+        self._stream = None
+        self.pinned = False
+        self._stopped = threading.Event()
+        self.loaded = threading.Event()
+        self.finished = threading.Event()
+
+    def extend(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        with self._lock:
+            self._lines.extend(lines)
+            self._version += 1
+
+    def text(self, tail: int | None = None) -> str:
+        """Buffered log text (the last tail lines), for pattern probes."""
+        with self._lock:
+            lines = list(self._lines)
+        if tail is not None:
+            lines = lines[-tail:]
+        return "\n".join(lines)
+
+    def render(self, tail: int | None = None) -> str | None:
+        """Console boot log block: header, dimmed lines, footer; None if empty."""
+        tail = tail or settings.boot_log_console_lines
+        with self._lock:
+            if self._rendered and self._rendered[:2] == (self._version, tail):
+                return self._rendered[2]
+            version = self._version
+            lines = list(self._lines)[-tail:]
+        block = None
+        if any(line.strip() for line in lines):
+            body = "".join(f"\x1b[90m{line}\x1b[0m\r\n" for line in lines)
+            block = BOOT_LOG_HEADER + body + BOOT_LOG_FOOTER
+        with self._lock:
+            self._rendered = (version, tail, block)
+        return block
+
+    def stop(self) -> None:
+        self._stopped.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def follow(self) -> None:
+        """Load the log tail, then follow new output (runs on its own thread)."""
+        try:
+            container = docker.from_env().containers.get(self.container_name)
+            since = int(time.time()) - 1
+            snapshot = container.logs(
+                tail=self._lines.maxlen, timestamps=True
+            ).decode("utf-8", errors="replace").splitlines()
+            self.extend([_strip_timestamp(line) for line in snapshot])
+            self.loaded.set()
+
+            # Lines carry nanosecond timestamps, so only true repeats of the
+            # snapshot match (the follow stream starts up to a second early)
+            overlap = set(snapshot)
+            if self._stopped.is_set():
+                return
+            self._stream = container.logs(stream=True, follow=True, since=since, timestamps=True)
+            pending = b""
+            for chunk in self._stream:
+                pending += chunk
+                *complete, pending = pending.split(b"\n")
+                lines = [
+                    raw.decode("utf-8", errors="replace").rstrip("\r") for raw in complete
+                ]
+                self.extend([_strip_timestamp(line) for line in lines if line not in overlap])
+        except Exception as e:
+            logger.debug(f"Boot log follower for {self.container_name} ended: {e}")
+        finally:
+            self.loaded.set()
+            self.finished.set()
+
+
+class BootLogCache:
+    """Boot log buffers by container name, each fed by one follower."""
+
+    def __init__(self):
+        self._logs: OrderedDict[str, BootLog] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, container_name: str, wait: float = 5.0, pin: bool = False) -> BootLog:
+        """The container's buffer, starting its follower if needed.
+
+        Waits up to wait seconds for the initial log tail on first use.
+        With pin, the buffer is not evicted until unpin() or the
+        container stops.
+        """
+        with self._lock:
+            log = self._logs.get(container_name)
+            if log is None or log.finished.is_set():
+                # Not followed yet, or the container stopped (it may have restarted)
+                log = BootLog(container_name, settings.boot_log_buffer_lines)
+                self._logs[container_name] = log
+                threading.Thread(
+                    target=log.follow, name=f"boot-log-{container_name}", daemon=True
+                ).start()
+            if pin:
+                log.pinned = True
+            self._logs.move_to_end(container_name)
+            self._evict(keep=container_name)
+        if not log.loaded.is_set():
+            await asyncio.to_thread(log.loaded.wait, wait)
+        return log
+
+    def unpin(self, container_name: str) -> None:
+        """Let the container's buffer be evicted again (readiness reached)."""
+        with self._lock:
+            log = self._logs.get(container_name)
+            if log:
+                log.pinned = False
+                self._evict(keep=container_name)
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used unpinned buffers beyond the cap. Holds _lock."""
+        excess = len(self._logs) - settings.boot_log_max_containers
+        if excess <= 0:
+            return
+        evictable = [
+            name for name, log in self._logs.items()
+            if name != keep and (not log.pinned or log.finished.is_set())
+        ]
+        for name in evictable[:excess]:
+            self._logs.pop(name).stop()
+
+    def forget(self, container_name: str) -> None:
+        with self._lock:
+            log = self._logs.pop(container_name, None)
+        if log:
+            log.stop()
+
+    def stop_all(self) -> None:
+        with self._lock:
+            logs = list(self._logs.values())
+            self._logs.clear()
+        for log in logs:
+            log.stop()
+
+
+boot_logs = BootLogCache()
@@ -0,0 +1,99 @@
+"""On-disk store for lab checkpoints.
+
+A checkpoint captures a lab's nodes after boot so a later deploy can
+start from that state instead of cold-booting. Providers write their
+artifacts (committed images, CRIU dumps, qcow2 layers, memory state)
+under the checkpoint's directory and describe them in manifest.json:
+
+    {
+      "checkpoint_id": "...",
+      "lab_id": "...",
+      "provider": "docker",
+      "created_at": "2026-01-01T00:00:00+00:00",
+      "nodes": {"r1": {...provider-specific artifacts...}}
+    }
+
+Checkpoints live outside the lab workspace so destroying or redeploying
+the lab does not remove them.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from agent.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+def checkpoint_dir(lab_id: str, checkpoint_id: str) -> Path:
+    """Directory holding a checkpoint's artifacts.
+
+    Raises:
+        ValueError: If either ID could escape the checkpoint store
+    """
+    for value in (lab_id, checkpoint_id):
+        if not _SAFE_ID.match(value) or value in (".", ".."):
+            raise ValueError(f"Invalid checkpoint identifier: {value!r}")
+    return Path(settings.workspace_path) / ".checkpoints" / lab_id / checkpoint_id
+
+
+def read_manifest(lab_id: str, checkpoint_id: str) -> dict[str, Any] | None:
+    """Load a checkpoint manifest, or None if the checkpoint doesn't exist."""
+    path = checkpoint_dir(lab_id, checkpoint_id) / MANIFEST_FILE
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Unreadable checkpoint manifest {path}: {e}")
+        return None
+
+
+def write_manifest(
+    lab_id: str,
+    checkpoint_id: str,
+    provider: str,
+    nodes: dict[str, dict[str, Any]],
+) -> dict[str, Any]:
+    """Write a checkpoint manifest atomically and return it."""
+    manifest = {
+        "checkpoint_id": checkpoint_id,
+        "lab_id": lab_id,
+        "provider": provider,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "nodes": nodes,
+    }
+    directory = checkpoint_dir(lab_id, checkpoint_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f".{MANIFEST_FILE}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    tmp.replace(directory / MANIFEST_FILE)
+    return manifest
+
+
+def remove_checkpoint_dir(lab_id: str, checkpoint_id: str) -> None:
+    """Delete a checkpoint's directory and everything in it."""
+    directory = checkpoint_dir(lab_id, checkpoint_id)
+    shutil.rmtree(directory, ignore_errors=True)
+    try:
+        directory.parent.rmdir()  # Drop the lab directory once empty
+    except OSError:
+        pass
+
+
+def directory_size(path: Path) -> int:
+    """Total size in bytes of regular files under path."""
+    if not path.exists():
+        return 0
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
@@ -27,6 +27,21 @@ class Settings(BaseSettings):
     # Libvirt settings
     libvirt_uri: str = "qemu:///system"
     qcow2_store_path: str = ""  # Path to qcow2 image store (auto-detect if empty)
+    image_catalog_rescan_interval: int = 300  # Seconds between qcow2 store rescans (0 disables)
+    image_catalog_checksums: bool = True  # SHA-256 qcow2 images in the background
+    libvirt_worker_threads: int = 8  # Threads for blocking libvirt API calls
+    libvirt_deploy_concurrency: int = 4  # VMs having disks prepared/defined at once
+    libvirt_boot_interval: float = 5.0  # Minimum seconds between VM cold boots on this host
+    vm_cpu_pinning: bool = True  # Pin each VM's vCPUs to dedicated cores on one NUMA node
+    vm_reserved_cpus: str = "0"  # Host cores never pinned to VMs (kernel cpulist syntax)
+    vm_hugepages: bool = True  # Back VM memory with the node's 2 MiB hugepages when available
+    vm_iothreads: int = 1  # Disk I/O threads per VM (0 disables)
+    vm_image_warmup: str = "fadvise"  # Pre-read base images before large deploys: off, fadvise, read
+    vm_image_warmup_min_vms: int = 4  # Only warm for deploys of at least this many VMs
+    vm_image_warmup_timeout: float = 120.0  # Max seconds a deploy waits for warming
+    vm_ksm_default: bool = False  # Share identical VM memory via KSM unless the lab says otherwise
+    vm_ksm_pages_to_scan: int = 1000  # KSM scanner pages per wake-up while a KSM lab runs
+    vm_ksm_sleep_millisecs: int = 20  # KSM scanner sleep between wake-ups
 
     # Overlay networking
     enable_vxlan: bool = True  # Enable VXLAN overlay for multi-host
@@ -44,11 +59,40 @@ class Settings(BaseSettings):
 
     # Console I/O timeouts (seconds)
     # Note: With event-driven I/O, these are fallback timeouts only
-    console_read_timeout: float = 0.005  # 5ms fallback (primary is event-driven)
-    console_input_timeout: float = 0.01  # 10ms input check interval
+    console_read_timeout: float = 0.005  # Poll interval of console_session() (WebSocket consoles are event-driven)
+    console_read_size: int = 65536  # Max bytes per console socket read
+    console_coalesce_window: float = 0.002  # Max seconds output waits to share a WebSocket frame (0 disables)
+    console_coalesce_max_bytes: int = 32768  # Send a frame once this much output is pending
+    ssh_connect_timeout: float = 10.0  # Seconds to connect and authenticate to a device
+    ssh_keepalive_interval: float = 15.0  # Seconds between keepalives on pooled SSH connections
+    ssh_keepalive_count_max: int = 3  # Unanswered keepalives before a connection is dropped
+    ssh_pool_idle_timeout: float = 300.0  # Close pooled connections unused this long
+    boot_log_buffer_lines: int = 500  # Log lines kept per followed container
+    boot_log_console_lines: int = 50  # Boot log lines shown when a console connects
+    boot_log_max_containers: int = 256  # Containers with a boot log follower
+    console_recording_enabled: bool = False  # Record consoles unless the client passes ?record=0
+    console_recording_queue: int = 1024  # Output frames buffered for the recorder before dropping
+    console_recording_keyframe_interval: float = 5.0  # Seconds between playback seek points
+
+    # Image transfer
+    image_load_timeout: float = 600.0  # Max time for docker load after the stream ends
+    image_resume_attempts: int = 5  # Resume attempts without progress before failing
+    image_resume_retry_delay: float = 2.0  # Base backoff between resume attempts
+    image_receive_session_timeout: float = 900.0  # Drop idle resumable receives after this
+    image_export_chunk_size: int = 8 * 1024 * 1024  # Chunk size of peer export manifests
+    image_export_cache_ttl: float = 3600.0  # Delete spooled peer exports unused this long
 
     # Container operations
     container_stop_timeout: int = 10
+    destroy_concurrency: int = 16  # Containers removed in parallel on lab destroy
+
+    # Lab checkpoints (POST /labs/{lab_id}/checkpoints)
+    checkpoint_concurrency: int = 4  # Nodes committed/snapshotted in parallel
+    checkpoint_criu: bool = True  # Dump container memory with CRIU if dockerd supports it
+
+    # Bulk node actions (/jobs/node-actions)
+    node_action_concurrency: int = 8  # Node starts/stops in flight per request
+    node_start_stagger: dict[str, float] = {"ceos": 5.0, "eos": 5.0}  # Seconds between starts, by kind
 
     # Docker client timeout (seconds) - covers container create, network ops, etc.
     # This needs to be long enough for slow operations like image layer extraction
@@ -71,6 +115,11 @@ class Settings(BaseSettings):
     # Should be less than lock_ttl to ensure lock doesn't expire mid-deploy
     lock_extend_interval: float = 30.0  # Extend every 30 seconds
 
+    # Waiters for a held lock sleep until the holder publishes a release.
+    # This is only the fallback re-check for holders that crash and let
+    # the TTL expire (when Redis keyspace notifications are disabled).
+    lock_wait_recheck_interval: float = 5.0
+
     # VXLAN networking
     vxlan_vni_base: int = 100000
     vxlan_vni_max: int = 199999
@@ -104,6 +153,9 @@ class Settings(BaseSettings):
     log_format: str = "json"  # "json" or "text"
     log_level: str = "INFO"
 
+    # Prometheus metrics (GET /metrics); when disabled, instrumentation is a no-op
+    metrics_enabled: bool = True
+
     # === Docker OVS Plugin Settings ===
 
     # Management network settings (eth0 for containers)
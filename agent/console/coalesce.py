@@ -0,0 +1,100 @@
+"""Console output coalescing.
+
+Devices write console output in small pieces (often one line, or one
+character of echo, per read). Sending each read as its own WebSocket
+frame costs a syscall and a frame per piece on the agent, the controller
+proxy and the browser. OutputCoalescer collects bytes that arrive within
+console_coalesce_window seconds of the first unsent byte and sends them
+as one frame; a frame is sent sooner once console_coalesce_max_bytes are
+pending. Idle consoles schedule nothing: the flush timer only exists
+while there is unsent output.
+
+Backpressure: while more than 4 x max_bytes are waiting on a slow
+WebSocket, the producer is paused (on_pause / writable()) and resumed
+once the backlog is sent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+
+from agent.config import settings
+
+
+class OutputCoalescer:
+    """Batches console output into WebSocket frames with bounded latency."""
+
+    def __init__(
+        self,
+        send: Callable[[bytes], Awaitable[None]],
+        window: float | None = None,
+        max_bytes: int | None = None,
+        on_pause: Callable[[], None] | None = None,
+        on_resume: Callable[[], None] | None = None,
+    ):
+        self._send = send
+        self._window = settings.console_coalesce_window if window is None else window
+        self._max_bytes = max_bytes or settings.console_coalesce_max_bytes
+        self._high_water = self._max_bytes * 4
+        self._on_pause = on_pause
+        self._on_resume = on_resume
+        self._buffer = bytearray()
+        self._ready = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._timer: asyncio.TimerHandle | None = None
+        self._closed = False
+        self.frames = 0
+        self.bytes = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> None:
+        """Queue output; safe to call from event loop reader callbacks."""
+        if self._closed or not data:
+            return
+        self._buffer += data
+        if len(self._buffer) >= self._max_bytes or self._window <= 0:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._window, self._flush_now)
+        if len(self._buffer) >= self._high_water and self._writable.is_set():
+            self._writable.clear()
+            if self._on_pause:
+                self._on_pause()
+
+    async def writable(self) -> None:
+        """Wait until the backlog is below the high-water mark."""
+        await self._writable.wait()
+
+    def close(self) -> None:
+        """Stop accepting output; run() returns after sending what is left."""
+        self._closed = True
+        self._flush_now()
+
+    async def run(self) -> None:
+        """Send coalesced frames until closed and drained."""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._buffer:
+                frame = bytes(self._buffer)
+                self._buffer.clear()
+                await self._send(frame)
+                self.frames += 1
+                self.bytes += len(frame)
+            if not self._writable.is_set() and len(self._buffer) < self._high_water:
+                self._writable.set()
+                if self._on_resume and not self._closed:
+                    self._on_resume()
+            if self._closed and not self._buffer:
+                return
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._ready.set()
@@ -0,0 +1,317 @@
+"""Console session recording.
+
+Recording must not slow the console: the WebSocket handlers only hand each
+output frame to ConsoleRecorder.output(), which puts it on a bounded queue
+(console_recording_queue frames) and returns. A writer task drains the
+queue in batches and writes them from a worker thread. If the disk falls
+behind and the queue fills, frames are dropped and counted rather than
+stalling the console.
+
+Recordings live in <workspace>/recordings/<lab_id>/ as three files:
+
+- <id>.rec: "ARCREC1\\n", a JSON header line, then one record per frame:
+  a little-endian (milliseconds since start, kind, length) header followed
+  by the payload. Kind "o" is output, "r" a resize ("COLSxROWS").
+- <id>.idx: keyframes written at most every console_recording_keyframe_interval
+  seconds: (milliseconds, .rec offset, cols, rows). Playback bisects these
+  to start at any time without scanning the recording.
+- <id>.json: metadata for listing, rewritten when the recording ends.
+
+Keyframes record where to resume reading and the terminal size there, not
+the screen contents; playback from a keyframe replays output from that
+point on. iter_asciicast() converts a recording to asciicast v2 lines.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import codecs
+import json
+import logging
+import re
+import struct
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from agent.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ARCREC1\n"
+RECORD = struct.Struct("<IcI")  # ms since start, kind, payload length
+KEYFRAME = struct.Struct("<IQHH")  # ms since start, .rec offset, cols, rows
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _is_safe_name(name: str) -> bool:
+    """True if name is a single path component (no separators, not . or ..)."""
+    return bool(_SAFE_NAME.match(name)) and not name.startswith(".")
+
+
+def recordings_dir(lab_id: str) -> Path:
+    """Directory of a lab's recordings.
+
+    Raises:
+        ValueError: If lab_id is not a single path component
+    """
+    if not _is_safe_name(lab_id):
+        raise ValueError(f"Invalid lab id for console recordings: {lab_id!r}")
+    return Path(settings.workspace_path) / "recordings" / lab_id
+
+
+def recording_path(lab_id: str, recording_id: str) -> Path | None:
+    """The recording's .rec file, or None if an id is invalid or unknown."""
+    if not _is_safe_name(lab_id) or not _is_safe_name(recording_id):
+        return None
+    path = recordings_dir(lab_id) / f"{recording_id}.rec"
+    return path if path.exists() else None
+
+
+def list_recordings(lab_id: str) -> list[dict]:
+    """Metadata of the lab's recordings, newest first."""
+    if not _is_safe_name(lab_id):
+        return []
+    directory = recordings_dir(lab_id)
+    if not directory.is_dir():
+        return []
+    recordings = []
+    for meta_path in directory.glob("*.json"):
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            continue
+        rec = meta_path.with_suffix(".rec")
+        meta["size_bytes"] = rec.stat().st_size if rec.exists() else 0
+        recordings.append(meta)
+    recordings.sort(key=lambda m: m.get("started_at", ""), reverse=True)
+    return recordings
+
+
+class ConsoleRecorder:
+    """Tees one console session's output into a recording, off the hot path."""
+
+    def __init__(self, lab_id: str, node_name: str, cols: int = 80, rows: int = 24):
+        started = datetime.now(timezone.utc)
+        self.lab_id = lab_id
+        self.node_name = node_name
+        safe_node = re.sub(r"[^A-Za-z0-9_.-]", "_", node_name).lstrip(".") or "node"
+        self.recording_id = f"{safe_node}-{started:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.started_at = started
+        self.cols = cols
+        self.rows = rows
+        self.frames = 0
+        self.bytes = 0
+        self.dropped = 0
+        self._start = time.monotonic()
+        self._queue: asyncio.Queue[tuple[int, bytes, bytes] | None] = asyncio.Queue(
+            settings.console_recording_queue
+        )
+        self._writer: asyncio.Task | None = None
+        self._rec = None
+        self._idx = None
+        self._offset = 0
+        self._last_keyframe: int | None = None
+        self._last_ms = 0
+        self.path = recordings_dir(lab_id) / f"{self.recording_id}.rec"
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def output(self, data: bytes) -> None:
+        """Record an output frame; never blocks."""
+        self._put(b"o", data)
+
+    def resize(self, cols: int, rows: int) -> None:
+        self._put(b"r", f"{cols}x{rows}".encode())
+
+    async def close(self) -> None:
+        """Write what is queued and finish the recording."""
+        if self._writer is None:
+            return
+        while not self._writer.done():
+            try:
+                self._queue.put_nowait(None)
+                break
+            except asyncio.QueueFull:
+                await asyncio.sleep(0.01)
+        await self._writer
+        self._writer = None
+
+    def _put(self, kind: bytes, data: bytes) -> None:
+        if not data or self._writer is None or self._writer.done():
+            return
+        ms = int((time.monotonic() - self._start) * 1000)
+        try:
+            self._queue.put_nowait((ms, kind, data))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _write_loop(self) -> None:
+        try:
+            await asyncio.to_thread(self._open)
+            done = False
+            while not done:
+                batch = [await self._queue.get()]
+                while not self._queue.empty() and len(batch) < 256:
+                    batch.append(self._queue.get_nowait())
+                if batch[-1] is None:
+                    done = True
+                    batch.pop()
+                await asyncio.to_thread(self._write_batch, batch)
+        except Exception as e:
+            logger.warning(f"Console recording {self.recording_id} stopped: {e}")
+        finally:
+            await asyncio.to_thread(self._finish)
+
+    def _metadata(self, active: bool) -> dict:
+        return {
+            "recording_id": self.recording_id,
+            "lab_id": self.lab_id,
+            "node_name": self.node_name,
+            "started_at": self.started_at.isoformat(),
+            "duration": self._last_ms / 1000,
+            "cols": self.cols,
+            "rows": self.rows,
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "dropped_frames": self.dropped,
+            "active": active,
+        }
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "node_name": self.node_name,
+            "started_at": self.started_at.isoformat(),
+            "cols": self.cols,
+            "rows": self.rows,
+        }
+        self._rec = open(self.path, "wb")
+        self._idx = open(self.path.with_suffix(".idx"), "wb")
+        self._rec.write(MAGIC + json.dumps(header).encode() + b"\n")
+        self._offset = self._rec.tell()
+        self._write_metadata(active=True)
+
+    def _write_batch(self, batch: list[tuple[int, bytes, bytes]]) -> None:
+        chunks = []
+        for ms, kind, data in batch:
+            if kind == b"r":
+                cols, _, rows = data.decode().partition("x")
+                self.cols, self.rows = int(cols), int(rows)
+            if (
+                self._last_keyframe is None
+                or ms - self._last_keyframe >= settings.console_recording_keyframe_interval * 1000
+            ):
+                self._idx.write(KEYFRAME.pack(ms, self._offset, self.cols, self.rows))
+                self._last_keyframe = ms
+            record = RECORD.pack(ms, kind, len(data)) + data
+            chunks.append(record)
+            self._offset += len(record)
+            self._last_ms = ms
+            if kind == b"o":
+                self.frames += 1
+                self.bytes += len(data)
+        self._rec.write(b"".join(chunks))
+        self._rec.flush()
+        self._idx.flush()
+
+    def _write_metadata(self, active: bool) -> None:
+        meta_path = self.path.with_suffix(".json")
+        tmp = meta_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self._metadata(active)))
+        tmp.replace(meta_path)
+
+    def _finish(self) -> None:
+        for f in (self._rec, self._idx):
+            if f is not None:
+                f.close()
+        if self._rec is not None:
+            self._write_metadata(active=False)
+        if self.dropped:
+            logger.warning(
+                f"Console recording {self.recording_id} dropped {self.dropped} frames"
+            )
+
+
+class RecordingReader:
+    """Seekable reader of a .rec recording."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path.name} is not a console recording")
+            self.header = json.loads(f.readline())
+            self.data_offset = f.tell()
+        self._times: list[int] = []
+        self._keyframes: list[tuple[int, int, int, int]] = []
+        idx = path.with_suffix(".idx")
+        if idx.exists():
+            raw = idx.read_bytes()
+            raw = raw[: len(raw) - len(raw) % KEYFRAME.size]  # Ignore a partial write
+            self._keyframes = list(KEYFRAME.iter_unpack(raw))
+            self._times = [k[0] for k in self._keyframes]
+
+    def seek(self, seconds: float) -> tuple[int, int, int]:
+        """(offset, cols, rows) of the last keyframe at or before seconds."""
+        i = bisect.bisect_right(self._times, int(seconds * 1000)) - 1
+        if i < 0:
+            return self.data_offset, self.header["cols"], self.header["rows"]
+        _, offset, cols, rows = self._keyframes[i]
+        return offset, cols, rows
+
+    def records(self, start: float = 0.0) -> Iterator[tuple[int, bytes, bytes]]:
+        """(ms, kind, payload) from the keyframe covering start onwards."""
+        offset, _, _ = self.seek(start)
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while True:
+                head = f.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return
+                ms, kind, length = RECORD.unpack(head)
+                data = f.read(length)
+                if len(data) < length:
+                    return  # Record still being written
+                yield ms, kind, data
+
+    def iter_raw(self, start: float = 0.0, chunk_size: int = 65536) -> Iterator[bytes]:
+        """The recording file, skipping to the keyframe covering start."""
+        offset, _, _ = self.seek(start)
+        with open(self.path, "rb") as f:
+            yield f.read(self.data_offset)
+            f.seek(offset)
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def iter_asciicast(self, start: float = 0.0) -> Iterator[str]:
+        """asciicast v2 lines, with times relative to start.
+
+        Output between the keyframe and start is emitted at time 0 so the
+        player has the context leading up to start.
+        """
+        _, cols, rows = self.seek(start)
+        started = datetime.fromisoformat(self.header["started_at"])
+        header = {
+            "version": 2,
+            "width": cols,
+            "height": rows,
+            "timestamp": int(started.timestamp()) + int(start),
+            "title": self.header["node_name"],
+        }
+        yield json.dumps(header) + "\n"
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        start_ms = int(start * 1000)
+        for ms, kind, data in self.records(start):
+            t = max(0, ms - start_ms) / 1000
+            if kind == b"o":
+                text = decoder.decode(data)
+                if text:
+                    yield json.dumps([t, "o", text]) + "\n"
+            elif kind == b"r":
+                yield json.dumps([t, "r", data.decode()]) + "\n"
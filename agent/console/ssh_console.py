@@ -8,6 +8,8 @@ from typing import Callable
 
 import asyncssh
 
+from agent.console.ssh_pool import ssh_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,6 +18,8 @@ class SSHConsole:
 
     Used for vrnetlab-based containers where the router/device console
     is accessed via SSH to the container's management IP, not docker exec.
+    The session is a channel on the device's pooled connection, so only
+    the first console (or probe) to a device pays the SSH handshake.
     """
 
     def __init__(self, host: str, username: str, password: str, port: int = 22):
@@ -33,21 +37,26 @@ class SSHConsole:
         Returns True if session started successfully.
         """
         try:
-            # Connect with password auth, no host key checking
-            self._conn = await asyncssh.connect(
-                self.host,
-                port=self.port,
-                username=self.username,
-                password=self.password,
-                known_hosts=None,  # Disable host key checking
-                connect_timeout=10,
-            )
-
-            # Start interactive shell with PTY
-            self._process = await self._conn.create_process(
-                term_type="xterm-256color",
-                term_size=(80, 24),
-            )
+            for attempt in range(2):
+                self._conn = await ssh_pool.acquire(
+                    self.host, self.username, self.password, self.port
+                )
+                try:
+                    # Start interactive shell with PTY
+                    self._process = await self._conn.create_process(
+                        term_type="xterm-256color",
+                        term_size=(80, 24),
+                        encoding=None,  # Raw bytes both ways, as the WebSocket carries
+                    )
+                    break
+                except (asyncssh.ChannelOpenError, asyncssh.ConnectionLost):
+                    # Pooled connection died since its last keepalive, or
+                    # the device won't open more channels on it
+                    ssh_pool.discard(self._conn)
+                    ssh_pool.release(self._conn)
+                    self._conn = None
+                    if attempt:
+                        raise
 
             self._running = True
             logger.info(f"SSH console connected to {self.host}")
@@ -86,9 +95,10 @@ class SSHConsole:
             self._running = False
             return False
 
-    async def read(self, size: int = 4096) -> bytes | None:
+    async def read(self, size: int = 4096, timeout: float | None = 0.1) -> bytes | None:
         """Read data from the SSH session's stdout.
 
+        Waits at most timeout seconds (None waits until data arrives).
         Returns None if connection is closed or error occurs.
         """
         if not self._process or not self._running:
@@ -96,7 +106,7 @@ class SSHConsole:
         try:
             data = await asyncio.wait_for(
                 self._process.stdout.read(size),
-                timeout=0.1,
+                timeout=timeout,
             )
             if not data:
                 self._running = False
@@ -124,11 +134,8 @@ class SSHConsole:
                 pass
             self._process = None
         if self._conn:
-            try:
-                self._conn.close()
-                await self._conn.wait_closed()
-            except Exception:
-                pass
+            # The connection stays pooled for other sessions to this device
+            ssh_pool.release(self._conn)
             self._conn = None
 
 
@@ -0,0 +1,198 @@
+"""Pooled SSH connections to lab devices.
+
+vrnetlab devices have slow SSH handshakes, and every console open,
+readiness probe and config extraction used to pay one. The pool keeps one
+authenticated connection per (host, port, user, password) and opens a new
+channel on it for each console or command:
+
+- Concurrent openers of the same device share a single handshake.
+- Liveness is tracked with SSH keepalives (ssh_keepalive_interval /
+  ssh_keepalive_count_max); a connection that drops is evicted, and the
+  next user reconnects.
+- A connection with no open channels is closed after ssh_pool_idle_timeout.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+import asyncssh
+
+from agent.config import settings
+
+logger = logging.getLogger(__name__)
+
+PoolKey = tuple[str, int, str, str]
+
+
+@dataclass
+class _PooledConnection:
+    conn: asyncssh.SSHClientConnection
+    users: int = 0
+    idle_timer: asyncio.TimerHandle | None = field(default=None, repr=False)
+
+
+class _PoolClient(asyncssh.SSHClient):
+    """Evicts the pool entry when its connection is lost."""
+
+    def __init__(self, pool: "SSHConnectionPool", key: PoolKey):
+        self._pool = pool
+        self._key = key
+        self._conn: asyncssh.SSHClientConnection | None = None
+
+    def connection_made(self, conn: asyncssh.SSHClientConnection) -> None:
+        self._conn = conn
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._pool._evict(self._key, self._conn, exc)
+
+
+class SSHConnectionPool:
+    """Shares authenticated SSH connections between device sessions."""
+
+    def __init__(self):
+        self._connections: dict[PoolKey, _PooledConnection] = {}
+        # Discarded connections still carrying sessions, closed after the last
+        self._retired: list[_PooledConnection] = []
+        self._locks: dict[PoolKey, asyncio.Lock] = {}
+
+    async def acquire(
+        self, host: str, username: str, password: str, port: int = 22
+    ) -> asyncssh.SSHClientConnection:
+        """Get a live connection to a device, connecting if needed.
+
+        Every acquire() must be paired with release().
+        """
+        key = (host, port, username, password)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            entry = self._connections.get(key)
+            if entry is None:
+                conn = await asyncssh.connect(
+                    host,
+                    port=port,
+                    username=username,
+                    password=password,
+                    known_hosts=None,  # Lab devices regenerate host keys on redeploy
+                    connect_timeout=settings.ssh_connect_timeout,
+                    keepalive_interval=settings.ssh_keepalive_interval,
+                    keepalive_count_max=settings.ssh_keepalive_count_max,
+                    client_factory=lambda: _PoolClient(self, key),
+                )
+                entry = self._connections[key] = _PooledConnection(conn)
+                logger.debug(f"SSH pool: connected to {username}@{host}:{port}")
+            if entry.idle_timer:
+                entry.idle_timer.cancel()
+                entry.idle_timer = None
+            entry.users += 1
+            return entry.conn
+
+    def release(self, conn: asyncssh.SSHClientConnection) -> None:
+        """Return a connection; it closes once idle for ssh_pool_idle_timeout."""
+        for key, entry in self._connections.items():
+            if entry.conn is conn:
+                entry.users = max(0, entry.users - 1)
+                if entry.users == 0 and entry.idle_timer is None:
+                    entry.idle_timer = asyncio.get_running_loop().call_later(
+                        settings.ssh_pool_idle_timeout, self._close_idle, key
+                    )
+                return
+        for entry in self._retired:
+            if entry.conn is conn:
+                entry.users -= 1
+                if entry.users <= 0:
+                    self._retired.remove(entry)
+                    conn.close()
+                return
+
+    def discard(self, conn: asyncssh.SSHClientConnection) -> None:
+        """Stop handing out a connection that failed to open a channel.
+
+        The device may just be refusing more channels on it, so sessions
+        already using it are left alone; it closes when the last releases.
+        """
+        for key, entry in list(self._connections.items()):
+            if entry.conn is conn:
+                del self._connections[key]
+                if entry.idle_timer:
+                    entry.idle_timer.cancel()
+                self._retired.append(entry)
+                return
+
+    @asynccontextmanager
+    async def connection(
+        self, host: str, username: str, password: str, port: int = 22
+    ) -> AsyncIterator[asyncssh.SSHClientConnection]:
+        conn = await self.acquire(host, username, password, port)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    async def run(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        command: str,
+        port: int = 22,
+        timeout: float | None = 30.0,
+    ) -> asyncssh.SSHCompletedProcess:
+        """Run a command on its own channel of the device's pooled connection.
+
+        Retries once on a fresh connection if the pooled one turns out to
+        be dead (e.g. the device rebooted between keepalives) or refuses
+        another channel.
+        """
+        async with self.connection(host, username, password, port) as conn:
+            try:
+                return await conn.run(command, check=False, timeout=timeout)
+            except (asyncssh.ChannelOpenError, asyncssh.ConnectionLost, ConnectionError) as e:
+                logger.debug(f"SSH pool: reconnecting to {host}:{port} after {e}")
+                self.discard(conn)
+        async with self.connection(host, username, password, port) as conn:
+            return await conn.run(command, check=False, timeout=timeout)
+
+    def stats(self) -> list[dict]:
+        """Pooled connections and their open channel counts."""
+        return [
+            {"host": host, "port": port, "username": username, "users": entry.users}
+            for (host, port, username, _), entry in self._connections.items()
+        ]
+
+    async def close_all(self) -> None:
+        entries = [*self._connections.values(), *self._retired]
+        self._connections.clear()
+        self._retired.clear()
+        for entry in entries:
+            entry.conn.close()
+        for entry in entries:
+            try:
+                await entry.conn.wait_closed()
+            except Exception:
+                pass
+
+    def _close_idle(self, key: PoolKey) -> None:
+        entry = self._connections.get(key)
+        if entry and entry.users == 0:
+            del self._connections[key]
+            entry.conn.close()
+            logger.debug(f"SSH pool: closed idle connection to {key[2]}@{key[0]}:{key[1]}")
+
+    def _evict(
+        self, key: PoolKey, conn: asyncssh.SSHClientConnection | None, exc: Exception | None
+    ) -> None:
+        entry = self._connections.get(key)
+        if entry is None or entry.conn is not conn:
+            return  # Already replaced by a newer connection
+        del self._connections[key]
+        if entry.idle_timer:
+            entry.idle_timer.cancel()
+        if exc:
+            logger.info(f"SSH pool: connection to {key[0]}:{key[1]} lost: {exc}")
+
+
+ssh_pool = SSHConnectionPool()
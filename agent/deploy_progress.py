@@ -0,0 +1,117 @@
+"""Per-lab deploy progress events.
+
+Providers that deploy nodes concurrently publish one event per node phase
+change (queued, preparing, booting, running, failed) and a final "done"
+event. Subscribers get every event of the lab's current deploy from the
+beginning, then follow live events until it finishes, so a client that
+connects halfway through still sees the whole picture.
+
+Events are kept for a lab's most recent deploy only; starting a new deploy
+replaces them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+
+@dataclass
+class _LabProgress:
+    total: int
+    events: list[dict[str, Any]] = field(default_factory=list)
+    finished: bool = False
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class DeployProgress:
+    """Fan-out of per-lab deploy progress events to any number of readers."""
+
+    def __init__(self):
+        self._labs: dict[str, _LabProgress] = {}
+
+    def start(self, lab_id: str, node_names: list[str]) -> None:
+        """Begin tracking a deploy; every node starts out queued."""
+        previous = self._labs.get(lab_id)
+        self._labs[lab_id] = _LabProgress(total=len(node_names))
+        if previous:
+            # Readers of the replaced deploy stop instead of hanging
+            previous.finished = True
+            previous.changed.set()
+        for name in node_names:
+            self.publish(lab_id, name, "queued")
+
+    def publish(
+        self,
+        lab_id: str,
+        node_name: str,
+        phase: str,
+        error: str | None = None,
+        seconds: float | None = None,
+    ) -> None:
+        """Record a node's phase change (seconds: how long the phase took)."""
+        progress = self._labs.get(lab_id)
+        if progress is None or progress.finished:
+            return
+        event: dict[str, Any] = {
+            "lab_id": lab_id,
+            "node": node_name,
+            "phase": phase,
+            "total": progress.total,
+            "timestamp": time.time(),
+        }
+        if error:
+            event["error"] = error
+        if seconds is not None:
+            event["seconds"] = round(seconds, 3)
+        self._append(progress, event)
+
+    def finish(self, lab_id: str, deployed: int, failed: int) -> None:
+        """Publish the final "done" event and release waiting readers."""
+        progress = self._labs.get(lab_id)
+        if progress is None or progress.finished:
+            return
+        self._append(progress, {
+            "lab_id": lab_id,
+            "phase": "done",
+            "total": progress.total,
+            "deployed": deployed,
+            "failed": failed,
+            "timestamp": time.time(),
+        })
+        progress.finished = True
+
+    def clear(self, lab_id: str) -> None:
+        """Forget a lab's events (e.g. once the lab is destroyed)."""
+        progress = self._labs.pop(lab_id, None)
+        if progress:
+            progress.finished = True
+            progress.changed.set()
+
+    def has_lab(self, lab_id: str) -> bool:
+        return lab_id in self._labs
+
+    async def subscribe(self, lab_id: str) -> AsyncIterator[dict[str, Any]]:
+        """Yield all events of the lab's deploy, then live ones until done."""
+        progress = self._labs.get(lab_id)
+        if progress is None:
+            return
+        index = 0
+        while True:
+            while index < len(progress.events):
+                yield progress.events[index]
+                index += 1
+            if progress.finished:
+                return
+            progress.changed.clear()
+            await progress.changed.wait()
+
+    @staticmethod
+    def _append(progress: _LabProgress, event: dict[str, Any]) -> None:
+        progress.events.append(event)
+        progress.changed.set()
+
+
+deploy_progress = DeployProgress()
@@ -0,0 +1,377 @@
+"""Host CPU/NUMA/hugepage placement for libvirt VMs.
+
+Dense VM labs on multi-socket hosts run far slower when a guest's vCPUs
+float across sockets and its memory lands on a remote NUMA node. The
+HostResourceManager discovers the host's NUMA topology from sysfs, places
+each VM on a single node, pins its vCPUs to dedicated cores there, backs
+its memory with that node's hugepages when enough are configured, and
+releases the allocation when the domain is destroyed.
+
+Allocations are kept in memory. After an agent restart they are rebuilt
+from the <cputune>/<numatune> of the domains that still exist (adopt()).
+
+KsmTuner turns on kernel samepage merging while any lab that opted in is
+deployed, so identical VMs share the memory pages they have in common.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from agent.config import settings
+
+logger = logging.getLogger(__name__)
+
+HUGEPAGE_KB = 2048
+
+
+def parse_cpulist(text: str) -> list[int]:
+    """Parse a kernel cpulist ("0-3,8,10-11") into sorted CPU numbers."""
+    cpus: set[int] = set()
+    for part in text.strip().split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def format_cpulist(cpus: list[int]) -> str:
+    """Format CPU numbers as a compact cpulist ("0-3,8")."""
+    ranges: list[str] = []
+    cpus = sorted(set(cpus))
+    i = 0
+    while i < len(cpus):
+        j = i
+        while j + 1 < len(cpus) and cpus[j + 1] == cpus[j] + 1:
+            j += 1
+        ranges.append(str(cpus[i]) if i == j else f"{cpus[i]}-{cpus[j]}")
+        i = j + 1
+    return ",".join(ranges)
+
+
+@dataclass
+class NumaNode:
+    """One host NUMA node and what this agent has allocated on it."""
+    id: int
+    cpus: list[int]
+    memory_mb: int
+    hugepages_mb: int = 0  # Memory in configured 2 MiB hugepages
+    pinned: dict[str, list[int]] = field(default_factory=dict)  # domain -> cores
+    memory: dict[str, int] = field(default_factory=dict)  # domain -> MiB placed here
+    hugepage_memory: dict[str, int] = field(default_factory=dict)  # domain -> MiB in hugepages
+
+    def free_cpus(self, reserved: set[int]) -> list[int]:
+        used = {cpu for cores in self.pinned.values() for cpu in cores}
+        return [cpu for cpu in self.cpus if cpu not in used and cpu not in reserved]
+
+    @property
+    def free_memory_mb(self) -> int:
+        return self.memory_mb - sum(self.memory.values())
+
+    @property
+    def free_hugepages_mb(self) -> int:
+        return self.hugepages_mb - sum(self.hugepage_memory.values())
+
+
+@dataclass
+class Allocation:
+    """Where a VM was placed."""
+    domain: str
+    numa_node: int
+    cpus: list[int]  # Empty if vCPUs could not be pinned
+    memory_mb: int
+    hugepages: bool
+
+
+def _node_memory_mb(meminfo: Path) -> int:
+    # "Node 0 MemTotal:       65799628 kB"
+    match = re.search(r"MemTotal:\s+(\d+)\s+kB", meminfo.read_text())
+    return int(match.group(1)) // 1024 if match else 0
+
+
+def discover_topology(sys_root: Path = Path("/sys")) -> list[NumaNode]:
+    """Read NUMA nodes, their CPUs, memory and 2 MiB hugepages from sysfs.
+
+    Falls back to a single node holding every CPU when the host exposes
+    no NUMA information (e.g. inside some containers).
+    """
+    nodes = []
+    node_root = sys_root / "devices" / "system" / "node"
+    for path in sorted(node_root.glob("node[0-9]*"), key=lambda p: int(p.name[4:])):
+        try:
+            cpus = parse_cpulist((path / "cpulist").read_text())
+            memory_mb = _node_memory_mb(path / "meminfo")
+            hugepages_file = path / "hugepages" / f"hugepages-{HUGEPAGE_KB}kB" / "nr_hugepages"
+            hugepages = int(hugepages_file.read_text()) if hugepages_file.exists() else 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable NUMA node {path.name}: {e}")
+            continue
+        if cpus:
+            nodes.append(NumaNode(
+                id=int(path.name[4:]),
+                cpus=cpus,
+                memory_mb=memory_mb,
+                hugepages_mb=hugepages * HUGEPAGE_KB // 1024,
+            ))
+    if nodes:
+        return nodes
+
+    memory_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    return [NumaNode(id=0, cpus=list(range(os.cpu_count() or 1)), memory_mb=memory_mb)]
+
+
+class HostResourceManager:
+    """Tracks per-domain NUMA placement and pinned cores on this host."""
+
+    def __init__(self, sys_root: Path = Path("/sys")):
+        self._sys_root = sys_root
+        self._nodes: list[NumaNode] | None = None
+        self._allocations: dict[str, Allocation] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nodes(self) -> list[NumaNode]:
+        if self._nodes is None:
+            self._nodes = discover_topology(self._sys_root)
+            logger.info(
+                "Host NUMA topology: "
+                + ", ".join(
+                    f"node{n.id}: cpus {format_cpulist(n.cpus)}, {n.memory_mb} MiB, "
+                    f"{n.hugepages_mb} MiB hugepages"
+                    for n in self._nodes
+                )
+            )
+        return self._nodes
+
+    @property
+    def reserved_cpus(self) -> set[int]:
+        return set(parse_cpulist(settings.vm_reserved_cpus))
+
+    def get(self, domain: str) -> Allocation | None:
+        return self._allocations.get(domain)
+
+    def allocate(
+        self, domain: str, vcpus: int, memory_mb: int, hugepages: bool = True
+    ) -> Allocation | None:
+        """Place a VM on one NUMA node.
+
+        Prefers the node with the most free cores that can hold all of the
+        VM's vCPUs and memory. If no node has enough free cores, the VM is
+        still kept on one node's memory but its vCPUs float. Returns None
+        if no node has room for its memory either. hugepages=False keeps
+        the VM on regular pages (KSM cannot merge hugepages).
+        """
+        with self._lock:
+            if domain in self._allocations:
+                return self._allocations[domain]
+            reserved = self.reserved_cpus
+            fits_memory = [n for n in self.nodes if n.free_memory_mb >= memory_mb]
+            if not fits_memory:
+                logger.info(f"No NUMA node has {memory_mb} MiB free for {domain}, not placing it")
+                return None
+
+            pinnable = [n for n in fits_memory if len(n.free_cpus(reserved)) >= vcpus]
+            if settings.vm_cpu_pinning and pinnable:
+                node = max(pinnable, key=lambda n: (len(n.free_cpus(reserved)), n.free_memory_mb))
+                cpus = node.free_cpus(reserved)[:vcpus]
+            else:
+                node = max(fits_memory, key=lambda n: n.free_memory_mb)
+                cpus = []
+                if settings.vm_cpu_pinning:
+                    logger.info(f"No NUMA node has {vcpus} free cores for {domain}; vCPUs will float")
+
+            use_hugepages = (
+                hugepages and settings.vm_hugepages and node.free_hugepages_mb >= memory_mb
+            )
+            allocation = Allocation(domain, node.id, cpus, memory_mb, use_hugepages)
+            self._record(node, allocation)
+            return allocation
+
+    def release(self, domain: str) -> None:
+        """Free a destroyed domain's cores and memory."""
+        with self._lock:
+            allocation = self._allocations.pop(domain, None)
+            if allocation is None:
+                return
+            for node in self.nodes:
+                node.pinned.pop(domain, None)
+                node.memory.pop(domain, None)
+                node.hugepage_memory.pop(domain, None)
+
+    def adopt(self, domain: str, domain_xml: str) -> None:
+        """Record the placement of an existing domain from its XML."""
+        root = ET.fromstring(domain_xml)
+        nodeset = root.find("./numatune/memory")
+        if nodeset is None or not nodeset.get("nodeset"):
+            return
+        node_ids = parse_cpulist(nodeset.get("nodeset"))
+        node = next((n for n in self.nodes if n.id in node_ids), None)
+        if node is None:
+            return
+        memory = root.find("./memory")
+        unit_to_mib = {"KiB": 1 / 1024, "MiB": 1, "GiB": 1024}
+        memory_mb = int(int(memory.text) * unit_to_mib.get(memory.get("unit", "KiB"), 1 / 1024)) if memory is not None else 0
+        cpus = sorted({
+            cpu
+            for pin in root.findall("./cputune/vcpupin")
+            for cpu in parse_cpulist(pin.get("cpuset", ""))
+        })
+        hugepages = root.find("./memoryBacking/hugepages") is not None
+        with self._lock:
+            if domain not in self._allocations:
+                self._record(node, Allocation(domain, node.id, cpus, memory_mb, hugepages))
+
+    def _record(self, node: NumaNode, allocation: Allocation) -> None:
+        self._allocations[allocation.domain] = allocation
+        if allocation.cpus:
+            node.pinned[allocation.domain] = allocation.cpus
+        node.memory[allocation.domain] = allocation.memory_mb
+        if allocation.hugepages:
+            node.hugepage_memory[allocation.domain] = allocation.memory_mb
+
+    def usage(self) -> list[dict]:
+        """Per-NUMA-node allocation, for agent resource usage reports."""
+        reserved = self.reserved_cpus
+        with self._lock:
+            return [
+                {
+                    "node": n.id,
+                    "cpus_total": len(n.cpus),
+                    "cpus_reserved": len([c for c in n.cpus if c in reserved]),
+                    "cpus_pinned": sum(len(c) for c in n.pinned.values()),
+                    "memory_total_mb": n.memory_mb,
+                    "memory_allocated_mb": sum(n.memory.values()),
+                    "hugepages_total_mb": n.hugepages_mb,
+                    "hugepages_allocated_mb": sum(n.hugepage_memory.values()),
+                    "domains": len(n.memory),
+                }
+                for n in self.nodes
+            ]
+
+
+class KsmTuner:
+    """Runs kernel samepage merging while labs that want it are deployed.
+
+    The first lab to acquire KSM saves the host's KSM settings and starts
+    the scanner with vm_ksm_pages_to_scan / vm_ksm_sleep_millisecs; the
+    settings are restored when the last such lab releases it. Domains of
+    labs that did not opt in carry <nosharepages/>, so the running scanner
+    leaves their memory alone.
+    """
+
+    TUNABLES = ("run", "pages_to_scan", "sleep_millisecs")
+
+    def __init__(self, sys_root: Path = Path("/sys")):
+        self._dir = sys_root / "kernel" / "mm" / "ksm"
+        self._labs: set[str] = set()
+        self._saved: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return (self._dir / "run").exists()
+
+    def acquire(self, lab_id: str) -> None:
+        """Start merging (if not already) on behalf of a lab."""
+        with self._lock:
+            if lab_id in self._labs or not self.available:
+                return
+            if not self._labs:
+                try:
+                    self._saved = {t: (self._dir / t).read_text().strip() for t in self.TUNABLES}
+                    self._write("pages_to_scan", settings.vm_ksm_pages_to_scan)
+                    self._write("sleep_millisecs", settings.vm_ksm_sleep_millisecs)
+                    self._write("run", 1)
+                except OSError as e:
+                    logger.warning(f"Could not enable KSM: {e}")
+                    return
+                logger.info(f"Enabled KSM for lab {lab_id}")
+            self._labs.add(lab_id)
+
+    def release(self, lab_id: str) -> None:
+        """Drop a lab's claim; restore the host settings after the last one."""
+        with self._lock:
+            if lab_id not in self._labs:
+                return
+            self._labs.discard(lab_id)
+            if self._labs:
+                return
+            try:
+                for tunable in reversed(self.TUNABLES):
+                    if tunable in self._saved:
+                        self._write(tunable, self._saved[tunable])
+            except OSError as e:
+                logger.warning(f"Could not restore KSM settings: {e}")
+            logger.info("Restored host KSM settings")
+
+    def usage(self) -> dict:
+        """KSM state and savings, for agent resource usage reports."""
+        if not self.available:
+            return {"available": False}
+        stats = {}
+        for name in ("run", "pages_shared", "pages_sharing"):
+            try:
+                stats[name] = int((self._dir / name).read_text())
+            except (OSError, ValueError):
+                stats[name] = 0
+        page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+        return {
+            "available": True,
+            "running": stats["run"] == 1,
+            "labs": sorted(self._labs),
+            "pages_shared": stats["pages_shared"],
+            "pages_sharing": stats["pages_sharing"],
+            # pages_sharing counts the mappings deduplicated onto shared pages
+            "saved_mb": stats["pages_sharing"] * page_kb // 1024,
+        }
+
+    def _write(self, tunable: str, value: object) -> None:
+        (self._dir / tunable).write_text(f"{value}\n")
+
+
+def tuning_xml(allocation: Allocation, vcpus: int, iothreads: int) -> str:
+    """Domain XML elements for an allocation (placed after <vcpu>)."""
+    node = str(allocation.numa_node)
+    parts = []
+    if iothreads > 0:
+        parts.append(f"<iothreads>{iothreads}</iothreads>")
+    if allocation.cpus:
+        cpuset = format_cpulist(allocation.cpus)
+        pins = "".join(
+            f"\n    <vcpupin vcpu='{i}' cpuset='{allocation.cpus[i]}'/>"
+            for i in range(min(vcpus, len(allocation.cpus)))
+        )
+        pins += f"\n    <emulatorpin cpuset='{cpuset}'/>"
+        pins += "".join(
+            f"\n    <iothreadpin iothread='{i}' cpuset='{cpuset}'/>"
+            for i in range(1, iothreads + 1)
+        )
+        parts.append(f"<cputune>{pins}\n  </cputune>")
+    # Hugepage-backed memory must come from the chosen node; otherwise let
+    # the kernel fall back to another node rather than OOM the guest
+    mode = "strict" if allocation.hugepages else "preferred"
+    parts.append(
+        f"<numatune>\n    <memory mode='{mode}' nodeset='{node}'/>\n  </numatune>"
+    )
+    if allocation.hugepages:
+        parts.append(
+            "<memoryBacking>\n    <hugepages>\n"
+            f"      <page size='{HUGEPAGE_KB}' unit='KiB'/>\n"
+            "    </hugepages>\n  </memoryBacking>"
+        )
+    return "\n  ".join(parts)
+
+
+host_resources = HostResourceManager()
+ksm = KsmTuner()
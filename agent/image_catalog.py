@@ -0,0 +1,382 @@
+"""In-memory index of the agent's qcow2 image store.
+
+Resolving a VM image used to stat candidate paths and then scan the whole
+store with substring matching on every node deploy, which is slow on NFS
+and ambiguous when several images match. The catalog scans the store once
+(name, version, size, backing chain), follows changes through inotify,
+and answers lookups from memory. SHA-256 checksums are computed in the
+background and cached across restarts keyed by size and mtime, so large
+images are hashed once.
+
+inotify does not report writes made by other NFS clients, so the store is
+also rescanned periodically (a stat per file; unchanged files are reused).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import subprocess
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from agent.config import settings
+
+logger = logging.getLogger(__name__)
+
+QCOW2_SUFFIXES = (".qcow2", ".qcow")
+CACHE_FILE = ".image_catalog.json"
+
+# Last dotted number in a filename: "csr1000v-universalk9.17.03.04a" -> "17.03.04a"
+_VERSION_RE = re.compile(r"(?<![A-Za-z0-9])\d+(?:\.\d+)+[A-Za-z0-9]*")
+
+
+@dataclass
+class Qcow2Image:
+    """One image in the qcow2 store."""
+    name: str
+    path: str
+    size_bytes: int
+    mtime: float
+    version: str | None = None
+    backing_chain: list[str] = field(default_factory=list)  # Backing files, nearest first
+    checksum: str | None = None  # sha256 hex, filled in by the background hasher
+
+
+def qcow2_store_path() -> Path:
+    """Directory holding qcow2 base images."""
+    if settings.qcow2_store_path:
+        return Path(settings.qcow2_store_path)
+    return Path(settings.workspace_path) / "images"
+
+
+def parse_version(filename: str) -> str | None:
+    """Best-effort version string from an image filename."""
+    stem = filename
+    for suffix in QCOW2_SUFFIXES:
+        if stem.lower().endswith(suffix):
+            stem = stem[: -len(suffix)]
+    matches = _VERSION_RE.findall(stem)
+    return matches[-1] if matches else None
+
+
+def _version_key(image: Qcow2Image) -> tuple:
+    parts = re.findall(r"\d+", image.version or "")
+    return tuple(int(p) for p in parts)
+
+
+def _backing_chain(path: Path) -> list[str]:
+    """Backing files of a qcow2 image via qemu-img (empty if none or unknown)."""
+    try:
+        result = subprocess.run(
+            ["qemu-img", "info", "--backing-chain", "--output=json", "-U", str(path)],
+            capture_output=True, text=True, timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    if result.returncode != 0:
+        return []
+    try:
+        chain = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return []
+    return [entry["filename"] for entry in chain[1:] if "filename" in entry]
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(4 * 1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _Inotify:
+    """Minimal inotify watch on one directory (via libc, no extra deps)."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+    def __init__(self, path: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(path)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def read_names(self) -> list[str]:
+        """Names of files with pending events."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset + self._HEADER.size <= len(data):
+            _, _, _, length = self._HEADER.unpack_from(data, offset)
+            offset += self._HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ImageCatalog:
+    """Index of qcow2 images, kept current by inotify and periodic rescans."""
+
+    def __init__(self, store: Path | None = None):
+        self._store = store
+        self._images: dict[str, Qcow2Image] = {}
+        self._scanned = False
+        self._lock = threading.Lock()
+        self._inotify: _Inotify | None = None
+        self._pending: set[str] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._hash_wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def store(self) -> Path:
+        return self._store or qcow2_store_path()
+
+    @property
+    def _cache_path(self) -> Path:
+        return Path(settings.workspace_path) / CACHE_FILE
+
+    # --- Indexing -----------------------------------------------------------
+
+    def _load_cache(self) -> dict[str, Qcow2Image]:
+        try:
+            raw = json.loads(self._cache_path.read_text())
+            return {entry["name"]: Qcow2Image(**entry) for entry in raw.get("images", [])}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable image catalog cache: {e}")
+            return {}
+
+    def _save_cache(self) -> None:
+        with self._lock:
+            images = [asdict(image) for image in self._images.values()]
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._cache_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"images": images}))
+            tmp.replace(self._cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save image catalog cache: {e}")
+
+    def _inspect(self, path: Path, previous: Qcow2Image | None) -> Qcow2Image | None:
+        """Catalog entry for a file, reusing previous if it hasn't changed."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if (
+            previous
+            and previous.path == str(path)
+            and previous.size_bytes == stat.st_size
+            and previous.mtime == stat.st_mtime
+        ):
+            return previous
+        return Qcow2Image(
+            name=path.name,
+            path=str(path),
+            size_bytes=stat.st_size,
+            mtime=stat.st_mtime,
+            version=parse_version(path.name),
+            backing_chain=_backing_chain(path),
+        )
+
+    def scan(self) -> None:
+        """(Re)index the whole store. Blocking; unchanged files are reused."""
+        known = dict(self._images) if self._scanned else self._load_cache()
+        images: dict[str, Qcow2Image] = {}
+        store = self.store
+        if store.is_dir():
+            for path in store.iterdir():
+                if path.suffix.lower() not in QCOW2_SUFFIXES or not path.is_file():
+                    continue
+                entry = self._inspect(path, known.get(path.name))
+                if entry:
+                    images[path.name] = entry
+        with self._lock:
+            changed = images != self._images
+            self._images = images
+            self._scanned = True
+        if changed:
+            logger.info(f"Image catalog: {len(images)} qcow2 images in {store}")
+            self._save_cache()
+            self._wake_hasher()
+
+    def refresh_file(self, name: str) -> None:
+        """Re-index a single file after a change event."""
+        if not name.lower().endswith(QCOW2_SUFFIXES):
+            return
+        entry = self._inspect(self.store / name, self._images.get(name))
+        with self._lock:
+            if entry:
+                self._images[name] = entry
+            else:
+                self._images.pop(name, None)
+        logger.info(f"Image catalog: {'updated' if entry else 'removed'} {name}")
+        self._save_cache()
+        self._wake_hasher()
+
+    def _ensure_scanned(self) -> None:
+        if not self._scanned:
+            self.scan()
+
+    # --- Lookups ------------------------------------------------------------
+
+    def images(self) -> list[Qcow2Image]:
+        self._ensure_scanned()
+        with self._lock:
+            return sorted(self._images.values(), key=lambda i: i.name)
+
+    def get(self, name: str) -> Qcow2Image | None:
+        self._ensure_scanned()
+        return self._images.get(name)
+
+    def resolve(self, image_ref: str) -> str | None:
+        """Resolve a node's image reference to a qcow2 path.
+
+        Tries, in order: an absolute path that exists, the exact filename,
+        the filename plus ".qcow2", then a case-insensitive substring
+        match. Several substring matches resolve to the newest version.
+        """
+        if not image_ref:
+            return None
+        if image_ref.startswith("/"):
+            if os.path.exists(image_ref):
+                return image_ref
+            # The store may be mounted elsewhere on this host
+            image_ref = os.path.basename(image_ref)
+
+        self._ensure_scanned()
+        for name in (image_ref, f"{image_ref}.qcow2"):
+            image = self._images.get(name)
+            if image:
+                return image.path
+            # Not indexed yet (e.g. written by another NFS client)
+            if (self.store / name).is_file():
+                self.refresh_file(name)
+                if name in self._images:
+                    return self._images[name].path
+
+        needle = image_ref.lower()
+        with self._lock:
+            matches = [i for i in self._images.values() if needle in i.name.lower()]
+        if not matches:
+            return None
+        matches.sort(key=lambda i: (_version_key(i), i.name), reverse=True)
+        if len(matches) > 1:
+            logger.warning(
+                f"Image reference '{image_ref}' matches {len(matches)} images, "
+                f"using {matches[0].name}"
+            )
+        return matches[0].path
+
+    # --- Background maintenance -----------------------------------------------
+
+    async def start(self) -> None:
+        """Index the store and start watching it."""
+        loop = self._loop = asyncio.get_running_loop()
+        await asyncio.to_thread(self.scan)
+        try:
+            self._inotify = _Inotify(self.store)
+            loop.add_reader(self._inotify.fd, self._on_inotify)
+        except OSError as e:
+            logger.warning(f"Image catalog not watching {self.store} ({e}); relying on rescans")
+            self._inotify = None
+        self._hash_wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._rescan_loop())]
+        if settings.image_catalog_checksums:
+            self._tasks.append(asyncio.create_task(self._hash_loop()))
+            self._hash_wakeup.set()
+
+    async def stop(self) -> None:
+        if self._inotify:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _on_inotify(self) -> None:
+        # Coalesce bursts (a copy produces several events) into one refresh
+        self._pending.update(self._inotify.read_names())
+        if self._pending and self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(0.5, lambda: asyncio.ensure_future(self._flush()))
+
+    async def _flush(self) -> None:
+        self._flush_handle = None
+        names, self._pending = self._pending, set()
+        for name in names:
+            await asyncio.to_thread(self.refresh_file, name)
+
+    async def _rescan_loop(self) -> None:
+        interval = settings.image_catalog_rescan_interval
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.scan)
+            except Exception as e:
+                logger.warning(f"Image catalog rescan failed: {e}")
+
+    def _wake_hasher(self) -> None:
+        # Safe from the worker threads scans run on
+        if self._loop is not None and self._hash_wakeup is not None:
+            self._loop.call_soon_threadsafe(self._hash_wakeup.set)
+
+    async def _hash_loop(self) -> None:
+        """Checksum unhashed images one at a time (large sequential reads)."""
+        while True:
+            await self._hash_wakeup.wait()
+            self._hash_wakeup.clear()
+            with self._lock:
+                pending = [i for i in self._images.values() if i.checksum is None]
+            for image in pending:
+                try:
+                    checksum = await asyncio.to_thread(_sha256, image.path)
+                except OSError as e:
+                    logger.warning(f"Could not checksum {image.name}: {e}")
+                    continue
+                with self._lock:
+                    current = self._images.get(image.name)
+                    if current and current.mtime == image.mtime and current.size_bytes == image.size_bytes:
+                        current.checksum = checksum
+            if pending:
+                await asyncio.to_thread(self._save_cache)
+
+
+image_catalog = ImageCatalog()
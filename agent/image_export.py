@@ -0,0 +1,209 @@
+"""Resumable image exports for peer-to-peer distribution.
+
+When the controller fans an image out across agents, an agent that
+already has the image serves it to others from /images/export. Piping
+`docker save` straight into the response made every transfer a one-shot:
+a dropped connection restarted from zero, and nothing told the receiver
+how large the archive was.
+
+The export is instead spooled once per image to the agent's workspace
+and described by the same chunk manifest the controller publishes (size,
+chunk_size, sha256 per chunk, artifact_id). Peers fetch the manifest,
+verify every chunk with ResumableImageLoad and resume with a Range
+request from their last verified offset. Responses carry Content-Length
+and are compressed with the codec the receiver offers in X-Image-Codecs.
+The spool also serves every other target of the same fan-out round
+without running `docker save` again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator
+
+from agent.config import settings
+from agent.image_loader import CODEC_GZIP, CODEC_IDENTITY, CODEC_ZSTD, ZSTD_AVAILABLE, zstandard
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+READ_SIZE = 1024 * 1024
+
+
+class ImageExportError(Exception):
+    """Raised when an image cannot be exported."""
+
+
+@dataclass
+class ImageExport:
+    """A spooled `docker save` archive and its chunk manifest."""
+
+    reference: str
+    path: Path
+    manifest: dict
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def size(self) -> int:
+        return int(self.manifest["size"])
+
+    @property
+    def artifact_id(self) -> str:
+        return self.manifest["artifact_id"]
+
+
+_exports: dict[str, ImageExport] = {}
+_locks: dict[str, asyncio.Lock] = {}
+
+
+def _export_dir() -> Path:
+    return Path(settings.workspace_path) / "image-exports"
+
+
+def _hash_chunks(path: Path, chunk_size: int) -> tuple[int, list[str]]:
+    """Hash a file in fixed-size chunks. Blocking; run in a thread."""
+    chunks = []
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            size += len(data)
+            chunks.append(hashlib.sha256(data).hexdigest())
+    return size, chunks
+
+
+def _image_id(reference: str) -> str | None:
+    """Docker image ID for a reference, or None if it is not present."""
+    import docker
+
+    try:
+        return docker.from_env().images.get(reference).id
+    except docker.errors.ImageNotFound:
+        return None
+
+
+def prune_exports(max_idle: float | None = None) -> int:
+    """Delete spooled exports unused for longer than `max_idle` seconds.
+
+    Readers that still have a pruned file open keep reading it; the
+    space is freed when they finish.
+    """
+    max_idle = settings.image_export_cache_ttl if max_idle is None else max_idle
+    cutoff = time.monotonic() - max_idle
+    pruned = 0
+    for reference, export in list(_exports.items()):
+        if export.last_used < cutoff:
+            _exports.pop(reference, None)
+            export.path.unlink(missing_ok=True)
+            export.path.with_suffix(".tmp").unlink(missing_ok=True)
+            pruned += 1
+    return pruned
+
+
+async def prepare_export(reference: str) -> ImageExport:
+    """Spool an image and build its chunk manifest, reusing a current spool.
+
+    Raises:
+        ImageExportError: If the image is missing or `docker save` fails
+    """
+    lock = _locks.setdefault(reference, asyncio.Lock())
+    async with lock:
+        image_id = await asyncio.to_thread(_image_id, reference)
+        if image_id is None:
+            raise ImageExportError(f"Image {reference} not found")
+
+        export = _exports.get(reference)
+        if export and export.artifact_id == image_id and export.path.exists():
+            export.last_used = time.monotonic()
+            return export
+
+        prune_exports()
+        directory = _export_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{hashlib.sha256(reference.encode()).hexdigest()[:16]}.tar"
+        spool = path.with_suffix(".tmp")
+
+        logger.info(f"Spooling {reference} for peer export")
+        proc = await asyncio.create_subprocess_exec(
+            "docker", "save", "-o", str(spool), reference,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            spool.unlink(missing_ok=True)
+            raise ImageExportError(
+                f"docker save failed for {reference}: {stderr.decode(errors='replace').strip()}"
+            )
+
+        chunk_size = settings.image_export_chunk_size
+        size, chunks = await asyncio.to_thread(_hash_chunks, spool, chunk_size)
+        os.replace(spool, path)
+
+        export = ImageExport(
+            reference=reference,
+            path=path,
+            manifest={
+                "version": MANIFEST_VERSION,
+                "artifact_id": image_id,
+                "size": size,
+                "chunk_size": chunk_size,
+                "chunks": chunks,
+            },
+        )
+        _exports[reference] = export
+        return export
+
+
+async def iter_export(export: ImageExport, start: int = 0) -> AsyncIterator[bytes]:
+    """Yield a spooled export from a byte offset without blocking the loop."""
+    f = await asyncio.to_thread(open, export.path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, start)
+        while True:
+            data = await asyncio.to_thread(f.read, READ_SIZE)
+            if not data:
+                break
+            export.last_used = time.monotonic()
+            yield data
+    finally:
+        f.close()
+
+
+def negotiate_codec(accepted: str | None) -> str:
+    """Pick the best codec from a receiver's X-Image-Codecs header."""
+    offered = [c.strip().lower() for c in (accepted or "").split(",") if c.strip()]
+    if CODEC_ZSTD in offered and ZSTD_AVAILABLE:
+        return CODEC_ZSTD
+    if CODEC_GZIP in offered:
+        return CODEC_GZIP
+    return CODEC_IDENTITY
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], codec: str) -> AsyncIterator[bytes]:
+    """Compress an async chunk stream off the event loop."""
+    if codec == CODEC_ZSTD:
+        compressor = zstandard.ZstdCompressor(level=3, threads=-1).compressobj()
+    elif codec == CODEC_GZIP:
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 31)  # gzip container
+    else:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    async for chunk in chunks:
+        compressed = await asyncio.to_thread(compressor.compress, chunk)
+        if compressed:
+            yield compressed
+    tail = await asyncio.to_thread(compressor.flush)
+    if tail:
+        yield tail
@@ -0,0 +1,396 @@
+"""Streaming `docker load` for incoming image archives.
+
+Image archives used to be spooled to a temp file and then loaded with a
+blocking `subprocess.run(["docker", "load", "-i", ...])` on the event loop
+thread, which doubled disk I/O and stalled heartbeats and consoles for the
+duration of the load.
+
+StreamingImageLoader instead pipes chunks straight into the stdin of an
+asyncio-managed `docker load` process as they arrive. Docker parses the
+archive concurrently with the transfer, nothing touches the agent's disk
+except Docker's own layer store, and the event loop stays responsive.
+Backpressure from Docker propagates to the sender through `drain()`.
+
+Archives may arrive compressed (zstd, or gzip as the stdlib fallback); the
+codec is announced in the X-Image-Codec header and decompressed off the
+event loop before being written to Docker.
+
+When the sender provides a manifest of chunk hashes, ResumableImageLoad
+verifies every chunk before it reaches Docker and keeps `docker load`
+running across dropped connections, so an interrupted transfer resumes
+from the last verified chunk instead of starting over.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+import zlib
+from contextlib import AbstractAsyncContextManager
+from typing import AsyncIterator, Callable
+
+from agent.config import settings
+from agent.metrics import image_load_bytes_total, image_load_seconds
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CODEC_HEADER = "X-Image-Codec"
+ACCEPT_CODECS_HEADER = "X-Image-Codecs"
+UNCOMPRESSED_LENGTH_HEADER = "X-Uncompressed-Length"
+
+CODEC_ZSTD = "zstd"
+CODEC_GZIP = "gzip"
+CODEC_IDENTITY = "identity"
+
+
+class ImageLoadError(Exception):
+    """Raised when `docker load` fails or times out."""
+
+
+class ChunkVerificationError(ImageLoadError):
+    """Raised when received data does not match the manifest's chunk hash."""
+
+
+def parse_loaded_images(output: str) -> list[str]:
+    """Extract loaded image references from `docker load` output."""
+    loaded_images = []
+    for line in output.splitlines():
+        if "Loaded image:" in line:
+            loaded_images.append(line.split("Loaded image:", 1)[-1].strip())
+        elif "Loaded image ID:" in line:
+            loaded_images.append(line.split("Loaded image ID:", 1)[-1].strip())
+    return loaded_images
+
+
+def accepted_codecs() -> list[str]:
+    """Compression codecs this agent can decode, in preference order."""
+    codecs = [CODEC_ZSTD] if ZSTD_AVAILABLE else []
+    codecs.append(CODEC_GZIP)
+    return codecs
+
+
+class StreamDecompressor:
+    """Incremental decompressor for one image stream."""
+
+    def __init__(self, codec: str):
+        codec = (codec or CODEC_IDENTITY).lower()
+        if codec == CODEC_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise ImageLoadError("zstd-compressed image received but zstandard is not installed")
+            self._obj = zstandard.ZstdDecompressor().decompressobj()
+        elif codec == CODEC_GZIP:
+            self._obj = zlib.decompressobj(31)  # gzip container
+        elif codec == CODEC_IDENTITY:
+            self._obj = None
+        else:
+            raise ImageLoadError(f"Unsupported image codec: {codec}")
+
+    def decompress(self, chunk: bytes) -> bytes:
+        if self._obj is None:
+            return chunk
+        try:
+            return self._obj.decompress(chunk)
+        except Exception as e:
+            raise ImageLoadError(f"Corrupt compressed image stream: {e}") from e
+
+
+async def decompress_stream(
+    chunks: AsyncIterator[bytes],
+    codec: str | None,
+) -> AsyncIterator[bytes]:
+    """Decompress an async chunk stream off the event loop."""
+    decompressor = StreamDecompressor(codec or CODEC_IDENTITY)
+    async for chunk in chunks:
+        data = await asyncio.to_thread(decompressor.decompress, chunk)
+        if data:
+            yield data
+
+
+class StreamingImageLoader:
+    """Feed an image archive to `docker load` via stdin as it arrives.
+
+    Usage:
+        async with StreamingImageLoader(on_progress=cb) as loader:
+            async for chunk in source:
+                await loader.write(chunk)
+        loaded = loader.loaded_images
+
+    Exiting the context normally waits for `docker load` to finish and
+    raises ImageLoadError on failure; exiting with an exception kills it.
+    """
+
+    def __init__(
+        self,
+        on_progress: Callable[[int], None] | None = None,
+        timeout: float | None = None,
+    ):
+        self._on_progress = on_progress
+        self._timeout = timeout if timeout is not None else settings.image_load_timeout
+        self._proc: asyncio.subprocess.Process | None = None
+        self._stdout_task: asyncio.Task | None = None
+        self._stderr_task: asyncio.Task | None = None
+        self.bytes_written = 0
+        self.loaded_images: list[str] = []
+        self._started = 0.0
+
+    async def start(self) -> None:
+        self._started = time.monotonic()
+        self._proc = await asyncio.create_subprocess_exec(
+            "docker", "load",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        # Drain output concurrently so docker load never blocks on a full pipe
+        self._stdout_task = asyncio.create_task(self._proc.stdout.read())
+        self._stderr_task = asyncio.create_task(self._proc.stderr.read())
+
+    async def _error_output(self) -> str:
+        stdout, stderr = await asyncio.gather(self._stdout_task, self._stderr_task)
+        return (stderr or stdout).decode(errors="replace").strip()
+
+    async def write(self, chunk: bytes) -> None:
+        """Write a chunk to docker load, waiting if Docker falls behind."""
+        if not chunk:
+            return
+        try:
+            self._proc.stdin.write(chunk)
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            await self._proc.wait()
+            error = await self._error_output()
+            raise ImageLoadError(error or f"docker load exited early: {e}") from e
+        self.bytes_written += len(chunk)
+        if self._on_progress:
+            self._on_progress(self.bytes_written)
+
+    async def finish(self) -> list[str]:
+        """Close stdin and wait for docker load to report loaded images."""
+        try:
+            self._proc.stdin.close()
+            await self._proc.stdin.wait_closed()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+        try:
+            await asyncio.wait_for(self._proc.wait(), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            await self.abort()
+            raise ImageLoadError("docker load timed out")
+
+        stdout, stderr = await asyncio.gather(self._stdout_task, self._stderr_task)
+        output = stdout.decode(errors="replace") + stderr.decode(errors="replace")
+        if self._proc.returncode != 0:
+            self._observe("failed")
+            raise ImageLoadError(output.strip() or "docker load failed")
+
+        self.loaded_images = parse_loaded_images(output)
+        self._observe("success")
+        image_load_bytes_total.inc(self.bytes_written)
+        return self.loaded_images
+
+    async def abort(self) -> None:
+        """Kill docker load, discarding any partially received archive."""
+        if self._proc and self._proc.returncode is None:
+            self._proc.kill()
+            await self._proc.wait()
+            self._observe("aborted")
+        for task in (self._stdout_task, self._stderr_task):
+            if task and not task.done():
+                task.cancel()
+
+    def _observe(self, result: str) -> None:
+        if self._started:
+            image_load_seconds.observe(time.monotonic() - self._started, result=result)
+
+    async def __aenter__(self) -> "StreamingImageLoader":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            await self.abort()
+            return
+        await self.finish()
+
+
+async def load_image_stream(
+    chunks: AsyncIterator[bytes],
+    on_progress: Callable[[int], None] | None = None,
+    timeout: float | None = None,
+    codec: str | None = None,
+) -> tuple[list[str], int]:
+    """Load an image archive from an async chunk source.
+
+    Args:
+        chunks: Archive chunks, compressed with `codec` if given
+        on_progress: Called with uncompressed bytes written to Docker
+        timeout: Seconds to wait for docker load after the last chunk
+        codec: Compression codec from the X-Image-Codec header
+
+    Returns:
+        Tuple of (loaded image references, bytes consumed)
+
+    Raises:
+        ImageLoadError: If docker load fails or times out
+    """
+    if codec and codec != CODEC_IDENTITY:
+        chunks = decompress_stream(chunks, codec)
+    async with StreamingImageLoader(on_progress=on_progress, timeout=timeout) as loader:
+        async for chunk in chunks:
+            await loader.write(chunk)
+    return loader.loaded_images, loader.bytes_written
+
+
+class ResumableImageLoad:
+    """A `docker load` fed from a verified, resumable artifact stream.
+
+    The manifest describes the archive as fixed-size chunks with sha256
+    hashes. Data is buffered one chunk at a time and only written to
+    Docker once its hash matches, so `verified_offset` is always a safe
+    point to resume from with a Range request.
+    """
+
+    def __init__(
+        self,
+        manifest: dict,
+        on_progress: Callable[[int], None] | None = None,
+        timeout: float | None = None,
+    ):
+        self.manifest = manifest
+        self.size = int(manifest["size"])
+        self.chunk_size = int(manifest["chunk_size"])
+        self.chunks: list[str] = manifest["chunks"]
+        self.verified_offset = 0
+        self.last_activity = time.monotonic()
+        self._loader = StreamingImageLoader(on_progress=on_progress, timeout=timeout)
+        self._lock = asyncio.Lock()
+
+    @property
+    def artifact_id(self) -> str | None:
+        return self.manifest.get("artifact_id")
+
+    @property
+    def complete(self) -> bool:
+        return self.verified_offset >= self.size
+
+    async def start(self) -> None:
+        await self._loader.start()
+
+    async def feed(self, chunks: AsyncIterator[bytes], codec: str | None = None) -> None:
+        """Consume a stream that starts at `verified_offset`.
+
+        Returns when the stream ends; a trailing partial chunk is discarded
+        and must be re-requested. Transport errors from `chunks` propagate
+        with `verified_offset` pointing at the resume position.
+
+        Raises:
+            ChunkVerificationError: If a chunk does not match the manifest
+        """
+        if codec and codec != CODEC_IDENTITY:
+            chunks = decompress_stream(chunks, codec)
+        async with self._lock:
+            buffer = bytearray()
+            async for data in chunks:
+                self.last_activity = time.monotonic()
+                if self.complete:
+                    raise ChunkVerificationError("Received more data than the manifest describes")
+                buffer += data
+                while not self.complete:
+                    expected = min(self.chunk_size, self.size - self.verified_offset)
+                    if len(buffer) < expected:
+                        break
+                    piece = bytes(buffer[:expected])
+                    del buffer[:expected]
+                    await self._commit(piece)
+                if self.complete and buffer:
+                    raise ChunkVerificationError("Received more data than the manifest describes")
+
+    async def _commit(self, piece: bytes) -> None:
+        index = self.verified_offset // self.chunk_size
+        digest = await asyncio.to_thread(lambda: hashlib.sha256(piece).hexdigest())
+        if digest != self.chunks[index]:
+            raise ChunkVerificationError(
+                f"Chunk {index} at offset {self.verified_offset} failed verification"
+            )
+        await self._loader.write(piece)
+        self.verified_offset += len(piece)
+
+    async def finish(self) -> list[str]:
+        """Wait for docker load once every chunk has been verified."""
+        if not self.complete:
+            raise ImageLoadError(
+                f"Transfer incomplete: {self.verified_offset} of {self.size} bytes verified"
+            )
+        return await self._loader.finish()
+
+    async def abort(self) -> None:
+        await self._loader.abort()
+
+
+async def load_image_resumable(
+    manifest: dict,
+    open_stream: Callable[[int], AbstractAsyncContextManager[tuple[AsyncIterator[bytes], str | None]]],
+    retry_on: tuple[type[BaseException], ...],
+    on_progress: Callable[[int], None] | None = None,
+    attempts: int | None = None,
+    retry_delay: float | None = None,
+) -> tuple[list[str], int]:
+    """Load an image archive, resuming from the last verified chunk on failure.
+
+    Args:
+        manifest: Chunk manifest from the sender (size, chunk_size, chunks)
+        open_stream: Opens the archive at a byte offset, yielding
+            (chunk iterator, codec)
+        retry_on: Transport exceptions that trigger a resume
+        on_progress: Called with verified bytes written to Docker
+        attempts: Consecutive attempts without progress before giving up
+        retry_delay: Base delay between attempts (doubled per failure)
+
+    Returns:
+        Tuple of (loaded image references, bytes loaded)
+
+    Raises:
+        ImageLoadError: If docker load fails or the transfer cannot complete
+    """
+    attempts = attempts if attempts is not None else settings.image_resume_attempts
+    retry_delay = retry_delay if retry_delay is not None else settings.image_resume_retry_delay
+
+    load = ResumableImageLoad(manifest, on_progress=on_progress)
+    await load.start()
+    try:
+        failures = 0
+        while not load.complete:
+            offset = load.verified_offset
+            try:
+                async with open_stream(offset) as (chunks, codec):
+                    await load.feed(chunks, codec)
+                if not load.complete:
+                    raise ConnectionError("Stream ended before the transfer completed")
+            except (ChunkVerificationError, ConnectionError, *retry_on) as e:
+                if load.verified_offset > offset:
+                    failures = 0
+                failures += 1
+                if failures > attempts:
+                    raise ImageLoadError(
+                        f"Transfer failed after {attempts} resume attempts: {e}"
+                    ) from e
+                logger.warning(
+                    f"Image transfer interrupted at {load.verified_offset}/{load.size} "
+                    f"bytes ({e}), resuming"
+                )
+                await asyncio.sleep(retry_delay * 2 ** (failures - 1))
+        loaded = await load.finish()
+    except BaseException:
+        await load.abort()
+        raise
+    return loaded, load.verified_offset
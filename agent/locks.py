@@ -7,7 +7,17 @@ asyncio.Lock objects, these locks:
 3. Can be force-released externally for stuck recovery
 4. Provide visibility into lock state across the cluster
 
-The lock implementation uses Redis SET NX with expiry for atomic lock acquisition.
+The lock implementation uses Redis SET NX with expiry for atomic lock
+acquisition. Release and extension are Lua compare-and-delete /
+compare-and-expire scripts keyed on a per-acquisition token, so a holder
+whose lock expired can never remove or extend someone else's lock.
+
+Waiters do not poll. Contenders for a lab queue in a Redis sorted set
+(FIFO by enqueue time) and sleep until a release is published on the
+lab's release channel, or a keyspace notification reports the lock key
+deleted/expired (when the server has notify-keyspace-events enabled).
+A slow fallback re-check covers holders that crash and let the TTL
+expire on servers without keyspace notifications.
 """
 
 from __future__ import annotations
@@ -16,12 +26,58 @@ import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
-from datetime import datetime, timezone
+from uuid import uuid4
 
 import redis.asyncio as redis
 
+from agent.metrics import lock_wait_seconds
+
 logger = logging.getLogger(__name__)
 
+# Take the lock if it is free and the caller is at the head of the lab's
+# FIFO queue. Queue entries whose waiter heartbeat expired are skipped.
+# Every key the script touches is passed in KEYS.
+# KEYS: lock key, queue key, waiter heartbeats (lock value -> expiry).
+# ARGV: lock value, ttl, now.
+_ACQUIRE_SCRIPT = """
+while true do
+    local head = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+    if not head or head == ARGV[1] then
+        break
+    end
+    local alive_until = redis.call('ZSCORE', KEYS[3], head)
+    if alive_until and tonumber(alive_until) > tonumber(ARGV[3]) then
+        return 0
+    end
+    redis.call('ZREM', KEYS[2], head)
+    redis.call('ZREM', KEYS[3], head)
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    redis.call('ZREM', KEYS[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# KEYS: lock key, release channel. ARGV: lock value.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('PUBLISH', KEYS[2], 'released')
+    return 1
+end
+return 0
+"""
+
+# KEYS: lock key. ARGV: lock value, ttl.
+_EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
 
 class LockAcquisitionTimeout(Exception):
     """Raised when lock cannot be acquired within timeout."""
@@ -50,6 +106,7 @@ class DeployLockManager:
         redis_url: str,
         lock_ttl: int = 960,
         agent_id: str = "",
+        recheck_interval: float = 5.0,
     ):
         """Initialize the lock manager.
 
@@ -57,12 +114,20 @@ class DeployLockManager:
             redis_url: Redis connection URL
             lock_ttl: Lock TTL in seconds (should be slightly longer than deploy_timeout)
             agent_id: Agent identifier for lock ownership
+            recheck_interval: Max seconds a waiter sleeps without a release
+                notification before re-checking (covers TTL expiry)
         """
         self.redis_url = redis_url
         self.lock_ttl = lock_ttl
         self.agent_id = agent_id
+        self.recheck_interval = recheck_interval
         self._redis: redis.Redis | None = None
         self._local_locks: dict[str, asyncio.Lock] = {}
+        # Lock values for locks held by this process, by lab
+        self._held: dict[str, str] = {}
+        # Set when a lab's lock is released; replaced after each wakeup
+        self._release_events: dict[str, asyncio.Event] = {}
+        self._listener_task: asyncio.Task | None = None
 
     async def _get_redis(self) -> redis.Redis:
         """Get or create Redis connection."""
@@ -85,8 +150,90 @@ class DeployLockManager:
         return f"deploy_lock:{self.agent_id}:{lab_id}"
 
     def _lock_value(self) -> str:
-        """Get lock value containing ownership info."""
-        return f"{self.agent_id}:{time.time()}"
+        """Get lock value containing ownership info and a unique token."""
+        return f"{self.agent_id}:{time.time()}:{uuid4().hex[:12]}"
+
+    def _queue_key(self, lab_id: str) -> str:
+        return f"deploy_lock_queue:{self.agent_id}:{lab_id}"
+
+    def _waiters_key(self, lab_id: str) -> str:
+        """Sorted set of a lab's queued waiters, scored by heartbeat expiry."""
+        return f"deploy_lock_waiters:{self.agent_id}:{lab_id}"
+
+    def _release_channel(self, lab_id: str) -> str:
+        return f"deploy_lock_released:{self.agent_id}:{lab_id}"
+
+    def _release_event(self, lab_id: str) -> asyncio.Event:
+        if lab_id not in self._release_events:
+            self._release_events[lab_id] = asyncio.Event()
+        return self._release_events[lab_id]
+
+    def _notify_released(self, lab_id: str) -> None:
+        """Wake the local waiter (if any) for a lab."""
+        event = self._release_events.pop(lab_id, None)
+        if event:
+            event.set()
+
+    def _ensure_listener(self) -> None:
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen_for_releases())
+
+    async def _listen_for_releases(self) -> None:
+        """Dispatch release messages and keyspace events to local waiters."""
+        release_prefix = f"deploy_lock_released:{self.agent_id}:"
+        keyspace_marker = f"__:deploy_lock:{self.agent_id}:"
+        while True:
+            pubsub = None
+            try:
+                r = await self._get_redis()
+                pubsub = r.pubsub()
+                await pubsub.psubscribe(
+                    f"{release_prefix}*",
+                    f"__keyspace@*{keyspace_marker}*",
+                )
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if not message:
+                        continue
+                    channel = message["channel"]
+                    if channel.startswith(release_prefix):
+                        self._notify_released(channel[len(release_prefix):])
+                    elif message["data"] in ("del", "expired") and keyspace_marker in channel:
+                        self._notify_released(channel.split(keyspace_marker, 1)[1])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Lock release listener error, reconnecting: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    async def _try_acquire(self, r: redis.Redis, lab_id: str, lock_value: str) -> bool:
+        return bool(await r.eval(
+            _ACQUIRE_SCRIPT, 3,
+            self._lock_key(lab_id), self._queue_key(lab_id), self._waiters_key(lab_id),
+            lock_value, self.lock_ttl, time.time(),
+        ))
+
+    async def _release(self, r: redis.Redis, lab_id: str, lock_value: str) -> bool:
+        released = await r.eval(
+            _RELEASE_SCRIPT, 2,
+            self._lock_key(lab_id), self._release_channel(lab_id), lock_value,
+        )
+        self._notify_released(lab_id)
+        return bool(released)
+
+    async def _leave_queue(self, r: redis.Redis, lab_id: str, lock_value: str) -> None:
+        """Drop out of a lab's queue and let the next waiter re-check."""
+        await r.zrem(self._queue_key(lab_id), lock_value)
+        await r.zrem(self._waiters_key(lab_id), lock_value)
+        await r.publish(self._release_channel(lab_id), "dequeued")
 
     async def _get_local_lock(self, lab_id: str) -> asyncio.Lock:
         """Get local asyncio lock for a lab.
@@ -104,7 +251,8 @@ class DeployLockManager:
 
         This context manager acquires a distributed lock for the given lab.
         The lock automatically expires after lock_ttl seconds, ensuring
-        recovery from crashes.
+        recovery from crashes. Contending callers are served in FIFO order
+        and woken by release notifications rather than polling.
 
         Args:
             lab_id: Lab identifier
@@ -117,57 +265,95 @@ class DeployLockManager:
             LockAcquisitionTimeout: If lock cannot be acquired within timeout
         """
         r = await self._get_redis()
-        lock_key = self._lock_key(lab_id)
         lock_value = self._lock_value()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
 
-        # First acquire local lock to prevent local races
+        # Local waiters queue FIFO on an asyncio lock, so only one coroutine
+        # per lab contends in Redis at a time
         local_lock = await self._get_local_lock(lab_id)
+        wait_started = loop.time()
+        try:
+            await asyncio.wait_for(local_lock.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            lock_wait_seconds.observe(timeout, lock="deploy", outcome="timeout")
+            raise LockAcquisitionTimeout(lab_id, timeout) from None
 
-        async with local_lock:
-            # Try to acquire Redis lock with TTL
-            start_time = asyncio.get_event_loop().time()
-
-            while True:
-                # Use SET NX EX for atomic acquire with TTL
-                acquired = await r.set(
-                    lock_key,
-                    lock_value,
-                    nx=True,  # Only set if not exists
-                    ex=self.lock_ttl,
+        try:
+            try:
+                await self._wait_for_lock(r, lab_id, lock_value, deadline, timeout)
+            except LockAcquisitionTimeout:
+                lock_wait_seconds.observe(
+                    loop.time() - wait_started, lock="deploy", outcome="timeout"
                 )
-
-                if acquired:
-                    logger.info(f"Acquired deploy lock for lab {lab_id} (TTL: {self.lock_ttl}s)")
-                    break
-
-                # Check timeout
-                elapsed = asyncio.get_event_loop().time() - start_time
-                if elapsed >= timeout:
-                    # Get info about current lock holder
-                    current = await r.get(lock_key)
-                    ttl = await r.ttl(lock_key)
-                    logger.warning(
-                        f"Lock acquisition timeout for lab {lab_id} after {timeout}s. "
-                        f"Current holder: {current}, TTL: {ttl}s"
-                    )
-                    raise LockAcquisitionTimeout(lab_id, timeout)
-
-                # Wait before retry
-                await asyncio.sleep(0.5)
-
+                raise
+            lock_wait_seconds.observe(loop.time() - wait_started, lock="deploy", outcome="acquired")
+            self._held[lab_id] = lock_value
+            logger.info(f"Acquired deploy lock for lab {lab_id} (TTL: {self.lock_ttl}s)")
             try:
                 yield
             finally:
-                # Release lock - only if we still own it
-                current = await r.get(lock_key)
-                if current and current.startswith(f"{self.agent_id}:"):
-                    await r.delete(lock_key)
+                self._held.pop(lab_id, None)
+                if await self._release(r, lab_id, lock_value):
                     logger.info(f"Released deploy lock for lab {lab_id}")
                 else:
+                    current = await r.get(self._lock_key(lab_id))
                     logger.warning(
                         f"Lock for lab {lab_id} was released by another process "
-                        f"(expected owner starting with {self.agent_id}:, got {current})"
+                        f"(expected {lock_value}, got {current})"
                     )
+        finally:
+            local_lock.release()
+
+    async def _wait_for_lock(
+        self,
+        r: redis.Redis,
+        lab_id: str,
+        lock_value: str,
+        deadline: float,
+        timeout: float,
+    ) -> None:
+        """Take the lab lock, queueing FIFO behind other holders if needed."""
+        loop = asyncio.get_running_loop()
+        event = self._release_event(lab_id)
+        if await self._try_acquire(r, lab_id, lock_value):
+            return
+
+        # Join the lab's queue and sleep until a release wakes us
+        self._ensure_listener()
+        waiters_key = self._waiters_key(lab_id)
+        waiter_ttl = max(int(self.recheck_interval * 3), 5)
+        queue_ttl = self.lock_ttl + int(timeout) + waiter_ttl
+        await r.zadd(self._queue_key(lab_id), {lock_value: time.time()}, nx=True)
+        await r.expire(self._queue_key(lab_id), queue_ttl)
+        try:
+            while True:
+                await r.zadd(waiters_key, {lock_value: time.time() + waiter_ttl})
+                await r.expire(waiters_key, queue_ttl)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    current = await r.get(self._lock_key(lab_id))
+                    ttl = await r.ttl(self._lock_key(lab_id))
+                    logger.warning(
+                        f"Lock acquisition timeout for lab {lab_id} after {timeout}s. "
+                        f"Current holder: {current}, TTL: {ttl}s"
+                    )
+                    raise LockAcquisitionTimeout(lab_id, timeout)
+                try:
+                    await asyncio.wait_for(
+                        event.wait(), timeout=min(remaining, self.recheck_interval)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                event = self._release_event(lab_id)
+                if await self._try_acquire(r, lab_id, lock_value):
+                    return
+        except BaseException:
+            try:
+                await self._leave_queue(r, lab_id, lock_value)
+            except Exception as e:
+                logger.debug(f"Failed to leave lock queue for lab {lab_id}: {e}")
+            raise
 
     async def force_release(self, lab_id: str) -> bool:
         """Force release a lock regardless of owner.
@@ -193,6 +379,8 @@ class DeployLockManager:
             )
 
         deleted = await r.delete(lock_key)
+        if deleted:
+            await r.publish(self._release_channel(lab_id), "force_released")
         return deleted > 0
 
     async def get_lock_status(self, lab_id: str) -> dict:
@@ -219,8 +407,8 @@ class DeployLockManager:
                 "age_seconds": 0,
             }
 
-        # Parse owner and acquisition time from value
-        parts = value.split(":", 1)
+        # Parse owner and acquisition time from value ("owner:time:token")
+        parts = value.rsplit(":", 2)
         owner = parts[0] if parts else "unknown"
         try:
             acquired_at = float(parts[1]) if len(parts) > 1 else 0
@@ -295,13 +483,16 @@ class DeployLockManager:
         if extension_seconds is None:
             extension_seconds = self.lock_ttl
 
-        r = await self._get_redis()
-        lock_key = self._lock_key(lab_id)
+        lock_value = self._held.get(lab_id)
+        if lock_value is None:
+            return False
 
-        # Only extend if we own the lock
-        current = await r.get(lock_key)
-        if current and current.startswith(f"{self.agent_id}:"):
-            await r.expire(lock_key, extension_seconds)
+        r = await self._get_redis()
+        # Only extend if we still own the lock (atomic compare-and-expire)
+        extended = await r.eval(
+            _EXTEND_SCRIPT, 1, self._lock_key(lab_id), lock_value, extension_seconds
+        )
+        if extended:
             logger.debug(f"Extended lock for lab {lab_id} by {extension_seconds}s")
             return True
 
@@ -368,6 +559,13 @@ class DeployLockManager:
 
     async def close(self):
         """Close Redis connection."""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
         if self._redis:
             await self._redis.close()
             self._redis = None
@@ -13,15 +13,19 @@ from __future__ import annotations
 import asyncio
 import json
 import uuid
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
 import httpx
-from fastapi import FastAPI, File, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 
+from agent import metrics
 from agent.config import settings
+from agent.console.recording import ConsoleRecorder, RecordingReader, list_recordings, recording_path
 from agent.providers import NodeStatus as ProviderNodeStatus, get_provider, list_providers
 from agent.providers.base import Provider
 from agent.schemas import (
@@ -30,6 +34,9 @@ from agent.schemas import (
     AgentStatus,
     AttachContainerRequest,
     AttachContainerResponse,
+    BulkNodeActionRequest,
+    CheckpointRequest,
+    CheckpointResponse,
     CleanupOrphansRequest,
     CleanupOrphansResponse,
     CleanupOverlayRequest,
@@ -50,11 +57,14 @@ from agent.schemas import (
     HeartbeatResponse,
     ImageExistsResponse,
     ImageInventoryResponse,
+    ImageLayersResponse,
     ImagePullProgress,
     ImagePullRequest,
     ImagePullResponse,
     ImageReceiveRequest,
     ImageReceiveResponse,
+    ImageReceiveSessionRequest,
+    ImageReceiveSessionResponse,
     JobResult,
     JobStatus,
     LabStatusRequest,
@@ -65,6 +75,7 @@ from agent.schemas import (
     LinkInfo,
     LinkListResponse,
     LinkState,
+    NodeActionOutcome,
     NodeActionRequest,
     NodeInfo,
     NodeStatus,
@@ -72,6 +83,7 @@ from agent.schemas import (
     OVSStatusResponse,
     OverlayStatusResponse,
     Provider,
+    Qcow2ImageInfo,
     ExternalConnectRequest,
     ExternalConnectResponse,
     ExternalDisconnectRequest,
@@ -84,6 +96,7 @@ from agent.schemas import (
     BridgeDeletePatchResponse,
     RegistrationRequest,
     RegistrationResponse,
+    TopologyDiffRequest,
     TunnelInfo,
     UpdateRequest,
     UpdateResponse,
@@ -132,6 +145,7 @@ logger = logging.getLogger(__name__)
 _registered = False
 _heartbeat_task: asyncio.Task | None = None
 _event_listener_task: asyncio.Task | None = None
+_receive_reaper_task: asyncio.Task | None = None
 
 # Overlay network manager (lazy initialized)
 _overlay_manager = None
@@ -286,9 +300,17 @@ def get_capabilities() -> AgentCapabilities:
     if settings.enable_libvirt:
         providers.append(Provider.LIBVIRT)
 
-    features = ["console", "status"]
+    features = ["console", "status", "console_recording"]
     if settings.enable_vxlan:
         features.append("vxlan")
+    # Image stream codecs this agent can decode (see image_loader)
+    from agent.image_loader import accepted_codecs
+    features.extend(f"image_{codec}" for codec in accepted_codecs())
+    features.append("resumable_images")
+    if settings.enable_docker:
+        features.append("incremental_deploy")
+    if settings.enable_docker or settings.enable_libvirt:
+        features.append("checkpoints")
 
     return AgentCapabilities(
         providers=providers,
@@ -372,7 +394,7 @@ def get_resource_usage() -> dict:
         except Exception:
             pass
 
-        return {
+        usage = {
             "cpu_percent": cpu_percent,
             "memory_percent": memory_percent,
             "memory_used_gb": memory_used_gb,
@@ -384,6 +406,12 @@ def get_resource_usage() -> dict:
             "containers_total": containers_total,
             "container_details": container_details,
         }
+        if settings.enable_libvirt:
+            # Per-NUMA-node cores, memory and hugepages allocated to VMs
+            from agent.host_resources import host_resources, ksm
+            usage["numa_nodes"] = host_resources.usage()
+            usage["ksm"] = ksm.usage()
+        return usage
     except Exception as e:
         logger.warning(f"Failed to gather resource usage: {e}")
         return {}
@@ -496,7 +524,7 @@ async def heartbeat_loop():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - register on startup, cleanup on shutdown."""
-    global _heartbeat_task, _event_listener_task, _lock_manager
+    global _heartbeat_task, _event_listener_task, _receive_reaper_task, _lock_manager
 
     logger.info(f"Agent {AGENT_ID} starting...")
     logger.info(f"Controller URL: {settings.controller_url}")
@@ -508,6 +536,7 @@ async def lifespan(app: FastAPI):
         redis_url=settings.redis_url,
         lock_ttl=settings.lock_ttl,
         agent_id=AGENT_ID,
+        recheck_interval=settings.lock_wait_recheck_interval,
     )
     set_lock_manager(_lock_manager)
     logger.info(f"Redis lock manager initialized (TTL: {settings.lock_ttl}s)")
@@ -552,11 +581,20 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Failed to start network cleanup: {e}")
 
+    # Index the qcow2 image store and watch it for changes
+    if settings.enable_libvirt:
+        try:
+            from agent.image_catalog import image_catalog
+            await image_catalog.start()
+        except Exception as e:
+            logger.warning(f"Failed to start qcow2 image catalog: {e}")
+
     # Try initial registration (will notify controller if this is a restart)
     await register_with_controller()
 
     # Start heartbeat background task
     _heartbeat_task = asyncio.create_task(heartbeat_loop())
+    _receive_reaper_task = asyncio.create_task(receive_session_reaper_loop())
 
     # Start Docker event listener if docker provider is enabled
     if settings.enable_docker:
@@ -590,6 +628,13 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
+    if _receive_reaper_task:
+        _receive_reaper_task.cancel()
+        try:
+            await _receive_reaper_task
+        except asyncio.CancelledError:
+            pass
+
     if _event_listener_task:
         try:
             listener = get_event_listener()
@@ -623,6 +668,16 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Error stopping network cleanup: {e}")
 
+    if settings.enable_libvirt:
+        from agent.image_catalog import image_catalog
+        await image_catalog.stop()
+
+    # Close pooled device SSH connections and stop boot log followers
+    from agent.console.ssh_pool import ssh_pool
+    from agent.boot_logs import boot_logs
+    await ssh_pool.close_all()
+    boot_logs.stop_all()
+
     # Close lock manager
     if _lock_manager:
         await _lock_manager.close()
@@ -666,6 +721,14 @@ def info():
     return get_agent_info().model_dump()
 
 
+@app.get("/metrics")
+def get_metrics() -> Response:
+    """Prometheus metrics for deploys, subprocesses, plugin, images, consoles and locks."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/callbacks/dead-letters")
 def get_dead_letters():
     """Get failed callbacks that couldn't be delivered.
@@ -861,6 +924,7 @@ async def deploy_lab(request: DeployRequest) -> JobResult:
                 request.topology_yaml,
                 request.provider.value,
                 request.callback_url,
+                checkpoint_id=request.checkpoint_id,
             )
         )
         return JobResult(
@@ -885,6 +949,7 @@ async def deploy_lab(request: DeployRequest) -> JobResult:
                 topology=request.topology,
                 topology_yaml=request.topology_yaml,
                 workspace=workspace,
+                checkpoint_id=request.checkpoint_id,
             )
 
             logger.info(f"Deploy finished: lab={lab_id}, success={result.success}")
@@ -895,6 +960,7 @@ async def deploy_lab(request: DeployRequest) -> JobResult:
                     status=JobStatus.COMPLETED,
                     stdout=result.stdout,
                     stderr=result.stderr,
+                    timings=result.timings,
                 )
             else:
                 job_result = JobResult(
@@ -903,6 +969,7 @@ async def deploy_lab(request: DeployRequest) -> JobResult:
                     stdout=result.stdout,
                     stderr=result.stderr,
                     error_message=result.error,
+                    timings=result.timings,
                 )
 
             # Cache result briefly for concurrent requests
@@ -929,6 +996,73 @@ async def deploy_lab(request: DeployRequest) -> JobResult:
         return job_result
 
 
+@app.post("/jobs/deploy-incremental")
+async def deploy_incremental(request: TopologyDiffRequest) -> JobResult:
+    """Apply node/link additions and removals to a deployed lab.
+
+    Used instead of a full redeploy when a running lab gains or loses a
+    few nodes: nodes not named in the request are not touched.
+    """
+    from agent.locks import LockAcquisitionTimeout
+
+    lab_id = request.lab_id
+    logger.info(
+        f"Incremental deploy request: lab={lab_id}, job={request.job_id}, "
+        f"+{len(request.add_nodes)}/-{len(request.remove_nodes)} nodes, "
+        f"+{len(request.add_links)}/-{len(request.remove_links)} links"
+    )
+
+    lock_manager = get_lock_manager()
+    if lock_manager is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Lock manager not initialized"
+        )
+
+    try:
+        async with lock_manager.acquire_with_heartbeat(
+            lab_id,
+            timeout=settings.lock_acquire_timeout,
+            extend_interval=settings.lock_extend_interval,
+        ):
+            provider = get_provider_for_request(request.provider.value)
+            try:
+                result = await provider.apply_topology_diff(
+                    lab_id=lab_id,
+                    add=DeployTopology(nodes=request.add_nodes, links=request.add_links),
+                    remove_nodes=request.remove_nodes,
+                    remove_links=request.remove_links,
+                    workspace=get_workspace(lab_id),
+                )
+            except NotImplementedError as e:
+                raise HTTPException(status_code=501, detail=str(e))
+
+            logger.info(f"Incremental deploy finished: lab={lab_id}, success={result.success}")
+            return JobResult(
+                job_id=request.job_id,
+                status=JobStatus.COMPLETED if result.success else JobStatus.FAILED,
+                stdout=result.stdout,
+                stderr=result.stderr,
+                error_message=None if result.success else result.error,
+            )
+
+    except LockAcquisitionTimeout as e:
+        logger.warning(f"Timeout waiting for deploy lock on lab {lab_id}: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Deploy already in progress for lab {lab_id}, try again later"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Incremental deploy error for lab {lab_id}: {e}", exc_info=True)
+        return JobResult(
+            job_id=request.job_id,
+            status=JobStatus.FAILED,
+            error_message=str(e),
+        )
+
+
 async def _execute_deploy_with_callback(
     job_id: str,
     lab_id: str,
@@ -936,6 +1070,7 @@ async def _execute_deploy_with_callback(
     topology_yaml: str | None,
     provider_name: str,
     callback_url: str,
+    checkpoint_id: str | None = None,
 ) -> None:
     """Execute deploy in background and send result via callback.
 
@@ -993,6 +1128,7 @@ async def _execute_deploy_with_callback(
                         topology=topology,
                         topology_yaml=topology_yaml,
                         workspace=workspace,
+                        checkpoint_id=checkpoint_id,
                     )
 
                 logger.info(f"Async deploy finished: lab={lab_id}, success={result.success}")
@@ -1098,6 +1234,7 @@ async def destroy_lab(request: DestroyRequest) -> JobResult:
                     status=JobStatus.COMPLETED,
                     stdout=result.stdout,
                     stderr=result.stderr,
+                    timings=result.timings,
                 )
             else:
                 return JobResult(
@@ -1106,6 +1243,7 @@ async def destroy_lab(request: DestroyRequest) -> JobResult:
                     stdout=result.stdout,
                     stderr=result.stderr,
                     error_message=result.error,
+                    timings=result.timings,
                 )
     except LockAcquisitionTimeout:
         logger.warning(f"Timeout waiting for lock on lab {request.lab_id} for destroy")
@@ -1265,6 +1403,84 @@ async def node_action(request: NodeActionRequest) -> JobResult:
         )
 
 
+@app.post("/jobs/node-actions")
+async def bulk_node_action(request: BulkNodeActionRequest) -> StreamingResponse:
+    """Start or stop several nodes of a lab concurrently.
+
+    Holds the lab lock for the whole batch and streams one
+    NodeActionOutcome JSON line per node as each one finishes.
+    """
+    from agent.locks import LockAcquisitionTimeout
+
+    logger.info(
+        f"Bulk node action: lab={request.lab_id}, action={request.action}, "
+        f"nodes={len(request.nodes)}"
+    )
+
+    if request.action not in ("start", "stop"):
+        raise HTTPException(status_code=400, detail=f"Unknown action: {request.action}")
+
+    lock_manager = get_lock_manager()
+    if lock_manager is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Lock manager not initialized"
+        )
+
+    # Take the lock before streaming starts so contention is still a 503
+    stack = AsyncExitStack()
+    try:
+        await stack.enter_async_context(lock_manager.acquire_with_heartbeat(
+            request.lab_id,
+            timeout=10.0,
+            extend_interval=settings.lock_extend_interval,
+        ))
+    except LockAcquisitionTimeout:
+        logger.warning(f"Timeout waiting for lock on lab {request.lab_id} for bulk node action")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Another operation is in progress for lab {request.lab_id}, try again later"
+        )
+
+    try:
+        provider = get_provider_for_request()
+        workspace = get_workspace(request.lab_id)
+    except BaseException:
+        await stack.aclose()
+        raise
+
+    async def generate():
+        try:
+            async for result in provider.node_actions(
+                lab_id=request.lab_id,
+                node_names=request.nodes,
+                action=request.action,
+                workspace=workspace,
+                max_concurrency=request.max_concurrency or settings.node_action_concurrency,
+                stagger=settings.node_start_stagger,
+            ):
+                outcome = NodeActionOutcome(
+                    node_name=result.node_name,
+                    success=result.success,
+                    status=provider_status_to_schema(result.new_status),
+                    stdout=result.stdout,
+                    stderr=result.stderr,
+                    error=result.error,
+                )
+                yield outcome.model_dump_json() + "\n"
+        finally:
+            await stack.aclose()
+
+    # The generator's finally only runs once iteration starts; if the client
+    # disconnects before the first chunk, the background task releases the
+    # lock instead (aclose() is a no-op the second time)
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(stack.aclose),
+    )
+
+
 # --- Status Endpoints ---
 
 @app.post("/labs/status")
@@ -1299,6 +1515,25 @@ async def lab_status(request: LabStatusRequest) -> LabStatusResponse:
     )
 
 
+@app.get("/labs/{lab_id}/deploy-progress")
+async def lab_deploy_progress(lab_id: str) -> StreamingResponse:
+    """Stream per-node progress of the lab's current (or last) VM deploy.
+
+    One JSON line per event: every node's phase changes from the start of
+    the deploy, then live events, ending with a "done" event.
+    """
+    from agent.deploy_progress import deploy_progress
+
+    if not deploy_progress.has_lab(lab_id):
+        raise HTTPException(status_code=404, detail=f"No deploy progress for lab {lab_id}")
+
+    async def generate():
+        async for event in deploy_progress.subscribe(lab_id):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @app.post("/labs/{lab_id}/extract-configs")
 async def extract_configs(lab_id: str) -> ExtractConfigsResponse:
     """Extract running configs from all cEOS nodes in a lab.
@@ -1337,6 +1572,68 @@ async def extract_configs(lab_id: str) -> ExtractConfigsResponse:
         )
 
 
+@app.post("/labs/{lab_id}/checkpoints")
+async def create_checkpoint(lab_id: str, request: CheckpointRequest) -> CheckpointResponse:
+    """Capture a running lab so a later deploy can restore it.
+
+    Holds the lab lock so the lab isn't deployed or destroyed mid-capture.
+    """
+    from agent.locks import LockAcquisitionTimeout
+
+    logger.info(f"Checkpoint request: lab={lab_id}, checkpoint={request.checkpoint_id}")
+    lock_manager = get_lock_manager()
+    if lock_manager is None:
+        raise HTTPException(status_code=503, detail="Lock manager not initialized")
+
+    provider = get_provider_for_request(request.provider.value)
+    try:
+        async with lock_manager.acquire_with_heartbeat(
+            lab_id,
+            timeout=settings.lock_acquire_timeout,
+            extend_interval=settings.lock_extend_interval,
+        ):
+            result = await provider.create_checkpoint(
+                lab_id,
+                request.checkpoint_id,
+                get_workspace(lab_id),
+                include_memory=request.include_memory,
+            )
+    except LockAcquisitionTimeout:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Another operation is in progress for lab {lab_id}, try again later",
+        )
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Checkpoint error for lab {lab_id}: {e}", exc_info=True)
+        return CheckpointResponse(success=False, checkpoint_id=request.checkpoint_id, error=str(e))
+
+    return CheckpointResponse(
+        success=result.success,
+        checkpoint_id=request.checkpoint_id,
+        nodes=result.nodes,
+        stateful_nodes=result.stateful_nodes,
+        size_bytes=result.size_bytes,
+        error=result.error or (result.stderr or None),
+    )
+
+
+@app.delete("/labs/{lab_id}/checkpoints/{checkpoint_id}")
+async def delete_checkpoint(lab_id: str, checkpoint_id: str, provider: str = "docker") -> dict:
+    """Remove a checkpoint's images and files from this agent."""
+    logger.info(f"Delete checkpoint: lab={lab_id}, checkpoint={checkpoint_id}")
+    try:
+        await get_provider_for_request(provider).delete_checkpoint(lab_id, checkpoint_id)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True}
+
+
 # --- Container Control Endpoints ---
 
 @app.post("/containers/{container_name}/start")
@@ -2841,6 +3138,9 @@ async def list_bridges() -> dict:
 # Track active image pull jobs
 _image_pull_jobs: dict[str, ImagePullProgress] = {}
 
+# Resumable image receives by sync job ID (see /images/receive/session)
+_image_receive_sessions: dict = {}
+
 
 def _get_docker_images() -> list[DockerImageInfo]:
     """Get list of Docker images on this agent."""
@@ -2869,15 +3169,167 @@ def _get_docker_images() -> list[DockerImageInfo]:
         return []
 
 
+def _qcow2_image_info(image) -> Qcow2ImageInfo:
+    return Qcow2ImageInfo(
+        name=image.name,
+        path=image.path,
+        size_bytes=image.size_bytes,
+        version=image.version,
+        checksum=image.checksum,
+        backing_chain=image.backing_chain,
+    )
+
+
 @app.get("/images")
 def list_images() -> ImageInventoryResponse:
-    """List all Docker images on this agent.
+    """List all Docker images (and, with libvirt, qcow2 images) on this agent.
 
     Returns a list of images with their tags, sizes, and IDs.
     Used by controller to check image availability before deployment.
     """
     images = _get_docker_images()
-    return ImageInventoryResponse(images=images)
+    qcow2_images = []
+    if settings.enable_libvirt:
+        from agent.image_catalog import image_catalog
+        qcow2_images = [_qcow2_image_info(i) for i in image_catalog.images()]
+    return ImageInventoryResponse(images=images, qcow2_images=qcow2_images)
+
+
+def _compute_chain_ids(diff_ids: list[str]) -> list[str]:
+    """Compute layer chain IDs from an image's ordered diff IDs.
+
+    Docker's layer store keys layers by chain ID (the layer plus all of its
+    parents), so this is what decides whether `docker load` can skip a layer.
+    """
+    import hashlib
+
+    chain_ids: list[str] = []
+    for diff_id in diff_ids:
+        if not chain_ids:
+            chain_ids.append(diff_id)
+        else:
+            digest = hashlib.sha256(f"{chain_ids[-1]} {diff_id}".encode()).hexdigest()
+            chain_ids.append(f"sha256:{digest}")
+    return chain_ids
+
+
+def _get_local_layer_chain_ids() -> list[str]:
+    """Get chain IDs of all layers present in the local Docker daemon."""
+    try:
+        import docker
+        client = docker.from_env()
+        chain_ids: set[str] = set()
+        for img in client.images.list(all=True):
+            diff_ids = img.attrs.get("RootFS", {}).get("Layers") or []
+            chain_ids.update(_compute_chain_ids(diff_ids))
+        return sorted(chain_ids)
+    except Exception as e:
+        logger.error(f"Error listing Docker image layers: {e}")
+        return []
+
+
+@app.get("/images/layers")
+def list_image_layers() -> ImageLayersResponse:
+    """List layer chain IDs present on this agent.
+
+    The controller uses this to stream only the layers this agent is
+    missing. Must be registered before the catch-all /images/{reference}.
+    """
+    return ImageLayersResponse(chain_ids=_get_local_layer_chain_ids())
+
+
+@app.get("/images/export/manifest")
+async def export_image_manifest(reference: str) -> dict:
+    """Chunk manifest of a local image for a resumable peer pull.
+
+    Spools the image on first use; /images/export serves the same bytes.
+    Must be registered before the catch-all /images/{reference}.
+    """
+    from agent.image_export import ImageExportError, prepare_export
+
+    try:
+        export = await prepare_export(reference)
+    except ImageExportError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return export.manifest
+
+
+@app.get("/images/export")
+async def export_image(reference: str, request: Request) -> StreamingResponse:
+    """Stream a local Docker image to a peer agent.
+
+    Serves the spooled `docker save` output so the controller can build a
+    fan-out tree where agents that already have an image feed agents that
+    don't. Supports `Range: bytes=N-` to resume from a verified offset and
+    compresses with the best codec the peer offers in X-Image-Codecs.
+    Must be registered before the catch-all /images/{reference}.
+    """
+    from agent.image_export import (
+        ImageExportError,
+        compress_stream,
+        iter_export,
+        negotiate_codec,
+        prepare_export,
+    )
+    from agent.image_loader import (
+        ACCEPT_CODECS_HEADER,
+        CODEC_HEADER,
+        CODEC_IDENTITY,
+        UNCOMPRESSED_LENGTH_HEADER,
+    )
+
+    try:
+        export = await prepare_export(reference)
+    except ImageExportError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    start = 0
+    range_header = request.headers.get("range", "")
+    if range_header.startswith("bytes=") and range_header.endswith("-"):
+        try:
+            start = int(range_header[len("bytes="):-1])
+        except ValueError:
+            start = 0
+    if start > export.size:
+        raise HTTPException(status_code=416, detail=f"Offset {start} beyond {export.size} bytes")
+
+    logger.info(f"Exporting image {reference} to peer from offset {start}")
+
+    headers = {"X-Artifact-Id": export.artifact_id}
+    if start:
+        headers["Content-Range"] = f"bytes {start}-{export.size - 1}/{export.size}"
+    body = iter_export(export, start)
+    codec = negotiate_codec(request.headers.get(ACCEPT_CODECS_HEADER))
+    if codec != CODEC_IDENTITY:
+        headers[CODEC_HEADER] = codec
+        headers[UNCOMPRESSED_LENGTH_HEADER] = str(export.size - start)
+        body = compress_stream(body, codec)
+    else:
+        headers["Content-Length"] = str(export.size - start)
+
+    return StreamingResponse(
+        body,
+        status_code=206 if start else 200,
+        media_type="application/x-tar",
+        headers=headers,
+    )
+
+
+@app.get("/images/receive/session/{job_id}")
+def get_receive_session(job_id: str) -> ImageReceiveSessionResponse:
+    """Get the resume position of a resumable image receive.
+
+    Must be registered before the catch-all /images/{reference}.
+    """
+    load = _image_receive_sessions.get(job_id)
+    if load is None:
+        raise HTTPException(status_code=404, detail=f"No receive session for job {job_id}")
+    return ImageReceiveSessionResponse(
+        job_id=job_id,
+        verified_offset=load.verified_offset,
+        size=load.size,
+        complete=load.complete,
+    )
 
 
 @app.get("/images/{reference:path}")
@@ -2885,11 +3337,21 @@ def check_image(reference: str) -> ImageExistsResponse:
     """Check if a specific image exists on this agent.
 
     Args:
-        reference: Docker image reference (e.g., "ceos:4.28.0F")
+        reference: Docker image reference (e.g., "ceos:4.28.0F"), or a
+            qcow2 filename/path, resolved through the image catalog
 
     Returns:
         Whether the image exists and its details if found.
     """
+    if reference.lower().endswith((".qcow2", ".qcow")):
+        from agent.image_catalog import image_catalog
+        path = image_catalog.resolve(reference)
+        image = image_catalog.get(Path(path).name) if path else None
+        return ImageExistsResponse(
+            exists=path is not None,
+            qcow2_image=_qcow2_image_info(image) if image else None,
+        )
+
     try:
         import docker
         client = docker.from_env()
@@ -2914,6 +3376,92 @@ def check_image(reference: str) -> ImageExistsResponse:
         return ImageExistsResponse(exists=False)
 
 
+def _set_transfer_progress(
+    job_id: str,
+    status: str,
+    bytes_transferred: int,
+    total_bytes: int,
+    max_percent: int = 95,
+) -> None:
+    """Record transfer progress for an image job from bytes consumed."""
+    if not job_id:
+        return
+    if total_bytes > 0:
+        percent = min(max_percent, int((bytes_transferred / total_bytes) * max_percent))
+    else:
+        percent = min(max_percent, bytes_transferred // (1024 * 1024))  # 1% per MB
+    _image_pull_jobs[job_id] = ImagePullProgress(
+        job_id=job_id,
+        status=status,
+        progress_percent=percent,
+        bytes_transferred=bytes_transferred,
+        total_bytes=total_bytes,
+    )
+
+
+async def _receive_into_docker(
+    chunks,
+    reference: str,
+    total_bytes: int,
+    job_id: str,
+    codec: str | None = None,
+) -> ImageReceiveResponse:
+    """Stream incoming archive chunks into docker load and track progress."""
+    from agent.image_loader import ImageLoadError, load_image_stream
+
+    _set_transfer_progress(job_id, "transferring", 0, total_bytes)
+
+    try:
+        loaded_images, bytes_received = await load_image_stream(
+            chunks,
+            on_progress=lambda n: _set_transfer_progress(job_id, "transferring", n, total_bytes),
+            codec=codec,
+        )
+    except ImageLoadError as e:
+        error_msg = str(e)
+        logger.error(f"Docker load failed for {reference}: {error_msg}")
+        if job_id:
+            _image_pull_jobs[job_id] = ImagePullProgress(
+                job_id=job_id,
+                status="failed",
+                progress_percent=0,
+                error=error_msg,
+            )
+        return ImageReceiveResponse(success=False, error=error_msg)
+    except Exception as e:
+        logger.error(f"Error receiving image {reference}: {e}", exc_info=True)
+        error_msg = str(e)
+        if job_id:
+            _image_pull_jobs[job_id] = ImagePullProgress(
+                job_id=job_id,
+                status="failed",
+                error=error_msg,
+            )
+        return ImageReceiveResponse(success=False, error=error_msg)
+
+    logger.info(f"Successfully loaded images: {loaded_images} ({bytes_received} bytes)")
+
+    if job_id:
+        _image_pull_jobs[job_id] = ImagePullProgress(
+            job_id=job_id,
+            status="completed",
+            progress_percent=100,
+            bytes_transferred=bytes_received,
+            total_bytes=total_bytes,
+        )
+
+    return ImageReceiveResponse(success=True, loaded_images=loaded_images)
+
+
+def _archive_length(headers) -> int:
+    """Uncompressed archive size from transfer headers, 0 if unknown."""
+    from agent.image_loader import CODEC_HEADER, UNCOMPRESSED_LENGTH_HEADER
+
+    if headers.get(CODEC_HEADER, "identity") != "identity":
+        return int(headers.get(UNCOMPRESSED_LENGTH_HEADER, 0))
+    return int(headers.get("content-length", 0))
+
+
 @app.post("/images/receive")
 async def receive_image(
     file: UploadFile,
@@ -2922,10 +3470,10 @@ async def receive_image(
     total_bytes: int = 0,
     job_id: str = "",
 ) -> ImageReceiveResponse:
-    """Receive a streamed Docker image tar from controller.
+    """Receive a Docker image tar from controller as a multipart upload.
 
-    This endpoint accepts a Docker image tar file (from `docker save`)
-    and loads it into the local Docker daemon.
+    Kept for controllers that predate /images/receive/stream. The upload
+    is piped into `docker load` without a second copy on disk.
 
     Args:
         file: The image tar file
@@ -2937,127 +3485,189 @@ async def receive_image(
     Returns:
         Result of loading the image
     """
-    import os
-    import subprocess
-    import tempfile
-
     logger.info(f"Receiving image: {reference} ({total_bytes} bytes)")
 
-    # Update progress if job_id provided
+    async def chunks():
+        while True:
+            chunk = await file.read(1024 * 1024)
+            if not chunk:
+                break
+            yield chunk
+
+    return await _receive_into_docker(chunks(), reference, total_bytes, job_id)
+
+
+async def _reap_receive_sessions() -> None:
+    """Abort resumable receives the controller has abandoned."""
+    import time
+
+    cutoff = time.monotonic() - settings.image_receive_session_timeout
+    for job_id, load in list(_image_receive_sessions.items()):
+        if load.last_activity < cutoff:
+            _image_receive_sessions.pop(job_id, None)
+            await load.abort()
+            logger.warning(f"Dropped idle image receive session {job_id}")
+
+
+async def receive_session_reaper_loop() -> None:
+    """Background task that reaps abandoned resumable receives.
+
+    Without it an abandoned transfer keeps its `docker load` process alive
+    until the next session starts, which may be never.
+    """
+    interval = min(60.0, settings.image_receive_session_timeout)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await _reap_receive_sessions()
+        except Exception as e:
+            logger.warning(f"Image receive session reaper failed: {e}")
+
+
+def _fail_transfer(job_id: str, error_msg: str) -> ImageReceiveResponse:
     if job_id:
         _image_pull_jobs[job_id] = ImagePullProgress(
             job_id=job_id,
-            status="transferring",
-            progress_percent=0,
-            bytes_transferred=0,
-            total_bytes=total_bytes,
+            status="failed",
+            error=error_msg,
         )
+    return ImageReceiveResponse(success=False, error=error_msg)
 
-    try:
-        # Save uploaded file to temp
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".tar") as tmp_file:
-            bytes_written = 0
-            chunk_size = 1024 * 1024  # 1MB chunks
 
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                tmp_file.write(chunk)
-                bytes_written += len(chunk)
-
-                # Update progress
-                if job_id and total_bytes > 0:
-                    percent = min(90, int((bytes_written / total_bytes) * 90))
-                    _image_pull_jobs[job_id] = ImagePullProgress(
-                        job_id=job_id,
-                        status="transferring",
-                        progress_percent=percent,
-                        bytes_transferred=bytes_written,
-                        total_bytes=total_bytes,
-                    )
+@app.post("/images/receive/session")
+async def start_receive_session(request: ImageReceiveSessionRequest) -> ImageReceiveSessionResponse:
+    """Start a resumable image receive for a sync job.
 
-            tmp_path = tmp_file.name
+    Starts `docker load` and keeps it running across /images/receive/stream
+    requests, each of which continues at the last verified offset.
+    Restarting a session for the same job discards the previous one.
+    """
+    from agent.image_loader import ResumableImageLoad
+
+    await _reap_receive_sessions()
+    previous = _image_receive_sessions.pop(request.job_id, None)
+    if previous is not None:
+        await previous.abort()
+
+    job_id = request.job_id
+    total_bytes = int(request.manifest.get("size", 0))
+    load = ResumableImageLoad(
+        request.manifest,
+        on_progress=lambda n: _set_transfer_progress(job_id, "transferring", n, total_bytes),
+    )
+    await load.start()
+    _image_receive_sessions[job_id] = load
+    _set_transfer_progress(job_id, "transferring", 0, total_bytes)
 
-        logger.debug(f"Saved {bytes_written} bytes to {tmp_path}")
+    logger.info(
+        f"Started resumable receive of {request.reference} for job {job_id} "
+        f"({total_bytes} bytes, {len(load.chunks)} chunks)"
+    )
+    return ImageReceiveSessionResponse(job_id=job_id, size=load.size)
 
-        # Update status to loading
-        if job_id:
-            _image_pull_jobs[job_id] = ImagePullProgress(
-                job_id=job_id,
-                status="loading",
-                progress_percent=90,
-                bytes_transferred=bytes_written,
-                total_bytes=total_bytes,
-            )
 
-        # Load into Docker
-        result = subprocess.run(
-            ["docker", "load", "-i", tmp_path],
-            capture_output=True,
-            text=True,
-            timeout=600,  # 10 minute timeout for large images
+async def _receive_into_session(
+    request: Request,
+    reference: str,
+    job_id: str,
+    offset: int,
+) -> ImageReceiveResponse:
+    """Feed one request body into a resumable receive session.
+
+    Responds 409 when the body cannot be used from this offset or ends
+    early; the sender then resumes from the session's verified offset.
+    """
+    from starlette.requests import ClientDisconnect
+
+    from agent.image_loader import CODEC_HEADER, ChunkVerificationError, ImageLoadError
+
+    load = _image_receive_sessions[job_id]
+    if offset != load.verified_offset:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Expected offset {load.verified_offset}, got {offset}",
         )
 
-        # Clean up temp file
-        os.unlink(tmp_path)
+    try:
+        await load.feed(request.stream(), request.headers.get(CODEC_HEADER))
+    except ChunkVerificationError as e:
+        logger.warning(f"Rejected image data for {reference}: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except ClientDisconnect:
+        logger.warning(
+            f"Sender disconnected while receiving {reference} at "
+            f"{load.verified_offset}/{load.size} bytes"
+        )
+        raise HTTPException(status_code=409, detail="Sender disconnected")
+    except ImageLoadError as e:
+        _image_receive_sessions.pop(job_id, None)
+        logger.error(f"Docker load failed for {reference}: {e}")
+        return _fail_transfer(job_id, str(e))
 
-        if result.returncode != 0:
-            error_msg = result.stderr or result.stdout or "docker load failed"
-            logger.error(f"Docker load failed for {reference}: {error_msg}")
-            if job_id:
-                _image_pull_jobs[job_id] = ImagePullProgress(
-                    job_id=job_id,
-                    status="failed",
-                    progress_percent=0,
-                    error=error_msg,
-                )
-            return ImageReceiveResponse(success=False, error=error_msg)
+    if not load.complete:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Stream ended at {load.verified_offset} of {load.size} bytes",
+        )
 
-        # Parse loaded images from output
-        output = (result.stdout or "") + (result.stderr or "")
-        loaded_images = []
-        for line in output.splitlines():
-            if "Loaded image:" in line:
-                loaded_images.append(line.split("Loaded image:", 1)[-1].strip())
-            elif "Loaded image ID:" in line:
-                loaded_images.append(line.split("Loaded image ID:", 1)[-1].strip())
+    _image_receive_sessions.pop(job_id, None)
+    try:
+        loaded_images = await load.finish()
+    except ImageLoadError as e:
+        logger.error(f"Docker load failed for {reference}: {e}")
+        return _fail_transfer(job_id, str(e))
 
-        logger.info(f"Successfully loaded images: {loaded_images}")
+    logger.info(f"Successfully loaded images: {loaded_images} ({load.size} bytes, verified)")
+    _image_pull_jobs[job_id] = ImagePullProgress(
+        job_id=job_id,
+        status="completed",
+        progress_percent=100,
+        bytes_transferred=load.size,
+        total_bytes=load.size,
+    )
+    return ImageReceiveResponse(success=True, loaded_images=loaded_images)
 
-        # Update final status
-        if job_id:
-            _image_pull_jobs[job_id] = ImagePullProgress(
-                job_id=job_id,
-                status="completed",
-                progress_percent=100,
-                bytes_transferred=bytes_written,
-                total_bytes=total_bytes,
-            )
 
-        return ImageReceiveResponse(success=True, loaded_images=loaded_images)
+@app.post("/images/receive/stream")
+async def receive_image_stream(
+    request: Request,
+    image_id: str = "",
+    reference: str = "",
+    total_bytes: int = 0,
+    job_id: str = "",
+    offset: int = 0,
+) -> ImageReceiveResponse:
+    """Receive a Docker image tar as a raw streamed request body.
 
-    except subprocess.TimeoutExpired:
-        error_msg = "docker load timed out"
-        logger.error(f"Docker load timeout for {reference}")
-        if job_id:
-            _image_pull_jobs[job_id] = ImagePullProgress(
-                job_id=job_id,
-                status="failed",
-                error=error_msg,
-            )
-        return ImageReceiveResponse(success=False, error=error_msg)
+    Chunks are piped straight into `docker load` as they arrive, so the
+    archive never touches the agent's disk and the event loop is never
+    blocked. Progress is reported from bytes consumed by Docker. A body
+    compressed by the controller is decompressed according to X-Image-Codec.
 
-    except Exception as e:
-        logger.error(f"Error receiving image {reference}: {e}", exc_info=True)
-        error_msg = str(e)
-        if job_id:
-            _image_pull_jobs[job_id] = ImagePullProgress(
-                job_id=job_id,
-                status="failed",
-                error=error_msg,
-            )
-        return ImageReceiveResponse(success=False, error=error_msg)
+    Args:
+        request: Raw request whose body is the image tar
+        image_id: Library image ID for tracking
+        reference: Docker reference (e.g., "ceos:4.28.0F")
+        total_bytes: Expected size for progress (falls back to the
+            X-Uncompressed-Length or Content-Length header)
+        job_id: Sync job ID for progress reporting
+        offset: Archive offset of the body when resuming a receive session
+
+    Returns:
+        Result of loading the image
+    """
+    from agent.image_loader import CODEC_HEADER
+
+    if job_id and job_id in _image_receive_sessions:
+        return await _receive_into_session(request, reference, job_id, offset)
+
+    codec = request.headers.get(CODEC_HEADER)
+    if not total_bytes:
+        total_bytes = _archive_length(request.headers)
+
+    logger.info(f"Receiving image stream: {reference} ({total_bytes} bytes, codec={codec or 'identity'})")
+
+    return await _receive_into_docker(request.stream(), reference, total_bytes, job_id, codec)
 
 
 @app.post("/images/pull")
@@ -3084,23 +3694,47 @@ async def pull_image(request: ImagePullRequest) -> ImagePullResponse:
     )
 
     # Start async pull task
-    asyncio.create_task(_execute_pull_from_controller(
-        job_id=job_id,
-        image_id=request.image_id,
-        reference=request.reference,
-    ))
+    if request.source_url:
+        asyncio.create_task(_execute_pull_from_peer(
+            job_id=job_id,
+            reference=request.reference,
+            source_url=request.source_url,
+        ))
+    else:
+        asyncio.create_task(_execute_pull_from_controller(
+            job_id=job_id,
+            image_id=request.image_id,
+            reference=request.reference,
+        ))
 
     return ImagePullResponse(job_id=job_id, status="pending")
 
 
-async def _execute_pull_from_controller(job_id: str, image_id: str, reference: str):
+async def _execute_pull_from_controller(
+    job_id: str,
+    image_id: str,
+    reference: str,
+    use_layer_delta: bool = True,
+):
     """Execute image pull from controller in background.
 
-    Fetches the image stream from the controller and loads it locally.
+    Streams the image from the controller straight into `docker load`.
+    With use_layer_delta, layers already present on this agent are omitted
+    by the controller; if loading the delta fails (e.g. a local layer was
+    pruned meanwhile) the pull is retried with the full archive.
+
+    When the controller publishes a chunk manifest, every chunk is verified
+    before it reaches Docker and dropped connections resume with a Range
+    request from the last verified chunk.
     """
-    import tempfile
-    import subprocess
-    import os
+    from agent.image_loader import (
+        ACCEPT_CODECS_HEADER,
+        CODEC_HEADER,
+        ImageLoadError,
+        accepted_codecs,
+        load_image_resumable,
+        load_image_stream,
+    )
 
     logger.info(f"Starting pull from controller: {reference}")
 
@@ -3116,87 +3750,226 @@ async def _execute_pull_from_controller(job_id: str, image_id: str, reference: s
         encoded_image_id = quote(image_id, safe='')
         stream_url = f"{settings.controller_url}/images/library/{encoded_image_id}/stream"
 
-        logger.debug(f"Fetching from: {stream_url}")
+        # Report local layers so the controller only sends missing ones
+        have_chain_ids: list[str] = []
+        if use_layer_delta:
+            have_chain_ids = await asyncio.to_thread(_get_local_layer_chain_ids)
+
+        logger.debug(f"Fetching from: {stream_url} ({len(have_chain_ids)} local layers)")
+
+        async def load_from(response: httpx.Response) -> tuple[list[str], int, int]:
+            total_bytes = _archive_length(response.headers)
+            loaded, received = await load_image_stream(
+                response.aiter_bytes(chunk_size=1024 * 1024),
+                on_progress=lambda n: _set_transfer_progress(
+                    job_id, "transferring", n, total_bytes
+                ),
+                codec=response.headers.get(CODEC_HEADER),
+            )
+            return loaded, received, total_bytes
+
+        # Offer compressed transfer; older controllers ignore the header
+        codec_headers = {ACCEPT_CODECS_HEADER: ", ".join(accepted_codecs())}
+
+        @asynccontextmanager
+        async def open_artifact(client: httpx.AsyncClient, manifest: dict, offset: int):
+            headers = dict(codec_headers)
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            async with client.stream(
+                "POST",
+                f"{stream_url}/delta",
+                json={"have_chain_ids": have_chain_ids},
+                headers=headers,
+            ) as response:
+                if response.status_code not in (200, 206) or (offset and response.status_code != 206):
+                    raise ConnectionError(f"Controller returned {response.status_code} for offset {offset}")
+                if response.headers.get("X-Artifact-Id") != manifest["artifact_id"]:
+                    raise ImageLoadError("Image changed on the controller during transfer")
+                yield (
+                    response.aiter_bytes(chunk_size=1024 * 1024),
+                    response.headers.get(CODEC_HEADER),
+                )
 
         # Stream the image from controller
+        use_delta = False
         async with httpx.AsyncClient(timeout=httpx.Timeout(600.0)) as client:
-            async with client.stream("GET", stream_url) as response:
-                if response.status_code != 200:
-                    error_msg = f"Controller returned {response.status_code}"
-                    _image_pull_jobs[job_id] = ImagePullProgress(
-                        job_id=job_id,
-                        status="failed",
-                        error=error_msg,
+            manifest_response = await client.post(
+                f"{stream_url}/manifest", json={"have_chain_ids": have_chain_ids}
+            )
+            if manifest_response.status_code == 200:
+                manifest = manifest_response.json()
+                total_bytes = manifest["size"]
+                try:
+                    _, bytes_written = await load_image_resumable(
+                        manifest,
+                        lambda offset: open_artifact(client, manifest, offset),
+                        retry_on=(httpx.TransportError,),
+                        on_progress=lambda n: _set_transfer_progress(
+                            job_id, "transferring", n, total_bytes
+                        ),
+                    )
+                except ImageLoadError as e:
+                    if not have_chain_ids:
+                        raise
+                    logger.warning(
+                        f"Delta load failed for {reference}, retrying with full archive: {e}"
+                    )
+                    await _execute_pull_from_controller(
+                        job_id, image_id, reference, use_layer_delta=False
                     )
                     return
-
-                # Get content length if available
-                total_bytes = int(response.headers.get("content-length", 0))
-
-                # Save to temp file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".tar") as tmp_file:
-                    bytes_written = 0
-                    async for chunk in response.aiter_bytes(chunk_size=1024 * 1024):
-                        tmp_file.write(chunk)
-                        bytes_written += len(chunk)
-
-                        # Update progress
-                        if total_bytes > 0:
-                            percent = min(85, int((bytes_written / total_bytes) * 85))
-                        else:
-                            percent = min(85, bytes_written // (1024 * 1024))  # 1% per MB
+                _image_pull_jobs[job_id] = ImagePullProgress(
+                    job_id=job_id,
+                    status="completed",
+                    progress_percent=100,
+                    bytes_transferred=bytes_written,
+                    total_bytes=total_bytes,
+                )
+                logger.info(f"Successfully loaded image: {reference} ({bytes_written} bytes, verified)")
+                return
+
+            # Controller without chunk manifests - stream without resume
+            async with client.stream(
+                "POST",
+                f"{stream_url}/delta",
+                json={"have_chain_ids": have_chain_ids},
+                headers=codec_headers,
+            ) as delta_response:
+                use_delta = delta_response.status_code == 200
+                if use_delta:
+                    try:
+                        _, bytes_written, total_bytes = await load_from(delta_response)
+                    except ImageLoadError as e:
+                        if not have_chain_ids:
+                            raise
+                        logger.warning(
+                            f"Delta load failed for {reference}, retrying with full archive: {e}"
+                        )
+                        await _execute_pull_from_controller(
+                            job_id, image_id, reference, use_layer_delta=False
+                        )
+                        return
+            if not use_delta:
+                # Older controller without delta support - fetch the full archive
+                async with client.stream("GET", stream_url, headers=codec_headers) as response:
+                    if response.status_code != 200:
+                        error_msg = f"Controller returned {response.status_code}"
                         _image_pull_jobs[job_id] = ImagePullProgress(
                             job_id=job_id,
-                            status="transferring",
-                            progress_percent=percent,
-                            bytes_transferred=bytes_written,
-                            total_bytes=total_bytes,
+                            status="failed",
+                            error=error_msg,
                         )
+                        return
 
-                    tmp_path = tmp_file.name
-
-        logger.debug(f"Downloaded {bytes_written} bytes")
+                    _, bytes_written, total_bytes = await load_from(response)
 
-        # Update to loading status
+        logger.info(f"Successfully loaded image: {reference} ({bytes_written} bytes)")
         _image_pull_jobs[job_id] = ImagePullProgress(
             job_id=job_id,
-            status="loading",
-            progress_percent=90,
+            status="completed",
+            progress_percent=100,
             bytes_transferred=bytes_written,
             total_bytes=total_bytes,
         )
 
-        # Load into Docker
-        result = subprocess.run(
-            ["docker", "load", "-i", tmp_path],
-            capture_output=True,
-            text=True,
-            timeout=600,
+    except ImageLoadError as e:
+        logger.error(f"Docker load failed for {reference}: {e}")
+        _image_pull_jobs[job_id] = ImagePullProgress(
+            job_id=job_id,
+            status="failed",
+            error=str(e),
+        )
+
+    except Exception as e:
+        logger.error(f"Error pulling image {reference}: {e}", exc_info=True)
+        _image_pull_jobs[job_id] = ImagePullProgress(
+            job_id=job_id,
+            status="failed",
+            error=str(e),
         )
 
-        os.unlink(tmp_path)
 
-        if result.returncode != 0:
-            error_msg = result.stderr or result.stdout or "docker load failed"
-            logger.error(f"Docker load failed for {reference}: {error_msg}")
-            _image_pull_jobs[job_id] = ImagePullProgress(
-                job_id=job_id,
-                status="failed",
-                error=error_msg,
+async def _execute_pull_from_peer(job_id: str, reference: str, source_url: str):
+    """Pull an image from a peer agent's /images/export endpoint.
+
+    Used for peer-to-peer distribution orchestrated by the controller.
+    Every chunk is verified against the peer's export manifest before it
+    reaches `docker load`, and dropped connections resume with a Range
+    request from the last verified chunk. Peers without export manifests
+    are streamed without resume.
+    """
+    from agent.image_loader import (
+        ACCEPT_CODECS_HEADER,
+        CODEC_HEADER,
+        ImageLoadError,
+        accepted_codecs,
+        load_image_resumable,
+        load_image_stream,
+    )
+
+    logger.info(f"Starting pull from peer: {reference} <- {source_url}")
+    _set_transfer_progress(job_id, "transferring", 0, 0)
+    params = {"reference": reference}
+    codec_headers = {ACCEPT_CODECS_HEADER: ", ".join(accepted_codecs())}
+
+    @asynccontextmanager
+    async def open_export(client: httpx.AsyncClient, manifest: dict, offset: int):
+        headers = dict(codec_headers)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        async with client.stream("GET", source_url, params=params, headers=headers) as response:
+            if response.status_code not in (200, 206) or (offset and response.status_code != 206):
+                raise ConnectionError(f"Peer returned {response.status_code} for offset {offset}")
+            if response.headers.get("X-Artifact-Id") != manifest["artifact_id"]:
+                raise ImageLoadError("Image changed on the peer during transfer")
+            yield (
+                response.aiter_bytes(chunk_size=1024 * 1024),
+                response.headers.get(CODEC_HEADER),
             )
-            return
 
-        logger.info(f"Successfully loaded image: {reference}")
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(600.0)) as client:
+            manifest_response = await client.get(f"{source_url}/manifest", params=params)
+            if manifest_response.status_code == 200:
+                manifest = manifest_response.json()
+                total_bytes = manifest["size"]
+                _, bytes_written = await load_image_resumable(
+                    manifest,
+                    lambda offset: open_export(client, manifest, offset),
+                    retry_on=(httpx.TransportError,),
+                    on_progress=lambda n: _set_transfer_progress(
+                        job_id, "transferring", n, total_bytes
+                    ),
+                )
+            else:
+                # Peer without export manifests - stream without resume
+                async with client.stream(
+                    "GET", source_url, params=params, headers=codec_headers
+                ) as response:
+                    if response.status_code != 200:
+                        raise ValueError(f"Peer returned {response.status_code}")
+
+                    total_bytes = _archive_length(response.headers)
+                    _, bytes_written = await load_image_stream(
+                        response.aiter_bytes(chunk_size=1024 * 1024),
+                        on_progress=lambda n: _set_transfer_progress(
+                            job_id, "transferring", n, total_bytes
+                        ),
+                        codec=response.headers.get(CODEC_HEADER),
+                    )
+
+        logger.info(f"Successfully loaded image from peer: {reference} ({bytes_written} bytes)")
         _image_pull_jobs[job_id] = ImagePullProgress(
             job_id=job_id,
             status="completed",
             progress_percent=100,
             bytes_transferred=bytes_written,
-            total_bytes=total_bytes,
+            total_bytes=total_bytes or bytes_written,
         )
 
     except Exception as e:
-        logger.error(f"Error pulling image {reference}: {e}", exc_info=True)
+        logger.error(f"Error pulling image {reference} from peer: {e}")
         _image_pull_jobs[job_id] = ImagePullProgress(
             job_id=job_id,
             status="failed",
@@ -3275,26 +4048,54 @@ def _get_container_ip(container_name: str) -> str | None:
         return None
 
 
-def _get_container_boot_logs(container_name: str, tail_lines: int = 50) -> str | None:
-    """Get recent boot logs from a container.
+async def _get_container_boot_logs(container_name: str) -> str | None:
+    """Boot log block shown before the CLI, rendered as a single chunk.
 
-    Args:
-        container_name: Name of the container
-        tail_lines: Number of log lines to retrieve (default 50)
+    Served from the container's boot log ring buffer, so repeated console
+    connects don't re-read the container's logs.
 
     Returns:
-        Log output as string, or None if unavailable
+        Pre-rendered log block, or None if the container has no logs
     """
     try:
-        import docker
-        client = docker.from_env()
-        container = client.containers.get(container_name)
-        logs = container.logs(tail=tail_lines, timestamps=False).decode("utf-8", errors="replace")
-        return logs if logs.strip() else None
+        from agent.boot_logs import boot_logs
+        log = await boot_logs.get(container_name)
+        return log.render()
     except Exception:
         return None
 
 
+@app.get("/labs/{lab_id}/recordings")
+def lab_recordings(lab_id: str) -> dict:
+    """List the lab's console recordings, newest first."""
+    return {"lab_id": lab_id, "recordings": list_recordings(lab_id)}
+
+
+@app.get("/labs/{lab_id}/recordings/{recording_id}")
+def stream_recording(
+    lab_id: str, recording_id: str, start: float = 0.0, format: str = "asciicast"
+) -> StreamingResponse:
+    """Stream a console recording from start seconds in.
+
+    format=asciicast streams asciicast v2 lines (playable with asciinema);
+    format=raw streams the compact recording itself, from the keyframe
+    covering start. Recordings still in progress stream what is written.
+    """
+    path = recording_path(lab_id, recording_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Recording {recording_id} not found")
+    if format not in ("asciicast", "raw"):
+        raise HTTPException(status_code=400, detail=f"Unknown recording format: {format}")
+    try:
+        reader = RecordingReader(path)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if format == "raw":
+        return StreamingResponse(reader.iter_raw(start), media_type="application/octet-stream")
+    return StreamingResponse(reader.iter_asciicast(start), media_type="application/x-asciicast")
+
+
 @app.websocket("/console/{lab_id}/{node_name}")
 async def console_websocket(websocket: WebSocket, lab_id: str, node_name: str):
     """WebSocket endpoint for console access to a node."""
@@ -3312,14 +4113,48 @@ async def console_websocket(websocket: WebSocket, lab_id: str, node_name: str):
     # Get console configuration based on node kind
     method, shell_cmd, username, password = _get_console_config(container_name)
 
-    if method == "ssh":
-        # SSH-based console for vrnetlab/VM containers
-        await _console_websocket_ssh(
-            websocket, container_name, node_name, username, password
-        )
+    # Record the session if enabled; clients can opt in or out with ?record=1/0
+    record = websocket.query_params.get("record")
+    if record is None:
+        recording = settings.console_recording_enabled
     else:
-        # Docker exec-based console for native containers
-        await _console_websocket_docker(websocket, container_name, node_name, shell_cmd)
+        recording = record.lower() in ("1", "true", "yes")
+    recorder: ConsoleRecorder | None = None
+    if recording:
+        try:
+            recorder = ConsoleRecorder(lab_id, node_name)
+            recorder.start()
+        except ValueError as e:
+            logger.warning(f"Not recording console of {node_name}: {e}")
+
+    metrics.console_sessions.inc(method=method)
+    try:
+        if method == "ssh":
+            # SSH-based console for vrnetlab/VM containers
+            await _console_websocket_ssh(
+                websocket, container_name, node_name, username, password, recorder
+            )
+        else:
+            # Docker exec-based console for native containers
+            await _console_websocket_docker(
+                websocket, container_name, node_name, shell_cmd, recorder
+            )
+    finally:
+        metrics.console_sessions.dec(method=method)
+        if recorder:
+            await recorder.close()
+
+
+def _console_sender(websocket: WebSocket, recorder: ConsoleRecorder | None = None):
+    """Send function for console output frames, teeing them to the recorder."""
+    if recorder is None:
+        return websocket.send_bytes
+
+    async def send(frame: bytes) -> None:
+        recorder.output(frame)
+        await websocket.send_bytes(frame)
+
+    return send
 
 
 async def _console_websocket_ssh(
@@ -3328,17 +4163,18 @@ async def _console_websocket_ssh(
     node_name: str,
     username: str,
     password: str,
+    recorder: ConsoleRecorder | None = None,
 ):
     """Handle console via SSH to container IP (for vrnetlab containers)."""
+    from agent.console.coalesce import OutputCoalescer
     from agent.console.ssh_console import SSHConsole
 
     # Send boot logs before connecting to CLI
-    boot_logs = _get_container_boot_logs(container_name)
+    boot_logs = await _get_container_boot_logs(container_name)
     if boot_logs:
-        await websocket.send_text("\r\n\x1b[90m--- Boot Log ---\x1b[0m\r\n")
-        for line in boot_logs.splitlines():
-            await websocket.send_text(f"\x1b[90m{line}\x1b[0m\r\n")
-        await websocket.send_text("\x1b[90m--- Connecting to CLI ---\x1b[0m\r\n\r\n")
+        await websocket.send_text(boot_logs)
+        if recorder:
+            recorder.output(boot_logs.encode())
 
     # Get container IP
     container_ip = _get_container_ip(container_name)
@@ -3382,6 +4218,8 @@ async def _console_websocket_ssh(
                                     rows = ctrl.get("rows", 24)
                                     cols = ctrl.get("cols", 80)
                                     await console.resize(rows=rows, cols=cols)
+                                    if recorder:
+                                        recorder.resize(cols, rows)
                                     continue  # Don't queue resize messages
                             except json.JSONDecodeError:
                                 pass  # Not JSON, treat as terminal input
@@ -3394,31 +4232,32 @@ async def _console_websocket_ssh(
             await input_queue.put(None)
 
     async def read_ssh():
-        """Read from SSH and send to WebSocket."""
+        """Read from SSH and send coalesced frames to the WebSocket."""
+        output = OutputCoalescer(_console_sender(websocket, recorder))
+        sender = asyncio.create_task(output.run())
         try:
-            while console.is_running:
-                data = await console.read()
+            while console.is_running and not sender.done():
+                data = await console.read(settings.console_read_size, timeout=None)
                 if data is None:
                     break
-                if data:
-                    await websocket.send_bytes(data)
+                output.feed(data)
+                await output.writable()
+            output.close()
+            await sender
         except Exception:
             pass
+        finally:
+            sender.cancel()
 
     async def write_ssh():
         """Read from input queue and write to SSH."""
         try:
             while console.is_running:
-                try:
-                    data = await asyncio.wait_for(
-                        input_queue.get(), timeout=settings.console_input_timeout
-                    )
-                    if data is None:
-                        break
-                    if data:
-                        await console.write(data)
-                except asyncio.TimeoutError:
-                    continue
+                data = await input_queue.get()
+                if data is None:
+                    break
+                if data:
+                    await console.write(data)
         except Exception:
             pass
 
@@ -3447,18 +4286,22 @@ async def _console_websocket_ssh(
 
 
 async def _console_websocket_docker(
-    websocket: WebSocket, container_name: str, node_name: str, shell_cmd: str
+    websocket: WebSocket,
+    container_name: str,
+    node_name: str,
+    shell_cmd: str,
+    recorder: ConsoleRecorder | None = None,
 ):
     """Handle console via docker exec (for native containers)."""
+    from agent.console.coalesce import OutputCoalescer
     from agent.console.docker_exec import DockerConsole
 
     # Send boot logs before connecting to CLI
-    boot_logs = _get_container_boot_logs(container_name)
+    boot_logs = await _get_container_boot_logs(container_name)
     if boot_logs:
-        await websocket.send_text("\r\n\x1b[90m--- Boot Log ---\x1b[0m\r\n")
-        for line in boot_logs.splitlines():
-            await websocket.send_text(f"\x1b[90m{line}\x1b[0m\r\n")
-        await websocket.send_text("\x1b[90m--- Connecting to CLI ---\x1b[0m\r\n\r\n")
+        await websocket.send_text(boot_logs)
+        if recorder:
+            recorder.output(boot_logs.encode())
 
     console = DockerConsole(container_name)
 
@@ -3494,6 +4337,8 @@ async def _console_websocket_docker(
                                     rows = ctrl.get("rows", 24)
                                     cols = ctrl.get("cols", 80)
                                     console.resize(rows=rows, cols=cols)
+                                    if recorder:
+                                        recorder.resize(cols, rows)
                                     continue  # Don't queue resize messages
                             except json.JSONDecodeError:
                                 pass  # Not JSON, treat as terminal input
@@ -3506,36 +4351,37 @@ async def _console_websocket_docker(
             await input_queue.put(None)
 
     async def read_container():
-        """Read from container and send to WebSocket using event-driven I/O."""
-        loop = asyncio.get_event_loop()
-        data_available = asyncio.Event()
-
-        def on_readable():
-            data_available.set()
+        """Read from container and send coalesced frames to the WebSocket.
 
+        Purely event-driven: the socket is read from its reader callback,
+        and nothing runs while the console is idle.
+        """
+        loop = asyncio.get_running_loop()
         fd = console.get_socket_fileno()
         if fd is None:
             return
+        closed = loop.create_future()
 
+        def on_readable():
+            data = console.read_nonblocking(settings.console_read_size)
+            if data is None:
+                loop.remove_reader(fd)
+                if not closed.done():
+                    closed.set_result(None)
+            elif data:
+                output.feed(data)
+
+        output = OutputCoalescer(
+            _console_sender(websocket, recorder),
+            on_pause=lambda: loop.remove_reader(fd),
+            on_resume=lambda: loop.add_reader(fd, on_readable),
+        )
+        sender = asyncio.create_task(output.run())
         try:
             loop.add_reader(fd, on_readable)
-
-            while console.is_running:
-                try:
-                    await asyncio.wait_for(
-                        data_available.wait(), timeout=settings.console_read_timeout
-                    )
-                except asyncio.TimeoutError:
-                    continue
-
-                data_available.clear()
-
-                data = console.read_nonblocking()
-                if data is None:
-                    break
-                if data:
-                    await websocket.send_bytes(data)
-
+            await asyncio.wait([closed, sender], return_when=asyncio.FIRST_COMPLETED)
+            output.close()
+            await sender
         except Exception:
             pass
         finally:
@@ -3543,21 +4389,17 @@ async def _console_websocket_docker(
                 loop.remove_reader(fd)
             except Exception:
                 pass
+            sender.cancel()
 
     async def write_container():
         """Read from input queue and write to container."""
         try:
             while console.is_running:
-                try:
-                    data = await asyncio.wait_for(
-                        input_queue.get(), timeout=settings.console_input_timeout
-                    )
-                    if data is None:
-                        break
-                    if data:
-                        console.write(data)
-                except asyncio.TimeoutError:
-                    continue
+                data = await input_queue.get()
+                if data is None:
+                    break
+                if data:
+                    console.write(data)
         except Exception:
             pass
 
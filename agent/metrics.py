@@ -0,0 +1,263 @@
+"""Prometheus metrics for agent hot paths.
+
+A minimal, dependency-free registry rendering the Prometheus text
+exposition format at GET /metrics. Instruments are module-level and cheap
+to update (a dict lookup plus an add, or a bisect for histograms); with
+metrics_enabled off every update returns immediately and /metrics is 404.
+
+Label values must come from small fixed sets (providers, phases, program
+names, plugin endpoints) to keep series counts bounded.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from agent.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans a fast ovs-vsctl call to a slow VM boot
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: tuple[str, ...], value) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if not settings.metrics_enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if not settings.metrics_enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        if not settings.metrics_enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not settings.metrics_enabled:
+            return
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._values.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def _render_series(self, key: tuple[str, ...], value) -> list[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+deploy_phase_seconds: Histogram = registry.register(Histogram(
+    "archetype_agent_deploy_phase_seconds",
+    "Duration of each lab deploy phase.",
+    ("provider", "phase"),
+))
+subprocess_seconds: Histogram = registry.register(Histogram(
+    "archetype_agent_subprocess_seconds",
+    "Latency of external commands run by the agent.",
+    ("command",),
+))
+subprocess_failures_total: Counter = registry.register(Counter(
+    "archetype_agent_subprocess_failures_total",
+    "External commands that exited non-zero.",
+    ("command",),
+))
+plugin_request_seconds: Histogram = registry.register(Histogram(
+    "archetype_agent_plugin_request_seconds",
+    "Docker network plugin request latency.",
+    ("endpoint", "status"),
+))
+image_load_seconds: Histogram = registry.register(Histogram(
+    "archetype_agent_image_load_seconds",
+    "Time from the start of an image stream to docker load finishing.",
+    ("result",),
+))
+image_load_bytes_total: Counter = registry.register(Counter(
+    "archetype_agent_image_load_bytes_total",
+    "Uncompressed image bytes fed to docker load.",
+))
+console_sessions: Gauge = registry.register(Gauge(
+    "archetype_agent_console_sessions",
+    "Open console WebSocket sessions.",
+    ("method",),
+))
+lock_wait_seconds: Histogram = registry.register(Histogram(
+    "archetype_agent_lock_wait_seconds",
+    "Time spent waiting to acquire a lock.",
+    ("lock", "outcome"),
+))
+
+# Tools whose first non-option argument names the operation
+_SUBCOMMAND_TOOLS = {"ip", "ovs-vsctl", "ovs-ofctl", "bridge", "docker", "virsh", "qemu-img"}
+# Options of those tools that take a separate value (a namespace, URI, ...)
+_OPTIONS_WITH_VALUE = {"-n", "-netns", "-c", "--connect", "-t", "--timeout"}
+
+
+def command_label(cmd: list[str] | tuple[str, ...]) -> str:
+    """Bounded label for a command line: the program, plus its subcommand."""
+    if not cmd:
+        return ""
+    program = os.path.basename(cmd[0])
+    if program in _SUBCOMMAND_TOOLS:
+        skip = False
+        for arg in cmd[1:5]:
+            if skip:
+                skip = False
+            elif arg in _OPTIONS_WITH_VALUE:
+                skip = True
+            elif not arg.startswith("-"):
+                return f"{program} {arg}"
+    return program
+
+
+def observe_subprocess(cmd: list[str], seconds: float, returncode: int) -> None:
+    """Record one finished external command."""
+    if not settings.metrics_enabled:
+        return
+    label = command_label(cmd)
+    subprocess_seconds.observe(seconds, command=label)
+    if returncode != 0:
+        subprocess_failures_total.inc(command=label)
+
+
+def render() -> str:
+    return registry.render()
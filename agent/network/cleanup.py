@@ -14,6 +14,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import re
+import time
 from dataclasses import dataclass
 from typing import Any
 
@@ -21,6 +22,7 @@ import docker
 from docker.errors import NotFound
 
 from agent.config import settings
+from agent.metrics import observe_subprocess
 
 
 logger = logging.getLogger(__name__)
@@ -119,12 +121,14 @@ class NetworkCleanupManager:
 
     async def _run_cmd(self, cmd: list[str]) -> tuple[int, str, str]:
         """Run a shell command asynchronously."""
+        started = time.monotonic()
         process = await asyncio.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
         stdout, stderr = await process.communicate()
+        observe_subprocess(cmd, time.monotonic() - started, process.returncode or 0)
         return (
             process.returncode or 0,
             stdout.decode(errors="replace"),
@@ -48,6 +48,7 @@ import os
 import re
 import secrets
 import signal
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -56,6 +57,7 @@ from typing import Any
 from aiohttp import web
 
 from agent.config import settings
+from agent.metrics import observe_subprocess, plugin_request_seconds
 
 logger = logging.getLogger(__name__)
 
@@ -125,6 +127,26 @@ class ManagementNetwork:
     gateway: str  # e.g., "172.20.1.1"
 
 
+@web.middleware
+async def _metrics_middleware(request: web.Request, handler):
+    """Record plugin request latency by endpoint."""
+    resource = request.match_info.route.resource
+    endpoint = resource.canonical if resource is not None else "unmatched"
+    started = time.monotonic()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        plugin_request_seconds.observe(
+            time.monotonic() - started, endpoint=endpoint, status=str(status)
+        )
+
+
 class DockerOVSPlugin:
     """Docker Network Plugin backed by Open vSwitch.
 
@@ -163,12 +185,14 @@ class DockerOVSPlugin:
 
     async def _run_cmd(self, cmd: list[str]) -> tuple[int, str, str]:
         """Run a shell command asynchronously."""
+        started = time.monotonic()
         proc = await asyncio.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
         stdout, stderr = await proc.communicate()
+        observe_subprocess(cmd, time.monotonic() - started, proc.returncode or 0)
         return proc.returncode or 0, stdout.decode(), stderr.decode()
 
     async def _ovs_vsctl(self, *args: str) -> tuple[int, str, str]:
@@ -1973,7 +1997,7 @@ class DockerOVSPlugin:
 
     def create_app(self) -> web.Application:
         """Create the aiohttp application with plugin routes."""
-        app = web.Application()
+        app = web.Application(middlewares=[_metrics_middleware])
 
         # Plugin activation
         app.router.add_post("/Plugin.Activate", self.handle_activate)
@@ -29,6 +29,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import secrets
+import time
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -36,6 +37,7 @@ import docker
 from docker.errors import NotFound, APIError
 
 from agent.config import settings
+from agent.metrics import observe_subprocess
 
 
 logger = logging.getLogger(__name__)
@@ -136,12 +138,14 @@ class LocalNetworkManager:
         Returns:
             Tuple of (return_code, stdout, stderr)
         """
+        started = time.monotonic()
         process = await asyncio.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
         stdout, stderr = await process.communicate()
+        observe_subprocess(cmd, time.monotonic() - started, process.returncode or 0)
         return (
             process.returncode or 0,
             stdout.decode(errors="replace"),
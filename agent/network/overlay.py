@@ -20,14 +20,17 @@ import asyncio
 import json
 import logging
 import re
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import docker
 from docker.errors import NotFound
 
 from agent.config import settings
+from agent.metrics import observe_subprocess
+from agent.network.batch import delete_links
 
 
 logger = logging.getLogger(__name__)
@@ -110,12 +113,14 @@ class OverlayManager:
 
     async def _run_cmd(self, cmd: list[str]) -> tuple[int, str, str]:
         """Run a shell command asynchronously."""
+        started = time.monotonic()
         process = await asyncio.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
         stdout, stderr = await process.communicate()
+        observe_subprocess(cmd, time.monotonic() - started, process.returncode or 0)
         return (
             process.returncode or 0,
             stdout.decode(errors="replace"),
@@ -486,24 +491,39 @@ class OverlayManager:
         tunnels_to_delete = [t for t in self._tunnels.values() if t.lab_id == lab_id]
         bridges_to_delete = [b for b in self._bridges.values() if b.lab_id == lab_id]
 
-        # Delete bridges first (they reference tunnels)
+        # One batched netlink pass: veth pairs, then bridges, then VXLAN
+        # devices (deleting a bridge releases its ports, so order only
+        # matters for avoiding transient errors)
+        names = [host_end for b in bridges_to_delete for host_end, _ in b.veth_pairs]
+        names += [b.name for b in bridges_to_delete]
+        names += [t.interface_name for t in tunnels_to_delete]
+        try:
+            failed = await delete_links(names)
+        except Exception as e:
+            result["errors"].append(f"Batched link delete: {e}")
+            return result
+        result["errors"].extend(f"{name}: {error}" for name, error in failed.items())
+
+        # Devices whose delete failed stay tracked so a later cleanup
+        # retries them
         for bridge in bridges_to_delete:
-            try:
-                if await self.delete_bridge(bridge):
-                    result["bridges_deleted"] += 1
-            except Exception as e:
-                result["errors"].append(f"Bridge {bridge.name}: {e}")
+            if bridge.name in failed or any(h in failed for h, _ in bridge.veth_pairs):
+                continue
+            self._bridges.pop(bridge.key, None)
+            result["bridges_deleted"] += 1
 
-        # Delete tunnels
+        kept_vnis = []
         for tunnel in tunnels_to_delete:
-            try:
-                if await self.delete_tunnel(tunnel):
-                    result["tunnels_deleted"] += 1
-            except Exception as e:
-                result["errors"].append(f"Tunnel {tunnel.interface_name}: {e}")
+            if tunnel.interface_name in failed:
+                kept_vnis.append(f"{tunnel.lab_id}:{tunnel.link_id}")
+                continue
+            self._vni_allocator.release(tunnel.lab_id, tunnel.link_id)
+            self._tunnels.pop(tunnel.key, None)
+            result["tunnels_deleted"] += 1
 
-        # Release all VNI allocations for this lab
-        result["vnis_released"] = self._vni_allocator.release_lab(lab_id)
+        # Release the lab's remaining VNI allocations, keeping those of
+        # tunnels that still exist
+        result["vnis_released"] = self._vni_allocator.release_lab(lab_id, keep=kept_vnis)
 
         logger.info(f"Lab {lab_id} overlay cleanup: {result}")
         return result
@@ -724,17 +744,21 @@ class VniAllocator:
             del self._allocated[key]
             self._save_to_disk()
 
-    def release_lab(self, lab_id: str) -> int:
+    def release_lab(self, lab_id: str, keep: Iterable[str] = ()) -> int:
         """Release all VNI allocations for a lab.
 
         Args:
             lab_id: Lab identifier
+            keep: Allocation keys ("lab_id:link_id") to leave allocated
 
         Returns:
             Number of allocations released
         """
         prefix = f"{lab_id}:"
-        keys_to_remove = [k for k in self._allocated if k.startswith(prefix)]
+        keep = set(keep)
+        keys_to_remove = [
+            k for k in self._allocated if k.startswith(prefix) and k not in keep
+        ]
 
         for key in keys_to_remove:
             del self._allocated[key]
@@ -42,14 +42,17 @@ import asyncio
 import json
 import logging
 import secrets
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import docker
 from docker.errors import NotFound
 
 from agent.config import settings
+from agent.metrics import observe_subprocess
+from agent.network.batch import delete_links, delete_ovs_ports
 
 
 logger = logging.getLogger(__name__)
@@ -285,11 +288,12 @@ class VlanAllocator:
             self._save_to_disk()
         return vlan
 
-    def release_lab(self, lab_id: str) -> int:
+    def release_lab(self, lab_id: str, keep: Iterable[str] = ()) -> int:
         """Release all VLAN allocations for a lab.
 
         Args:
             lab_id: Lab identifier (matches container names starting with archetype-{lab_id})
+            keep: Allocation keys ("container:interface") to leave allocated
 
         Returns:
             Number of allocations released
@@ -297,7 +301,10 @@ class VlanAllocator:
         # Keys are in format "container:interface"
         # Container names are "archetype-{lab_id}-{node}"
         prefix = f"archetype-{lab_id[:20]}"
-        keys_to_remove = [k for k in self._allocated if k.startswith(prefix)]
+        keep = set(keep)
+        keys_to_remove = [
+            k for k in self._allocated if k.startswith(prefix) and k not in keep
+        ]
 
         for key in keys_to_remove:
             del self._allocated[key]
@@ -402,12 +409,14 @@ class OVSNetworkManager:
         Returns:
             Tuple of (return_code, stdout, stderr)
         """
+        started = time.monotonic()
         process = await asyncio.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
         stdout, stderr = await process.communicate()
+        observe_subprocess(cmd, time.monotonic() - started, process.returncode or 0)
         return (
             process.returncode or 0,
             stdout.decode(errors="replace"),
@@ -1110,31 +1119,35 @@ class OVSNetworkManager:
             del self._links[link_key]
             result["links_deleted"] += 1
 
-        # Delete ports
-        for key, port in ports_to_delete:
+        # Delete ports: one OVSDB transaction, then one batched netlink
+        # pass for the veths (removing one end deletes both)
+        failed: dict[str, str] = {}
+        if ports_to_delete:
+            port_names = [port.port_name for _, port in ports_to_delete]
             try:
-                # Remove from OVS
-                await self._ovs_vsctl(
-                    "--if-exists", "del-port", self._bridge_name, port.port_name
-                )
-
-                # Delete veth
-                await self._run_cmd(["ip", "link", "delete", port.port_name])
+                failed = await delete_ovs_ports(self._bridge_name, port_names)
+                failed.update(await delete_links(port_names))
+            except Exception as e:
+                failed = {name: str(e) for name in port_names}
+            result["errors"].extend(
+                f"Port {name}: {error}" for name, error in failed.items()
+            )
 
-                # Release VLAN
+            # Ports whose delete failed stay tracked, with their VLANs, so
+            # a later cleanup retries them
+            for key, port in ports_to_delete:
+                if port.port_name in failed:
+                    continue
                 self._vlan_allocator.release(key)
-
-                # Remove from tracking
                 del self._ports[key]
-
                 result["ports_deleted"] += 1
 
-            except Exception as e:
-                result["errors"].append(f"Port {key}: {e}")
-
         # Release any remaining VLAN allocations for this lab
         # (handles allocations that may not have tracked ports)
-        result["vlans_released"] = self._vlan_allocator.release_lab(lab_id)
+        result["vlans_released"] = self._vlan_allocator.release_lab(
+            lab_id,
+            keep=[key for key, port in ports_to_delete if port.port_name in failed],
+        )
 
         logger.info(f"Lab {lab_id} OVS cleanup: {result}")
         return result
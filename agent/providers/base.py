@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, AsyncIterator
 
 if TYPE_CHECKING:
-    from agent.schemas import DeployTopology
+    from agent.schemas import DeployLink, DeployTopology
 
 
 class NodeStatus(str, Enum):
@@ -43,6 +44,7 @@ class DeployResult:
     stdout: str = ""
     stderr: str = ""
     error: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)  # Seconds per deploy phase, where reported
 
 
 @dataclass
@@ -52,6 +54,19 @@ class DestroyResult:
     stdout: str = ""
     stderr: str = ""
     error: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)  # Seconds per teardown phase
+
+
+@dataclass
+class CheckpointResult:
+    """Result of a checkpoint operation."""
+    success: bool
+    nodes: list[str] = field(default_factory=list)  # Nodes captured
+    stateful_nodes: list[str] = field(default_factory=list)  # Nodes with memory state
+    size_bytes: int = 0
+    stdout: str = ""
+    stderr: str = ""
+    error: str | None = None
 
 
 @dataclass
@@ -106,6 +121,7 @@ class Provider(ABC):
         topology: "DeployTopology | None",
         topology_yaml: str | None,
         workspace: Path,
+        checkpoint_id: str | None = None,
     ) -> DeployResult:
         """Deploy a topology.
 
@@ -120,6 +136,8 @@ class Provider(ABC):
             topology: Structured topology definition (JSON format)
             topology_yaml: The topology definition in YAML format (legacy)
             workspace: Directory to use for lab files
+            checkpoint_id: Restore nodes from this checkpoint where it has
+                state for them; other nodes cold-boot as usual
 
         Returns:
             DeployResult with success status and node info
@@ -198,6 +216,131 @@ class Provider(ABC):
         """
         ...
 
+    async def apply_topology_diff(
+        self,
+        lab_id: str,
+        add: DeployTopology,
+        remove_nodes: list[str],
+        remove_links: list[DeployLink],
+        workspace: Path,
+    ) -> DeployResult:
+        """Apply node/link additions and removals to a deployed lab.
+
+        Nodes not named in the diff must be left untouched. Providers that
+        cannot deploy incrementally keep this default; the controller then
+        falls back to a full deploy.
+
+        Args:
+            lab_id: Unique identifier for the lab
+            add: Nodes to create/start and links to wire
+            remove_nodes: Names of nodes to delete
+            remove_links: Links to disconnect
+            workspace: Directory containing lab files
+
+        Returns:
+            DeployResult with success status and node info
+        """
+        raise NotImplementedError(f"{self.name} provider does not support incremental deploy")
+
+    async def create_checkpoint(
+        self,
+        lab_id: str,
+        checkpoint_id: str,
+        workspace: Path,
+        include_memory: bool = True,
+    ) -> CheckpointResult:
+        """Capture the running nodes of a lab for a later restore.
+
+        Args:
+            lab_id: Unique identifier for the lab
+            checkpoint_id: Identifier to store the checkpoint under
+            workspace: Directory containing lab files
+            include_memory: Also capture process/VM memory where supported
+
+        Returns:
+            CheckpointResult listing the captured nodes
+        """
+        raise NotImplementedError(f"{self.name} provider does not support checkpoints")
+
+    async def delete_checkpoint(self, lab_id: str, checkpoint_id: str) -> None:
+        """Remove a checkpoint's artifacts. Missing checkpoints are not an error."""
+        raise NotImplementedError(f"{self.name} provider does not support checkpoints")
+
+    async def get_node_kind(self, lab_id: str, node_name: str) -> str | None:
+        """Get the device kind of a deployed node (e.g., 'ceos').
+
+        Used to stagger bulk starts per kind. Default implementation
+        returns None (no stagger).
+        """
+        return None
+
+    async def node_actions(
+        self,
+        lab_id: str,
+        node_names: list[str],
+        action: str,
+        workspace: Path,
+        max_concurrency: int = 8,
+        stagger: dict[str, float] | None = None,
+    ) -> AsyncIterator[NodeActionResult]:
+        """Start or stop several nodes concurrently.
+
+        Results are yielded as each node finishes, not in request order.
+        Starts of the same kind are spaced at least stagger[kind] seconds
+        apart (e.g. cEOS instances race loading kernel modules when they
+        boot together); waiting for a stagger slot does not hold one of the
+        max_concurrency slots.
+
+        Args:
+            lab_id: Unique identifier for the lab
+            node_names: Names of the nodes to act on
+            action: "start" or "stop"
+            workspace: Directory containing lab files
+            max_concurrency: Maximum node actions in flight at once
+            stagger: Minimum seconds between starts, by node kind
+
+        Yields:
+            NodeActionResult for each node
+        """
+        if action == "start":
+            run = self.start_node
+        elif action == "stop":
+            run = self.stop_node
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        loop = asyncio.get_running_loop()
+        next_start: dict[str, float] = {}
+
+        async def wait_for_stagger(node_name: str) -> None:
+            if action != "start" or not stagger:
+                return
+            kind = await self.get_node_kind(lab_id, node_name)
+            delay = stagger.get(kind or "", 0)
+            if not delay:
+                return
+            now = loop.time()
+            slot = max(now, next_start.get(kind, now))
+            next_start[kind] = slot + delay
+            await asyncio.sleep(slot - now)
+
+        async def act(node_name: str) -> NodeActionResult:
+            try:
+                await wait_for_stagger(node_name)
+                async with semaphore:
+                    return await run(lab_id=lab_id, node_name=node_name, workspace=workspace)
+            except Exception as e:
+                return NodeActionResult(success=False, node_name=node_name, error=str(e))
+
+        tasks = [asyncio.create_task(act(name)) for name in node_names]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def get_console_command(
         self,
         lab_id: str,
@@ -30,6 +30,8 @@ from __future__ import annotations
 import asyncio
 import logging
 import re
+import shutil
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
@@ -39,11 +41,22 @@ import yaml
 from docker.errors import NotFound, APIError, ImageNotFound
 from docker.types import Mount, IPAMConfig
 
+from agent.boot_logs import boot_logs
+from agent.checkpoints import (
+    checkpoint_dir,
+    directory_size,
+    read_manifest,
+    remove_checkpoint_dir,
+    write_manifest,
+)
 from agent.config import settings
+from agent.console.ssh_pool import ssh_pool
+from agent.metrics import deploy_phase_seconds
 from agent.network.local import LocalNetworkManager, get_local_manager
 from agent.network.ovs import OVSNetworkManager, get_ovs_manager
 from agent.network.docker_plugin import DockerOVSPlugin, get_docker_ovs_plugin
 from agent.providers.base import (
+    CheckpointResult,
     DeployResult,
     DestroyResult,
     NodeActionResult,
@@ -58,6 +71,7 @@ from agent.vendors import (
     get_config_by_device,
     get_container_config,
     get_console_shell,
+    get_vendor_config,
 )
 
 
@@ -132,6 +146,9 @@ LABEL_NODE_DISPLAY_NAME = "archetype.node_display_name"
 LABEL_NODE_KIND = "archetype.node_kind"
 LABEL_PROVIDER = "archetype.provider"
 
+# Repository for images committed from lab containers by create_checkpoint
+CHECKPOINT_REPOSITORY = "archetype-checkpoint"
+
 
 def _log_name_from_labels(labels: dict[str, str]) -> str:
     """Format node name for logging from container labels."""
@@ -201,6 +218,7 @@ class DockerProvider(Provider):
         self._docker: docker.DockerClient | None = None
         self._local_network: LocalNetworkManager | None = None
         self._ovs_manager: OVSNetworkManager | None = None
+        self._criu_supported: bool | None = None
 
     @property
     def name(self) -> str:
@@ -663,14 +681,21 @@ username admin privilege 15 role network-admin nopassword
             lab_prefix = f"{lab_id}-"
             lab_networks = [n for n in all_networks if n.name.startswith(lab_prefix)]
 
-            for network in lab_networks:
+            semaphore = asyncio.Semaphore(max(1, settings.destroy_concurrency))
+
+            async def remove(network) -> bool:
                 try:
-                    network.remove()
-                    deleted += 1
+                    async with semaphore:
+                        await asyncio.to_thread(network.remove)
                     logger.debug(f"Deleted network {network.name}")
+                    return True
                 except APIError as e:
                     # Network might be in use or already deleted
                     logger.warning(f"Failed to delete network {network.name}: {e}")
+                    return False
+
+            results = await asyncio.gather(*(remove(n) for n in lab_networks))
+            deleted = sum(results)
 
         except APIError as e:
             logger.warning(f"Failed to list networks for lab {lab_id}: {e}")
@@ -743,17 +768,79 @@ username admin privilege 15 role network-admin nopassword
 
         return attached
 
+    async def _attach_link_endpoints(self, topology: ParsedTopology, lab_id: str) -> int:
+        """Attach existing nodes to the interface networks new links need.
+
+        Containers are attached to eth1..N when created, with N sized from
+        the links known at the time. A link added later may use a higher
+        interface on a node that is already deployed; that node must join
+        the interface's network before the link can be wired. Nodes being
+        created with `topology` get their networks in _create_containers.
+
+        Returns number of networks attached.
+        """
+        if not self.use_ovs_plugin:
+            return 0
+
+        needed: dict[str, set[int]] = {}
+        for link in topology.links:
+            for endpoint in link.endpoints:
+                parts = endpoint.split(":")
+                if len(parts) < 2 or parts[0] in topology.nodes:
+                    continue
+                match = re.search(r"(\d+)$", parts[1])
+                if match:
+                    needed.setdefault(parts[0], set()).add(int(match.group(1)))
+        if not needed:
+            return 0
+
+        await self._create_lab_networks(
+            lab_id, max_interfaces=self._calculate_required_interfaces(topology)
+        )
+
+        attached = 0
+        for node_name, indexes in needed.items():
+            container_name = self._container_name(lab_id, node_name)
+            try:
+                container = await asyncio.to_thread(self.docker.containers.get, container_name)
+            except NotFound:
+                logger.warning(f"Container {container_name} not found, cannot attach link networks")
+                continue
+            current = container.attrs.get("NetworkSettings", {}).get("Networks") or {}
+            for index in sorted(indexes):
+                if f"{lab_id}-eth{index}" in current:
+                    continue
+                attached += len(await self._attach_container_to_networks(
+                    container=container,
+                    lab_id=lab_id,
+                    interface_count=1,
+                    interface_prefix="eth",
+                    start_index=index,
+                ))
+        if attached:
+            logger.info(f"Attached {attached} interface networks to existing nodes in lab {lab_id}")
+        return attached
+
     async def _create_containers(
         self,
         topology: ParsedTopology,
         lab_id: str,
         workspace: Path,
+        cleanup_networks_on_failure: bool = True,
+        reuse_stopped: bool = False,
     ) -> dict[str, Any]:
         """Create all containers for a topology.
 
+        Set cleanup_networks_on_failure=False when other nodes of the lab
+        are already running on the lab networks (incremental deploy).
+        With reuse_stopped, existing stopped containers are kept (and
+        attached to any new interface networks) so that starting them
+        preserves their state, instead of being removed and recreated.
+
         Returns dict mapping node_name -> container object.
         """
         containers = {}
+        created = []
 
         # Calculate the number of interfaces actually needed based on topology links
         # This avoids creating 64 networks per node which exhausts Docker's IP pool
@@ -780,6 +867,18 @@ username admin privilege 15 role network-admin nopassword
                         logger.info(f"Container {log_name} already running")
                         containers[node_name] = existing
                         continue
+                    elif reuse_stopped:
+                        logger.info(f"Reusing stopped container {log_name}")
+                        if self.use_ovs_plugin:
+                            await self._attach_container_to_networks(
+                                container=existing,
+                                lab_id=lab_id,
+                                interface_count=required_interfaces - 1,
+                                interface_prefix="eth",
+                                start_index=2,
+                            )
+                        containers[node_name] = existing
+                        continue
                     else:
                         logger.info(f"Removing stopped container {log_name}")
                         await asyncio.to_thread(existing.remove, force=True)
@@ -816,6 +915,7 @@ username admin privilege 15 role network-admin nopassword
                     )
                     logger.debug(f"[{log_name}] container.create completed")
                     containers[node_name] = container
+                    created.append(node_name)
 
                     # Attach to remaining interface networks (eth2, eth3, ...)
                     logger.debug(f"[{log_name}] Starting network attachments...")
@@ -841,13 +941,16 @@ username admin privilege 15 role network-admin nopassword
                         lambda cfg=config: self.docker.containers.create(**cfg)
                     )
                     containers[node_name] = container
+                    created.append(node_name)
 
         except Exception as e:
             # Clean up partially created resources on failure to prevent leaks
             logger.error(f"Container creation failed, cleaning up: {e}")
 
             # Remove any containers that were created before the failure
-            for node_name, container in containers.items():
+            # (containers that already existed are left alone)
+            for node_name in created:
+                container = containers[node_name]
                 try:
                     await asyncio.to_thread(container.remove, force=True, v=True)
                     logger.debug(f"Cleaned up container for {node_name}")
@@ -855,7 +958,7 @@ username admin privilege 15 role network-admin nopassword
                     logger.warning(f"Failed to clean up container {node_name}: {cleanup_err}")
 
             # Clean up Docker networks to prevent IP address exhaustion
-            if self.use_ovs_plugin:
+            if self.use_ovs_plugin and cleanup_networks_on_failure:
                 try:
                     deleted = await self._delete_lab_networks(lab_id)
                     logger.info(f"Cleaned up {deleted} networks after failed container creation")
@@ -871,9 +974,13 @@ username admin privilege 15 role network-admin nopassword
         containers: dict[str, Any],
         topology: ParsedTopology,
         lab_id: str,
+        restore: dict[str, dict] | None = None,
     ) -> list[str]:
         """Start all containers and provision interfaces as needed.
 
+        Nodes with a CRIU dump in `restore` (checkpoint manifest entries by
+        node name) resume from it; if the restore fails they boot normally.
+
         When OVS plugin is enabled, interfaces are already provisioned via Docker
         networks (created in _create_containers), so no post-start provisioning needed.
 
@@ -910,8 +1017,10 @@ username admin privilege 15 role network-admin nopassword
                     await asyncio.sleep(5)
 
                 if container.status != "running":
-                    # Run in thread pool - start triggers network plugin callbacks
-                    await asyncio.to_thread(container.start)
+                    entry = (restore or {}).get(node_name, {})
+                    if not (entry.get("criu_dir") and await self._start_from_criu(container, entry)):
+                        # Run in thread pool - start triggers network plugin callbacks
+                        await asyncio.to_thread(container.start)
                     logger.info(f"Started container {log_name}")
 
                 if is_ceos:
@@ -1181,6 +1290,49 @@ username admin privilege 15 role network-admin nopassword
 
         return created
 
+    async def _remove_links(
+        self,
+        topology: ParsedTopology,
+        lab_id: str,
+    ) -> int:
+        """Disconnect links between running containers.
+
+        Mirrors _create_links: isolates both endpoints onto their own VLANs
+        (OVS plugin / legacy OVS) or deletes the veth pair.
+
+        Returns number of links removed.
+        """
+        removed = 0
+        for link in topology.links:
+            if len(link.endpoints) < 2:
+                continue
+            node_a, iface_a = link.endpoints[0].split(":")[:2]
+            node_b, iface_b = link.endpoints[1].split(":")[:2]
+            container_a = self._container_name(lab_id, node_a)
+            container_b = self._container_name(lab_id, node_b)
+            link_id = f"{node_a}:{iface_a}-{node_b}:{iface_b}"
+
+            try:
+                if self.use_ovs_plugin:
+                    await self.ovs_plugin.hot_disconnect(lab_id, container_a, iface_a)
+                    await self.ovs_plugin.hot_disconnect(lab_id, container_b, iface_b)
+                elif self.use_ovs and self.ovs_manager._initialized:
+                    await self.ovs_manager.hot_disconnect(
+                        container_a=container_a,
+                        iface_a=iface_a,
+                        container_b=container_b,
+                        iface_b=iface_b,
+                    )
+                else:
+                    for local_link in self.local_network.get_links_for_lab(lab_id):
+                        if local_link.link_id == link_id:
+                            await self.local_network.delete_link(local_link)
+                removed += 1
+            except Exception as e:
+                logger.error(f"Failed to remove link {link_id}: {e}")
+
+        return removed
+
     async def _wait_for_readiness(
         self,
         topology: ParsedTopology,
@@ -1230,12 +1382,14 @@ username admin privilege 15 role network-admin nopassword
                         continue
 
                     if config.readiness_probe == "log_pattern":
-                        # Check logs for pattern - run in thread to avoid blocking
-                        logs_bytes = await asyncio.to_thread(container.logs, tail=100)
-                        logs = logs_bytes.decode(errors="replace")
+                        # Check the container's boot log buffer for the pattern
+                        logs = (await boot_logs.get(
+                            container.name, pin=bool(config.readiness_pattern)
+                        )).text(tail=100)
                         if config.readiness_pattern:
                             if re.search(config.readiness_pattern, logs):
                                 ready_status[node_name] = True
+                                boot_logs.unpin(container.name)
                                 logger.info(f"Node {log_name} is ready")
                             else:
                                 all_ready = False
@@ -1341,6 +1495,7 @@ username admin privilege 15 role network-admin nopassword
         topology_yaml: str | None,
         workspace: Path,
         agent_id: str | None = None,
+        checkpoint_id: str | None = None,
     ) -> DeployResult:
         """Deploy a topology using Docker SDK.
 
@@ -1348,6 +1503,9 @@ username admin privilege 15 role network-admin nopassword
         - topology: Structured JSON format (preferred)
         - topology_yaml: Legacy YAML string format
 
+        With checkpoint_id, nodes the checkpoint captured are created from
+        their committed images (and resumed from CRIU dumps if present).
+
         Steps:
         1. Parse topology (from JSON or YAML)
         2. Validate images exist
@@ -1377,8 +1535,11 @@ username admin privilege 15 role network-admin nopassword
 
         logger.info(f"Deploying lab {lab_id} with {len(parsed_topology.nodes)} nodes")
 
+        deploy_started = time.monotonic()
+
         # Validate images
-        missing_images = self._validate_images(parsed_topology)
+        with deploy_phase_seconds.time(provider="docker", phase="validate_images"):
+            missing_images = self._validate_images(parsed_topology)
         if missing_images:
             logger.error(f"Missing images: {missing_images}")
             error_lines = ["Missing Docker images:"]
@@ -1394,18 +1555,24 @@ username admin privilege 15 role network-admin nopassword
                 stderr=error_msg,
             )
 
+        # Boot from checkpointed images where the checkpoint has them
+        restore = self._apply_checkpoint(parsed_topology, lab_id, checkpoint_id) if checkpoint_id else {}
+
         # Create directories
-        await self._ensure_directories(parsed_topology, workspace)
+        with deploy_phase_seconds.time(provider="docker", phase="directories"):
+            await self._ensure_directories(parsed_topology, workspace)
 
         # Create management network
         try:
-            await self.local_network.create_management_network(lab_id)
+            with deploy_phase_seconds.time(provider="docker", phase="management_network"):
+                await self.local_network.create_management_network(lab_id)
         except Exception as e:
             logger.warning(f"Failed to create management network: {e}")
 
         # Create containers
         try:
-            containers = await self._create_containers(parsed_topology, lab_id, workspace)
+            with deploy_phase_seconds.time(provider="docker", phase="create_containers"):
+                containers = await self._create_containers(parsed_topology, lab_id, workspace)
         except Exception as e:
             logger.error(f"Failed to create containers: {e}")
             return DeployResult(
@@ -1414,19 +1581,24 @@ username admin privilege 15 role network-admin nopassword
             )
 
         # Start containers
-        failed_starts = await self._start_containers(containers, parsed_topology, lab_id)
+        with deploy_phase_seconds.time(provider="docker", phase="start_containers"):
+            failed_starts = await self._start_containers(
+                containers, parsed_topology, lab_id, restore=restore
+            )
         if failed_starts:
             failed_log_names = [parsed_topology.log_name(n) for n in failed_starts]
             logger.warning(f"Some containers failed to start: {failed_log_names}")
 
         # Create local links
-        links_created = await self._create_links(parsed_topology, lab_id)
+        with deploy_phase_seconds.time(provider="docker", phase="create_links"):
+            links_created = await self._create_links(parsed_topology, lab_id)
         logger.info(f"Created {links_created} local links")
 
         # Wait for readiness
-        ready_status = await self._wait_for_readiness(
-            parsed_topology, lab_id, containers, timeout=settings.deploy_timeout
-        )
+        with deploy_phase_seconds.time(provider="docker", phase="readiness"):
+            ready_status = await self._wait_for_readiness(
+                parsed_topology, lab_id, containers, timeout=settings.deploy_timeout
+            )
         not_ready = [name for name, ready in ready_status.items() if not ready]
         if not_ready:
             not_ready_log_names = [parsed_topology.log_name(n) for n in not_ready]
@@ -1439,76 +1611,364 @@ username admin privilege 15 role network-admin nopassword
             f"Deployed {len(containers)} containers",
             f"Created {links_created} links",
         ]
+        if restore:
+            stdout_lines.append(f"Restored {len(restore)} nodes from checkpoint {checkpoint_id}")
         if not_ready:
             not_ready_log_names = [parsed_topology.log_name(n) for n in not_ready]
             stdout_lines.append(f"Warning: {len(not_ready)} nodes not fully ready: {', '.join(not_ready_log_names)}")
 
+        deploy_phase_seconds.observe(
+            time.monotonic() - deploy_started, provider="docker", phase="total"
+        )
         return DeployResult(
             success=True,
             nodes=status_result.nodes,
             stdout="\n".join(stdout_lines),
         )
 
+    async def apply_topology_diff(
+        self,
+        lab_id: str,
+        add: DeployTopology,
+        remove_nodes: list[str],
+        remove_links: list[DeployLink],
+        workspace: Path,
+    ) -> DeployResult:
+        """Apply node/link additions and removals to a deployed lab.
+
+        Only the listed nodes and links are touched: removed links are
+        disconnected, removed nodes' containers deleted, then added nodes
+        are created and started, their links wired, and readiness awaited
+        for the new nodes alone. Added nodes whose container exists but is
+        stopped are started rather than recreated, and existing nodes on
+        the added links are attached to any interface networks they lack.
+        """
+        workspace.mkdir(parents=True, exist_ok=True)
+        added = self._topology_from_json(add)
+        removed = self._topology_from_json(DeployTopology(nodes=[], links=remove_links))
+
+        logger.info(
+            f"Incremental deploy for lab {lab_id}: +{len(added.nodes)} nodes, "
+            f"-{len(remove_nodes)} nodes, +{len(added.links)} links, -{len(removed.links)} links"
+        )
+
+        missing_images = self._validate_images(added)
+        if missing_images:
+            error_lines = ["Missing Docker images:"]
+            for node_name, image in missing_images:
+                error_lines.append(f"  • Node '{added.log_name(node_name)}' requires: {image}")
+            return DeployResult(
+                success=False,
+                error=f"Missing {len(missing_images)} Docker image(s)",
+                stderr="\n".join(error_lines),
+            )
+
+        links_removed = await self._remove_links(removed, lab_id)
+
+        nodes_removed = 0
+        for node_name in remove_nodes:
+            container_name = self._container_name(lab_id, node_name)
+            try:
+                container = await asyncio.to_thread(self.docker.containers.get, container_name)
+                await asyncio.to_thread(container.remove, force=True, v=True)
+                nodes_removed += 1
+                logger.info(f"Removed container {container_name}")
+            except NotFound:
+                pass
+
+        containers: dict[str, Any] = {}
+        if added.nodes:
+            await self._ensure_directories(added, workspace)
+            try:
+                containers = await self._create_containers(
+                    added, lab_id, workspace,
+                    cleanup_networks_on_failure=False, reuse_stopped=True,
+                )
+            except Exception as e:
+                logger.error(f"Failed to create containers: {e}")
+                return DeployResult(
+                    success=False,
+                    error=f"Failed to create containers: {e}",
+                )
+            failed_starts = await self._start_containers(containers, added, lab_id)
+            if failed_starts:
+                failed_log_names = [added.log_name(n) for n in failed_starts]
+                logger.warning(f"Some containers failed to start: {failed_log_names}")
+
+        await self._attach_link_endpoints(added, lab_id)
+        links_created = await self._create_links(added, lab_id)
+
+        ready_status = await self._wait_for_readiness(
+            added, lab_id, containers, timeout=settings.deploy_timeout
+        )
+        not_ready = [added.log_name(n) for n, ready in ready_status.items() if not ready]
+
+        status_result = await self.status(lab_id, workspace)
+
+        stdout_lines = [
+            f"Added {len(containers)} containers, removed {nodes_removed}",
+            f"Created {links_created} links, removed {links_removed}",
+        ]
+        if not_ready:
+            stdout_lines.append(f"Warning: {len(not_ready)} nodes not fully ready: {', '.join(not_ready)}")
+
+        return DeployResult(
+            success=True,
+            nodes=status_result.nodes,
+            stdout="\n".join(stdout_lines),
+        )
+
+    def _checkpoint_image(self, lab_id: str, checkpoint_id: str, node_name: str) -> str:
+        """Image reference a node is committed to for a checkpoint."""
+        def safe(value: str) -> str:
+            return re.sub(r"[^a-z0-9_.-]", "", value.lower())[:40]
+        return f"{CHECKPOINT_REPOSITORY}/{safe(lab_id)}:{safe(checkpoint_id)}-{safe(node_name)}"
+
+    async def _criu_available(self) -> bool:
+        """Whether dockerd can checkpoint containers (experimental + CRIU)."""
+        if self._criu_supported is None:
+            try:
+                info = await asyncio.to_thread(self.docker.info)
+                self._criu_supported = bool(info.get("ExperimentalBuild")) and shutil.which("criu") is not None
+            except Exception as e:
+                logger.debug(f"Could not query Docker for checkpoint support: {e}")
+                self._criu_supported = False
+        return self._criu_supported
+
+    def _criu_dump(self, container, checkpoint_id: str, directory: Path) -> None:
+        """Dump a running container's processes with CRIU, leaving it running."""
+        # docker-py has no checkpoint API; call the Engine endpoint directly
+        directory.mkdir(parents=True, exist_ok=True)
+        api = self.docker.api
+        response = api._post_json(
+            api._url("/containers/{0}/checkpoints", container.id),
+            data={"CheckpointID": checkpoint_id, "CheckpointDir": str(directory), "Exit": False},
+        )
+        api._raise_for_status(response)
+
+    async def _start_from_criu(self, container, entry: dict) -> bool:
+        """Start a container from a CRIU dump. Returns False if it couldn't."""
+        api = self.docker.api
+
+        def start() -> None:
+            response = api._post(
+                api._url("/containers/{0}/start", container.id),
+                params={"checkpoint": entry["criu_checkpoint"], "checkpoint-dir": entry["criu_dir"]},
+            )
+            api._raise_for_status(response)
+
+        try:
+            await asyncio.to_thread(start)
+            logger.info(f"Restored {container.name} from CRIU checkpoint")
+            return True
+        except Exception as e:
+            logger.warning(f"CRIU restore of {container.name} failed, booting normally: {e}")
+            return False
+
+    def _apply_checkpoint(
+        self,
+        topology: ParsedTopology,
+        lab_id: str,
+        checkpoint_id: str,
+    ) -> dict[str, dict]:
+        """Point topology nodes at their checkpoint images.
+
+        Returns the manifest entries of the nodes that will be restored;
+        nodes the checkpoint doesn't cover (or whose image is gone) keep
+        their normal image and cold-boot.
+        """
+        manifest = read_manifest(lab_id, checkpoint_id)
+        if not manifest or manifest.get("provider") != self.name:
+            logger.warning(f"Checkpoint {checkpoint_id} not found for lab {lab_id}, deploying cold")
+            return {}
+
+        restore = {}
+        for node_name, entry in manifest.get("nodes", {}).items():
+            node = topology.nodes.get(node_name)
+            if node is None:
+                continue
+            try:
+                self.docker.images.get(entry["image"])
+            except (ImageNotFound, APIError) as e:
+                logger.warning(f"Checkpoint image for {node.log_name()} unavailable: {e}")
+                continue
+            node.image = entry["image"]
+            restore[node_name] = entry
+
+        logger.info(
+            f"Restoring {len(restore)}/{len(topology.nodes)} nodes of lab {lab_id} "
+            f"from checkpoint {checkpoint_id}"
+        )
+        return restore
+
+    async def create_checkpoint(
+        self,
+        lab_id: str,
+        checkpoint_id: str,
+        workspace: Path,
+        include_memory: bool = True,
+    ) -> CheckpointResult:
+        """Commit every running container of a lab to a checkpoint image.
+
+        When dockerd runs in experimental mode with CRIU installed, each
+        container's processes are also dumped so a restore resumes them
+        instead of re-running init.
+        """
+        directory = checkpoint_dir(lab_id, checkpoint_id)
+        containers = await asyncio.to_thread(
+            self.docker.containers.list,
+            filters={"label": f"{LABEL_LAB_ID}={lab_id}"},
+        )
+        if not containers:
+            return CheckpointResult(success=False, error="No running nodes to checkpoint")
+
+        use_criu = include_memory and settings.checkpoint_criu and await self._criu_available()
+        semaphore = asyncio.Semaphore(max(1, settings.checkpoint_concurrency))
+        entries: dict[str, dict] = {}
+        errors: list[str] = []
+
+        async def capture(container) -> None:
+            node_name = container.labels.get(LABEL_NODE_NAME)
+            if not node_name:
+                return
+            image = self._checkpoint_image(lab_id, checkpoint_id, node_name)
+            repository, tag = image.rsplit(":", 1)
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(container.commit, repository=repository, tag=tag)
+                except Exception as e:
+                    errors.append(f"{node_name}: commit failed: {e}")
+                    return
+                entry = {"image": image}
+                if use_criu:
+                    criu_dir = directory / "criu" / node_name
+                    try:
+                        await asyncio.to_thread(self._criu_dump, container, checkpoint_id, criu_dir)
+                        entry.update(criu_dir=str(criu_dir), criu_checkpoint=checkpoint_id)
+                    except Exception as e:
+                        logger.warning(f"CRIU checkpoint of {node_name} failed, keeping filesystem only: {e}")
+                entries[node_name] = entry
+                logger.info(f"Checkpointed {_log_name_from_labels(container.labels)} to {image}")
+
+        await asyncio.gather(*(capture(c) for c in containers))
+
+        if not entries:
+            return CheckpointResult(success=False, error="; ".join(errors) or "No nodes captured")
+
+        write_manifest(lab_id, checkpoint_id, self.name, entries)
+        return CheckpointResult(
+            success=True,
+            nodes=sorted(entries),
+            stateful_nodes=sorted(n for n, e in entries.items() if "criu_dir" in e),
+            size_bytes=directory_size(directory),
+            stdout=f"Checkpointed {len(entries)} nodes",
+            stderr="\n".join(errors),
+        )
+
+    async def delete_checkpoint(self, lab_id: str, checkpoint_id: str) -> None:
+        """Remove a checkpoint's committed images and CRIU dumps."""
+        manifest = read_manifest(lab_id, checkpoint_id) or {}
+        for entry in manifest.get("nodes", {}).values():
+            try:
+                await asyncio.to_thread(self.docker.images.remove, entry["image"], force=True)
+            except ImageNotFound:
+                pass
+            except APIError as e:
+                logger.warning(f"Failed to remove checkpoint image {entry['image']}: {e}")
+        remove_checkpoint_dir(lab_id, checkpoint_id)
+
     async def destroy(
         self,
         lab_id: str,
         workspace: Path,
     ) -> DestroyResult:
-        """Destroy all containers and networking for a lab."""
+        """Destroy all containers and networking for a lab.
+
+        Teardown runs as a pipeline: containers are removed concurrently,
+        then volumes, local links, OVS ports and Docker networks are
+        cleaned up in parallel. Each phase's wall time is returned in
+        DestroyResult.timings.
+        """
         prefix = self._lab_prefix(lab_id)
         removed = 0
         volumes_removed = 0
         errors = []
+        timings: dict[str, float] = {}
 
-        try:
-            # Find all containers for this lab - run in thread to avoid blocking
-            containers = await asyncio.to_thread(
-                self.docker.containers.list,
-                all=True,
-                filters={"label": f"{LABEL_LAB_ID}={lab_id}"},
-            )
+        async def timed(phase: str, coro):
+            start = time.monotonic()
+            try:
+                return await coro
+            finally:
+                timings[phase] = round(time.monotonic() - start, 3)
 
-            # Also find by prefix (fallback)
-            prefix_containers = await asyncio.to_thread(
-                self.docker.containers.list,
-                all=True,
-                filters={"name": prefix},
-            )
+        try:
+            # Find all containers for this lab (by label, and by name prefix
+            # as a fallback) - run in thread to avoid blocking
+            containers, prefix_containers = await timed("list", asyncio.gather(
+                asyncio.to_thread(
+                    self.docker.containers.list,
+                    all=True,
+                    filters={"label": f"{LABEL_LAB_ID}={lab_id}"},
+                ),
+                asyncio.to_thread(
+                    self.docker.containers.list,
+                    all=True,
+                    filters={"name": prefix},
+                ),
+            ))
             all_containers = {c.id: c for c in containers}
             for c in prefix_containers:
                 all_containers[c.id] = c
 
-            # Remove containers
-            for container in all_containers.values():
-                try:
-                    await asyncio.to_thread(container.remove, force=True, v=True)  # v=True removes anonymous volumes
-                    removed += 1
-                    logger.info(f"Removed container {container.name}")
-                except Exception as e:
-                    errors.append(f"Failed to remove {container.name}: {e}")
-
-            # Clean up orphaned volumes for this lab
-            volumes_removed = await self._cleanup_lab_volumes(lab_id)
-            if volumes_removed > 0:
-                logger.info(f"Volume cleanup: {volumes_removed} volumes removed")
-
-            # Clean up local networking
-            cleanup_result = await self.local_network.cleanup_lab(lab_id)
-            logger.info(f"Local network cleanup: {cleanup_result}")
-
-            # Clean up OVS networking if enabled
+            # Remove containers, bounded so a large lab doesn't flood dockerd
+            semaphore = asyncio.Semaphore(max(1, settings.destroy_concurrency))
+
+            async def remove(container) -> str | None:
+                async with semaphore:
+                    try:
+                        # v=True removes anonymous volumes
+                        await asyncio.to_thread(container.remove, force=True, v=True)
+                        logger.info(f"Removed container {container.name}")
+                        return None
+                    except Exception as e:
+                        return f"Failed to remove {container.name}: {e}"
+
+            outcomes = await timed("containers", asyncio.gather(
+                *(remove(c) for c in all_containers.values())
+            ))
+            removed = outcomes.count(None)
+            errors.extend(e for e in outcomes if e)
+
+            # With the containers gone the remaining cleanups are independent
+            cleanups = {
+                "volumes": self._cleanup_lab_volumes(lab_id),
+                "local_network": self.local_network.cleanup_lab(lab_id),
+            }
             if self.use_ovs and self.ovs_manager._initialized:
-                ovs_cleanup_result = await self.ovs_manager.cleanup_lab(lab_id)
-                logger.info(f"OVS network cleanup: {ovs_cleanup_result}")
-
-            # Clean up Docker networks if OVS plugin is enabled
+                cleanups["ovs"] = self.ovs_manager.cleanup_lab(lab_id)
             if self.use_ovs_plugin:
-                networks_deleted = await self._delete_lab_networks(lab_id)
-                logger.info(f"Docker network cleanup: {networks_deleted} networks deleted")
+                cleanups["docker_networks"] = self._delete_lab_networks(lab_id)
+            results = await asyncio.gather(
+                *(timed(phase, coro) for phase, coro in cleanups.items()),
+                return_exceptions=True,
+            )
+            for phase, result in zip(cleanups, results):
+                if isinstance(result, Exception):
+                    errors.append(f"Error during {phase} cleanup: {result}")
+                elif phase == "volumes":
+                    volumes_removed = result
+                    if volumes_removed > 0:
+                        logger.info(f"Volume cleanup: {volumes_removed} volumes removed")
+                elif phase == "docker_networks":
+                    logger.info(f"Docker network cleanup: {result} networks deleted")
+                else:
+                    logger.info(f"{phase} cleanup: {result}")
 
         except Exception as e:
             errors.append(f"Error during destroy: {e}")
 
+        logger.info(f"Destroy of lab {lab_id} timings: {timings}")
         success = len(errors) == 0
         stdout_parts = [f"Removed {removed} containers"]
         if volumes_removed > 0:
@@ -1518,6 +1978,7 @@ username admin privilege 15 role network-admin nopassword
             stdout=", ".join(stdout_parts),
             stderr="\n".join(errors) if errors else "",
             error=errors[0] if errors else None,
+            timings=timings,
         )
 
     async def _cleanup_lab_volumes(self, lab_id: str) -> int:
@@ -1680,6 +2141,15 @@ username admin privilege 15 role network-admin nopassword
                 error=f"Docker API error: {e}",
             )
 
+    async def get_node_kind(self, lab_id: str, node_name: str) -> str | None:
+        """Get a node's device kind from its container label."""
+        container_name = self._container_name(lab_id, node_name)
+        try:
+            container = await asyncio.to_thread(self.docker.containers.get, container_name)
+        except (NotFound, APIError):
+            return None
+        return container.labels.get(LABEL_NODE_KIND)
+
     async def get_console_command(
         self,
         lab_id: str,
@@ -1716,6 +2186,9 @@ username admin privilege 15 role network-admin nopassword
     ) -> list[tuple[str, str]]:
         """Extract running-config from all cEOS containers in a lab.
 
+        SSH-console devices whose vendor defines config_extract_command
+        are extracted too, over their pooled SSH connection.
+
         Returns list of (node_name, config_content) tuples.
         Also saves configs to workspace/configs/{node}/startup-config.
         """
@@ -1736,8 +2209,14 @@ username admin privilege 15 role network-admin nopassword
                 node_name = labels.get(LABEL_NODE_NAME)
                 kind = labels.get(LABEL_NODE_KIND, "")
 
-                # Only extract from cEOS containers
-                if kind != "ceos" or not node_name:
+                vendor = get_vendor_config(kind)
+                over_ssh = bool(
+                    vendor
+                    and vendor.console_method == "ssh"
+                    and vendor.config_extract_command
+                )
+                # Only extract from cEOS and SSH-extractable containers
+                if (kind != "ceos" and not over_ssh) or not node_name:
                     continue
 
                 log_name = _log_name_from_labels(labels)
@@ -1747,22 +2226,29 @@ username admin privilege 15 role network-admin nopassword
                     continue
 
                 try:
-                    # Execute 'show running-config' via FastCli with privilege level 15
-                    result = await asyncio.to_thread(
-                        container.exec_run,
-                        ["FastCli", "-p", "15", "-c", "show running-config"],
-                        demux=True,
-                    )
-                    stdout, stderr = result.output
-
-                    if result.exit_code != 0:
-                        logger.warning(
-                            f"Failed to extract config from {log_name}: "
-                            f"exit={result.exit_code}, stderr={stderr}"
+                    if over_ssh:
+                        config_content = await self._extract_config_over_ssh(
+                            container, vendor, log_name
                         )
-                        continue
+                        if config_content is None:
+                            continue
+                    else:
+                        # Execute 'show running-config' via FastCli with privilege level 15
+                        result = await asyncio.to_thread(
+                            container.exec_run,
+                            ["FastCli", "-p", "15", "-c", "show running-config"],
+                            demux=True,
+                        )
+                        stdout, stderr = result.output
+
+                        if result.exit_code != 0:
+                            logger.warning(
+                                f"Failed to extract config from {log_name}: "
+                                f"exit={result.exit_code}, stderr={stderr}"
+                            )
+                            continue
 
-                    config_content = stdout.decode("utf-8") if stdout else ""
+                        config_content = stdout.decode("utf-8") if stdout else ""
                     if not config_content.strip():
                         logger.warning(f"Empty config from {log_name}")
                         continue
@@ -1784,6 +2270,27 @@ username admin privilege 15 role network-admin nopassword
 
         return extracted
 
+    async def _extract_config_over_ssh(
+        self, container, vendor: VendorConfig, log_name: str
+    ) -> str | None:
+        """Run the vendor's config command over the device's pooled SSH connection."""
+        networks = container.attrs.get("NetworkSettings", {}).get("Networks", {})
+        ip = next((n.get("IPAddress") for n in networks.values() if n.get("IPAddress")), None)
+        if not ip:
+            logger.warning(f"Skipping {log_name}: no management IP for SSH")
+            return None
+        result = await ssh_pool.run(
+            ip, vendor.console_user, vendor.console_password, vendor.config_extract_command
+        )
+        if result.exit_status not in (0, None):
+            logger.warning(
+                f"Failed to extract config from {log_name}: "
+                f"exit={result.exit_status}, stderr={result.stderr}"
+            )
+            return None
+        output = result.stdout or ""
+        return output.decode("utf-8") if isinstance(output, bytes) else output
+
     async def discover_labs(self) -> dict[str, list[NodeInfo]]:
         """Discover all running labs managed by this provider.
 
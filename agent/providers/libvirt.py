@@ -7,23 +7,40 @@ like Cisco IOS-XRv, FTDv, vManage, etc.
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-import os
 import re
 import shutil
-import subprocess
+import time
 import uuid
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
 from textwrap import dedent
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable
 
 if TYPE_CHECKING:
     from agent.schemas import DeployTopology
 
 import yaml
 
+from agent.checkpoints import (
+    checkpoint_dir,
+    directory_size,
+    read_manifest,
+    remove_checkpoint_dir,
+    write_manifest,
+)
 from agent.config import settings
+from agent.deploy_progress import deploy_progress
+from agent.host_resources import Allocation, host_resources, ksm, tuning_xml
+from agent.image_catalog import image_catalog
+from agent.image_warmup import warm_base_images
+from agent.metrics import deploy_phase_seconds
 from agent.providers.base import (
+    CheckpointResult,
     DeployResult,
     DestroyResult,
     NodeActionResult,
@@ -44,6 +61,30 @@ def _log_name(node_name: str, node_config: dict) -> str:
     return node_name
 
 
+class BootRateLimiter:
+    """Spaces VM boots at least `interval` seconds apart.
+
+    A booting guest reads much of its base image and writes its overlay
+    heavily; booting a whole lab at once saturates the host's disks and
+    every VM comes up slower than it would one after another. Boot slots
+    are handed out in request order, host-wide across labs.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        """Wait for this caller's boot slot."""
+        if self.interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        await asyncio.sleep(slot - now)
+
+
 # Try to import libvirt - it's optional
 try:
     import libvirt
@@ -65,6 +106,13 @@ class LibvirtProvider(Provider):
             raise ImportError("libvirt-python package is not installed")
         self._conn: libvirt.virConnect | None = None
         self._uri = getattr(settings, 'libvirt_uri', 'qemu:///system')
+        # libvirt API calls block; they run here instead of on the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.libvirt_worker_threads),
+            thread_name_prefix="libvirt",
+        )
+        self._boot_limiter = BootRateLimiter(settings.libvirt_boot_interval)
+        self._placements_adopted = False
 
     @property
     def name(self) -> str:
@@ -108,45 +156,12 @@ class LibvirtProvider(Provider):
     def _get_base_image(self, node_config: dict) -> str | None:
         """Get the base image path for a node.
 
-        Looks up the image in the qcow2 store based on the node's image field.
+        Looks up the image in the agent's qcow2 image catalog based on the
+        node's image field.
         """
-        image_ref = node_config.get("image")
-        if not image_ref:
-            return None
-
-        # Check if it's an absolute path
-        if image_ref.startswith("/"):
-            if os.path.exists(image_ref):
-                return image_ref
-            return None
+        return image_catalog.resolve(node_config.get("image") or "")
 
-        # Look in qcow2 store
-        qcow2_store = getattr(settings, 'qcow2_store_path', None)
-        if not qcow2_store:
-            # Fall back to workspace/images
-            qcow2_store = Path(settings.workspace_path) / "images"
-
-        # Try exact filename match
-        image_path = Path(qcow2_store) / image_ref
-        if image_path.exists():
-            return str(image_path)
-
-        # Try with .qcow2 extension
-        if not image_ref.endswith(('.qcow2', '.qcow')):
-            image_path = Path(qcow2_store) / f"{image_ref}.qcow2"
-            if image_path.exists():
-                return str(image_path)
-
-        # Search for partial match
-        store_path = Path(qcow2_store)
-        if store_path.exists():
-            for f in store_path.iterdir():
-                if f.suffix in ('.qcow2', '.qcow') and image_ref.lower() in f.name.lower():
-                    return str(f)
-
-        return None
-
-    def _create_overlay_disk(
+    async def _create_overlay_disk(
         self,
         base_image: str,
         overlay_path: Path,
@@ -164,23 +179,22 @@ class LibvirtProvider(Provider):
             logger.info(f"Overlay disk already exists: {overlay_path}")
             return True
 
-        cmd = [
-            "qemu-img", "create",
-            "-F", "qcow2",
-            "-f", "qcow2",
-            "-b", base_image,
-            str(overlay_path),
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            logger.error(f"Failed to create overlay disk: {result.stderr}")
+        try:
+            await self._qemu_img(
+                "create",
+                "-F", "qcow2",
+                "-f", "qcow2",
+                "-b", base_image,
+                str(overlay_path),
+            )
+        except RuntimeError as e:
+            logger.error(f"Failed to create overlay disk: {e}")
             return False
 
         logger.info(f"Created overlay disk: {overlay_path}")
         return True
 
-    def _create_data_volume(
+    async def _create_data_volume(
         self,
         path: Path,
         size_gb: int,
@@ -198,16 +212,10 @@ class LibvirtProvider(Provider):
             logger.info(f"Data volume already exists: {path}")
             return True
 
-        cmd = [
-            "qemu-img", "create",
-            "-f", "qcow2",
-            str(path),
-            f"{size_gb}G",
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            logger.error(f"Failed to create data volume: {result.stderr}")
+        try:
+            await self._qemu_img("create", "-f", "qcow2", str(path), f"{size_gb}G")
+        except RuntimeError as e:
+            logger.error(f"Failed to create data volume: {e}")
             return False
 
         logger.info(f"Created data volume: {path} ({size_gb}GB)")
@@ -220,15 +228,19 @@ class LibvirtProvider(Provider):
         overlay_path: Path,
         data_volume_path: Path | None = None,
         bridge_interfaces: list[str] | None = None,
+        allocation: Allocation | None = None,
     ) -> str:
         """Generate libvirt domain XML for a VM.
 
         Args:
             name: Domain name
-            node_config: Node configuration from topology
+            node_config: Node configuration from topology ("ksm": False
+                keeps the domain's memory out of KSM merging)
             overlay_path: Path to the overlay disk
             data_volume_path: Optional path to data volume
             bridge_interfaces: List of bridge names for network interfaces
+            allocation: NUMA placement; adds vCPU pinning, numatune,
+                hugepage backing and I/O threads
 
         Returns:
             Domain XML string
@@ -244,10 +256,22 @@ class LibvirtProvider(Provider):
         # Generate UUID for the domain
         domain_uuid = str(uuid.uuid4())
 
+        # Host placement (pinning, NUMA memory, hugepages, I/O threads)
+        tuning = ""
+        iothreads = settings.vm_iothreads if allocation else 0
+        if allocation:
+            tuning = "\n  " + tuning_xml(allocation, cpus, iothreads)
+        # Labs that did not opt into KSM keep their memory out of the merge
+        # scanner (hugepage-backed memory is never merged anyway)
+        if node_config.get("ksm") is False and "<memoryBacking>" not in tuning:
+            tuning += "\n  <memoryBacking>\n    <nosharepages/>\n  </memoryBacking>"
+        # virtio-blk disks are served by the first I/O thread
+        driver_extra = " iothread='1'" if iothreads and disk_driver == "virtio" else ""
+
         # Build disk elements
         disks_xml = f'''
     <disk type='file' device='disk'>
-      <driver name='qemu' type='qcow2'/>
+      <driver name='qemu' type='qcow2'{driver_extra}/>
       <source file='{overlay_path}'/>
       <target dev='vda' bus='{disk_driver}'/>
     </disk>'''
@@ -255,7 +279,7 @@ class LibvirtProvider(Provider):
         if data_volume_path:
             disks_xml += f'''
     <disk type='file' device='disk'>
-      <driver name='qemu' type='qcow2'/>
+      <driver name='qemu' type='qcow2'{driver_extra}/>
       <source file='{data_volume_path}'/>
       <target dev='vdb' bus='{disk_driver}'/>
     </disk>'''
@@ -282,7 +306,7 @@ class LibvirtProvider(Provider):
   <name>{name}</name>
   <uuid>{domain_uuid}</uuid>
   <memory unit='MiB'>{memory_mb}</memory>
-  <vcpu>{cpus}</vcpu>
+  <vcpu>{cpus}</vcpu>{tuning}
   <os>
     <type arch='x86_64' machine='pc-q35-6.2'>hvm</type>
     <boot dev='hd'/>
@@ -355,11 +379,27 @@ class LibvirtProvider(Provider):
         topology: "DeployTopology | None",
         topology_yaml: str | None,
         workspace: Path,
+        checkpoint_id: str | None = None,
     ) -> DeployResult:
         """Deploy a libvirt topology.
 
         Note: LibvirtProvider currently only supports YAML format.
         JSON topology is not yet implemented for VM deployments.
+
+        VMs are deployed concurrently: qemu-img runs as async subprocesses,
+        blocking libvirt calls run on the provider's worker threads, at most
+        libvirt_deploy_concurrency VMs prepare disks at once, and boots are
+        spaced libvirt_boot_interval apart host-wide. Per-node progress is
+        published to deploy_progress.
+
+        With checkpoint_id, VMs the checkpoint captured boot from its disk
+        layers, and resume from its memory image when one was saved.
+
+        Deploys of at least vm_image_warmup_min_vms VMs first pull their
+        shared base images into the page cache. A top-level "ksm" key in
+        the topology (or per-node "ksm") opts the lab's VMs into KSM
+        memory sharing. Per-phase timings are returned in
+        DeployResult.timings and appended to stdout.
         """
         workspace.mkdir(parents=True, exist_ok=True)
         disks_dir = self._disks_dir(workspace)
@@ -390,9 +430,17 @@ class LibvirtProvider(Provider):
                     error="Invalid topology: no nodes defined",
                 )
 
-            deployed_nodes: list[NodeInfo] = []
-            errors: list[str] = []
+            lab_ksm = bool(topo.get("ksm", settings.vm_ksm_default))
+
+            checkpoint = None
+            if checkpoint_id:
+                manifest = read_manifest(lab_id, checkpoint_id)
+                if manifest and manifest.get("provider") == self.name:
+                    checkpoint = manifest
+                else:
+                    logger.warning(f"Checkpoint {checkpoint_id} not found for lab {lab_id}, deploying cold")
 
+            vm_nodes: list[tuple[str, dict]] = []
             for node_name, node_config in nodes.items():
                 if not isinstance(node_config, dict):
                     continue
@@ -406,16 +454,64 @@ class LibvirtProvider(Provider):
                     "cat9800", "cisco_asav", "cisco_iosv", "cisco_csr1000v",
                 ):
                     continue
+                vm_nodes.append((node_name, {**node_config, "ksm": bool(node_config.get("ksm", lab_ksm))}))
+
+            # Connect (or reconnect) off the event loop before fanning out
+            await self._call(lambda: self.conn)
+            if not self._placements_adopted:
+                await self._call(self._adopt_placements)
+                self._placements_adopted = True
+
+            started = time.monotonic()
+            timings: dict[str, float] = {}
+            if any(config["ksm"] for _, config in vm_nodes):
+                await asyncio.to_thread(ksm.acquire, lab_id)
+            if len(vm_nodes) >= settings.vm_image_warmup_min_vms:
+                timings.update(await warm_base_images(
+                    self._shared_base_images(lab_id, vm_nodes, checkpoint)
+                ))
+
+            deployed_nodes: list[NodeInfo] = []
+            errors: list[str] = []
+            node_timings: dict[str, dict[str, float]] = {}
+            prepare_slots = asyncio.Semaphore(max(1, settings.libvirt_deploy_concurrency))
+            deploy_progress.start(lab_id, [name for name, _ in vm_nodes])
 
+            async def deploy_one(node_name: str, node_config: dict) -> None:
                 try:
+                    node_timings[node_name] = {}
                     node_info = await self._deploy_node(
-                        lab_id, node_name, node_config, disks_dir
+                        lab_id, node_name, node_config, disks_dir, checkpoint, prepare_slots,
+                        node_timings[node_name],
                     )
                     deployed_nodes.append(node_info)
+                    deploy_progress.publish(
+                        lab_id, node_name, "running", seconds=node_timings[node_name].get("boot")
+                    )
                 except Exception as e:
                     log_name_str = _log_name(node_name, node_config)
                     logger.error(f"Failed to deploy node {log_name_str}: {e}")
                     errors.append(f"{log_name_str}: {e}")
+                    deploy_progress.publish(lab_id, node_name, "failed", error=str(e))
+
+            try:
+                await asyncio.gather(*(deploy_one(name, config) for name, config in vm_nodes))
+            finally:
+                deploy_progress.finish(lab_id, len(deployed_nodes), len(errors))
+
+            if "warmup" in timings:
+                deploy_phase_seconds.observe(timings["warmup"], provider="libvirt", phase="warmup")
+            for phase in ("prepare", "boot"):
+                durations = [t[phase] for t in node_timings.values() if phase in t]
+                for seconds in durations:
+                    deploy_phase_seconds.observe(seconds, provider="libvirt", phase=phase)
+                if durations:
+                    timings[f"{phase}_avg"] = round(sum(durations) / len(durations), 3)
+                    timings[f"{phase}_max"] = round(max(durations), 3)
+            timings["total"] = round(time.monotonic() - started, 3)
+            deploy_phase_seconds.observe(timings["total"], provider="libvirt", phase="total")
+            logger.info(f"Deploy of lab {lab_id} timings: {timings}")
+            timings_line = "Timings: " + ", ".join(f"{k}={v}" for k, v in timings.items())
 
             if errors and not deployed_nodes:
                 # Complete failure
@@ -423,6 +519,7 @@ class LibvirtProvider(Provider):
                     success=False,
                     nodes=deployed_nodes,
                     error=f"Failed to deploy nodes: {'; '.join(errors)}",
+                    timings=timings,
                 )
 
             if errors:
@@ -430,13 +527,16 @@ class LibvirtProvider(Provider):
                 return DeployResult(
                     success=True,
                     nodes=deployed_nodes,
+                    stdout=timings_line,
                     stderr=f"Some nodes failed: {'; '.join(errors)}",
+                    timings=timings,
                 )
 
             return DeployResult(
                 success=True,
                 nodes=deployed_nodes,
-                stdout=f"Deployed {len(deployed_nodes)} VM nodes",
+                stdout=f"Deployed {len(deployed_nodes)} VM nodes\n{timings_line}",
+                timings=timings,
             )
 
         except Exception as e:
@@ -446,38 +546,143 @@ class LibvirtProvider(Provider):
                 error=str(e),
             )
 
+    def _shared_base_images(
+        self, lab_id: str, vm_nodes: list[tuple[str, dict]], checkpoint: dict | None
+    ) -> list[str]:
+        """Base images of the nodes that will cold boot from a new overlay."""
+        restored = set((checkpoint or {}).get("nodes", {}))
+        prefix_len = len(self._lab_prefix(lab_id)) + 1
+        images = []
+        for node_name, node_config in vm_nodes:
+            if self._domain_name(lab_id, node_name)[prefix_len:] in restored:
+                continue
+            base_image = self._get_base_image(node_config)
+            if base_image:
+                images.append(base_image)
+        return images
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking libvirt call on the provider's worker threads."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    def _lookup_domain(self, domain_name: str):
+        """Look up a domain by name, or None if it isn't defined."""
+        try:
+            return self.conn.lookupByName(domain_name)
+        except libvirt.libvirtError:
+            return None
+
+    def _place(self, domain_name: str, node_config: dict) -> Allocation | None:
+        """Reserve NUMA node, cores and hugepages for a new domain."""
+        allocation = host_resources.allocate(
+            domain_name,
+            vcpus=node_config.get("cpu", 1),
+            memory_mb=node_config.get("memory", 2048),
+            hugepages=not node_config.get("ksm"),
+        )
+        if allocation:
+            pinned = f"cores {allocation.cpus}" if allocation.cpus else "unpinned vCPUs"
+            hugepages = ", hugepages" if allocation.hugepages else ""
+            logger.info(
+                f"Placing {domain_name} on NUMA node {allocation.numa_node} "
+                f"({pinned}{hugepages})"
+            )
+        return allocation
+
+    async def _define(self, domain_name: str, xml: str):
+        """Define a domain, releasing its placement if libvirt rejects it."""
+        try:
+            domain = await self._call(self.conn.defineXML, xml)
+        except Exception:
+            host_resources.release(domain_name)
+            raise
+        if not domain:
+            host_resources.release(domain_name)
+            raise RuntimeError(f"Failed to define domain {domain_name}")
+        return domain
+
+    def _adopt_placements(self) -> None:
+        """Rebuild host placements from domains defined before a restart."""
+        for domain in self.conn.listAllDomains(0):
+            if domain.name().startswith("arch-"):
+                try:
+                    host_resources.adopt(domain.name(), domain.XMLDesc(0))
+                except Exception as e:
+                    logger.warning(f"Could not read placement of {domain.name()}: {e}")
+
     async def _deploy_node(
         self,
         lab_id: str,
         node_name: str,
         node_config: dict,
         disks_dir: Path,
+        checkpoint: dict | None = None,
+        prepare_slots: asyncio.Semaphore | None = None,
+        timings: dict[str, float] | None = None,
     ) -> NodeInfo:
-        """Deploy a single VM node."""
+        """Deploy a single VM node, from a checkpoint manifest if given.
+
+        Disk preparation and domain definition run while holding one of
+        prepare_slots. The boot then waits its turn on the host-wide boot
+        rate limiter without holding a slot, so other VMs' disks are
+        prepared in the meantime. Seconds spent preparing and booting are
+        recorded in timings.
+        """
+        timings = timings if timings is not None else {}
         domain_name = self._domain_name(lab_id, node_name)
+        async with prepare_slots or nullcontext():
+            deploy_progress.publish(lab_id, node_name, "preparing")
+            started = time.monotonic()
+            domain, boot = await self._prepare_node(
+                lab_id, node_name, node_config, disks_dir, checkpoint
+            )
+            timings["prepare"] = time.monotonic() - started
 
-        # Check if domain already exists
-        try:
-            existing = self.conn.lookupByName(domain_name)
-            if existing:
-                state = self._get_domain_status(existing)
-                if state == NodeStatus.RUNNING:
-                    logger.info(f"Domain {domain_name} already running")
-                    return NodeInfo(
-                        name=node_name,
-                        status=state,
-                        container_id=existing.UUIDString()[:12],
-                    )
-                else:
-                    # Start the existing domain
-                    existing.create()
-                    return NodeInfo(
-                        name=node_name,
-                        status=NodeStatus.RUNNING,
-                        container_id=existing.UUIDString()[:12],
-                    )
-        except libvirt.libvirtError:
-            pass  # Domain doesn't exist, we'll create it
+        if boot is not None:
+            await self._boot_limiter.wait()
+            deploy_progress.publish(lab_id, node_name, "booting")
+            started = time.monotonic()
+            await self._call(boot)
+            timings["boot"] = time.monotonic() - started
+            logger.info(f"Started domain {domain_name} in {timings['boot']:.2f}s")
+
+        return NodeInfo(
+            name=node_name,
+            status=NodeStatus.RUNNING,
+            container_id=domain.UUIDString()[:12],
+        )
+
+    async def _prepare_node(
+        self,
+        lab_id: str,
+        node_name: str,
+        node_config: dict,
+        disks_dir: Path,
+        checkpoint: dict | None,
+    ) -> tuple[Any, Callable[[], Any] | None]:
+        """Create a node's disks and define its domain.
+
+        Returns:
+            The domain, and the blocking call that boots it (None if the
+            domain is already running)
+        """
+        domain_name = self._domain_name(lab_id, node_name)
+
+        # Reuse an existing domain
+        existing = await self._call(self._lookup_domain, domain_name)
+        if existing is not None:
+            if await self._call(self._get_domain_status, existing) == NodeStatus.RUNNING:
+                logger.info(f"Domain {domain_name} already running")
+                return existing, None
+            return existing, existing.create
+
+        prefix = self._lab_prefix(lab_id)
+        entry = (checkpoint or {}).get("nodes", {}).get(domain_name[len(prefix) + 1:])
+        if entry:
+            return await self._prepare_restore(
+                lab_id, node_name, node_config, disks_dir, checkpoint["checkpoint_id"], entry
+            )
 
         # Get base image
         base_image = self._get_base_image(node_config)
@@ -486,7 +691,7 @@ class LibvirtProvider(Provider):
 
         # Create overlay disk
         overlay_path = disks_dir / f"{node_name}.qcow2"
-        if not self._create_overlay_disk(base_image, overlay_path):
+        if not await self._create_overlay_disk(base_image, overlay_path):
             raise RuntimeError(f"Failed to create overlay disk for {node_name}")
 
         # Check if data volume is needed
@@ -494,7 +699,7 @@ class LibvirtProvider(Provider):
         data_volume_size = node_config.get("data_volume_gb")
         if data_volume_size:
             data_volume_path = disks_dir / f"{node_name}-data.qcow2"
-            if not self._create_data_volume(data_volume_path, data_volume_size):
+            if not await self._create_data_volume(data_volume_path, data_volume_size):
                 raise RuntimeError(f"Failed to create data volume for {node_name}")
 
         # Generate domain XML
@@ -505,21 +710,220 @@ class LibvirtProvider(Provider):
             overlay_path,
             data_volume_path,
             bridge_interfaces=None,  # Will be populated from links
+            allocation=self._place(domain_name, node_config),
+        )
+        domain = await self._define(domain_name, xml)
+        return domain, domain.create
+
+    async def _qemu_img(self, *args: str) -> None:
+        """Run qemu-img without blocking the event loop."""
+        process = await asyncio.create_subprocess_exec(
+            "qemu-img", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"qemu-img {args[0]} failed: {stderr.decode(errors='replace').strip()}")
+
+    def _domain_disks(self, domain) -> dict[str, str]:
+        """Map target device (vda, vdb, ...) to source file for a domain's file disks."""
+        root = ET.fromstring(domain.XMLDesc(0))
+        disks = {}
+        for disk in root.findall("./devices/disk[@device='disk']"):
+            source = disk.find("source")
+            target = disk.find("target")
+            if source is not None and target is not None and source.get("file"):
+                disks[target.get("dev")] = source.get("file")
+        return disks
 
-        # Define and start the domain
-        domain = self.conn.defineXML(xml)
-        if not domain:
-            raise RuntimeError(f"Failed to define domain {domain_name}")
+    @staticmethod
+    def _retarget_disks(domain_xml: str, sources: dict[str, Path]) -> str:
+        """Rewrite disk source files in domain XML, by target device."""
+        root = ET.fromstring(domain_xml)
+        for disk in root.findall("./devices/disk[@device='disk']"):
+            target = disk.find("target")
+            source = disk.find("source")
+            if target is not None and source is not None and target.get("dev") in sources:
+                source.set("file", str(sources[target.get("dev")]))
+        return ET.tostring(root, encoding="unicode")
+
+    async def create_checkpoint(
+        self,
+        lab_id: str,
+        checkpoint_id: str,
+        workspace: Path,
+        include_memory: bool = True,
+    ) -> CheckpointResult:
+        """Checkpoint running VMs with qcow2 external snapshots.
+
+        Each domain gets an external snapshot: its disks switch to fresh
+        overlays and the layers underneath are frozen (plus, with
+        include_memory, a memory image is written while the guest is
+        briefly paused). The frozen layers are then flattened onto their
+        base image into the checkpoint directory, so the checkpoint
+        survives the lab's disks being removed on destroy.
+        """
+        prefix = self._lab_prefix(lab_id)
+        directory = checkpoint_dir(lab_id, checkpoint_id)
+        disks_dir = self._disks_dir(workspace)
+        domains = [
+            d for d in self.conn.listAllDomains(libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE)
+            if d.name().startswith(prefix + "-")
+        ]
+        if not domains:
+            return CheckpointResult(success=False, error="No running VMs to checkpoint")
 
-        domain.create()
-        logger.info(f"Started domain {domain_name}")
+        semaphore = asyncio.Semaphore(max(1, settings.checkpoint_concurrency))
+        entries: dict[str, dict] = {}
+        errors: list[str] = []
 
-        return NodeInfo(
-            name=node_name,
-            status=NodeStatus.RUNNING,
-            container_id=domain.UUIDString()[:12],
+        async def capture(domain) -> None:
+            name = domain.name()
+            node_key = name[len(prefix) + 1:]
+            node_dir = directory / node_key
+            node_dir.mkdir(parents=True, exist_ok=True)
+            async with semaphore:
+                try:
+                    frozen = self._domain_disks(domain)
+                    snap_disks = "".join(
+                        f"<disk name='{dev}' snapshot='external'>"
+                        f"<source file='{disks_dir / f'{node_key}-{dev}.{checkpoint_id[:12]}.qcow2'}'/></disk>"
+                        for dev in frozen
+                    )
+                    memory_path = node_dir / "memory.sav"
+                    flags = (
+                        libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_NO_METADATA
+                        | libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_ATOMIC
+                    )
+                    if include_memory:
+                        memory_xml = f"<memory snapshot='external' file='{memory_path}'/>"
+                    else:
+                        memory_xml = "<memory snapshot='no'/>"
+                        flags |= libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_DISK_ONLY
+                    await self._call(
+                        domain.snapshotCreateXML,
+                        f"<domainsnapshot><name>{checkpoint_id}</name>{memory_xml}"
+                        f"<disks>{snap_disks}</disks></domainsnapshot>",
+                        flags,
+                    )
+
+                    # Frozen layers are read-only now; collapse each chain onto
+                    # its base image (or a standalone copy for data volumes)
+                    disks = {}
+                    for dev, layer in frozen.items():
+                        out = node_dir / f"{dev}.qcow2"
+                        base = await self._backing_base(layer)
+                        if base:
+                            await self._qemu_img(
+                                "convert", "-O", "qcow2", "-B", base, "-F", "qcow2", layer, str(out)
+                            )
+                        else:
+                            await self._qemu_img("convert", "-O", "qcow2", layer, str(out))
+                        disks[dev] = out.name
+                    entries[node_key] = {
+                        "disks": disks,
+                        "memory": memory_path.name if include_memory else None,
+                    }
+                    logger.info(f"Checkpointed domain {name}")
+                except Exception as e:
+                    errors.append(f"{node_key}: {e}")
+                    logger.error(f"Checkpoint of domain {name} failed: {e}")
+
+        await asyncio.gather(*(capture(d) for d in domains))
+
+        if not entries:
+            remove_checkpoint_dir(lab_id, checkpoint_id)
+            return CheckpointResult(success=False, error="; ".join(errors) or "No VMs captured")
+
+        write_manifest(lab_id, checkpoint_id, self.name, entries)
+        return CheckpointResult(
+            success=True,
+            nodes=sorted(entries),
+            stateful_nodes=sorted(n for n, e in entries.items() if e["memory"]),
+            size_bytes=directory_size(directory),
+            stdout=f"Checkpointed {len(entries)} VMs",
+            stderr="; ".join(errors),
+        )
+
+    async def _backing_base(self, image: str) -> str | None:
+        """Bottom of a qcow2 image's backing chain, or None if it has none."""
+        process = await asyncio.create_subprocess_exec(
+            "qemu-img", "info", "--backing-chain", "--output=json", "-U", image,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"qemu-img info failed: {stderr.decode(errors='replace').strip()}")
+        chain = json.loads(stdout)
+        return chain[-1]["filename"] if len(chain) > 1 else None
+
+    async def _prepare_restore(
+        self,
+        lab_id: str,
+        node_name: str,
+        node_config: dict,
+        disks_dir: Path,
+        checkpoint_id: str,
+        entry: dict,
+    ) -> tuple[Any, Callable[[], Any]]:
+        """Define a VM on checkpointed disk layers; its boot resumes saved memory."""
+        domain_name = self._domain_name(lab_id, node_name)
+        node_dir = checkpoint_dir(lab_id, checkpoint_id) / domain_name[len(self._lab_prefix(lab_id)) + 1:]
+
+        # Fresh overlays on top of the checkpoint layers; the layers
+        # themselves are never written so the checkpoint can be reused
+        sources: dict[str, Path] = {}
+        for dev, layer in entry["disks"].items():
+            # Same names a cold deploy uses, so destroy cleans them up
+            overlay = disks_dir / {"vda": f"{node_name}.qcow2", "vdb": f"{node_name}-data.qcow2"}.get(
+                dev, f"{node_name}-{dev}.qcow2"
+            )
+            overlay.unlink(missing_ok=True)
+            await self._qemu_img(
+                "create", "-F", "qcow2", "-f", "qcow2", "-b", str(node_dir / layer), str(overlay)
+            )
+            sources[dev] = overlay
+
+        memory = node_dir / entry["memory"] if entry.get("memory") else None
+        if memory and memory.exists():
+            try:
+                saved_xml = await self._call(self.conn.saveImageGetXMLDesc, str(memory), 0)
+                xml = self._retarget_disks(saved_xml, sources)
+                domain = await self._call(self.conn.defineXML, xml)
+                # The saved guest keeps the placement it was checkpointed with
+                host_resources.adopt(domain_name, xml)
+
+                def boot() -> None:
+                    try:
+                        self.conn.restoreFlags(str(memory), xml, 0)
+                        logger.info(f"Restored domain {domain_name} from checkpoint memory")
+                    except libvirt.libvirtError as e:
+                        logger.warning(
+                            f"Memory restore of {domain_name} failed, booting from checkpoint disk: {e}"
+                        )
+                        domain.create()
+
+                return domain, boot
+            except libvirt.libvirtError as e:
+                logger.warning(f"Unusable memory image for {domain_name}, booting from checkpoint disk: {e}")
+
+        xml = self._generate_domain_xml(
+            domain_name,
+            node_config,
+            sources["vda"],
+            sources.get("vdb"),
+            bridge_interfaces=None,
+            allocation=self._place(domain_name, node_config),
+        )
+        domain = await self._define(domain_name, xml)
+        logger.info(f"Defined domain {domain_name} on checkpoint disk")
+        return domain, domain.create
+
+    async def delete_checkpoint(self, lab_id: str, checkpoint_id: str) -> None:
+        """Remove a checkpoint's disk layers and memory images."""
+        remove_checkpoint_dir(lab_id, checkpoint_id)
 
     async def destroy(
         self,
@@ -528,6 +932,8 @@ class LibvirtProvider(Provider):
     ) -> DestroyResult:
         """Destroy a libvirt topology."""
         prefix = self._lab_prefix(lab_id)
+        deploy_progress.clear(lab_id)
+        await asyncio.to_thread(ksm.release, lab_id)
         destroyed_count = 0
         errors: list[str] = []
 
@@ -551,6 +957,7 @@ class LibvirtProvider(Provider):
 
                     # Undefine (remove from libvirt)
                     domain.undefine()
+                    host_resources.release(name)
                     destroyed_count += 1
                     logger.info(f"Destroyed domain {name}")
 
@@ -622,12 +1029,12 @@ class LibvirtProvider(Provider):
         node_name: str,
         workspace: Path,
     ) -> NodeActionResult:
-        """Start a specific VM."""
+        """Start a specific VM, waiting for a boot slot on this host."""
         domain_name = self._domain_name(lab_id, node_name)
 
         try:
-            domain = self.conn.lookupByName(domain_name)
-            state, _ = domain.state()
+            domain = await self._call(self.conn.lookupByName, domain_name)
+            state, _ = await self._call(domain.state)
 
             if state == libvirt.VIR_DOMAIN_RUNNING:
                 return NodeActionResult(
@@ -637,7 +1044,8 @@ class LibvirtProvider(Provider):
                     stdout="Domain already running",
                 )
 
-            domain.create()
+            await self._boot_limiter.wait()
+            await self._call(domain.create)
 
             return NodeActionResult(
                 success=True,
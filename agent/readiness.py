@@ -20,6 +20,8 @@ from typing import Optional
 
 import docker
 
+from agent.boot_logs import boot_logs
+from agent.console.ssh_pool import ssh_pool
 from agent.vendors import get_vendor_config
 
 
@@ -61,8 +63,9 @@ class NoopProbe(ReadinessProbe):
 class LogPatternProbe(ReadinessProbe):
     """Check container logs for boot completion patterns.
 
-    This probe tails the container's stdout/stderr logs and searches
-    for vendor-specific patterns that indicate boot completion.
+    This probe searches the container's boot log ring buffer (fed by one
+    log follower per container) for vendor-specific patterns that
+    indicate boot completion.
     """
 
     def __init__(self, pattern: str, progress_patterns: Optional[dict[str, int]] = None):
@@ -94,11 +97,12 @@ class LogPatternProbe(ReadinessProbe):
                     progress_percent=0,
                 )
 
-            # Get recent logs (last 500 lines should be enough)
-            logs = container.logs(tail=500, timestamps=False).decode("utf-8", errors="replace")
+            # Pinned while the node boots so eviction never drops its banner
+            logs = (await boot_logs.get(container_name, pin=True)).text()
 
             # Check for completion pattern
             if self.pattern.search(logs):
+                boot_logs.unpin(container_name)
                 return ReadinessResult(
                     is_ready=True,
                     message="Boot complete",
@@ -135,18 +139,32 @@ class CliProbe(ReadinessProbe):
 
     This probe executes a command inside the container and checks if
     the output matches an expected pattern. Useful for devices where
-    log parsing isn't reliable.
+    log parsing isn't reliable. For SSH-console devices the command runs
+    over the device's pooled SSH connection instead of docker exec.
     """
 
-    def __init__(self, cli_command: str, expected_pattern: str):
+    def __init__(
+        self,
+        cli_command: str,
+        expected_pattern: str,
+        method: str = "docker_exec",
+        username: str = "admin",
+        password: str = "admin",
+    ):
         """Initialize CLI probe.
 
         Args:
             cli_command: Command to execute in container
             expected_pattern: Regex pattern expected in output when ready
+            method: "docker_exec", or "ssh" to run it on the device over SSH
+            username: SSH username (method "ssh")
+            password: SSH password (method "ssh")
         """
         self.cli_command = cli_command
         self.expected_pattern = re.compile(expected_pattern, re.IGNORECASE)
+        self.method = method
+        self.username = username
+        self.password = password
 
     async def check(self, container_name: str) -> ReadinessResult:
         """Execute CLI command and check output."""
@@ -161,13 +179,15 @@ class CliProbe(ReadinessProbe):
                     progress_percent=0,
                 )
 
-            # Execute command with short timeout
-            exit_code, output = container.exec_run(
-                self.cli_command,
-                demux=False,
-            )
-
-            output_str = output.decode("utf-8", errors="replace") if output else ""
+            if self.method == "ssh":
+                exit_code, output_str = await self._run_over_ssh(container)
+            else:
+                # Execute command with short timeout
+                exit_code, output = container.exec_run(
+                    self.cli_command,
+                    demux=False,
+                )
+                output_str = output.decode("utf-8", errors="replace") if output else ""
 
             if exit_code == 0 and self.expected_pattern.search(output_str):
                 return ReadinessResult(
@@ -194,6 +214,20 @@ class CliProbe(ReadinessProbe):
             )
 
 
+    async def _run_over_ssh(self, container) -> tuple[int, str]:
+        networks = container.attrs.get("NetworkSettings", {}).get("Networks", {})
+        ip = next((n.get("IPAddress") for n in networks.values() if n.get("IPAddress")), None)
+        if not ip:
+            return 1, ""
+        result = await ssh_pool.run(
+            ip, self.username, self.password, self.cli_command, timeout=10
+        )
+        output = result.stdout or ""
+        if isinstance(output, bytes):
+            output = output.decode("utf-8", errors="replace")
+        return result.exit_status or 0, output
+
+
 # Progress patterns for cEOS boot sequence
 CEOS_PROGRESS_PATTERNS = {
     r"ZTP|zerotouch": 20,
@@ -234,10 +268,13 @@ def get_probe_for_vendor(kind: str) -> ReadinessProbe:
     if config.readiness_probe == "cli_probe":
         if config.readiness_pattern is None:
             return NoopProbe()
-        # For CLI probe, use console_shell as the command
+        # For CLI probe, use console_shell unless a probe command is given
         return CliProbe(
-            cli_command=config.console_shell,
+            cli_command=config.readiness_command or config.console_shell,
             expected_pattern=config.readiness_pattern,
+            method=config.console_method,
+            username=config.console_user,
+            password=config.console_password,
         )
 
     return NoopProbe()
@@ -150,6 +150,40 @@ class DeployRequest(BaseModel):
     # Optional callback URL for async execution
     # If provided, agent returns 202 Accepted immediately and POSTs result to this URL
     callback_url: str | None = None
+    # Restore nodes from this checkpoint (see CheckpointRequest) instead of cold-booting
+    checkpoint_id: str | None = None
+
+
+class CheckpointRequest(BaseModel):
+    """Controller -> Agent: Capture a running lab for later restore."""
+    checkpoint_id: str
+    provider: Provider = Provider.DOCKER
+    include_memory: bool = True  # CRIU / VM memory state where supported
+
+
+class CheckpointResponse(BaseModel):
+    """Agent -> Controller: Checkpoint result."""
+    success: bool
+    checkpoint_id: str
+    nodes: list[str] = Field(default_factory=list)
+    stateful_nodes: list[str] = Field(default_factory=list)  # Memory state captured
+    size_bytes: int = 0
+    error: str | None = None
+
+
+class TopologyDiffRequest(BaseModel):
+    """Controller -> Agent: Incrementally change a deployed lab.
+
+    Only the listed nodes and links are added or removed; every other node
+    of the lab keeps running untouched.
+    """
+    job_id: str
+    lab_id: str
+    provider: Provider = Provider.DOCKER
+    add_nodes: list[DeployNode] = Field(default_factory=list)
+    remove_nodes: list[str] = Field(default_factory=list)
+    add_links: list[DeployLink] = Field(default_factory=list)
+    remove_links: list[DeployLink] = Field(default_factory=list)
 
 
 class DestroyRequest(BaseModel):
@@ -176,6 +210,28 @@ class NodeActionRequest(BaseModel):
         return self.node_name
 
 
+class BulkNodeActionRequest(BaseModel):
+    """Controller -> Agent: Start/stop several nodes of a lab concurrently."""
+    job_id: str
+    lab_id: str
+    action: str  # "start" or "stop"
+    nodes: list[str]
+    max_concurrency: int | None = None  # Defaults to agent setting
+
+
+class NodeActionOutcome(BaseModel):
+    """Agent -> Controller: Result for one node of a bulk node action.
+
+    Streamed as one JSON line per node, in completion order.
+    """
+    node_name: str
+    success: bool
+    status: NodeStatus = NodeStatus.UNKNOWN
+    stdout: str = ""
+    stderr: str = ""
+    error: str | None = None
+
+
 class JobResult(BaseModel):
     """Agent -> Controller: Job completed."""
     job_id: str
@@ -185,6 +241,7 @@ class JobResult(BaseModel):
     stderr: str = ""
     error_message: str | None = None
     completed_at: datetime = Field(default_factory=datetime.utcnow)
+    timings: dict[str, float] = Field(default_factory=dict)  # Seconds per phase, where reported
 
 
 # --- Status Queries ---
@@ -343,16 +400,37 @@ class DockerImageInfo(BaseModel):
     created: str | None = None  # ISO timestamp
 
 
+class Qcow2ImageInfo(BaseModel):
+    """Information about a qcow2 image in an agent's image store."""
+    name: str  # Filename (e.g., "iosxrv9k-7.7.1.qcow2")
+    path: str
+    size_bytes: int = 0
+    version: str | None = None  # Parsed from the filename
+    checksum: str | None = None  # sha256 hex, once computed
+    backing_chain: list[str] = Field(default_factory=list)
+
+
 class ImageInventoryResponse(BaseModel):
-    """Agent -> Controller: List of Docker images on agent."""
+    """Agent -> Controller: List of Docker and qcow2 images on agent."""
     images: list[DockerImageInfo] = Field(default_factory=list)
+    qcow2_images: list[Qcow2ImageInfo] = Field(default_factory=list)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ImageLayersResponse(BaseModel):
+    """Agent -> Controller: Layer chain IDs present in the local Docker daemon.
+
+    Used by the controller to omit layers the agent already has when
+    streaming an image (layer-aware delta sync).
+    """
+    chain_ids: list[str] = Field(default_factory=list)
+
+
 class ImageExistsResponse(BaseModel):
     """Agent -> Controller: Whether an image exists."""
     exists: bool
     image: DockerImageInfo | None = None
+    qcow2_image: Qcow2ImageInfo | None = None
 
 
 class ImageReceiveRequest(BaseModel):
@@ -370,10 +448,36 @@ class ImageReceiveResponse(BaseModel):
     error: str | None = None
 
 
+class ImageReceiveSessionRequest(BaseModel):
+    """Controller -> Agent: Start a resumable image receive.
+
+    The manifest lists sha256 hashes of fixed-size chunks of the archive.
+    Chunks are verified before they reach `docker load`, and the stream can
+    be re-sent from the last verified offset after a dropped connection.
+    """
+    job_id: str
+    reference: str
+    manifest: dict
+
+
+class ImageReceiveSessionResponse(BaseModel):
+    """Agent -> Controller: State of a resumable image receive."""
+    job_id: str
+    verified_offset: int = 0
+    size: int = 0
+    complete: bool = False
+
+
 class ImagePullRequest(BaseModel):
-    """Agent -> Controller: Request to pull an image from controller."""
+    """Controller -> Agent: Request to pull an image.
+
+    By default the agent pulls from the controller. When source_url is set
+    (peer-to-peer distribution), it pulls from another agent's
+    /images/export endpoint instead.
+    """
     image_id: str  # Library image ID
     reference: str  # Docker reference
+    source_url: str | None = None  # Peer agent export URL
 
 
 class ImagePullResponse(BaseModel):
@@ -0,0 +1,143 @@
+"""Tests for per-container boot log ring buffers."""
+from __future__ import annotations
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from agent import boot_logs as boot_logs_module
+from agent.boot_logs import BOOT_LOG_HEADER, BootLogCache
+from agent.config import settings
+from agent.readiness import LogPatternProbe
+
+SNAPSHOT = (
+    b"2024-05-01T10:00:00.000000001Z Booting kernel\n"
+    b"2024-05-01T10:00:01.000000002Z Starting services\n"
+)
+
+
+def _container(stream_chunks: list[bytes]) -> MagicMock:
+    container = MagicMock()
+    container.status = "running"
+
+    def logs(stream=False, **kwargs):
+        return iter(stream_chunks) if stream else SNAPSHOT
+
+    container.logs.side_effect = logs
+    return container
+
+
+class OpenStream:
+    """A follow stream of a running container: blocks until closed."""
+
+    def __init__(self):
+        self._closed = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._closed.wait(5)
+        raise StopIteration
+
+    def close(self):
+        self._closed.set()
+
+
+@pytest.fixture
+def docker_client(monkeypatch):
+    client = MagicMock()
+    monkeypatch.setattr(boot_logs_module.docker, "from_env", lambda: client)
+    monkeypatch.setattr("agent.readiness.docker.from_env", lambda: client)
+    return client
+
+
+async def _followed(cache: BootLogCache, name: str):
+    log = await cache.get(name)
+    log.finished.wait(5)
+    return log
+
+
+@pytest.mark.asyncio
+async def test_follower_skips_overlap_and_joins_split_lines(docker_client):
+    docker_client.containers.get.return_value = _container([
+        # The follow stream starts slightly before the snapshot ended
+        b"2024-05-01T10:00:01.000000002Z Starting services\n2024-05-01T10:00:02Z Inter",
+        b"faces up\n",
+    ])
+
+    log = await _followed(BootLogCache(), "r1")
+
+    assert log.text() == "Booting kernel\nStarting services\nInterfaces up"
+    block = log.render()
+    assert block.startswith(BOOT_LOG_HEADER)
+    assert block.count("Starting services") == 1
+    # Rendered once per change, then served from cache
+    assert log.render() is block
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_bounded_and_followed_once(docker_client, monkeypatch):
+    monkeypatch.setattr(settings, "boot_log_buffer_lines", 3)
+    docker_client.containers.get.return_value = _container([
+        b"".join(f"2024-05-01T10:00:0{i}.5Z line {i}\n".encode() for i in range(2, 6))
+    ])
+    cache = BootLogCache()
+
+    log = await _followed(cache, "r1")
+    assert log.text() == "line 3\nline 4\nline 5"
+
+    # A stopped container's follower is restarted on next use (it may have restarted)
+    await _followed(cache, "r1")
+    assert docker_client.containers.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_log_pattern_probe_reads_the_buffer(docker_client, monkeypatch):
+    container = _container([b"2024-05-01T10:00:05Z Startup complete\n"])
+    docker_client.containers.get.return_value = container
+    cache = BootLogCache()
+    monkeypatch.setattr("agent.readiness.boot_logs", cache)
+    await _followed(cache, "r1")
+
+    result = await LogPatternProbe(r"Startup complete").check("r1")
+
+    assert result.is_ready
+
+
+@pytest.mark.asyncio
+async def test_nodes_being_polled_for_readiness_are_not_evicted(docker_client, monkeypatch):
+    monkeypatch.setattr(settings, "boot_log_max_containers", 2)
+    container = _container([])
+    container.logs.side_effect = lambda stream=False, **kwargs: OpenStream() if stream else SNAPSHOT
+    docker_client.containers.get.return_value = container
+    cache = BootLogCache()
+
+    booting = await cache.get("r1", pin=True)
+    for name in ("r2", "r3", "r4"):
+        await cache.get(name)
+
+    assert list(cache._logs) == ["r1", "r4"]
+    assert cache._logs["r1"] is booting
+
+    cache.unpin("r1")
+    await cache.get("r5")
+    assert list(cache._logs) == ["r4", "r5"]
+    assert booting._stopped.is_set()
+    cache.stop_all()
+
+
+@pytest.mark.asyncio
+async def test_log_pattern_probe_pins_until_ready(docker_client, monkeypatch):
+    docker_client.containers.get.return_value = _container([])
+    cache = BootLogCache()
+    monkeypatch.setattr("agent.readiness.boot_logs", cache)
+
+    result = await LogPatternProbe(r"Startup complete").check("r1")
+    assert not result.is_ready
+    assert cache._logs["r1"].pinned
+
+    result = await LogPatternProbe(r"Starting services").check("r1")
+    assert result.is_ready
+    assert not cache._logs["r1"].pinned
@@ -0,0 +1,72 @@
+"""Tests for the checkpoint store and Docker checkpoint restore planning."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+from docker.errors import ImageNotFound
+
+from agent import checkpoints
+from agent.config import settings
+from agent.providers.docker import DockerProvider, ParsedTopology, TopologyNode
+
+
+@pytest.fixture(autouse=True)
+def workspace(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "workspace_path", str(tmp_path))
+    return tmp_path
+
+
+def test_checkpoint_dir_rejects_path_traversal():
+    with pytest.raises(ValueError):
+        checkpoints.checkpoint_dir("lab-1", "../other")
+    with pytest.raises(ValueError):
+        checkpoints.checkpoint_dir("..", "ckpt")
+
+
+def test_manifest_round_trip_and_removal(workspace):
+    checkpoints.write_manifest("lab-1", "ckpt-1", "docker", {"r1": {"image": "img"}})
+
+    manifest = checkpoints.read_manifest("lab-1", "ckpt-1")
+    assert manifest["provider"] == "docker"
+    assert manifest["nodes"] == {"r1": {"image": "img"}}
+
+    checkpoints.remove_checkpoint_dir("lab-1", "ckpt-1")
+    assert checkpoints.read_manifest("lab-1", "ckpt-1") is None
+    assert not (workspace / ".checkpoints" / "lab-1").exists()
+
+
+def test_apply_checkpoint_restores_only_covered_nodes():
+    provider = DockerProvider()
+    provider._docker = MagicMock()
+    r1_image = provider._checkpoint_image("lab-1", "ckpt-1", "r1")
+    gone_image = provider._checkpoint_image("lab-1", "ckpt-1", "r2")
+
+    def get_image(ref):
+        if ref == gone_image:
+            raise ImageNotFound("gone")
+        return MagicMock()
+
+    provider._docker.images.get.side_effect = get_image
+    checkpoints.write_manifest("lab-1", "ckpt-1", "docker", {
+        "r1": {"image": r1_image},
+        "r2": {"image": gone_image},
+        "removed": {"image": "whatever"},
+    })
+    topology = ParsedTopology(
+        name="lab",
+        nodes={
+            "r1": TopologyNode(name="r1", kind="linux", image="alpine"),
+            "r2": TopologyNode(name="r2", kind="linux", image="alpine"),
+            "r3": TopologyNode(name="r3", kind="linux", image="alpine"),
+        },
+        links=[],
+    )
+
+    restore = provider._apply_checkpoint(topology, "lab-1", "ckpt-1")
+
+    assert list(restore) == ["r1"]
+    assert topology.nodes["r1"].image == r1_image
+    # Missing checkpoint image and new nodes cold-boot from their own image
+    assert topology.nodes["r2"].image == "alpine"
+    assert topology.nodes["r3"].image == "alpine"
@@ -0,0 +1,81 @@
+"""Tests for console output coalescing."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from agent.console.coalesce import OutputCoalescer
+
+
+class Sink:
+    def __init__(self, delay: float = 0.0):
+        self.frames: list[bytes] = []
+        self.delay = delay
+
+    async def send(self, data: bytes) -> None:
+        await asyncio.sleep(self.delay)
+        self.frames.append(data)
+
+
+@pytest.mark.asyncio
+async def test_output_within_window_shares_a_frame():
+    sink = Sink()
+    output = OutputCoalescer(sink.send, window=0.02, max_bytes=1024)
+    sender = asyncio.create_task(output.run())
+
+    for piece in (b"Router>", b"en", b"able\r\n"):
+        output.feed(piece)
+    await asyncio.sleep(0.05)
+    output.feed(b"Router#")
+    output.close()
+    await sender
+
+    assert sink.frames == [b"Router>enable\r\n", b"Router#"]
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_is_sent_without_waiting_for_window():
+    sink = Sink()
+    output = OutputCoalescer(sink.send, window=10.0, max_bytes=8)
+    sender = asyncio.create_task(output.run())
+
+    output.feed(b"0123456789")
+    await asyncio.sleep(0.01)
+
+    assert sink.frames == [b"0123456789"]
+    output.close()
+    await sender
+
+
+@pytest.mark.asyncio
+async def test_idle_console_schedules_nothing():
+    output = OutputCoalescer(Sink().send, window=0.01, max_bytes=1024)
+    sender = asyncio.create_task(output.run())
+    await asyncio.sleep(0.02)
+
+    assert output._timer is None
+    output.close()
+    await sender
+
+
+@pytest.mark.asyncio
+async def test_slow_websocket_pauses_the_producer():
+    sink = Sink(delay=0.02)
+    paused, resumed = [], []
+    output = OutputCoalescer(
+        sink.send, window=0, max_bytes=4,
+        on_pause=lambda: paused.append(True), on_resume=lambda: resumed.append(True),
+    )
+    sender = asyncio.create_task(output.run())
+
+    output.feed(b"a" * 4)
+    await asyncio.sleep(0)  # First frame is now being sent
+    output.feed(b"b" * 16)
+    assert paused == [True]
+
+    await output.writable()
+    assert resumed == [True]
+    output.close()
+    await sender
+    assert b"".join(sink.frames) == b"a" * 4 + b"b" * 16
@@ -0,0 +1,114 @@
+"""Tests for console session recording."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from agent.config import settings
+from agent.console import recording
+from agent.console.recording import ConsoleRecorder, RecordingReader
+
+
+@pytest.fixture(autouse=True)
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "workspace_path", str(tmp_path))
+    monkeypatch.setattr(settings, "console_recording_keyframe_interval", 5.0)
+    return tmp_path
+
+
+async def record(frames: list[tuple[float, bytes]]) -> ConsoleRecorder:
+    """Record output frames at the given offsets (seconds) from the start."""
+    recorder = ConsoleRecorder("lab1", "r1")
+    recorder.start()
+    start = recorder._start
+    for seconds, data in frames:
+        recorder._start = start - seconds  # Frame lands `seconds` into the session
+        if data.startswith(b"resize:"):
+            cols, rows = data[7:].split(b"x")
+            recorder.resize(int(cols), int(rows))
+        else:
+            recorder.output(data)
+    await recorder.close()
+    return recorder
+
+
+@pytest.mark.asyncio
+async def test_recording_round_trips_as_asciicast():
+    recorder = await record([(0.0, b"Router>"), (1.5, b"enable\r\n"), (2.0, b"resize:132x40")])
+
+    lines = [json.loads(line) for line in RecordingReader(recorder.path).iter_asciicast()]
+
+    assert lines[0]["version"] == 2
+    assert (lines[0]["width"], lines[0]["height"]) == (80, 24)
+    assert lines[1:] == [[0.0, "o", "Router>"], [1.5, "o", "enable\r\n"], [2.0, "r", "132x40"]]
+
+
+@pytest.mark.asyncio
+async def test_seek_starts_at_covering_keyframe():
+    frames = [(float(s), f"line {s}\r\n".encode()) for s in range(0, 30, 2)]
+    recorder = await record([(0.0, b"resize:100x30"), *frames])
+    reader = RecordingReader(recorder.path)
+
+    offset, cols, rows = reader.seek(13.0)
+    records = list(reader.records(13.0))
+
+    # Keyframes every 5s: 0, 6, 12, 18, 24 (the first frame at or after each)
+    assert records[0][0] == 12000
+    assert offset > reader.data_offset
+    assert (cols, rows) == (100, 30)
+    lines = [json.loads(line) for line in reader.iter_asciicast(start=13.0)]
+    assert lines[0]["width"] == 100
+    assert lines[1] == [0.0, "o", "line 12\r\n"]
+    assert lines[2] == [1.0, "o", "line 14\r\n"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(settings, "console_recording_queue", 2)
+    recorder = ConsoleRecorder("lab1", "r1")
+    recorder.start()
+
+    # The writer task hasn't run yet, so the queue fills synchronously
+    for i in range(5):
+        recorder.output(b"x%d" % i)
+    await recorder.close()
+
+    assert recorder.dropped == 3
+    meta = recording.list_recordings("lab1")[0]
+    assert meta["dropped_frames"] == 3
+    assert meta["frames"] == 2
+    assert meta["active"] is False
+
+
+@pytest.mark.asyncio
+async def test_listing_and_path_lookup(workspace):
+    recorder = await record([(0.0, b"hello")])
+
+    listed = recording.list_recordings("lab1")
+
+    assert [m["recording_id"] for m in listed] == [recorder.recording_id]
+    assert listed[0]["size_bytes"] == recorder.path.stat().st_size
+    assert recording.recording_path("lab1", recorder.recording_id) == recorder.path
+    assert recording.recording_path("lab1", "../lab1/" + recorder.recording_id) is None
+    assert recording.list_recordings("other") == []
+
+
+@pytest.mark.asyncio
+async def test_raw_stream_from_start_is_the_whole_file():
+    recorder = await record([(0.0, b"a"), (10.0, b"b")])
+    reader = RecordingReader(recorder.path)
+
+    assert b"".join(reader.iter_raw()) == recorder.path.read_bytes()
+    tail = b"".join(reader.iter_raw(start=10.0))
+    assert tail.startswith(recording.MAGIC)
+    assert len(tail) < recorder.path.stat().st_size
+
+
+def test_lab_ids_outside_the_recordings_root_are_rejected(workspace):
+    for lab_id in ("..", "../etc", "a/b", ".hidden"):
+        assert recording.list_recordings(lab_id) == []
+        assert recording.recording_path(lab_id, "r1-x") is None
+        with pytest.raises(ValueError):
+            ConsoleRecorder(lab_id, "r1")
+    assert not (workspace / "etc").exists()
@@ -0,0 +1,116 @@
+"""Tests for NUMA discovery, VM placement and domain tuning XML."""
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from agent.config import settings
+from agent.host_resources import (
+    HostResourceManager,
+    discover_topology,
+    format_cpulist,
+    parse_cpulist,
+    tuning_xml,
+)
+from agent.providers.libvirt import LibvirtProvider
+
+
+def _fake_sysfs(root: Path, nodes: dict[int, tuple[str, int, int]]) -> Path:
+    """Write node<N>/{cpulist,meminfo,hugepages} for (cpulist, MiB, 2M pages)."""
+    for node_id, (cpulist, memory_mb, hugepages) in nodes.items():
+        node = root / "devices" / "system" / "node" / f"node{node_id}"
+        (node / "hugepages" / "hugepages-2048kB").mkdir(parents=True)
+        (node / "cpulist").write_text(cpulist + "\n")
+        (node / "meminfo").write_text(f"Node {node_id} MemTotal:  {memory_mb * 1024} kB\n")
+        (node / "hugepages" / "hugepages-2048kB" / "nr_hugepages").write_text(f"{hugepages}\n")
+    return root
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vm_reserved_cpus", "0")
+    monkeypatch.setattr(settings, "vm_cpu_pinning", True)
+    monkeypatch.setattr(settings, "vm_hugepages", True)
+    _fake_sysfs(tmp_path, {0: ("0-3", 8192, 1024), 1: ("4-7", 8192, 0)})
+    return HostResourceManager(sys_root=tmp_path)
+
+
+def test_cpulist_round_trip():
+    assert parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpulist([11, 0, 1, 2, 3, 8, 10]) == "0-3,8,10-11"
+
+
+def test_discovers_numa_nodes(tmp_path):
+    _fake_sysfs(tmp_path, {0: ("0-3", 8192, 512), 1: ("4-7", 4096, 0)})
+
+    nodes = discover_topology(tmp_path)
+
+    assert [(n.id, n.cpus, n.memory_mb, n.hugepages_mb) for n in nodes] == [
+        (0, [0, 1, 2, 3], 8192, 1024),
+        (1, [4, 5, 6, 7], 4096, 0),
+    ]
+
+
+def test_places_vms_on_single_nodes_and_releases(manager):
+    first = manager.allocate("arch-lab-r1", vcpus=2, memory_mb=2048)
+    second = manager.allocate("arch-lab-r2", vcpus=3, memory_mb=2048)
+
+    # Node 1 has the most free cores (node 0 loses core 0 to the host)
+    assert (first.numa_node, first.cpus, first.hugepages) == (1, [4, 5], False)
+    assert (second.numa_node, second.cpus, second.hugepages) == (0, [1, 2, 3], True)
+
+    # No node has 3 free cores left: the VM keeps NUMA-local memory, vCPUs float
+    third = manager.allocate("arch-lab-r3", vcpus=3, memory_mb=1024)
+    assert third.cpus == []
+
+    manager.release("arch-lab-r2")
+    usage = {n["node"]: n for n in manager.usage()}
+    assert usage[0]["cpus_pinned"] == 0
+    assert usage[1]["cpus_pinned"] == 2
+    assert usage[0]["cpus_reserved"] == 1
+
+
+def test_adopts_placement_from_domain_xml(manager):
+    allocation = manager.allocate("arch-lab-r1", vcpus=2, memory_mb=2048)
+    xml = (
+        "<domain><memory unit='MiB'>2048</memory><vcpu>2</vcpu>  "
+        + tuning_xml(allocation, 2, 1)
+        + "</domain>"
+    )
+
+    restarted = HostResourceManager(sys_root=manager._sys_root)
+    restarted.adopt("arch-lab-r1", xml)
+
+    adopted = restarted.get("arch-lab-r1")
+    assert (adopted.numa_node, adopted.cpus, adopted.memory_mb) == (1, [4, 5], 2048)
+
+
+def test_domain_xml_includes_tuning(manager):
+    manager.allocate("arch-lab-r1", vcpus=3, memory_mb=1024)  # Takes node 1
+    allocation = manager.allocate("arch-lab-r2", vcpus=2, memory_mb=1024)
+    provider = LibvirtProvider.__new__(LibvirtProvider)
+
+    root = ET.fromstring(provider._generate_domain_xml(
+        "arch-lab-r2", {"cpu": 2, "memory": 1024}, Path("/tmp/r2.qcow2"),
+        allocation=allocation,
+    ))
+
+    assert [p.get("cpuset") for p in root.findall("./cputune/vcpupin")] == ["1", "2"]
+    assert root.find("./numatune/memory").get("nodeset") == "0"
+    assert root.find("./memoryBacking/hugepages/page") is not None
+    assert root.find("./iothreads").text == "1"
+    assert root.find("./devices/disk/driver").get("iothread") == "1"
+
+
+def test_ksm_lab_vms_use_regular_pages(manager):
+    provider = LibvirtProvider.__new__(LibvirtProvider)
+
+    shared = manager.allocate("arch-lab-r1", vcpus=1, memory_mb=1024, hugepages=False)
+    assert shared.hugepages is False
+
+    unshared = ET.fromstring(provider._generate_domain_xml(
+        "arch-lab-r2", {"cpu": 1, "memory": 1024, "ksm": False}, Path("/tmp/r2.qcow2"),
+    ))
+    assert unshared.find("./memoryBacking/nosharepages") is not None
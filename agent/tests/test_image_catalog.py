@@ -0,0 +1,91 @@
+"""Tests for the qcow2 image catalog."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+import pytest
+
+from agent import image_catalog as catalog_module
+from agent.config import settings
+from agent.image_catalog import ImageCatalog, parse_version
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "workspace_path", str(tmp_path / "workspace"))
+    monkeypatch.setattr(catalog_module, "_backing_chain", lambda path: [])
+    store = tmp_path / "images"
+    store.mkdir()
+    for name in ("iosxrv9k-7.7.1.qcow2", "iosxrv9k-7.10.2.qcow2", "csr1000v-17.03.04a.qcow2"):
+        (store / name).write_bytes(b"qcow2")
+    (store / "notes.txt").write_text("not an image")
+    return store
+
+
+def test_parse_version():
+    assert parse_version("csr1000v-universalk9.17.03.04a.qcow2") == "17.03.04a"
+    assert parse_version("iosxrv9k-fullk9-x-7.7.1.qcow2") == "7.7.1"
+    assert parse_version("vmx.qcow2") is None
+
+
+def test_resolves_from_index(store):
+    catalog = ImageCatalog(store)
+
+    assert catalog.resolve("csr1000v-17.03.04a.qcow2") == str(store / "csr1000v-17.03.04a.qcow2")
+    assert catalog.resolve("csr1000v-17.03.04a") == str(store / "csr1000v-17.03.04a.qcow2")
+    # Ambiguous substring matches pick the newest version
+    assert catalog.resolve("iosxrv9k") == str(store / "iosxrv9k-7.10.2.qcow2")
+    # Controller paths resolve by filename when the store is mounted elsewhere
+    assert catalog.resolve("/var/lib/archetype/images/csr1000v-17.03.04a.qcow2") == str(
+        store / "csr1000v-17.03.04a.qcow2"
+    )
+    assert catalog.resolve("missing") is None
+    assert [i.name for i in catalog.images()] == [
+        "csr1000v-17.03.04a.qcow2", "iosxrv9k-7.10.2.qcow2", "iosxrv9k-7.7.1.qcow2",
+    ]
+
+
+def test_unchanged_images_are_not_reinspected(store, monkeypatch):
+    inspected = []
+    monkeypatch.setattr(catalog_module, "_backing_chain", lambda path: inspected.append(path.name) or [])
+    ImageCatalog(store).scan()
+    assert len(inspected) == 3
+
+    # A restarted agent reuses the on-disk cache
+    inspected.clear()
+    restarted = ImageCatalog(store)
+    restarted.scan()
+    assert inspected == []
+    assert len(restarted.images()) == 3
+
+
+def test_picks_up_images_written_after_scan(store):
+    catalog = ImageCatalog(store)
+    catalog.scan()
+
+    (store / "new.qcow2").write_bytes(b"qcow2")
+
+    assert catalog.resolve("new.qcow2") == str(store / "new.qcow2")
+
+
+@pytest.mark.asyncio
+async def test_inotify_refresh_and_checksums(store):
+    catalog = ImageCatalog(store)
+    await catalog.start()
+    try:
+        (store / "vmx-21.1.qcow2").write_bytes(b"vmx")
+        (store / "iosxrv9k-7.7.1.qcow2").unlink()
+
+        for _ in range(50):
+            names = {i.name for i in catalog.images()}
+            checksum = catalog.get("vmx-21.1.qcow2")
+            if "iosxrv9k-7.7.1.qcow2" not in names and checksum and checksum.checksum:
+                break
+            await asyncio.sleep(0.1)
+
+        assert "vmx-21.1.qcow2" in names
+        assert "iosxrv9k-7.7.1.qcow2" not in names
+        assert catalog.get("vmx-21.1.qcow2").checksum == hashlib.sha256(b"vmx").hexdigest()
+    finally:
+        await catalog.stop()
@@ -0,0 +1,109 @@
+"""Tests for resumable peer image exports (agent/image_export.py)."""
+
+import asyncio
+import gzip
+import hashlib
+import sys
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from agent import image_export
+from agent.config import settings
+from agent.image_loader import ACCEPT_CODECS_HEADER, CODEC_HEADER
+
+DATA = bytes(range(256)) * 10
+
+FAKE_DOCKER = """
+import sys
+if sys.argv[1] == "save":
+    with open(sys.argv[3], "wb") as f:
+        f.write(bytes(range(256)) * 10)
+else:
+    data = sys.stdin.buffer.read()
+    print(f"Loaded image: test:{len(data)}")
+"""
+
+
+@pytest.fixture
+def fake_docker(monkeypatch, tmp_path):
+    """Replace the docker CLI with a script that saves DATA and loads stdin."""
+    real_exec = asyncio.create_subprocess_exec
+    calls = []
+
+    async def fake_exec(*args, **kwargs):
+        calls.append(args[1])
+        return await real_exec(sys.executable, "-c", FAKE_DOCKER, *args[1:], **kwargs)
+
+    monkeypatch.setattr(image_export.asyncio, "create_subprocess_exec", fake_exec)
+    monkeypatch.setattr(image_export, "_image_id", lambda reference: "sha256:image")
+    monkeypatch.setattr(image_export, "_exports", {})
+    monkeypatch.setattr(settings, "workspace_path", str(tmp_path))
+    monkeypatch.setattr(settings, "image_export_chunk_size", 256)
+    monkeypatch.setattr(settings, "image_resume_retry_delay", 0)
+    return calls
+
+
+async def test_export_is_spooled_once_with_manifest(fake_docker):
+    export = await image_export.prepare_export("test:1.0")
+    again = await image_export.prepare_export("test:1.0")
+
+    assert again is export
+    assert fake_docker == ["save"]
+    assert export.manifest["artifact_id"] == "sha256:image"
+    assert export.manifest["size"] == len(DATA)
+    assert export.manifest["chunks"] == [
+        hashlib.sha256(DATA[i:i + 256]).hexdigest() for i in range(0, len(DATA), 256)
+    ]
+    tail = b"".join([chunk async for chunk in image_export.iter_export(export, 1000)])
+    assert tail == DATA[1000:]
+
+
+async def test_export_endpoint_resumes_and_compresses(fake_docker):
+    from agent import main
+
+    request = SimpleNamespace(headers={"range": "bytes=512-", ACCEPT_CODECS_HEADER: "gzip"})
+    response = await main.export_image("test:1.0", request)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+
+    assert response.status_code == 206
+    assert response.headers[CODEC_HEADER] == "gzip"
+    assert response.headers["X-Artifact-Id"] == "sha256:image"
+    assert response.headers["Content-Range"] == f"bytes 512-{len(DATA) - 1}/{len(DATA)}"
+    assert gzip.decompress(body) == DATA[512:]
+
+
+async def test_peer_pull_resumes_from_verified_offset(fake_docker, monkeypatch):
+    from agent import image_loader, main
+
+    monkeypatch.setattr(image_loader.asyncio, "create_subprocess_exec",
+                        image_export.asyncio.create_subprocess_exec)
+    manifest = (await image_export.prepare_export("test:1.0")).manifest
+    offsets = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/manifest"):
+            return httpx.Response(200, json=manifest)
+        offset = int(request.headers.get("range", "bytes=0-")[6:-1])
+        offsets.append(offset)
+        # The first connection drops partway through the third chunk
+        end = offset + 700 if len(offsets) == 1 else len(DATA)
+        return httpx.Response(
+            206 if offset else 200,
+            headers={"X-Artifact-Id": manifest["artifact_id"]},
+            content=DATA[offset:end],
+        )
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        main.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler)),
+    )
+
+    await main._execute_pull_from_peer("pull-1", "test:1.0", "http://peer/images/export")
+
+    progress = main._image_pull_jobs["pull-1"]
+    assert progress.status == "completed", progress.error
+    assert progress.bytes_transferred == len(DATA)
+    assert offsets == [0, 512]
@@ -0,0 +1,174 @@
+"""Tests for streaming docker load (agent/image_loader.py)."""
+
+import asyncio
+import sys
+
+import pytest
+
+from agent import image_loader
+from agent.image_loader import ImageLoadError, load_image_stream, parse_loaded_images
+
+
+FAKE_DOCKER_LOAD = """
+import sys
+data = sys.stdin.buffer.read()
+print(f"Loaded image: test:{len(data)}")
+"""
+
+FAILING_DOCKER_LOAD = """
+import sys
+sys.stdin.buffer.read(10)
+sys.stderr.write("invalid tar header")
+sys.exit(1)
+"""
+
+
+@pytest.fixture
+def fake_docker(monkeypatch):
+    """Replace `docker load` with a Python script reading stdin."""
+    real_exec = asyncio.create_subprocess_exec
+
+    def install(script: str):
+        async def fake_exec(*args, **kwargs):
+            return await real_exec(sys.executable, "-c", script, **kwargs)
+        monkeypatch.setattr(image_loader.asyncio, "create_subprocess_exec", fake_exec)
+
+    return install
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def test_parse_loaded_images():
+    output = "Loaded image: ceos:4.28.0F\nLoaded image ID: sha256:abc\nother line"
+    assert parse_loaded_images(output) == ["ceos:4.28.0F", "sha256:abc"]
+
+
+async def test_streams_chunks_into_docker_load(fake_docker):
+    fake_docker(FAKE_DOCKER_LOAD)
+    progress = []
+
+    loaded, consumed = await load_image_stream(
+        _chunks(b"a" * 100, b"b" * 50), on_progress=progress.append
+    )
+
+    assert loaded == ["test:150"]
+    assert consumed == 150
+    assert progress == [100, 150]
+
+
+async def test_raises_on_docker_load_failure(fake_docker):
+    fake_docker(FAILING_DOCKER_LOAD)
+
+    with pytest.raises(ImageLoadError, match="invalid tar header"):
+        await load_image_stream(_chunks(b"x" * 20))
+
+
+async def test_decompresses_gzip_stream(fake_docker):
+    import gzip
+
+    fake_docker(FAKE_DOCKER_LOAD)
+    compressed = gzip.compress(b"z" * 4096)
+
+    loaded, consumed = await load_image_stream(
+        _chunks(compressed[:10], compressed[10:]), codec="gzip"
+    )
+
+    assert loaded == ["test:4096"]
+    assert consumed == 4096
+
+
+async def test_rejects_unknown_codec(fake_docker):
+    fake_docker(FAKE_DOCKER_LOAD)
+
+    with pytest.raises(ImageLoadError, match="Unsupported image codec"):
+        await load_image_stream(_chunks(b"data"), codec="brotli")
+
+
+def test_accepted_codecs_always_include_gzip():
+    assert "gzip" in image_loader.accepted_codecs()
+
+
+def _manifest(data: bytes, chunk_size: int) -> dict:
+    import hashlib
+
+    return {
+        "artifact_id": "a1",
+        "size": len(data),
+        "chunk_size": chunk_size,
+        "chunks": [
+            hashlib.sha256(data[i:i + chunk_size]).hexdigest()
+            for i in range(0, len(data), chunk_size)
+        ],
+    }
+
+
+async def test_resumes_from_last_verified_chunk(fake_docker):
+    from contextlib import asynccontextmanager
+
+    fake_docker(FAKE_DOCKER_LOAD)
+    data = bytes(range(256)) * 10
+    offsets = []
+
+    @asynccontextmanager
+    async def open_stream(offset):
+        offsets.append(offset)
+
+        async def body():
+            yield data[offset:offset + 700]
+            if len(offsets) == 1:
+                raise ConnectionResetError("link dropped")
+            yield data[offset + 700:]
+
+        yield body(), None
+
+    loaded, consumed = await image_loader.load_image_resumable(
+        _manifest(data, 256), open_stream, retry_on=(), retry_delay=0
+    )
+
+    assert loaded == [f"test:{len(data)}"]
+    assert consumed == len(data)
+    assert offsets == [0, 512]
+
+
+async def test_rejects_corrupt_chunk_before_docker_load(fake_docker):
+    from contextlib import asynccontextmanager
+
+    fake_docker(FAKE_DOCKER_LOAD)
+    data = b"a" * 1000
+
+    @asynccontextmanager
+    async def open_stream(offset):
+        async def body():
+            yield b"b" * (len(data) - offset)
+
+        yield body(), None
+
+    with pytest.raises(ImageLoadError, match="failed verification"):
+        await image_loader.load_image_resumable(
+            _manifest(data, 256), open_stream, retry_on=(), attempts=1, retry_delay=0
+        )
+
+
+async def test_reaper_aborts_idle_receive_sessions(monkeypatch):
+    import time
+    from unittest.mock import AsyncMock, MagicMock
+
+    from agent import main
+
+    idle = MagicMock(last_activity=time.monotonic() - 1000, abort=AsyncMock())
+    active = MagicMock(last_activity=time.monotonic() + 1000, abort=AsyncMock())
+    monkeypatch.setattr(main.settings, "image_receive_session_timeout", 0.05)
+    monkeypatch.setattr(main, "_image_receive_sessions", {"idle": idle, "active": active})
+
+    task = asyncio.create_task(main.receive_session_reaper_loop())
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    idle.abort.assert_awaited_once()
+    active.abort.assert_not_awaited()
+    assert list(main._image_receive_sessions) == ["active"]
@@ -0,0 +1,74 @@
+"""Tests for base-image page-cache warming and KSM tuning."""
+from __future__ import annotations
+
+import pytest
+
+from agent import image_warmup
+from agent.config import settings
+from agent.host_resources import KsmTuner
+
+
+@pytest.fixture
+def ksm_sysfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vm_ksm_pages_to_scan", 2000)
+    monkeypatch.setattr(settings, "vm_ksm_sleep_millisecs", 10)
+    ksm_dir = tmp_path / "kernel" / "mm" / "ksm"
+    ksm_dir.mkdir(parents=True)
+    for name, value in {
+        "run": 0, "pages_to_scan": 100, "sleep_millisecs": 200,
+        "pages_shared": 10, "pages_sharing": 512,
+    }.items():
+        (ksm_dir / name).write_text(f"{value}\n")
+    return ksm_dir
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["fadvise", "read"])
+async def test_warms_each_image_once(tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(image_warmup.image_catalog, "get", lambda name: None)
+    warmed = []
+    real_warm_file = image_warmup.warm_file
+    monkeypatch.setattr(
+        image_warmup, "warm_file", lambda path, m: warmed.append(path) or real_warm_file(path, m)
+    )
+    base = tmp_path / "iosv.qcow2"
+    base.write_bytes(b"\0" * (3 * 1024 * 1024))
+
+    timings = await image_warmup.warm_base_images([str(base)] * 5, mode=mode)
+
+    assert warmed == [str(base)]
+    assert timings["warmup_mb"] == 3.0
+    assert await image_warmup.warm_base_images([str(base)], mode="off") == {}
+
+
+@pytest.mark.asyncio
+async def test_missing_images_do_not_fail_warming(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_warmup.image_catalog, "get", lambda name: None)
+
+    timings = await image_warmup.warm_base_images([str(tmp_path / "gone.qcow2")])
+
+    assert timings["warmup_mb"] == 0
+
+
+def test_ksm_runs_while_any_opted_in_lab_is_deployed(tmp_path, ksm_sysfs):
+    tuner = KsmTuner(sys_root=tmp_path)
+
+    tuner.acquire("lab-1")
+    tuner.acquire("lab-2")
+    assert (ksm_sysfs / "run").read_text().strip() == "1"
+    assert (ksm_sysfs / "pages_to_scan").read_text().strip() == "2000"
+    assert tuner.usage()["labs"] == ["lab-1", "lab-2"]
+
+    tuner.release("lab-1")
+    assert (ksm_sysfs / "run").read_text().strip() == "1"
+
+    tuner.release("lab-2")
+    assert (ksm_sysfs / "run").read_text().strip() == "0"
+    assert (ksm_sysfs / "pages_to_scan").read_text().strip() == "100"
+    assert (ksm_sysfs / "sleep_millisecs").read_text().strip() == "200"
+
+
+def test_ksm_unavailable(tmp_path):
+    tuner = KsmTuner(sys_root=tmp_path)
+    tuner.acquire("lab-1")
+    assert tuner.usage() == {"available": False}
@@ -0,0 +1,77 @@
+"""Tests for incremental (diff) deploys in the Docker provider."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+from docker.errors import NotFound
+
+from agent.config import settings
+from agent.providers.docker import DockerProvider, ParsedTopology, TopologyLink, TopologyNode
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(settings, "enable_ovs", True)
+    monkeypatch.setattr(settings, "enable_ovs_plugin", True)
+    provider = DockerProvider()
+    provider._docker = MagicMock()
+    return provider
+
+
+def _container(name: str, status: str, networks: list[str] = ()) -> MagicMock:
+    container = MagicMock()
+    container.name = name
+    container.id = f"id-{name}"
+    container.status = status
+    container.attrs = {"NetworkSettings": {"Networks": {n: {} for n in networks}}}
+    return container
+
+
+@pytest.mark.asyncio
+async def test_existing_link_endpoints_join_missing_networks(provider):
+    """A new link on a higher interface of a running node attaches that network."""
+    r1 = _container("archetype-lab1-r1", "running", ["lab1-eth1", "lab1-eth2"])
+    provider._docker.containers.get.return_value = r1
+    topology = ParsedTopology(
+        name="lab",
+        nodes={"r2": TopologyNode(name="r2", kind="linux", image="alpine")},
+        links=[
+            TopologyLink(endpoints=["r1:eth2", "r2:eth1"]),
+            TopologyLink(endpoints=["r1:eth7", "r2:eth2"]),
+        ],
+    )
+
+    attached = await provider._attach_link_endpoints(topology, "lab1")
+
+    assert attached == 1
+    provider._docker.containers.get.assert_called_once_with("archetype-lab1-r1")
+    connected = [c.args[0] for c in provider._docker.networks.get.return_value.connect.call_args_list]
+    assert connected == [r1.id]
+    assert "lab1-eth7" in [c.args[0] for c in provider._docker.networks.get.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_stopped_containers_are_reused_not_recreated(provider, tmp_path):
+    """reuse_stopped keeps existing containers so starting them preserves state."""
+    r1 = _container("archetype-lab1-r1", "exited")
+
+    def get(name):
+        if name == "archetype-lab1-r1":
+            return r1
+        raise NotFound("missing")
+
+    provider._docker.containers.get.side_effect = get
+    topology = ParsedTopology(
+        name="lab",
+        nodes={"r1": TopologyNode(name="r1", kind="linux", image="alpine")},
+        links=[],
+    )
+
+    containers = await provider._create_containers(
+        topology, "lab1", tmp_path, cleanup_networks_on_failure=False, reuse_stopped=True
+    )
+
+    assert containers == {"r1": r1}
+    r1.remove.assert_not_called()
+    provider._docker.containers.create.assert_not_called()
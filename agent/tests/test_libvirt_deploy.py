@@ -0,0 +1,128 @@
+"""Tests for concurrent libvirt deploys, boot rate limiting and deploy progress."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from agent.config import settings
+from agent.deploy_progress import DeployProgress, deploy_progress
+from agent.providers.libvirt import BootRateLimiter, LibvirtProvider
+
+
+def _provider(boot_interval: float = 0.0) -> LibvirtProvider:
+    # Bypass __init__, which requires libvirt-python
+    provider = LibvirtProvider.__new__(LibvirtProvider)
+    provider._conn = MagicMock()
+    provider._uri = "qemu:///system"
+    provider._executor = ThreadPoolExecutor(max_workers=8)
+    provider._boot_limiter = BootRateLimiter(boot_interval)
+    provider._placements_adopted = True
+    return provider
+
+
+TOPOLOGY = "nodes:\n" + "".join(
+    f"  vm{i}:\n    kind: cisco_iosv\n    image: iosv.qcow2\n" for i in range(6)
+)
+
+
+@pytest.mark.asyncio
+async def test_boot_rate_limiter_spaces_boots():
+    limiter = BootRateLimiter(0.05)
+    started = []
+
+    async def boot():
+        await limiter.wait()
+        started.append(time.monotonic())
+
+    await asyncio.gather(*(boot() for _ in range(4)))
+
+    gaps = [b - a for a, b in zip(started, started[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+@pytest.mark.asyncio
+async def test_progress_replays_history_then_follows_live():
+    progress = DeployProgress()
+    progress.start("lab-1", ["r1", "r2"])
+    progress.publish("lab-1", "r1", "running")
+
+    async def read():
+        return [(e.get("node"), e["phase"]) async for e in progress.subscribe("lab-1")]
+
+    reader = asyncio.create_task(read())
+    await asyncio.sleep(0)
+    progress.publish("lab-1", "r2", "failed", error="boom")
+    progress.finish("lab-1", deployed=1, failed=1)
+
+    assert await reader == [
+        ("r1", "queued"), ("r2", "queued"), ("r1", "running"),
+        ("r2", "failed"), (None, "done"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_deploy_prepares_concurrently_off_the_event_loop(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "libvirt_deploy_concurrency", 3)
+    provider = _provider()
+    loop_thread = threading.get_ident()
+    in_flight = 0
+    peak = 0
+    boot_threads = set()
+
+    async def prepare(lab_id, node_name, node_config, disks_dir, checkpoint):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        domain = MagicMock()
+        domain.UUIDString.return_value = f"uuid-{node_name}"
+        return domain, lambda: boot_threads.add(threading.get_ident())
+
+    monkeypatch.setattr(provider, "_prepare_node", prepare)
+
+    result = await provider.deploy("lab-1", None, TOPOLOGY, tmp_path)
+
+    assert result.success
+    assert len(result.nodes) == 6
+    assert peak == 3
+    assert boot_threads and loop_thread not in boot_threads
+    events = [e async for e in deploy_progress.subscribe("lab-1")]
+    assert events[-1]["phase"] == "done" and events[-1]["deployed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_large_deploy_warms_base_images_and_reports_timings(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "vm_image_warmup_min_vms", 4)
+    provider = _provider()
+    warmed = []
+    configs = {}
+
+    async def warm(paths):
+        warmed.extend(paths)
+        return {"warmup": 0.5, "warmup_mb": 300.0}
+
+    async def prepare(lab_id, node_name, node_config, disks_dir, checkpoint):
+        configs[node_name] = node_config
+        domain = MagicMock()
+        domain.UUIDString.return_value = f"uuid-{node_name}"
+        return domain, lambda: None
+
+    monkeypatch.setattr("agent.providers.libvirt.warm_base_images", warm)
+    monkeypatch.setattr(provider, "_get_base_image", lambda config: "/images/iosv.qcow2")
+    monkeypatch.setattr(provider, "_prepare_node", prepare)
+
+    result = await provider.deploy("lab-2", None, TOPOLOGY.replace("nodes:", "ksm: false\nnodes:", 1), tmp_path)
+
+    assert warmed == ["/images/iosv.qcow2"] * 6
+    assert result.timings["warmup"] == 0.5
+    assert {"prepare_max", "boot_max", "total"} <= set(result.timings)
+    assert "Timings: warmup=0.5" in result.stdout
+    assert all(config["ksm"] is False for config in configs.values())
+    events = [e async for e in deploy_progress.subscribe("lab-2")]
+    assert all("seconds" in e for e in events if e["phase"] == "running")
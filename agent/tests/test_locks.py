@@ -0,0 +1,164 @@
+"""Tests for DeployLockManager against fakeredis.
+
+fakeredis runs the lock manager's Lua scripts (through lupa) and its
+pub/sub, so the tests exercise the real queueing, wakeup and ownership
+logic without a Redis server.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from agent.locks import DeployLockManager, LockAcquisitionTimeout  # noqa: E402
+
+
+@pytest.fixture
+async def redis_server():
+    """One in-memory server shared by every lock manager of a test."""
+    managers: list[DeployLockManager] = []
+    server = fakeredis.FakeServer()
+    yield server, managers
+    for manager in managers:
+        await manager.close()
+
+
+def _manager(redis_server, recheck_interval: float = 10.0) -> DeployLockManager:
+    server, managers = redis_server
+    manager = DeployLockManager("redis://unused", lock_ttl=60, agent_id="agent-1",
+                                recheck_interval=recheck_interval)
+    manager._redis = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    managers.append(manager)
+    return manager
+
+
+def _count_commands(manager: DeployLockManager) -> list[str]:
+    """Record the commands a manager sends (pub/sub reads excluded)."""
+    commands: list[str] = []
+    execute = manager._redis.execute_command
+
+    async def counted(*args, **kwargs):
+        commands.append(args[0])
+        return await execute(*args, **kwargs)
+
+    manager._redis.execute_command = counted
+    return commands
+
+
+@pytest.mark.asyncio
+async def test_release_does_not_delete_lock_taken_by_another_holder(redis_server):
+    manager = _manager(redis_server)
+
+    async with manager.acquire("lab-1"):
+        # Lock expired and was taken by someone else while we held it
+        await manager._redis.set(manager._lock_key("lab-1"), "agent-1:0:other")
+
+    assert await manager._redis.get(manager._lock_key("lab-1")) == "agent-1:0:other"
+
+
+@pytest.mark.asyncio
+async def test_extend_only_while_holding(redis_server):
+    manager = _manager(redis_server)
+
+    assert await manager.extend_lock("lab-1") is False
+    async with manager.acquire("lab-1"):
+        assert await manager.extend_lock("lab-1") is True
+        await manager._redis.set(manager._lock_key("lab-1"), "agent-1:0:other")
+        assert await manager.extend_lock("lab-1") is False
+
+
+@pytest.mark.asyncio
+async def test_waiter_wakes_on_release_without_polling(redis_server):
+    holder, waiter = _manager(redis_server), _manager(redis_server)
+    commands = _count_commands(waiter)
+    acquired_at = None
+
+    async def wait_for_lock():
+        nonlocal acquired_at
+        async with waiter.acquire("lab-1", timeout=5.0):
+            acquired_at = time.monotonic()
+
+    async with holder.acquire("lab-1"):
+        task = asyncio.create_task(wait_for_lock())
+        await asyncio.sleep(0.2)
+        commands_while_waiting = len(commands)
+        await asyncio.sleep(0.3)
+        # No Redis traffic while blocked (recheck interval is 10s)
+        assert len(commands) == commands_while_waiting
+        released_at = time.monotonic()
+    await task
+
+    assert acquired_at - released_at < 0.1
+
+
+@pytest.mark.asyncio
+async def test_waiters_acquire_in_fifo_order(redis_server):
+    holder = _manager(redis_server)
+    waiters = [_manager(redis_server) for _ in range(3)]
+    order = []
+
+    async def wait_for_lock(i):
+        async with waiters[i].acquire("lab-1", timeout=5.0):
+            order.append(i)
+            await asyncio.sleep(0.01)
+
+    async with holder.acquire("lab-1"):
+        tasks = []
+        for i in range(3):
+            tasks.append(asyncio.create_task(wait_for_lock(i)))
+            await asyncio.sleep(0.02)
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_timed_out_waiter_leaves_queue(redis_server):
+    holder, waiter, late = (_manager(redis_server) for _ in range(3))
+
+    async with holder.acquire("lab-1"):
+        with pytest.raises(LockAcquisitionTimeout):
+            async with waiter.acquire("lab-1", timeout=0.1):
+                pass
+        assert await holder._redis.zcard(holder._queue_key("lab-1")) == 0
+        assert await holder._redis.zcard(holder._waiters_key("lab-1")) == 0
+
+    # A later caller is not blocked behind the abandoned ticket
+    async with late.acquire("lab-1", timeout=0.5):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_lock_status_parses_tokenized_value(redis_server):
+    manager = _manager(redis_server)
+
+    async with manager.acquire("lab-1"):
+        status = await manager.get_lock_status("lab-1")
+
+    assert status["held"] is True
+    assert status["owner"] == "agent-1"
+    assert status["age_seconds"] < 5
+
+
+@pytest.mark.asyncio
+async def test_queue_head_blocks_only_while_its_heartbeat_is_live(redis_server):
+    manager = _manager(redis_server)
+    r = manager._redis
+    queue, waiters = manager._queue_key("lab-1"), manager._waiters_key("lab-1")
+    await r.zadd(queue, {"other": 0})
+    await r.zadd(waiters, {"other": time.time() + 30})
+
+    with pytest.raises(LockAcquisitionTimeout):
+        async with manager.acquire("lab-1", timeout=0.1):
+            pass
+
+    # The waiter crashed: its heartbeat lapsed, so its ticket is dropped
+    await r.zadd(waiters, {"other": time.time() - 1})
+    async with manager.acquire("lab-1", timeout=0.5):
+        pass
+    assert await r.zcard(queue) == 0
+    assert await r.zcard(waiters) == 0
@@ -0,0 +1,68 @@
+"""Tests for the agent's Prometheus metrics."""
+from __future__ import annotations
+
+import pytest
+
+from agent import metrics
+from agent.config import settings
+from agent.network import batch
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    metrics.registry.clear()
+    yield
+    metrics.registry.clear()
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram("test_seconds", "Test.", ("phase",), buckets=(0.1, 1.0))
+    hist.observe(0.05, phase="a")
+    hist.observe(0.5, phase="a")
+    hist.observe(5.0, phase="a")
+
+    lines = hist.render()
+
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{phase="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{phase="a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{phase="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{phase="a"} 3' in lines
+    assert 'test_seconds_sum{phase="a"} 5.55' in lines
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+
+    metrics.deploy_phase_seconds.observe(1.0, provider="docker", phase="total")
+    metrics.console_sessions.inc(method="ssh")
+    with metrics.lock_wait_seconds.time(lock="deploy", outcome="acquired"):
+        pass
+
+    assert metrics.deploy_phase_seconds.count(provider="docker", phase="total") == 0
+    assert metrics.console_sessions.value(method="ssh") == 0
+    assert "archetype_agent_console_sessions{" not in metrics.render()
+
+
+def test_command_label_keeps_cardinality_bounded():
+    assert metrics.command_label(["ip", "-j", "link", "show", "eth0"]) == "ip link"
+    assert metrics.command_label(["ip", "-n", "lab-ns-1", "addr", "add"]) == "ip addr"
+    assert metrics.command_label(["ovs-vsctl", "--", "--if-exists", "del-port", "br", "p"]) == (
+        "ovs-vsctl del-port"
+    )
+    assert metrics.command_label(["ip", "-force", "-batch", "-"]) == "ip"
+    assert metrics.command_label(["/usr/bin/qemu-img", "create", "-f", "qcow2"]) == "qemu-img create"
+    assert metrics.command_label(["nsenter", "-t", "123", "-n", "ip", "link"]) == "nsenter"
+
+
+@pytest.mark.asyncio
+async def test_subprocess_latency_and_failures_are_recorded():
+    await batch._run(["true"])
+    await batch._run(["false"])
+
+    assert metrics.subprocess_seconds.count(command="true") == 1
+    assert metrics.subprocess_seconds.count(command="false") == 1
+    assert metrics.subprocess_failures_total.value(command="false") == 1
+    assert metrics.subprocess_failures_total.value(command="true") == 0
+    assert 'archetype_agent_subprocess_failures_total{command="false"} 1' in metrics.render()
@@ -0,0 +1,151 @@
+"""Tests for batched link/port teardown and overlay cleanup."""
+from __future__ import annotations
+
+import pytest
+
+from agent.config import settings
+from agent.network import batch
+from agent.network.overlay import OverlayBridge, OverlayManager, VxlanTunnel
+from agent.network.ovs import OVSNetworkManager, OVSPort
+
+
+class FakeRun:
+    """Records batch commands instead of spawning processes."""
+
+    def __init__(self, code: int = 0, stderr: str = ""):
+        self.calls: list[tuple[list[str], str | None]] = []
+        self.code = code
+        self.stderr = stderr
+
+    async def __call__(self, cmd, stdin=None):
+        self.calls.append((cmd, stdin))
+        return self.code, "", self.stderr
+
+
+@pytest.fixture
+def fake_run(monkeypatch):
+    run = FakeRun()
+    monkeypatch.setattr(batch, "_run", run)
+    return run
+
+
+@pytest.mark.asyncio
+async def test_delete_links_uses_one_batch(fake_run):
+    errors = await batch.delete_links(["v1", "abr-1", "v1", "vxlan1"])
+
+    assert errors == {}
+    assert len(fake_run.calls) == 1
+    cmd, script = fake_run.calls[0]
+    assert cmd == ["ip", "-force", "-batch", "-"]
+    assert script == "link delete v1\nlink delete abr-1\nlink delete vxlan1\n"
+
+
+@pytest.mark.asyncio
+async def test_delete_links_ignores_missing_devices(fake_run):
+    fake_run.code = 1
+    fake_run.stderr = (
+        'Cannot find device "v1"\nCommand failed -:1\n'
+        "RTNETLINK answers: Operation not permitted\nCommand failed -:2\n"
+    )
+
+    errors = await batch.delete_links(["v1", "v2"])
+
+    assert errors == {"v2": "RTNETLINK answers: Operation not permitted"}
+
+
+@pytest.mark.asyncio
+async def test_delete_ovs_ports_chains_transactions(fake_run, monkeypatch):
+    monkeypatch.setattr(batch, "OVS_PORTS_PER_TRANSACTION", 2)
+
+    await batch.delete_ovs_ports("arch-ovs", ["p1", "p2", "p3"])
+
+    assert [cmd for cmd, _ in fake_run.calls] == [
+        ["ovs-vsctl", "--", "--if-exists", "del-port", "arch-ovs", "p1",
+         "--", "--if-exists", "del-port", "arch-ovs", "p2"],
+        ["ovs-vsctl", "--", "--if-exists", "del-port", "arch-ovs", "p3"],
+    ]
+
+
+def _overlay_manager() -> OverlayManager:
+    manager = OverlayManager()
+    for i in range(3):
+        tunnel = VxlanTunnel(
+            vni=100 + i, local_ip="10.0.0.1", remote_ip="10.0.0.2",
+            interface_name=f"vxlan{100 + i}", lab_id="lab-1", link_id=f"l{i}",
+        )
+        manager._tunnels[tunnel.key] = tunnel
+        manager._bridges[tunnel.key] = OverlayBridge(
+            name=f"abr-{100 + i}", vni=100 + i, lab_id="lab-1", link_id=f"l{i}",
+            veth_pairs=[(f"v{100 + i}h", "eth1")],
+        )
+        manager._vni_allocator._allocated[f"lab-1:l{i}"] = 100 + i
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_overlay_cleanup_is_one_batch(fake_run, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "workspace_path", str(tmp_path))
+    manager = _overlay_manager()
+
+    result = await manager.cleanup_lab("lab-1")
+
+    assert result["tunnels_deleted"] == 3
+    assert result["bridges_deleted"] == 3
+    assert result["errors"] == []
+    assert len(fake_run.calls) == 1
+    assert manager._tunnels == {} and manager._bridges == {}
+
+
+@pytest.mark.asyncio
+async def test_overlay_cleanup_keeps_devices_that_failed(fake_run, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "workspace_path", str(tmp_path))
+    manager = _overlay_manager()
+    # Script order: v100h v101h v102h abr-100 abr-101 abr-102 vxlan100 ...
+    fake_run.code = 1
+    fake_run.stderr = (
+        "RTNETLINK answers: Device or resource busy\nCommand failed -:5\n"
+        "RTNETLINK answers: Device or resource busy\nCommand failed -:9\n"
+    )
+
+    result = await manager.cleanup_lab("lab-1")
+
+    assert result["bridges_deleted"] == 2
+    assert result["tunnels_deleted"] == 2
+    assert result["errors"] == [
+        "abr-101: RTNETLINK answers: Device or resource busy",
+        "vxlan102: RTNETLINK answers: Device or resource busy",
+    ]
+    assert [b.name for b in manager._bridges.values()] == ["abr-101"]
+    assert [t.interface_name for t in manager._tunnels.values()] == ["vxlan102"]
+    assert manager._vni_allocator._allocated == {"lab-1:l2": 102}
+
+
+@pytest.mark.asyncio
+async def test_ovs_cleanup_keeps_ports_that_failed(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "workspace_path", str(tmp_path))
+    manager = object.__new__(OVSNetworkManager)
+    manager._init_state()
+    for i in range(2):
+        port = OVSPort(
+            port_name=f"vh{i}", container_name="archetype-lab-1-r1",
+            interface_name=f"eth{i}", vlan_tag=100 + i, lab_id="lab-1",
+        )
+        manager._ports[port.key] = port
+        manager._vlan_allocator._allocated[port.key] = port.vlan_tag
+
+    async def run(cmd, stdin=None):
+        # OVSDB removes both ports; netlink fails on the second veth
+        if cmd[0] == "ip":
+            return 1, "", "RTNETLINK answers: Operation not permitted\nCommand failed -:2\n"
+        return 0, "", ""
+
+    monkeypatch.setattr(batch, "_run", run)
+
+    result = await manager.cleanup_lab("lab-1")
+
+    assert result["ports_deleted"] == 1
+    assert result["errors"] == [
+        "Port vh1: RTNETLINK answers: Operation not permitted",
+    ]
+    assert list(manager._ports) == ["archetype-lab-1-r1:eth1"]
+    assert manager._vlan_allocator._allocated == {"archetype-lab-1-r1:eth1": 101}
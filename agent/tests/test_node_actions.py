@@ -0,0 +1,166 @@
+"""Tests for Provider.node_actions - concurrent bulk start/stop."""
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from agent.providers.base import NodeActionResult, NodeStatus, Provider
+
+
+class FakeProvider(Provider):
+    """Provider whose node actions sleep instead of touching Docker."""
+
+    def __init__(self, kinds: dict[str, str] | None = None, delay: float = 0.05):
+        self.kinds = kinds or {}
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.started_at: dict[str, float] = {}
+
+    @property
+    def name(self) -> str:
+        return "fake"
+
+    async def deploy(self, lab_id, topology, topology_yaml, workspace):
+        raise NotImplementedError
+
+    async def destroy(self, lab_id, workspace):
+        raise NotImplementedError
+
+    async def status(self, lab_id, workspace):
+        raise NotImplementedError
+
+    async def get_node_kind(self, lab_id, node_name):
+        return self.kinds.get(node_name)
+
+    async def _act(self, node_name: str, status: NodeStatus) -> NodeActionResult:
+        self.started_at[node_name] = time.monotonic()
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if node_name == "broken":
+            raise RuntimeError("boom")
+        return NodeActionResult(success=True, node_name=node_name, new_status=status)
+
+    async def start_node(self, lab_id, node_name, workspace):
+        return await self._act(node_name, NodeStatus.RUNNING)
+
+    async def stop_node(self, lab_id, node_name, workspace):
+        return await self._act(node_name, NodeStatus.STOPPED)
+
+
+async def _collect(provider: Provider, nodes: list[str], action: str, **kwargs) -> list[NodeActionResult]:
+    return [
+        result async for result in provider.node_actions(
+            "lab-1", nodes, action, Path("/tmp"), **kwargs
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_runs_nodes_concurrently_up_to_limit():
+    provider = FakeProvider()
+    nodes = [f"r{i}" for i in range(10)]
+
+    results = await _collect(provider, nodes, "stop", max_concurrency=4)
+
+    assert sorted(r.node_name for r in results) == sorted(nodes)
+    assert all(r.success and r.new_status == NodeStatus.STOPPED for r in results)
+    assert provider.peak == 4
+
+
+@pytest.mark.asyncio
+async def test_failures_are_reported_per_node():
+    provider = FakeProvider()
+
+    results = {r.node_name: r for r in await _collect(provider, ["r1", "broken"], "start")}
+
+    assert results["r1"].success
+    assert not results["broken"].success
+    assert results["broken"].error == "boom"
+
+
+@pytest.mark.asyncio
+async def test_staggers_starts_of_the_same_kind():
+    provider = FakeProvider(kinds={"c1": "ceos", "c2": "ceos", "c3": "ceos", "l1": "linux"})
+
+    await _collect(
+        provider, ["c1", "c2", "c3", "l1"], "start", stagger={"ceos": 0.1}
+    )
+
+    ceos_starts = sorted(provider.started_at[n] for n in ("c1", "c2", "c3"))
+    gaps = [b - a for a, b in zip(ceos_starts, ceos_starts[1:])]
+    assert all(gap >= 0.09 for gap in gaps)
+    # Other kinds are not held back behind the stagger
+    assert provider.started_at["l1"] - ceos_starts[0] < 0.05
+
+
+@pytest.mark.asyncio
+async def test_rejects_unknown_action():
+    with pytest.raises(ValueError):
+        await _collect(FakeProvider(), ["r1"], "reboot")
+
+
+class FakeLockManager:
+    """Records whether the lab lock is held."""
+
+    def __init__(self):
+        self.held = False
+
+    def acquire_with_heartbeat(self, lab_id, timeout, extend_interval):
+        manager = self
+
+        class _Held:
+            async def __aenter__(self):
+                manager.held = True
+
+            async def __aexit__(self, *exc):
+                manager.held = False
+
+        return _Held()
+
+
+@pytest.mark.asyncio
+async def test_bulk_endpoint_releases_lock_when_setup_fails(monkeypatch):
+    from agent import main
+    from agent.schemas import BulkNodeActionRequest
+
+    locks = FakeLockManager()
+    monkeypatch.setattr(main, "get_lock_manager", lambda: locks)
+
+    def no_provider():
+        raise RuntimeError("no provider")
+
+    monkeypatch.setattr(main, "get_provider_for_request", no_provider)
+
+    with pytest.raises(RuntimeError):
+        await main.bulk_node_action(
+            BulkNodeActionRequest(job_id="j1", lab_id="lab1", action="start", nodes=["r1"])
+        )
+    assert not locks.held
+
+
+@pytest.mark.asyncio
+async def test_bulk_endpoint_releases_lock_if_stream_never_starts(monkeypatch, tmp_path):
+    from agent import main
+    from agent.schemas import BulkNodeActionRequest
+
+    locks = FakeLockManager()
+    monkeypatch.setattr(main, "get_lock_manager", lambda: locks)
+    monkeypatch.setattr(main, "get_provider_for_request", lambda: FakeProvider())
+    monkeypatch.setattr(main, "get_workspace", lambda lab_id: tmp_path)
+
+    response = await main.bulk_node_action(
+        BulkNodeActionRequest(job_id="j1", lab_id="lab1", action="start", nodes=["r1"])
+    )
+    assert locks.held
+
+    # Client gone before the body is iterated: only the background task runs
+    await response.background()
+    assert not locks.held
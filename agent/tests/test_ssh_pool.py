@@ -0,0 +1,123 @@
+"""Tests for pooled device SSH connections, against an in-process SSH server."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import MagicMock
+
+import asyncssh
+import pytest
+
+from agent.config import settings
+from agent.console import ssh_console
+from agent.console.ssh_console import SSHConsole
+from agent.console.ssh_pool import SSHConnectionPool
+from agent.readiness import CliProbe
+
+
+class _Server(asyncssh.SSHServer):
+    connections: list = []
+
+    def connection_made(self, conn):
+        self.connections.append(conn)
+
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        return password == "admin"
+
+
+async def _handle(process: asyncssh.SSHServerProcess) -> None:
+    if process.command:
+        process.stdout.write(f"ran: {process.command}\n")
+        process.exit(0)
+        return
+    process.stdout.write("r1# ")
+    async for line in process.stdin:
+        process.stdout.write(line)
+
+
+@pytest.fixture
+async def device():
+    _Server.connections = []
+    server = await asyncssh.create_server(
+        _Server, "127.0.0.1", 0,
+        server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+        process_factory=_handle,
+    )
+    yield server.sockets[0].getsockname()[1], _Server.connections
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = SSHConnectionPool()
+    monkeypatch.setattr(ssh_console, "ssh_pool", pool)
+    monkeypatch.setattr("agent.readiness.ssh_pool", pool)
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_consoles_share_one_connection(device, pool, monkeypatch):
+    port, connections = device
+    monkeypatch.setattr(settings, "ssh_pool_idle_timeout", 0.1)
+
+    first = SSHConsole("127.0.0.1", "admin", "admin", port)
+    second = SSHConsole("127.0.0.1", "admin", "admin", port)
+    assert await asyncio.gather(first.start(), second.start()) == [True, True]
+
+    assert len(connections) == 1
+    assert await first.read(timeout=5) == b"r1# "
+    await second.write(b"show version\n")
+    output = b""
+    while b"show version" not in output:
+        output += await second.read(timeout=5)
+    assert output.startswith(b"r1# ")
+
+    await first.close()
+    await second.close()
+    assert pool.stats()[0]["users"] == 0
+
+    await asyncio.sleep(0.2)
+    assert pool.stats() == []
+
+
+@pytest.mark.asyncio
+async def test_run_reconnects_after_connection_drop(device, pool):
+    port, connections = device
+
+    result = await pool.run("127.0.0.1", "admin", "admin", "show clock", port=port)
+    assert result.stdout == "ran: show clock\n"
+    await pool.run("127.0.0.1", "admin", "admin", "show clock", port=port)
+    assert len(connections) == 1
+
+    # Device reboots: the pool notices the lost connection and reconnects
+    connections[0].close()
+    await asyncio.sleep(0.1)
+    assert pool.stats() == []
+    await pool.run("127.0.0.1", "admin", "admin", "show clock", port=port)
+    assert len(connections) == 2
+
+
+@pytest.mark.asyncio
+async def test_cli_probe_runs_over_pooled_ssh(device, pool, monkeypatch):
+    port, connections = device
+    container = MagicMock()
+    container.status = "running"
+    container.attrs = {"NetworkSettings": {"Networks": {"mgmt": {"IPAddress": "127.0.0.1"}}}}
+    client = MagicMock()
+    client.containers.get.return_value = container
+    monkeypatch.setattr("agent.readiness.docker.from_env", lambda: client)
+    # The test device listens on a random port rather than 22
+    run = pool.run
+    monkeypatch.setattr(pool, "run", lambda *args, **kwargs: run(*args, **kwargs, port=port))
+
+    probe = CliProbe("show platform", r"ran: show platform", method="ssh")
+    results = [await probe.check("vr-r1") for _ in range(3)]
+
+    assert all(r.is_ready for r in results)
+    assert len(connections) == 1
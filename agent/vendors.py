@@ -104,6 +104,7 @@ class VendorConfig:
     readiness_probe: str = "none"
     readiness_pattern: Optional[str] = None  # Regex pattern for log/cli detection
     readiness_timeout: int = 120  # Max seconds to wait for ready state
+    readiness_command: Optional[str] = None  # cli_probe command (default: console_shell)
 
     # Console access method
     # - "docker_exec": Use docker exec with console_shell (default for native containers)
@@ -111,6 +112,8 @@ class VendorConfig:
     console_method: str = "docker_exec"
     console_user: str = "admin"  # Username for SSH console access
     console_password: str = "admin"  # Password for SSH console access
+    # Command printing the running config, run over SSH on "ssh" console devices
+    config_extract_command: Optional[str] = None
 
     # ==========================================================================
     # Container runtime configuration (used by DockerProvider)
@@ -544,6 +547,7 @@ VENDOR_CONFIGS: dict[str, VendorConfig] = {
         console_method="ssh",
         console_user="admin",
         console_password="admin",
+        config_extract_command="show running-config",
     ),
 
     # =========================================================================
@@ -847,6 +851,7 @@ VENDOR_CONFIGS: dict[str, VendorConfig] = {
         console_method="ssh",
         console_user="admin",
         console_password="admin",
+        config_extract_command="show running-config",
     ),
     "cat-sdwan-controller": VendorConfig(
         kind="cat-sdwan-controller",
@@ -1072,6 +1077,7 @@ VENDOR_CONFIGS: dict[str, VendorConfig] = {
         console_method="ssh",
         console_user="admin",
         console_password="admin",
+        config_extract_command="show running-config",
     ),
 }
 
@@ -0,0 +1,34 @@
+"""Add source_host_id to image_sync_jobs.
+
+Records which agent served an image during peer-to-peer distribution.
+NULL means the image was streamed from the controller.
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-02-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "020"
+down_revision = "019"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "image_sync_jobs",
+        sa.Column("source_host_id", sa.String(36), nullable=True),
+    )
+    op.create_foreign_key(
+        "fk_image_sync_jobs_source_host",
+        "image_sync_jobs", "hosts",
+        ["source_host_id"], ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_image_sync_jobs_source_host", "image_sync_jobs", type_="foreignkey")
+    op.drop_column("image_sync_jobs", "source_host_id")
@@ -0,0 +1,49 @@
+"""Add composite indexes for the background monitors.
+
+Reconciliation, state enforcement and job health scan node_states, jobs
+and node_placements every few seconds. These indexes match their filters:
+
+- node_states(actual_state, updated_at): stale pending / running scans
+- node_states(desired_state, actual_state): desired != actual mismatches
+- node_states(lab_id, node_name): per-node lookups and placement joins
+- jobs(lab_id, status): active job checks per lab
+- jobs(status, action): active job sweeps filtered by action
+- node_placements(lab_id, node_name): placement lookups
+
+link_states(lab_id) is already served by the uq_link_state_lab_link
+unique index, whose leading column is lab_id.
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-02-03
+"""
+from alembic import op
+
+revision = "021"
+down_revision = "020"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_node_states_actual_state_updated_at", "node_states", ["actual_state", "updated_at"]
+    )
+    op.create_index(
+        "ix_node_states_desired_state_actual_state", "node_states", ["desired_state", "actual_state"]
+    )
+    op.create_index("ix_node_states_lab_id_node_name", "node_states", ["lab_id", "node_name"])
+    op.create_index("ix_jobs_lab_id_status", "jobs", ["lab_id", "status"])
+    op.create_index("ix_jobs_status_action", "jobs", ["status", "action"])
+    op.create_index(
+        "ix_node_placements_lab_id_node_name", "node_placements", ["lab_id", "node_name"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_node_placements_lab_id_node_name", table_name="node_placements")
+    op.drop_index("ix_jobs_status_action", table_name="jobs")
+    op.drop_index("ix_jobs_lab_id_status", table_name="jobs")
+    op.drop_index("ix_node_states_lab_id_node_name", table_name="node_states")
+    op.drop_index("ix_node_states_desired_state_actual_state", table_name="node_states")
+    op.drop_index("ix_node_states_actual_state_updated_at", table_name="node_states")
@@ -0,0 +1,39 @@
+"""Add lab_checkpoints for restoring labs from captured post-boot state.
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-02-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "022"
+down_revision = "021"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lab_checkpoints",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("lab_id", sa.String(36), sa.ForeignKey("labs.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("provider", sa.String(50), nullable=False, server_default="docker"),
+        sa.Column("status", sa.String(50), nullable=False, server_default="creating"),
+        sa.Column("include_memory", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("host_ids_json", sa.Text(), nullable=False, server_default="[]"),
+        sa.Column("nodes_json", sa.Text(), nullable=False, server_default="[]"),
+        sa.Column("stateful_nodes_json", sa.Text(), nullable=False, server_default="[]"),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("created_by", sa.String(36), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_lab_checkpoints_lab_id", "lab_checkpoints", ["lab_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lab_checkpoints_lab_id", table_name="lab_checkpoints")
+    op.drop_table("lab_checkpoints")
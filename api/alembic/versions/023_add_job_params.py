@@ -0,0 +1,25 @@
+"""Add jobs.params_json for runner arguments a retry needs.
+
+The job action only names the operation; arguments such as the checkpoint
+an "up" restores from are stored here so job health can resubmit a stuck
+job with the same arguments.
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-02-07
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "023"
+down_revision = "022"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("params_json", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("jobs", "params_json")
@@ -0,0 +1,32 @@
+"""Add a partial index over node states whose desired and actual state differ.
+
+State enforcement sweeps node_states for desired_state != actual_state.
+That compares two columns, so the (desired_state, actual_state) index
+cannot seek on it and the sweep read every node state. Indexing only the
+mismatched rows keeps the sweep proportional to the nodes it acts on.
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-02-08
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "024"
+down_revision = "023"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_node_states_mismatched",
+        "node_states",
+        ["lab_id"],
+        sqlite_where=sa.text("desired_state != actual_state"),
+        postgresql_where=sa.text("desired_state != actual_state"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_node_states_mismatched", table_name="node_states")
@@ -202,6 +202,22 @@ async def get_healthy_agent(
 ) -> models.Host | None:
     """Get a healthy agent to handle jobs with capability-based selection.
 
+    See select_healthy_agent.
+    """
+    return select_healthy_agent(database, required_provider, prefer_agent_id, exclude_agents)
+
+
+def select_healthy_agent(
+    database: Session,
+    required_provider: str | None = None,
+    prefer_agent_id: str | None = None,
+    exclude_agents: list[str] | None = None,
+) -> models.Host | None:
+    """Select a healthy agent to handle jobs with capability-based selection.
+
+    Only reads the database, so it can also run on an async session
+    through `AsyncSession.run_sync`.
+
     Implements:
     - Capability filtering: Only returns agents that support the required provider
     - Load balancing: Prefers agents with fewer active jobs
@@ -289,6 +305,15 @@ async def get_agent_for_lab(
     This prevents nodes from getting deployed on different agents than where
     they were previously running, which would cause duplicate containers.
     """
+    return select_agent_for_lab(database, lab, required_provider)
+
+
+def select_agent_for_lab(
+    database: Session,
+    lab: models.Lab,
+    required_provider: str = "docker",
+) -> models.Host | None:
+    """Synchronous get_agent_for_lab, usable through `AsyncSession.run_sync`."""
     # Query NodePlacement to find which agent(s) have nodes for this lab
     placements = (
         database.query(models.NodePlacement)
@@ -311,7 +336,7 @@ async def get_agent_for_lab(
     else:
         preferred_agent_id = lab.agent_id
 
-    return await get_healthy_agent(
+    return select_healthy_agent(
         database,
         required_provider=required_provider,
         prefer_agent_id=preferred_agent_id,
@@ -360,6 +385,7 @@ async def _do_deploy(
     topology: dict | None,
     topology_yaml: str | None,
     provider: str = "docker",
+    checkpoint_id: str | None = None,
 ) -> dict:
     """Internal deploy request (for retry wrapper).
 
@@ -372,12 +398,15 @@ async def _do_deploy(
         topology: Structured topology dict (preferred for multi-host)
         topology_yaml: Legacy YAML string format
         provider: Provider to use
+        checkpoint_id: Restore nodes from this checkpoint instead of cold-booting
     """
     payload: dict = {
         "job_id": job_id,
         "lab_id": lab_id,
         "provider": provider,
     }
+    if checkpoint_id:
+        payload["checkpoint_id"] = checkpoint_id
 
     # Prefer JSON topology if provided, fall back to YAML
     if topology is not None:
@@ -402,6 +431,7 @@ async def deploy_to_agent(
     topology_yaml: str | None = None,
     topology: dict | None = None,
     provider: str = "docker",
+    checkpoint_id: str | None = None,
 ) -> dict:
     """Send deploy request to agent with retry logic.
 
@@ -418,6 +448,7 @@ async def deploy_to_agent(
         topology_yaml: Topology YAML content (legacy)
         topology: Structured topology dict (preferred)
         provider: Provider to use (default: docker)
+        checkpoint_id: Restore nodes from this checkpoint instead of cold-booting
 
     Returns:
         Agent response dict
@@ -429,7 +460,8 @@ async def deploy_to_agent(
     try:
         # Reduce retries for deploy since it's a long operation and agent has its own deduplication
         result = await with_retry(
-            _do_deploy, url, job_id, lab_id, topology, topology_yaml, provider, max_retries=1
+            _do_deploy, url, job_id, lab_id, topology, topology_yaml, provider,
+            checkpoint_id, max_retries=1,
         )
         logger.info(f"Deploy completed for lab {lab_id}: {result.get('status')}")
         return result
@@ -438,6 +470,116 @@ async def deploy_to_agent(
         raise
 
 
+async def _do_deploy_incremental(url: str, payload: dict) -> dict:
+    """Internal incremental deploy request (for retry wrapper)."""
+    client = get_http_client()
+    response = await client.post(url, json=payload, timeout=settings.agent_deploy_timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+async def deploy_incremental_to_agent(
+    agent: models.Host,
+    job_id: str,
+    lab_id: str,
+    diff: dict,
+    provider: str = "docker",
+) -> dict:
+    """Send only node/link additions and removals to an agent.
+
+    Args:
+        agent: The agent hosting the lab
+        job_id: Job identifier
+        lab_id: Lab identifier
+        diff: Output of diff_deploy_topology
+        provider: Provider to use (default: docker)
+
+    Returns:
+        Agent response dict (JobResult)
+    """
+    url = f"{get_agent_url(agent)}/jobs/deploy-incremental"
+    payload = {"job_id": job_id, "lab_id": lab_id, "provider": provider, **diff}
+    logger.info(
+        f"Incremental deploy of lab {lab_id} via agent {agent.id}: "
+        f"+{len(diff.get('add_nodes', []))}/-{len(diff.get('remove_nodes', []))} nodes, "
+        f"+{len(diff.get('add_links', []))} links"
+    )
+
+    try:
+        result = await with_retry(_do_deploy_incremental, url, payload, max_retries=1)
+        logger.info(f"Incremental deploy completed for lab {lab_id}: {result.get('status')}")
+        return result
+    except AgentError as e:
+        e.agent_id = agent.id
+        raise
+
+
+async def checkpoint_lab_on_agent(
+    agent: models.Host,
+    lab_id: str,
+    checkpoint_id: str,
+    provider: str = "docker",
+    include_memory: bool = True,
+) -> dict:
+    """Capture a checkpoint of a lab's nodes on an agent.
+
+    Not retried: a partial checkpoint is cleaned up by the agent and a
+    second attempt would pause the nodes again.
+
+    Args:
+        agent: The agent holding the lab's nodes
+        lab_id: Lab identifier
+        checkpoint_id: Controller-assigned checkpoint identifier
+        provider: Provider the nodes were deployed with
+        include_memory: Capture runtime memory state where supported
+
+    Returns:
+        Agent response dict (success, nodes, stateful_nodes, size_bytes, error)
+    """
+    url = f"{get_agent_url(agent)}/labs/{lab_id}/checkpoints"
+    logger.info(f"Checkpointing lab {lab_id} on agent {agent.id} as {checkpoint_id}")
+    client = get_http_client()
+    try:
+        response = await client.post(
+            url,
+            json={
+                "checkpoint_id": checkpoint_id,
+                "provider": provider,
+                "include_memory": include_memory,
+            },
+            timeout=settings.agent_deploy_timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        raise AgentError(
+            f"Checkpoint failed on agent {agent.id}: {e.response.text}",
+            agent_id=agent.id,
+        ) from e
+    except (httpx.ConnectError, httpx.TimeoutException) as e:
+        raise AgentUnavailableError(
+            f"Agent {agent.id} unreachable: {e}", agent_id=agent.id
+        ) from e
+
+
+async def delete_checkpoint_on_agent(
+    agent: models.Host,
+    lab_id: str,
+    checkpoint_id: str,
+    provider: str = "docker",
+) -> bool:
+    """Remove a checkpoint's artifacts from an agent. Returns success."""
+    url = f"{get_agent_url(agent)}/labs/{lab_id}/checkpoints/{checkpoint_id}"
+    try:
+        client = get_http_client()
+        response = await client.delete(url, params={"provider": provider}, timeout=60.0)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to delete checkpoint {checkpoint_id} on agent {agent.id}: {e}")
+        return False
+
+
 async def _do_destroy(url: str, job_id: str, lab_id: str) -> dict:
     """Internal destroy request (for retry wrapper)."""
     client = get_http_client()
@@ -527,6 +669,89 @@ async def node_action_on_agent(
         raise
 
 
+async def _do_bulk_node_action(
+    url: str,
+    job_id: str,
+    lab_id: str,
+    node_names: list[str],
+    action: str,
+    on_result: Callable[[dict], None] | None = None,
+) -> dict[str, dict]:
+    """Internal bulk node action request (for retry wrapper)."""
+    payload = {
+        "job_id": job_id,
+        "lab_id": lab_id,
+        "action": action,
+        "nodes": node_names,
+    }
+    results: dict[str, dict] = {}
+    client = get_http_client()
+    # The agent streams one JSON line per node; the read timeout applies
+    # between lines, so a large batch is bounded per node, not in total.
+    async with client.stream(
+        "POST", url, json=payload, timeout=settings.agent_node_action_timeout
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            outcome = json.loads(line)
+            results[outcome["node_name"]] = outcome
+            if on_result:
+                on_result(outcome)
+    return results
+
+
+async def bulk_node_action_on_agent(
+    agent: models.Host,
+    job_id: str,
+    lab_id: str,
+    node_names: list[str],
+    action: str,
+    on_result: Callable[[dict], None] | None = None,
+) -> dict[str, dict]:
+    """Start or stop several nodes with one request, executed concurrently by the agent.
+
+    Args:
+        agent: The agent where the nodes live
+        job_id: Job ID for agent-side logging
+        lab_id: Lab the nodes belong to
+        node_names: Node names (not container names)
+        action: "start" or "stop"
+        on_result: Called with each node's result as the agent streams it
+
+    Returns:
+        Dict of node_name -> {"success", "status", "error", ...} for every
+        requested node
+    """
+    if not node_names:
+        return {}
+    url = f"{get_agent_url(agent)}/jobs/node-actions"
+    logger.info(
+        f"Bulk node action {action} on {len(node_names)} node(s) in lab {lab_id} "
+        f"via agent {agent.id}"
+    )
+
+    try:
+        results = await with_retry(
+            _do_bulk_node_action, url, job_id, lab_id, node_names, action, on_result
+        )
+    except AgentError as e:
+        e.agent_id = agent.id
+        raise
+
+    for node_name in node_names:
+        results.setdefault(
+            node_name, {"node_name": node_name, "success": False, "error": "No result from agent"}
+        )
+    failed = sum(1 for r in results.values() if not r.get("success"))
+    logger.info(
+        f"Bulk node action {action} completed in lab {lab_id}: "
+        f"{len(node_names) - failed} succeeded, {failed} failed"
+    )
+    return results
+
+
 async def _do_get_status(url: str, lab_id: str) -> dict:
     """Internal status request (for retry wrapper)."""
     client = get_http_client()
@@ -983,6 +1208,37 @@ def agent_supports_vxlan(agent: models.Host) -> bool:
     return "vxlan" in features
 
 
+def agent_supports_resumable_images(agent: models.Host) -> bool:
+    """Check if an agent accepts verified, resumable image receives."""
+    caps = parse_capabilities(agent)
+    return "resumable_images" in caps.get("features", [])
+
+
+def agent_supports_incremental_deploy(agent: models.Host) -> bool:
+    """Check if an agent can apply topology diffs instead of full deploys."""
+    caps = parse_capabilities(agent)
+    return "incremental_deploy" in caps.get("features", [])
+
+
+def agent_supports_checkpoints(agent: models.Host) -> bool:
+    """Check if an agent can capture and restore lab checkpoints."""
+    caps = parse_capabilities(agent)
+    return "checkpoints" in caps.get("features", [])
+
+
+def get_agent_image_codecs(agent: models.Host) -> list[str]:
+    """Get image stream compression codecs an agent can decode.
+
+    Agents advertise codecs as "image_<codec>" capability features.
+    """
+    caps = parse_capabilities(agent)
+    return [
+        feature.removeprefix("image_")
+        for feature in caps.get("features", [])
+        if feature.startswith("image_")
+    ]
+
+
 async def get_agent_images(agent: models.Host) -> dict:
     """Get list of Docker images on an agent.
 
@@ -1005,6 +1261,74 @@ async def get_agent_images(agent: models.Host) -> dict:
         return {"images": []}
 
 
+async def get_agent_image_layers(agent: models.Host) -> list[str]:
+    """Get layer chain IDs present in an agent's Docker daemon.
+
+    Used for layer-aware image sync. Returns an empty list on error so
+    callers fall back to sending the full image.
+    """
+    url = f"{get_agent_url(agent)}/images/layers"
+
+    try:
+        client = get_http_client()
+        response = await client.get(url, timeout=30.0)
+        response.raise_for_status()
+        return response.json().get("chain_ids", [])
+    except Exception as e:
+        logger.warning(f"Failed to get image layers from agent {agent.id}: {e}")
+        return []
+
+
+async def start_image_pull_on_agent(
+    agent: models.Host,
+    image_id: str,
+    reference: str,
+    source_agent: models.Host | None = None,
+) -> str:
+    """Ask an agent to pull an image, optionally from a peer agent.
+
+    Args:
+        agent: Agent that should receive the image
+        image_id: Library image ID
+        reference: Docker image reference
+        source_agent: Peer agent to pull from (None = pull from controller)
+
+    Returns:
+        Agent-side pull job ID for progress polling
+
+    Raises:
+        AgentUnavailableError: If the agent cannot be reached
+    """
+    url = f"{get_agent_url(agent)}/images/pull"
+    payload = {"image_id": image_id, "reference": reference}
+    if source_agent is not None:
+        payload["source_url"] = f"{get_agent_url(source_agent)}/images/export"
+
+    try:
+        client = get_http_client()
+        response = await client.post(url, json=payload, timeout=30.0)
+        response.raise_for_status()
+        return response.json()["job_id"]
+    except Exception as e:
+        raise AgentUnavailableError(
+            f"Failed to start image pull on agent {agent.id}: {e}", agent_id=agent.id
+        ) from e
+
+
+async def get_image_pull_progress(agent: models.Host, job_id: str) -> dict:
+    """Get progress of an agent-side image pull job."""
+    url = f"{get_agent_url(agent)}/images/pull/{job_id}/progress"
+
+    try:
+        client = get_http_client()
+        response = await client.get(url, timeout=10.0)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.warning(f"Failed to get image pull progress from agent {agent.id}: {e}")
+        return {"job_id": job_id, "status": "unreachable", "error": str(e)}
+
+
 async def container_action(
     agent: models.Host,
     container_name: str,
@@ -5,6 +5,10 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./archetype.db"
+    # Connection pool for the asyncio engine used by hot request paths
+    # (agent events and heartbeats). Ignored for SQLite.
+    database_async_pool_size: int = 20
+    database_async_max_overflow: int = 20
     redis_url: str = "redis://redis:6379/0"
     # Workspace directory for lab files and images
     workspace: str = "/var/lib/archetype"
@@ -77,6 +81,10 @@ class Settings(BaseSettings):
     # Cooldown before retrying enforcement on the same node (seconds)
     state_enforcement_cooldown: int = 300  # 5 minutes
 
+    # Incremental deploy: when adding nodes to a running lab, send agents only
+    # the node/link additions and removals instead of a full topology redeploy
+    incremental_deploy_enabled: bool = True
+
     # Job health monitoring settings
     # How often the job health monitor checks for stuck jobs (seconds)
     job_health_check_interval: int = 30
@@ -95,6 +103,34 @@ class Settings(BaseSettings):
     # Grace period after timeout before allowing reconciliation (seconds)
     job_stuck_grace_period: int = 60  # 1 minute
 
+    # Job execution tier
+    # "queue" runs lab jobs on RQ workers (durable, scales across worker
+    # processes); "inprocess" runs them as asyncio tasks in the API process
+    job_executor: str = "queue"
+    # Maximum runtime of a queued job on a worker (seconds)
+    job_queue_timeout: int = 3600
+    # Concurrent jobs per agent across all workers
+    job_queue_per_agent_limit: int = 2
+    # Delay before a job waiting on its lab or agent is retried (seconds)
+    job_queue_retry_delay: int = 5
+    # TTL of per-lab execution locks, refreshed while the job runs (seconds)
+    job_queue_lock_ttl: int = 60
+    # Queue entries not picked up by a worker for this long are presumed lost
+    # (worker killed, Redis eviction) and no longer shield the job from
+    # job_health's retry/fail handling (seconds)
+    job_queue_stale_after: int = 3600
+
+    # Console hub: browser tabs watching the same node share one agent session
+    # Output kept for late joiners (bytes)
+    console_scrollback_bytes: int = 65536
+    # How long a session with no viewers stays open for a reconnect (seconds)
+    console_idle_grace: float = 30.0
+    # A viewer that typed holds the input this long before another may take over
+    # (seconds, 0 = everyone types freely)
+    console_input_lease: float = 3.0
+    # Output messages buffered per viewer before a stalled viewer is dropped
+    console_viewer_queue: int = 1024
+
     # Feature flags
     feature_multihost_labs: bool = True
     feature_vxlan_overlay: bool = True
@@ -116,10 +152,30 @@ class Settings(BaseSettings):
     image_sync_pre_deploy_check: bool = True
     # Maximum seconds for a single image sync operation
     image_sync_timeout: int = 600
-    # Maximum concurrent sync operations per agent
+    # Maximum concurrent sync operations per agent. With peer distribution
+    # this is the fan-out of each source (controller or agent) per round.
     image_sync_max_concurrent: int = 2
+    # Compression for controller -> agent image streams: auto, zstd, gzip, none
+    # "auto" negotiates zstd when both sides have it, otherwise gzip
+    image_sync_compression: str = "auto"
+    # zstd level (1-19) and worker threads (-1 = all cores, 0 = single-threaded)
+    image_sync_zstd_level: int = 3
+    image_sync_zstd_threads: int = -1
+    # gzip fallback level (1 = fastest)
+    image_sync_gzip_level: int = 1
+    # Let agents that already have an image serve it to other agents
+    image_sync_peer_enabled: bool = True
+    # Seconds between progress polls of a peer-to-peer transfer
+    image_sync_peer_poll_interval: float = 2.0
     # Chunk size for streaming image data (1MB default)
     image_sync_chunk_size: int = 1048576
+    # Cache `docker save` output as content-addressed layers and only send
+    # layers the target agent does not already have
+    image_sync_layer_cache: bool = True
+    # Chunk size for sha256 manifests used to verify and resume transfers
+    image_sync_verify_chunk_size: int = 8 * 1024 * 1024
+    # Resume attempts without progress before an interrupted transfer fails
+    image_sync_resume_attempts: int = 5
 
     # ISO import settings
     # Per-file extraction timeout (seconds) - large qcow2 files can take a while
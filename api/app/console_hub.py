@@ -0,0 +1,229 @@
+"""Shared console sessions behind the console WebSocket proxy.
+
+Without sharing, every browser tab watching a node opens its own agent
+WebSocket, and with it its own docker exec or SSH session on the device.
+The hub keeps one upstream session per (lab, node) and fans its output
+out to every viewer:
+
+- Output is appended to a bounded scrollback, which late joiners get
+  replayed before live output, coalesced into as few messages as
+  possible so the replay never fills their queue.
+- Input is arbitrated with a short lease: whoever typed last holds the
+  console until they pause for console_input_lease seconds; other
+  viewers' keystrokes are dropped meanwhile, with a notice. Viewers that
+  join read-only never send input.
+- A viewer that stops reading (its queue fills) is disconnected rather
+  than stalling everyone else.
+- When the last viewer leaves, the upstream stays open for
+  console_idle_grace seconds so a page reload reattaches to it.
+
+Sessions live in the API process, so with several API workers each
+worker shares sessions among its own connections.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Union
+
+import websockets
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Message = Union[str, bytes]
+
+INPUT_HELD_NOTICE = "\r\n\x1b[90m[Console input is held by another viewer]\x1b[0m\r\n"
+
+
+class ConsoleViewer:
+    """One browser connection attached to a shared session."""
+
+    def __init__(self, interactive: bool = True):
+        self.interactive = interactive
+        # None marks the end of the session
+        self.queue: asyncio.Queue[Message | None] = asyncio.Queue(settings.console_viewer_queue)
+        self.notified_at = 0.0
+
+    def deliver(self, message: Message | None) -> bool:
+        """Queue a message for the viewer; False if it has fallen too far behind."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+class ConsoleSession:
+    """One upstream agent console shared by any number of viewers."""
+
+    def __init__(self, hub: "ConsoleHub", key: tuple[str, str], url: str):
+        self.hub = hub
+        self.key = key
+        self.url = url
+        self.viewers: list[ConsoleViewer] = []
+        self.scrollback: deque[Message] = deque()
+        self._scrollback_bytes = 0
+        self._upstream: Any = None
+        self._reader: asyncio.Task | None = None
+        self._idle_timer: asyncio.Task | None = None
+        self._writer: ConsoleViewer | None = None
+        self._last_input = 0.0
+        self.closed = False
+
+    async def open(self) -> None:
+        self._upstream = await websockets.connect(self.url)
+        self._reader = asyncio.create_task(self._read_upstream())
+
+    def attach(self, viewer: ConsoleViewer) -> None:
+        """Add a viewer, replaying the scrollback to it first."""
+        if self._idle_timer:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        replay = self._replay()
+        # Keep the newest output and leave room in the queue for live frames
+        room = viewer.queue.maxsize - 1
+        if viewer.queue.maxsize > 0:
+            replay = replay[-room:] if room > 0 else []
+        for message in replay:
+            viewer.deliver(message)
+        self.viewers.append(viewer)
+
+    def detach(self, viewer: ConsoleViewer) -> None:
+        """Remove a viewer; start the idle grace period after the last one."""
+        if viewer in self.viewers:
+            self.viewers.remove(viewer)
+        if self._writer is viewer:
+            self._writer = None
+        if not self.viewers and not self.closed and self._idle_timer is None:
+            self._idle_timer = asyncio.create_task(self._close_when_idle())
+
+    async def send_input(self, viewer: ConsoleViewer, message: Message) -> None:
+        """Forward a viewer's input (keystrokes or resize) if it holds the console."""
+        if not viewer.interactive or self.closed:
+            return
+        now = time.monotonic()
+        holder = self._writer
+        if (
+            holder is not None
+            and holder is not viewer
+            and holder in self.viewers
+            and now - self._last_input < settings.console_input_lease
+        ):
+            if now - viewer.notified_at >= settings.console_input_lease:
+                viewer.notified_at = now
+                viewer.deliver(INPUT_HELD_NOTICE)
+            return
+        self._writer = viewer
+        self._last_input = now
+        await self._upstream.send(message)
+
+    async def close(self) -> None:
+        """Close the upstream and end every viewer's stream."""
+        if self.closed:
+            return
+        self.closed = True
+        self.hub._forget(self)
+        if self._idle_timer and self._idle_timer is not asyncio.current_task():
+            self._idle_timer.cancel()
+        if self._reader and self._reader is not asyncio.current_task():
+            self._reader.cancel()
+        for viewer in self.viewers:
+            viewer.deliver(None)
+        try:
+            await self._upstream.close()
+        except Exception:
+            pass
+        logger.info(f"Console: closed shared session for {self.key[0]}/{self.key[1]}")
+
+    async def _read_upstream(self) -> None:
+        try:
+            async for message in self._upstream:
+                self._remember(message)
+                for viewer in list(self.viewers):
+                    if not viewer.deliver(message):
+                        logger.warning(
+                            f"Console: dropping stalled viewer of {self.key[0]}/{self.key[1]}"
+                        )
+                        self.viewers.remove(viewer)
+                        # Make room so the viewer's forwarder sees the end
+                        viewer.queue.get_nowait()
+                        viewer.deliver(None)
+        except Exception as e:
+            logger.debug(f"Console upstream for {self.key[0]}/{self.key[1]} ended: {e}")
+        finally:
+            await self.close()
+
+    def _replay(self) -> list[Message]:
+        """The scrollback with consecutive text or binary frames joined."""
+        runs: list[list[Message]] = []
+        for message in self.scrollback:
+            if runs and type(runs[-1][0]) is type(message):
+                runs[-1].append(message)
+            else:
+                runs.append([message])
+        return [("" if isinstance(run[0], str) else b"").join(run) for run in runs]
+
+    def _remember(self, message: Message) -> None:
+        self.scrollback.append(message)
+        self._scrollback_bytes += len(message)
+        while self._scrollback_bytes > settings.console_scrollback_bytes and len(self.scrollback) > 1:
+            self._scrollback_bytes -= len(self.scrollback.popleft())
+
+    async def _close_when_idle(self) -> None:
+        await asyncio.sleep(settings.console_idle_grace)
+        if not self.viewers:
+            await self.close()
+
+
+class ConsoleHub:
+    """Registry of shared console sessions keyed by (lab_id, node_name)."""
+
+    def __init__(self):
+        self._sessions: dict[tuple[str, str], ConsoleSession] = {}
+        # One lock per node, so a slow agent connect only delays viewers
+        # of that node
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def attach(
+        self, lab_id: str, node_name: str, url: str, interactive: bool = True
+    ) -> tuple[ConsoleSession, ConsoleViewer]:
+        """Join the node's shared session, opening it on first use.
+
+        Raises whatever websockets.connect raises if the agent is unreachable.
+        """
+        key = (lab_id, node_name)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            session = self._sessions.get(key)
+            if session is None or session.closed or session.url != url:
+                if session is not None:
+                    # The node moved to another agent
+                    await session.close()
+                session = ConsoleSession(self, key, url)
+                await session.open()
+                self._sessions[key] = session
+                logger.info(f"Console: opened shared session for {lab_id}/{node_name}")
+            viewer = ConsoleViewer(interactive)
+            session.attach(viewer)
+            return session, viewer
+
+    def stats(self) -> list[dict]:
+        """Open sessions and their viewer counts."""
+        return [
+            {"lab_id": lab_id, "node": node, "viewers": len(s.viewers)}
+            for (lab_id, node), s in self._sessions.items()
+        ]
+
+    async def close_all(self) -> None:
+        for session in list(self._sessions.values()):
+            await session.close()
+
+    def _forget(self, session: ConsoleSession) -> None:
+        if self._sessions.get(session.key) is session:
+            del self._sessions[session.key]
+
+
+console_hub = ConsoleHub()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
@@ -9,9 +11,47 @@ engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto the asyncio driver for the same backend.
+
+    SQLite uses aiosqlite; PostgreSQL uses psycopg 3, which serves both the
+    sync and async engines from one driver.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+    return url
+
+
+def _create_async_engine(url: str):
+    options: dict = {"pool_pre_ping": True}
+    if make_url(url).get_backend_name() != "sqlite":
+        options["pool_size"] = settings.database_async_pool_size
+        options["max_overflow"] = settings.database_async_max_overflow
+    return create_async_engine(async_database_url(url), **options)
+
+
+# Asyncio engine for high-frequency paths (agent events, heartbeats, node
+# state listing and readiness polling, console connects, and the enforcement
+# and reconciliation sweeps) so they never block the event loop on database
+# I/O. Sync helpers run on it through AsyncSession.run_sync.
+async_engine = _create_async_engine(settings.database_url)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
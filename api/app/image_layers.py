@@ -0,0 +1,466 @@
+"""Content-addressed layer cache for Docker image sync.
+
+`docker save` produces a tar archive whose bulk is made of uncompressed
+layer tarballs. Syncing the same image to many agents used to run a full
+`docker save` per transfer and ship every layer even when the agent
+already had most of them.
+
+This module runs `docker save` once per image ID, splits the archive into
+content-addressed blobs under the image store, and records a "recipe"
+describing how to reassemble the original archive. A delta archive can
+then be generated that omits layers an agent already has. Docker resolves
+omitted layers from its local layer store by chain ID when loading, so the
+delta archive loads exactly like the full one.
+
+Every (image, excluded layers) pair reassembles into a byte-identical
+"artifact", so transfers can be resumed with HTTP Range requests and
+verified against a manifest of fixed-size chunk hashes.
+
+Cache layout (under the image store):
+    layers/blobs/sha256/<hex>   - file contents keyed by sha256
+    layers/images/<image-hex>.json - recipe for a Docker image ID
+    layers/manifests/<artifact-id>.json - chunk hashes of an artifact
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tarfile
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from app.config import settings
+from app.image_store import image_store_root
+
+logger = logging.getLogger(__name__)
+
+RECIPE_VERSION = 1
+MANIFEST_VERSION = 1
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE
+TAR_RECORD_SIZE = tarfile.RECORDSIZE
+
+# Serialize cache population per image so concurrent syncs of the same
+# image only run `docker save` once.
+_populate_locks: dict[str, threading.Lock] = {}
+_populate_locks_guard = threading.Lock()
+
+
+def layer_cache_root() -> Path:
+    return image_store_root() / "layers"
+
+
+def blob_path(digest: str) -> Path:
+    algo, _, hex_digest = digest.partition(":")
+    return layer_cache_root() / "blobs" / algo / hex_digest
+
+
+def recipe_path(docker_image_id: str) -> Path:
+    hex_id = docker_image_id.split(":", 1)[-1]
+    return layer_cache_root() / "images" / f"{hex_id}.json"
+
+
+def manifest_path(artifact: str) -> Path:
+    return layer_cache_root() / "manifests" / f"{artifact}.json"
+
+
+def compute_chain_ids(diff_ids: list[str]) -> list[str]:
+    """Compute layer chain IDs from an ordered list of diff IDs.
+
+    The chain ID identifies a layer together with all of its parents,
+    which is how Docker's layer store looks layers up during `docker load`.
+    """
+    chain_ids: list[str] = []
+    for diff_id in diff_ids:
+        if not chain_ids:
+            chain_ids.append(diff_id)
+        else:
+            parent = chain_ids[-1]
+            digest = hashlib.sha256(f"{parent} {diff_id}".encode()).hexdigest()
+            chain_ids.append(f"sha256:{digest}")
+    return chain_ids
+
+
+def get_docker_image_id(reference: str) -> str | None:
+    """Resolve a Docker reference to its image ID on the controller."""
+    try:
+        result = subprocess.run(
+            ["docker", "inspect", "--format", "{{.Id}}", reference],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except Exception as e:
+        logger.warning(f"Could not inspect image {reference}: {e}")
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def load_recipe(docker_image_id: str) -> dict | None:
+    """Load a cached recipe, verifying all referenced blobs still exist."""
+    path = recipe_path(docker_image_id)
+    if not path.exists():
+        return None
+    try:
+        recipe = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if recipe.get("version") != RECIPE_VERSION:
+        return None
+    for member in recipe.get("members", []):
+        digest = member.get("digest")
+        if digest and not blob_path(digest).exists():
+            return None
+    return recipe
+
+
+def _store_blob(fileobj, size: int) -> str:
+    """Copy a tar member into the blob store and return its digest."""
+    blobs_tmp = layer_cache_root() / "blobs" / "tmp"
+    blobs_tmp.mkdir(parents=True, exist_ok=True)
+    hasher = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(dir=blobs_tmp)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            remaining = size
+            while remaining > 0:
+                chunk = fileobj.read(min(settings.image_sync_chunk_size, remaining))
+                if not chunk:
+                    raise ValueError("Unexpected end of docker save stream")
+                hasher.update(chunk)
+                out.write(chunk)
+                remaining -= len(chunk)
+        digest = f"sha256:{hasher.hexdigest()}"
+        target = blob_path(digest)
+        if target.exists():
+            os.unlink(tmp_name)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, target)
+        return digest
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def build_recipe_from_archive(fileobj, reference: str, docker_image_id: str) -> dict:
+    """Split a `docker save` archive stream into blobs and build its recipe.
+
+    Args:
+        fileobj: Readable binary stream of a `docker save` tar archive
+        reference: Docker reference the archive was saved from
+        docker_image_id: Docker image ID (sha256:...) used as the cache key
+
+    Returns:
+        Recipe dict describing members and layers of the archive
+    """
+    members: list[dict] = []
+    digests_by_name: dict[str, str] = {}
+
+    with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+        for info in tar:
+            entry = {
+                "name": info.name,
+                "mode": info.mode,
+                "mtime": int(info.mtime),
+            }
+            if info.isreg():
+                source = tar.extractfile(info)
+                entry["type"] = "file"
+                entry["size"] = info.size
+                entry["digest"] = _store_blob(source, info.size)
+                digests_by_name[info.name] = entry["digest"]
+            elif info.isdir():
+                entry["type"] = "dir"
+            elif info.issym() or info.islnk():
+                entry["type"] = "symlink" if info.issym() else "hardlink"
+                entry["linkname"] = info.linkname
+            else:
+                # docker save never emits devices/fifos; skip anything unexpected
+                continue
+            members.append(entry)
+
+    manifest_digest = digests_by_name.get("manifest.json")
+    if not manifest_digest:
+        raise ValueError("docker save archive has no manifest.json")
+    manifest = json.loads(blob_path(manifest_digest).read_bytes())
+    if not manifest:
+        raise ValueError("docker save archive has an empty manifest.json")
+
+    image_manifest = manifest[0]
+    config_digest = digests_by_name.get(image_manifest.get("Config", ""))
+    diff_ids: list[str] = []
+    if config_digest:
+        config = json.loads(blob_path(config_digest).read_bytes())
+        diff_ids = config.get("rootfs", {}).get("diff_ids", [])
+
+    layer_paths = image_manifest.get("Layers", [])
+    chain_ids = compute_chain_ids(diff_ids)
+    sizes_by_name = {m["name"]: m.get("size", 0) for m in members}
+    layers = []
+    for i, path in enumerate(layer_paths):
+        layers.append({
+            "path": path,
+            "digest": digests_by_name.get(path),
+            "diff_id": diff_ids[i] if i < len(diff_ids) else None,
+            "chain_id": chain_ids[i] if i < len(chain_ids) else None,
+            "size": sizes_by_name.get(path, 0),
+        })
+
+    recipe = {
+        "version": RECIPE_VERSION,
+        "reference": reference,
+        "docker_image_id": docker_image_id,
+        "members": members,
+        "layers": layers,
+    }
+    recipe["total_bytes"] = archive_size(recipe)
+    return recipe
+
+
+def _save_recipe(recipe: dict) -> None:
+    path = recipe_path(recipe["docker_image_id"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(recipe), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def ensure_layer_cache(reference: str) -> dict:
+    """Return the recipe for an image, populating the cache if needed.
+
+    Runs `docker save` at most once per Docker image ID. This is blocking
+    and should be called through `asyncio.to_thread` from async code.
+
+    Raises:
+        ValueError: If the image cannot be resolved or saved
+    """
+    docker_image_id = get_docker_image_id(reference)
+    if not docker_image_id:
+        raise ValueError(f"Image {reference} not found on controller")
+
+    with _populate_locks_guard:
+        lock = _populate_locks.setdefault(docker_image_id, threading.Lock())
+
+    with lock:
+        recipe = load_recipe(docker_image_id)
+        if recipe:
+            return recipe
+
+        logger.info(f"Populating layer cache for {reference} ({docker_image_id[:19]})")
+        proc = subprocess.Popen(
+            ["docker", "save", reference],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            recipe = build_recipe_from_archive(proc.stdout, reference, docker_image_id)
+        except Exception:
+            proc.kill()
+            proc.wait()
+            raise
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise ValueError(stderr.decode(errors="replace") or "docker save failed")
+
+        _save_recipe(recipe)
+        logger.info(
+            f"Layer cache ready for {reference}: {len(recipe['layers'])} layers, "
+            f"{recipe['total_bytes']} bytes"
+        )
+        return recipe
+
+
+def excluded_layer_paths(recipe: dict, have_chain_ids: set[str] | None) -> set[str]:
+    """Get archive paths of layers the receiving agent already has."""
+    if not have_chain_ids:
+        return set()
+    return {
+        layer["path"]
+        for layer in recipe.get("layers", [])
+        if layer.get("chain_id") in have_chain_ids
+    }
+
+
+def _tarinfo_for(member: dict) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(member["name"])
+    info.mode = member.get("mode", 0o644)
+    info.mtime = member.get("mtime", 0)
+    member_type = member.get("type")
+    if member_type == "dir":
+        info.type = tarfile.DIRTYPE
+    elif member_type == "symlink":
+        info.type = tarfile.SYMTYPE
+        info.linkname = member["linkname"]
+    elif member_type == "hardlink":
+        info.type = tarfile.LNKTYPE
+        info.linkname = member["linkname"]
+    else:
+        info.size = member.get("size", 0)
+    return info
+
+
+def _tar_header(member: dict) -> bytes:
+    return _tarinfo_for(member).tobuf(
+        format=tarfile.PAX_FORMAT, encoding="utf-8", errors="surrogateescape"
+    )
+
+
+def _padding(size: int) -> int:
+    remainder = size % TAR_BLOCK_SIZE
+    return TAR_BLOCK_SIZE - remainder if remainder else 0
+
+
+def _trailer_size(offset: int) -> int:
+    # Two zero blocks, then pad the archive to a full record like tarfile does
+    offset += 2 * TAR_BLOCK_SIZE
+    remainder = offset % TAR_RECORD_SIZE
+    return 2 * TAR_BLOCK_SIZE + (TAR_RECORD_SIZE - remainder if remainder else 0)
+
+
+def _included_members(recipe: dict, exclude_paths: set[str]) -> Iterator[dict]:
+    for member in recipe.get("members", []):
+        if member.get("type") == "file" and member["name"] in exclude_paths:
+            continue
+        yield member
+
+
+def archive_size(recipe: dict, exclude_paths: set[str] | None = None) -> int:
+    """Compute the exact byte size of the archive `iter_archive` produces."""
+    offset = 0
+    for member in _included_members(recipe, exclude_paths or set()):
+        offset += len(_tar_header(member))
+        if member.get("type") == "file":
+            size = member.get("size", 0)
+            offset += size + _padding(size)
+    return offset + _trailer_size(offset)
+
+
+def _segments(recipe: dict, exclude_paths: set[str]) -> Iterator[tuple[bytes | Path, int]]:
+    """Yield the archive as (inline bytes or blob path, length) segments."""
+    offset = 0
+    for member in _included_members(recipe, exclude_paths):
+        header = _tar_header(member)
+        offset += len(header)
+        yield header, len(header)
+        if member.get("type") != "file":
+            continue
+        size = member.get("size", 0)
+        yield blob_path(member["digest"]), size
+        pad = _padding(size)
+        offset += size + pad
+        if pad:
+            yield b"\0" * pad, pad
+    trailer = _trailer_size(offset)
+    yield b"\0" * trailer, trailer
+
+
+def iter_archive(
+    recipe: dict,
+    exclude_paths: set[str] | None = None,
+    chunk_size: int | None = None,
+    start: int = 0,
+) -> Iterator[bytes]:
+    """Reassemble a docker-loadable tar archive from cached blobs.
+
+    Args:
+        recipe: Recipe from `ensure_layer_cache`
+        exclude_paths: Layer paths to omit (already present on the agent)
+        chunk_size: Maximum size of yielded chunks
+        start: Byte offset to start from (for resumed transfers)
+
+    Yields:
+        Chunks of the tar archive
+    """
+    chunk_size = chunk_size or settings.image_sync_chunk_size
+    position = 0
+    for segment, length in _segments(recipe, exclude_paths or set()):
+        if position + length <= start:
+            position += length
+            continue
+        skip = max(0, start - position)
+        position += length
+        if isinstance(segment, bytes):
+            yield segment[skip:]
+            continue
+        with open(segment, "rb") as f:
+            if skip:
+                f.seek(skip)
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+def artifact_id(recipe: dict, exclude_paths: set[str] | None = None) -> str:
+    """Stable identifier of the archive produced for a recipe/exclusion pair."""
+    key = "\n".join([recipe["docker_image_id"], *sorted(exclude_paths or ())])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def build_chunk_manifest(
+    recipe: dict,
+    exclude_paths: set[str] | None = None,
+    chunk_size: int | None = None,
+) -> dict:
+    """Hash an artifact in fixed-size chunks so receivers can verify it.
+
+    The manifest is cached next to the recipe; building it reads every
+    included blob once. This is blocking and should be called through
+    `asyncio.to_thread` from async code.
+    """
+    chunk_size = chunk_size or settings.image_sync_verify_chunk_size
+    artifact = artifact_id(recipe, exclude_paths)
+    path = manifest_path(artifact)
+    if path.exists():
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+            if (
+                manifest.get("version") == MANIFEST_VERSION
+                and manifest.get("chunk_size") == chunk_size
+            ):
+                return manifest
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    chunks: list[str] = []
+    hasher = hashlib.sha256()
+    filled = 0
+    size = 0
+    for data in iter_archive(recipe, exclude_paths):
+        size += len(data)
+        view = memoryview(data)
+        while view:
+            take = min(chunk_size - filled, len(view))
+            hasher.update(view[:take])
+            filled += take
+            view = view[take:]
+            if filled == chunk_size:
+                chunks.append(hasher.hexdigest())
+                hasher = hashlib.sha256()
+                filled = 0
+    if filled:
+        chunks.append(hasher.hexdigest())
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "artifact_id": artifact,
+        "docker_image_id": recipe["docker_image_id"],
+        "size": size,
+        "chunk_size": chunk_size,
+        "chunks": chunks,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, path)
+    return manifest
@@ -20,9 +20,10 @@ queue = Queue("archetype", connection=redis_conn)
 
 # Actions that conflict with each other for concurrent execution
 CONFLICTING_ACTIONS = {
-    "up": ["up", "down", "sync"],
-    "down": ["up", "down", "sync"],
-    "sync": ["up", "down"],
+    "up": ["up", "down", "sync", "checkpoint"],
+    "down": ["up", "down", "sync", "checkpoint"],
+    "sync": ["up", "down", "checkpoint"],
+    "checkpoint": ["up", "down", "sync", "checkpoint"],
 }
 
 
@@ -19,6 +19,7 @@ from app.db import SessionLocal
 from app.config import settings
 from app.auth import get_current_user, hash_password
 from app.catalog import list_devices as catalog_devices, list_images as catalog_images
+from app.console_hub import console_hub
 from app.logging_config import (
     correlation_id_var,
     generate_correlation_id,
@@ -113,6 +114,8 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Archetype API controller")
 
+    await console_hub.close_all()
+
     if _agent_monitor_task:
         _agent_monitor_task.cancel()
         try:
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -86,6 +86,10 @@ class Job(Base):
     - cancelled: Job cancelled by user
     """
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_lab_id_status", "lab_id", "status"),
+        Index("ix_jobs_status_action", "status", "action"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     lab_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("labs.id"), nullable=True)
@@ -104,6 +108,9 @@ class Job(Base):
     last_heartbeat: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     # Number of retry attempts
     retry_count: Mapped[int] = mapped_column(default=0)
+    # JSON: runner arguments a retry needs that the action doesn't carry
+    # (e.g. checkpoint_id for "up"/"checkpoint")
+    params_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -137,6 +144,7 @@ class Host(Base):
 class NodePlacement(Base):
     """Tracks which host is running which node for a lab."""
     __tablename__ = "node_placements"
+    __table_args__ = (Index("ix_node_placements_lab_id_node_name", "lab_id", "node_name"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     lab_id: Mapped[str] = mapped_column(String(36), ForeignKey("labs.id"))
@@ -162,7 +170,20 @@ class NodeState(Base):
     Nodes default to 'stopped' when added and only boot when user triggers start.
     """
     __tablename__ = "node_states"
-    __table_args__ = (UniqueConstraint("lab_id", "node_id", name="uq_node_state_lab_node"),)
+    __table_args__ = (
+        UniqueConstraint("lab_id", "node_id", name="uq_node_state_lab_node"),
+        Index("ix_node_states_actual_state_updated_at", "actual_state", "updated_at"),
+        Index("ix_node_states_desired_state_actual_state", "desired_state", "actual_state"),
+        Index("ix_node_states_lab_id_node_name", "lab_id", "node_name"),
+        # Partial index over mismatched nodes only: desired != actual compares
+        # two columns, which a plain B-tree index cannot seek on
+        Index(
+            "ix_node_states_mismatched",
+            "lab_id",
+            sqlite_where=text("desired_state != actual_state"),
+            postgresql_where=text("desired_state != actual_state"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     lab_id: Mapped[str] = mapped_column(String(36), ForeignKey("labs.id", ondelete="CASCADE"))
@@ -264,6 +285,38 @@ class ConfigSnapshot(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
+class LabCheckpoint(Base):
+    """Post-boot state of a lab's nodes, captured for fast redeploys.
+
+    The artifacts (committed container images, CRIU dumps, qcow2 layers,
+    VM memory images) stay on the agents that ran the nodes; this row
+    records which agents hold them so "up" can restore from them.
+
+    Status: "creating", "ready", "failed"
+    """
+    __tablename__ = "lab_checkpoints"
+    __table_args__ = (
+        Index("ix_lab_checkpoints_lab_id", "lab_id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
+    lab_id: Mapped[str] = mapped_column(String(36), ForeignKey("labs.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(200))
+    provider: Mapped[str] = mapped_column(String(50), default="docker")
+    status: Mapped[str] = mapped_column(String(50), default="creating")
+    include_memory: Mapped[bool] = mapped_column(default=True)
+    # JSON list of host IDs holding this checkpoint's artifacts
+    host_ids_json: Mapped[str] = mapped_column(Text, default="[]")
+    # JSON list of node names captured / captured with memory state
+    nodes_json: Mapped[str] = mapped_column(Text, default="[]")
+    stateful_nodes_json: Mapped[str] = mapped_column(Text, default="[]")
+    size_bytes: Mapped[int] = mapped_column(BigInteger, default=0)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[str | None] = mapped_column(String(36), ForeignKey("users.id"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
 class ImageHost(Base):
     """Tracks which images exist on which agents.
 
@@ -302,7 +355,8 @@ class ImageHost(Base):
 class ImageSyncJob(Base):
     """Tracks image transfer operations with progress.
 
-    Each sync job represents a single image transfer from controller to agent.
+    Each sync job represents a single image transfer to an agent, either
+    from the controller or from a peer agent that already has the image.
     Progress is tracked as bytes transferred and percentage complete.
 
     Status values:
@@ -320,6 +374,10 @@ class ImageSyncJob(Base):
     image_id: Mapped[str] = mapped_column(String(255), index=True)
     # Target agent
     host_id: Mapped[str] = mapped_column(String(36), ForeignKey("hosts.id", ondelete="CASCADE"), index=True)
+    # Peer agent serving the image (None = streamed from the controller)
+    source_host_id: Mapped[str | None] = mapped_column(
+        String(36), ForeignKey("hosts.id", ondelete="SET NULL"), nullable=True
+    )
     # Job status: pending, transferring, loading, completed, failed, cancelled
     status: Mapped[str] = mapped_column(String(50), default="pending")
     # Progress tracking - using BigInteger for large file transfers
@@ -429,6 +429,23 @@ async def reconcile_images(
     return result.to_dict()
 
 
+@router.get("/job-health")
+def job_health_stats(
+    current_user: models.User = Depends(get_current_user),
+) -> dict:
+    """Job-health sweep statistics.
+
+    Returns cumulative per-rule action counters (stuck, orphaned,
+    offline_agent, stuck_lock), retry/fail totals and sweep latency.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    from app.tasks.job_health import get_job_health_stats
+
+    return get_job_health_stats()
+
+
 @router.post("/cleanup-stuck-jobs")
 async def cleanup_stuck_jobs(
     max_age_minutes: int = Query(5, ge=1, le=60, description="Mark jobs stuck longer than this as failed"),
@@ -10,6 +10,7 @@ from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import db, models
@@ -304,13 +305,13 @@ async def _handle_agent_restart_cleanup(database: Session, agent_id: str) -> Non
 
 
 @router.post("/{agent_id}/heartbeat", response_model=HeartbeatResponse)
-def heartbeat(
+async def heartbeat(
     agent_id: str,
     request: HeartbeatRequest,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
 ) -> HeartbeatResponse:
     """Receive heartbeat from agent."""
-    host = database.get(models.Host, agent_id)
+    host = await database.get(models.Host, agent_id)
 
     if not host:
         raise HTTPException(status_code=404, detail="Agent not registered")
@@ -319,7 +320,7 @@ def heartbeat(
     host.status = request.status
     host.resource_usage = json.dumps(request.resource_usage)
     host.last_heartbeat = datetime.now(timezone.utc)
-    database.commit()
+    await database.commit()
 
     # TODO: Check for pending jobs to dispatch
     pending_jobs: list[str] = []
@@ -1,13 +1,19 @@
-"""WebSocket console proxy endpoint."""
+"""WebSocket console proxy endpoint.
+
+Browser connections to the same node share one agent console session
+through the console hub. Connect with ?mode=view to watch without input.
+"""
 from __future__ import annotations
 
 import asyncio
 import logging
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from sqlalchemy.orm import Session
 
 from app import agent_client, models
-from app.db import SessionLocal
+from app.console_hub import console_hub
+from app.db import AsyncSessionLocal
 from app.services.topology import TopologyService
 
 logger = logging.getLogger(__name__)
@@ -15,110 +21,124 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["console"])
 
 
-@router.websocket("/labs/{lab_id}/nodes/{node}/console")
-async def console_ws(websocket: WebSocket, lab_id: str, node: str) -> None:
-    """Proxy console WebSocket to agent."""
-    await websocket.accept()
-
-    database = SessionLocal()
-    try:
-        lab = database.get(models.Lab, lab_id)
-        if not lab:
-            await websocket.send_text("Lab not found\r\n")
-            await websocket.close(code=1008)
-            return
-
-        # For multi-host labs, find which agent has the specific node
-        agent = None
-        node_name = node  # May be GUI ID or actual name
-
-        # Use TopologyService to look up node and its host from database
-        topology_service = TopologyService(database)
-
-        # Use database as source of truth for node lookup
-        node_def = topology_service.get_node_by_any_id(lab.id, node)
-        if node_def:
-            node_name = node_def.container_name
-            logger.debug(f"Console: resolved {node} to container name {node_name} from DB")
-
-            # Get agent from Node.host_id (explicit placement)
-            if node_def.host_id:
-                agent = database.get(models.Host, node_def.host_id)
-                if agent and not agent_client.is_agent_online(agent):
-                    agent = None  # Agent offline, will fall back below
-                else:
-                    logger.debug(f"Console: using host_id {node_def.host_id} from topology")
-
-        # If no agent from topology, check NodePlacement (runtime placement records)
-        if not agent:
-            placement = (
-                database.query(models.NodePlacement)
-                .filter(
-                    models.NodePlacement.lab_id == lab_id,
-                    models.NodePlacement.node_name == node_name,
-                )
-                .first()
+def _resolve_console_target(
+    database: Session, lab_id: str, node: str
+) -> tuple[models.Lab | None, models.Host | None, str, models.NodeState | None]:
+    """Resolve the agent, container name and NodeState for a console request.
+
+    Runs through `AsyncSession.run_sync` so console connects never block
+    the event loop on database I/O.
+
+    Returns:
+        Tuple of (lab, agent or None, container name, node state or None)
+    """
+    lab = database.get(models.Lab, lab_id)
+    if not lab:
+        return None, None, node, None
+
+    # For multi-host labs, find which agent has the specific node
+    agent = None
+    node_name = node  # May be GUI ID or actual name
+
+    # Use TopologyService to look up node and its host from database
+    topology_service = TopologyService(database)
+
+    # Use database as source of truth for node lookup
+    node_def = topology_service.get_node_by_any_id(lab.id, node)
+    if node_def:
+        node_name = node_def.container_name
+        logger.debug(f"Console: resolved {node} to container name {node_name} from DB")
+
+        # Get agent from Node.host_id (explicit placement)
+        if node_def.host_id:
+            agent = database.get(models.Host, node_def.host_id)
+            if agent and not agent_client.is_agent_online(agent):
+                agent = None  # Agent offline, will fall back below
+            else:
+                logger.debug(f"Console: using host_id {node_def.host_id} from topology")
+
+    # If no agent from topology, check NodePlacement (runtime placement records)
+    if not agent:
+        placement = (
+            database.query(models.NodePlacement)
+            .filter(
+                models.NodePlacement.lab_id == lab_id,
+                models.NodePlacement.node_name == node_name,
             )
-            if placement:
-                agent = database.get(models.Host, placement.host_id)
-                if agent and not agent_client.is_agent_online(agent):
-                    agent = None
-        # Get the provider for this lab (outside try block for fallback)
-        lab_provider = lab.provider if lab.provider else "docker"
-
-        # If not found via topology (single-host or node not found), use lab's agent
-        if not agent:
-            agent = await agent_client.get_agent_for_lab(database, lab, required_provider=lab_provider)
-
-        if not agent:
-            await websocket.send_text("No healthy agent available\r\n")
-            await websocket.close(code=1011)
-            return
+            .first()
+        )
+        if placement:
+            agent = database.get(models.Host, placement.host_id)
+            if agent and not agent_client.is_agent_online(agent):
+                agent = None
 
-        # Get agent WebSocket URL (use resolved node_name, not raw GUI ID)
-        agent_ws_url = agent_client.get_agent_console_url(agent, lab_id, node_name)
+    # If not found via topology (single-host or node not found), use lab's agent
+    if not agent:
+        lab_provider = lab.provider if lab.provider else "docker"
+        agent = agent_client.select_agent_for_lab(database, lab, required_provider=lab_provider)
+
+    # Look up NodeState to check is_ready flag
+    node_state = (
+        database.query(models.NodeState)
+        .filter(
+            models.NodeState.lab_id == lab_id,
+            models.NodeState.node_name == node_name,
+        )
+        .first()
+    )
 
-        # Check if node is ready for console access
-        # Look up NodeState to check is_ready flag
+    # Also check by node_id in case the raw GUI ID was passed
+    if not node_state:
         node_state = (
             database.query(models.NodeState)
             .filter(
                 models.NodeState.lab_id == lab_id,
-                models.NodeState.node_name == node_name,
+                models.NodeState.node_id == node,
             )
             .first()
         )
 
-        # Also check by node_id in case the raw GUI ID was passed
-        if not node_state:
-            node_state = (
-                database.query(models.NodeState)
-                .filter(
-                    models.NodeState.lab_id == lab_id,
-                    models.NodeState.node_id == node,
-                )
-                .first()
-            )
+    return lab, agent, node_name, node_state
 
-        boot_warning = None
-        if node_state and node_state.actual_state == "running" and not node_state.is_ready:
-            # Node is running but not ready - check readiness from agent
-            try:
-                readiness = await agent_client.check_node_readiness(agent, lab_id, node_name)
-                if not readiness.get("is_ready", False):
-                    progress = readiness.get("progress_percent")
-                    progress_str = f" ({progress}%)" if progress is not None else ""
-                    boot_warning = f"\r\n[Boot in progress{progress_str}... Console may be unresponsive]\r\n\r\n"
-            except Exception as e:
-                logger.debug(f"Readiness check failed for {node_name}: {e}")
 
-    finally:
-        database.close()
+@router.websocket("/labs/{lab_id}/nodes/{node}/console")
+async def console_ws(websocket: WebSocket, lab_id: str, node: str) -> None:
+    """Proxy console WebSocket to agent through a shared session."""
+    await websocket.accept()
 
-    # Connect to agent WebSocket and proxy
-    import websockets
+    async with AsyncSessionLocal() as database:
+        lab, agent, node_name, node_state = await database.run_sync(
+            _resolve_console_target, lab_id, node
+        )
+
+    if not lab:
+        await websocket.send_text("Lab not found\r\n")
+        await websocket.close(code=1008)
+        return
+
+    if not agent:
+        await websocket.send_text("No healthy agent available\r\n")
+        await websocket.close(code=1011)
+        return
+
+    # Get agent WebSocket URL (use resolved node_name, not raw GUI ID)
+    agent_ws_url = agent_client.get_agent_console_url(agent, lab_id, node_name)
+
+    # Check if node is ready for console access
+    boot_warning = None
+    if node_state and node_state.actual_state == "running" and not node_state.is_ready:
+        # Node is running but not ready - check readiness from agent
+        try:
+            readiness = await agent_client.check_node_readiness(agent, lab_id, node_name)
+            if not readiness.get("is_ready", False):
+                progress = readiness.get("progress_percent")
+                progress_str = f" ({progress}%)" if progress is not None else ""
+                boot_warning = f"\r\n[Boot in progress{progress_str}... Console may be unresponsive]\r\n\r\n"
+        except Exception as e:
+            logger.debug(f"Readiness check failed for {node_name}: {e}")
 
-    logger.info(f"Console: connecting to agent at {agent_ws_url}")
+    # Join the node's shared agent session (opened on first use)
+    logger.info(f"Console: attaching to agent session at {agent_ws_url}")
 
     # Send boot warning if node is not yet ready
     if boot_warning:
@@ -127,62 +147,71 @@ async def console_ws(websocket: WebSocket, lab_id: str, node: str) -> None:
         except Exception:
             pass
 
+    interactive = websocket.query_params.get("mode") != "view"
     try:
-        async with websockets.connect(agent_ws_url) as agent_ws:
-            async def forward_to_client():
-                """Forward data from agent to client."""
-                try:
-                    async for message in agent_ws:
-                        if isinstance(message, bytes):
-                            await websocket.send_bytes(message)
-                        else:
-                            await websocket.send_text(message)
-                except Exception:
-                    pass
-
-            async def forward_to_agent():
-                """Forward data from client to agent."""
-                try:
-                    while True:
-                        message = await websocket.receive()
-                        if message["type"] == "websocket.disconnect":
-                            break
-                        elif message["type"] == "websocket.receive":
-                            if "text" in message:
-                                await agent_ws.send(message["text"])
-                            elif "bytes" in message:
-                                await agent_ws.send(message["bytes"])
-                except WebSocketDisconnect:
-                    pass
-                except Exception:
-                    pass
-
-            # Run both directions concurrently
-            to_client_task = asyncio.create_task(forward_to_client())
-            to_agent_task = asyncio.create_task(forward_to_agent())
-
-            try:
-                done, pending = await asyncio.wait(
-                    [to_client_task, to_agent_task],
-                    return_when=asyncio.FIRST_COMPLETED,
-                )
-
-                for task in pending:
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
-
-            finally:
-                pass
-
+        session, viewer = await console_hub.attach(lab_id, node_name, agent_ws_url, interactive)
     except Exception as e:
         logger.error(f"Console connection failed to {agent_ws_url}: {e}")
         try:
             await websocket.send_text(f"Console connection failed: {e}\r\n")
         except Exception:
             pass
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+        return
+
+    async def forward_to_client():
+        """Forward shared session output (scrollback first) to the client."""
+        try:
+            while True:
+                message = await viewer.queue.get()
+                if message is None:
+                    break
+                if isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
+        except Exception:
+            pass
+
+    async def forward_to_agent():
+        """Forward client input to the session, subject to input arbitration."""
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                elif message["type"] == "websocket.receive":
+                    if "text" in message:
+                        await session.send_input(viewer, message["text"])
+                    elif "bytes" in message:
+                        await session.send_input(viewer, message["bytes"])
+        except WebSocketDisconnect:
+            pass
+        except Exception:
+            pass
+
+    # Run both directions concurrently
+    to_client_task = asyncio.create_task(forward_to_client())
+    to_agent_task = asyncio.create_task(forward_to_agent())
+
+    try:
+        done, pending = await asyncio.wait(
+            [to_client_task, to_agent_task],
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+
+        for task in pending:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    finally:
+        session.detach(viewer)
 
     try:
         await websocket.close()
@@ -12,7 +12,8 @@ import logging
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import db, models, schemas
 
@@ -21,7 +22,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/events", tags=["events"])
 
 
-def _find_lab_by_prefix(database: Session, lab_prefix: str) -> models.Lab | None:
+async def _find_lab_by_prefix(database: AsyncSession, lab_prefix: str) -> models.Lab | None:
     """Find a lab by its containerlab prefix.
 
     Containerlab truncates lab IDs to ~20 chars, so we need to find
@@ -38,14 +39,15 @@ def _find_lab_by_prefix(database: Session, lab_prefix: str) -> models.Lab | None
         return None
 
     # Try exact match first
-    lab = database.query(models.Lab).filter(models.Lab.id == lab_prefix).first()
+    lab = await database.get(models.Lab, lab_prefix)
     if lab:
         return lab
 
     # Try prefix match (containerlab truncates to ~20 chars)
-    labs = database.query(models.Lab).filter(
-        models.Lab.id.startswith(lab_prefix)
-    ).all()
+    result = await database.execute(
+        select(models.Lab).where(models.Lab.id.startswith(lab_prefix))
+    )
+    labs = result.scalars().all()
 
     if len(labs) == 1:
         return labs[0]
@@ -61,8 +63,8 @@ def _find_lab_by_prefix(database: Session, lab_prefix: str) -> models.Lab | None
     return None
 
 
-def _find_node_state(
-    database: Session, lab_id: str, node_name: str
+async def _find_node_state(
+    database: AsyncSession, lab_id: str, node_name: str
 ) -> models.NodeState | None:
     """Find a NodeState record by lab ID and node name.
 
@@ -74,14 +76,15 @@ def _find_node_state(
     Returns:
         NodeState if found, None otherwise
     """
-    return (
-        database.query(models.NodeState)
-        .filter(
+    result = await database.execute(
+        select(models.NodeState)
+        .where(
             models.NodeState.lab_id == lab_id,
             models.NodeState.node_name == node_name,
         )
-        .first()
+        .limit(1)
     )
+    return result.scalars().first()
 
 
 def _event_type_to_actual_state(
@@ -124,7 +127,7 @@ def _event_type_to_actual_state(
 @router.post("/node", response_model=schemas.NodeEventResponse)
 async def receive_node_event(
     payload: schemas.NodeEventPayload,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
 ) -> schemas.NodeEventResponse:
     """Receive a node state change event from an agent.
 
@@ -140,7 +143,7 @@ async def receive_node_event(
     )
 
     # Find the lab by prefix
-    lab = _find_lab_by_prefix(database, payload.lab_id)
+    lab = await _find_lab_by_prefix(database, payload.lab_id)
     if not lab:
         # Lab not found - might be a stale container
         logger.debug(f"Lab not found for prefix: {payload.lab_id}")
@@ -150,7 +153,7 @@ async def receive_node_event(
         )
 
     # Find the NodeState record
-    node_state = _find_node_state(database, lab.id, payload.node_name)
+    node_state = await _find_node_state(database, lab.id, payload.node_name)
     if not node_state:
         # NodeState not found - this can happen if topology was changed
         logger.debug(
@@ -190,7 +193,7 @@ async def receive_node_event(
             f"{old_state} -> {new_state} (event: {payload.event_type})"
         )
 
-    database.commit()
+    await database.commit()
 
     return schemas.NodeEventResponse(
         success=True,
@@ -201,7 +204,7 @@ async def receive_node_event(
 @router.post("/batch", response_model=schemas.NodeEventResponse)
 async def receive_batch_events(
     events: list[schemas.NodeEventPayload],
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
 ) -> schemas.NodeEventResponse:
     """Receive multiple node events in a single request.
 
@@ -213,16 +216,20 @@ async def receive_batch_events(
 
     processed = 0
     errors = 0
+    # Batches usually carry many events for the same lab
+    labs: dict[str, models.Lab | None] = {}
 
     for payload in events:
         try:
             # Find the lab
-            lab = _find_lab_by_prefix(database, payload.lab_id)
+            if payload.lab_id not in labs:
+                labs[payload.lab_id] = await _find_lab_by_prefix(database, payload.lab_id)
+            lab = labs[payload.lab_id]
             if not lab:
                 continue
 
             # Find the NodeState
-            node_state = _find_node_state(database, lab.id, payload.node_name)
+            node_state = await _find_node_state(database, lab.id, payload.node_name)
             if not node_state:
                 continue
 
@@ -253,7 +260,7 @@ async def receive_batch_events(
             logger.error(f"Error processing event: {e}")
             errors += 1
 
-    database.commit()
+    await database.commit()
 
     return schemas.NodeEventResponse(
         success=True,
@@ -17,12 +17,12 @@ from typing import AsyncGenerator
 from uuid import uuid4
 
 import httpx
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app import db, models
+from app import db, image_codec, image_layers, models
 from app.auth import get_current_user
 from app.config import settings
 from app.image_store import (
@@ -1179,6 +1179,7 @@ class SyncJobOut(BaseModel):
     image_id: str
     host_id: str
     host_name: str | None = None
+    source_host_id: str | None = None  # Peer agent that served the image
     status: str
     progress_percent: int = 0
     bytes_transferred: int = 0
@@ -1338,6 +1339,210 @@ async def sync_image_to_hosts(
     return {"jobs": job_ids, "count": len(job_ids)}
 
 
+async def _iter_archive_async(
+    recipe: dict, exclude: set[str], start: int = 0
+) -> AsyncGenerator[bytes, None]:
+    """Yield cached archive chunks without blocking the event loop on disk reads."""
+    chunks = image_layers.iter_archive(recipe, exclude, start=start)
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+async def _layer_delta_plan(host: models.Host, reference: str) -> tuple[dict, set[str]]:
+    """Get the cached recipe of an image and the layers a host can skip."""
+    import logging
+
+    from app.agent_client import get_agent_image_layers
+
+    logger = logging.getLogger(__name__)
+
+    recipe = await asyncio.to_thread(image_layers.ensure_layer_cache, reference)
+    have_chain_ids = set(await get_agent_image_layers(host))
+    exclude = image_layers.excluded_layer_paths(recipe, have_chain_ids)
+    logger.info(
+        f"Delta sync {reference} -> {host.name}: skipping {len(exclude)} of "
+        f"{len(recipe.get('layers', []))} layers already on agent"
+    )
+    return recipe, exclude
+
+
+async def _push_image_resumable(
+    client: httpx.AsyncClient,
+    host: models.Host,
+    job: models.ImageSyncJob,
+    session: Session,
+    image_id: str,
+    reference: str,
+    codec: str,
+    use_layer_delta: bool = True,
+) -> None:
+    """Push an image through a resumable receive session on the agent.
+
+    The agent verifies every chunk against the artifact's manifest before
+    it reaches `docker load`. After a dropped connection or a rejected
+    chunk the archive is resent from the agent's last verified offset.
+    If `docker load` fails on a delta archive (the agent no longer has a
+    parent layer it reported), the full archive is sent instead.
+
+    Raises:
+        ValueError: If the agent fails to load the image or the transfer
+            stops making progress
+        httpx.HTTPError: If the agent rejects the session
+    """
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+    if use_layer_delta:
+        recipe, exclude = await _layer_delta_plan(host, reference)
+    else:
+        recipe = await asyncio.to_thread(image_layers.ensure_layer_cache, reference)
+        exclude = set()
+    manifest = await asyncio.to_thread(image_layers.build_chunk_manifest, recipe, exclude)
+    size = manifest["size"]
+    job.total_bytes = size
+    session.commit()
+
+    base_url = f"http://{host.address}/images/receive"
+    response = await client.post(
+        f"{base_url}/session",
+        json={"job_id": job.id, "reference": reference, "manifest": manifest},
+    )
+    response.raise_for_status()
+
+    async def tracked_archive(start: int):
+        """Forward archive chunks from an offset, recording progress every 5%."""
+        sent = start
+        async for chunk in _iter_archive_async(recipe, exclude, start):
+            sent += len(chunk)
+            percent = min(95, int(sent * 100 / size)) if size else 0
+            if percent >= job.progress_percent + 5:
+                job.bytes_transferred = sent
+                job.progress_percent = percent
+                session.commit()
+            yield chunk
+
+    offset = 0
+    failures = 0
+    while True:
+        headers = {"Content-Type": "application/x-tar"}
+        body = tracked_archive(offset)
+        if codec != image_codec.CODEC_IDENTITY:
+            headers[image_codec.CODEC_HEADER] = codec
+            headers[image_codec.UNCOMPRESSED_LENGTH_HEADER] = str(size - offset)
+            body = image_codec.compress_stream(body, codec)
+        else:
+            headers["Content-Length"] = str(size - offset)
+
+        params = {
+            "image_id": image_id,
+            "reference": reference,
+            "total_bytes": str(size),
+            "job_id": job.id,
+            "offset": str(offset),
+        }
+        try:
+            response = await client.post(
+                f"{base_url}/stream", content=body, params=params, headers=headers
+            )
+            if response.status_code != 409:
+                response.raise_for_status()
+                result = response.json()
+                if not result.get("success"):
+                    delta_error = result.get("error", "Agent failed to load image")
+                    if not exclude:
+                        raise ValueError(delta_error)
+                    break
+                job.bytes_transferred = size
+                return
+            reason = response.json().get("detail", "rejected by agent")
+        except httpx.TransportError as e:
+            reason = str(e) or type(e).__name__
+
+        previous = offset
+        try:
+            state = await client.get(f"{base_url}/session/{job.id}")
+            state.raise_for_status()
+            offset = state.json()["verified_offset"]
+        except httpx.TransportError:
+            pass  # Agent unreachable; retry from the same offset
+
+        failures = 0 if offset > previous else failures + 1
+        if failures > settings.image_sync_resume_attempts:
+            raise ValueError(
+                f"Transfer to {host.name} stalled at {offset}/{size} bytes: {reason}"
+            )
+        logger.warning(
+            f"Transfer of {reference} to {host.name} interrupted ({reason}), "
+            f"resuming at {offset}/{size} bytes"
+        )
+        await asyncio.sleep(min(30, 2 ** failures))
+
+    # Only a failed delta load leaves the loop; resend the full archive
+    logger.warning(
+        f"Delta load of {reference} on {host.name} failed, "
+        f"resending full archive: {delta_error}"
+    )
+    job.progress_percent = 0
+    session.commit()
+    await _push_image_resumable(
+        client, host, job, session, image_id, reference, codec,
+        use_layer_delta=False,
+    )
+
+
+async def _open_image_archive_for_host(
+    host: models.Host, reference: str, use_layer_delta: bool = True
+) -> tuple[AsyncGenerator[bytes, None], int | None, bool]:
+    """Open a streaming docker-loadable archive of an image for a host.
+
+    With the layer cache enabled, the archive is reassembled from cached
+    blobs and, unless `use_layer_delta` is False, omits layers the host
+    already has; its exact size is known. Otherwise `docker save` output
+    is streamed and the size is unknown.
+
+    Returns:
+        Tuple of (async chunk generator, archive size or None, whether
+        any layers were omitted)
+    """
+    if settings.image_sync_layer_cache:
+        if use_layer_delta:
+            recipe, exclude = await _layer_delta_plan(host, reference)
+        else:
+            recipe = await asyncio.to_thread(image_layers.ensure_layer_cache, reference)
+            exclude = set()
+        return (
+            _iter_archive_async(recipe, exclude),
+            image_layers.archive_size(recipe, exclude),
+            bool(exclude),
+        )
+
+    async def generate_from_docker_save():
+        proc = await asyncio.create_subprocess_exec(
+            "docker", "save", reference,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            while True:
+                chunk = await proc.stdout.read(settings.image_sync_chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            _, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                raise ValueError(stderr.decode() if stderr else "docker save failed")
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+    return generate_from_docker_save(), None, False
+
+
 async def _execute_sync_job(job_id: str, image_id: str, image: dict, host: models.Host):
     """Execute a sync job in the background.
 
@@ -1345,6 +1550,7 @@ async def _execute_sync_job(job_id: str, image_id: str, image: dict, host: model
     Uses structured error handling for better error messages.
     """
     import logging
+    from app.agent_client import agent_supports_resumable_images, get_agent_image_codecs
     from app.db import SessionLocal
     from app.errors import ErrorCategory, StructuredError, categorize_httpx_error
 
@@ -1382,69 +1588,117 @@ async def _execute_sync_job(job_id: str, image_id: str, image: dict, host: model
         except Exception as e:
             logger.warning(f"Could not get image size for {reference}: {e}")
 
-        # Stream image to agent
-        # Use docker save and pipe to agent
+        # Stream image to agent without buffering the archive in memory
         async with httpx.AsyncClient(timeout=httpx.Timeout(settings.image_sync_timeout)) as client:
-            # Build agent URL
-            agent_url = f"http://{host.address}/images/receive"
-
-            # Use subprocess to stream docker save output
-            proc = await asyncio.create_subprocess_exec(
-                "docker", "save", reference,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            # Read all output (for now, TODO: true streaming)
-            stdout, stderr = await proc.communicate()
-
-            if proc.returncode != 0:
-                error_msg = stderr.decode() if stderr else "docker save failed"
-                raise ValueError(error_msg)
-
-            # Update progress
-            job.bytes_transferred = len(stdout)
-            job.progress_percent = 50
-            session.commit()
-
-            # Send to agent
-            files = {"file": ("image.tar", stdout, "application/x-tar")}
-            params = {
-                "image_id": image_id,
-                "reference": reference,
-                "total_bytes": str(len(stdout)),
-                "job_id": job_id,
-            }
-
-            try:
-                response = await client.post(
-                    agent_url,
-                    files=files,
-                    params=params,
-                )
-                response.raise_for_status()
-
-                result = response.json()
-                if not result.get("success"):
-                    raise ValueError(result.get("error", "Agent failed to load image"))
-
-            except httpx.TimeoutException as e:
-                structured_error = categorize_httpx_error(
-                    e, host_name=host.name, agent_id=host.id, job_id=job_id
-                )
-                raise ValueError(structured_error.to_error_message()) from e
-
-            except httpx.ConnectError as e:
-                structured_error = categorize_httpx_error(
-                    e, host_name=host.name, agent_id=host.id, job_id=job_id
-                )
-                raise ValueError(structured_error.to_error_message()) from e
+            codec = image_codec.negotiate_codec(get_agent_image_codecs(host))
+            if settings.image_sync_layer_cache and agent_supports_resumable_images(host):
+                try:
+                    await _push_image_resumable(
+                        client, host, job, session, image_id, reference, codec
+                    )
+                except httpx.HTTPError as e:
+                    structured_error = categorize_httpx_error(
+                        e, host_name=host.name, agent_id=host.id, job_id=job_id
+                    )
+                    raise ValueError(structured_error.to_error_message()) from e
+            else:
+                progress = {"bytes": 0, "percent": 0}
+
+                async def push_archive(use_layer_delta: bool) -> tuple[dict, bool]:
+                    """Stream an archive to the agent and return its load result."""
+                    archive, archive_size, is_delta = await _open_image_archive_for_host(
+                        host, reference, use_layer_delta
+                    )
+                    if archive_size is not None:
+                        job.total_bytes = archive_size
+                        session.commit()
+                    progress.update(bytes=0, percent=0)
+
+                    async def tracked_archive():
+                        """Forward archive chunks, recording progress every 5%."""
+                        async for chunk in archive:
+                            progress["bytes"] += len(chunk)
+                            if job.total_bytes:
+                                percent = min(95, int(progress["bytes"] * 100 / job.total_bytes))
+                                if percent >= progress["percent"] + 5:
+                                    progress["percent"] = percent
+                                    job.bytes_transferred = progress["bytes"]
+                                    job.progress_percent = percent
+                                    session.commit()
+                            yield chunk
+
+                    params = {
+                        "image_id": image_id,
+                        "reference": reference,
+                        "total_bytes": str(job.total_bytes or 0),
+                        "job_id": job_id,
+                    }
+                    headers = {"Content-Type": "application/x-tar"}
+                    body = tracked_archive()
+                    if codec != image_codec.CODEC_IDENTITY:
+                        # Progress is tracked on uncompressed bytes before compression
+                        headers[image_codec.CODEC_HEADER] = codec
+                        if archive_size is not None:
+                            headers[image_codec.UNCOMPRESSED_LENGTH_HEADER] = str(archive_size)
+                        body = image_codec.compress_stream(body, codec)
+                    elif archive_size is not None:
+                        headers["Content-Length"] = str(archive_size)
+
+                    response = await client.post(
+                        f"http://{host.address}/images/receive/stream",
+                        content=body,
+                        params=params,
+                        headers=headers,
+                    )
+                    if response.status_code == 404:
+                        # Older agent without streaming receive - use multipart upload
+                        await archive.aclose()
+                        archive, _, _ = await _open_image_archive_for_host(
+                            host, reference, use_layer_delta
+                        )
+                        data = b"".join([chunk async for chunk in archive])
+                        params["total_bytes"] = str(len(data))
+                        response = await client.post(
+                            f"http://{host.address}/images/receive",
+                            files={"file": ("image.tar", data, "application/x-tar")},
+                            params=params,
+                        )
+                    response.raise_for_status()
+                    return response.json(), is_delta
 
-            except httpx.HTTPStatusError as e:
-                structured_error = categorize_httpx_error(
-                    e, host_name=host.name, agent_id=host.id, job_id=job_id
-                )
-                raise ValueError(structured_error.to_error_message()) from e
+                try:
+                    result, is_delta = await push_archive(use_layer_delta=True)
+                    if not result.get("success") and is_delta:
+                        # The agent lost a parent layer it reported; send everything
+                        logger.warning(
+                            f"Delta load of {reference} on {host.name} failed, "
+                            f"resending full archive: {result.get('error')}"
+                        )
+                        job.progress_percent = 0
+                        session.commit()
+                        result, _ = await push_archive(use_layer_delta=False)
+                    if not result.get("success"):
+                        raise ValueError(result.get("error", "Agent failed to load image"))
+
+                    job.bytes_transferred = progress["bytes"] or job.total_bytes
+
+                except httpx.TimeoutException as e:
+                    structured_error = categorize_httpx_error(
+                        e, host_name=host.name, agent_id=host.id, job_id=job_id
+                    )
+                    raise ValueError(structured_error.to_error_message()) from e
+
+                except httpx.ConnectError as e:
+                    structured_error = categorize_httpx_error(
+                        e, host_name=host.name, agent_id=host.id, job_id=job_id
+                    )
+                    raise ValueError(structured_error.to_error_message()) from e
+
+                except httpx.HTTPStatusError as e:
+                    structured_error = categorize_httpx_error(
+                        e, host_name=host.name, agent_id=host.id, job_id=job_id
+                    )
+                    raise ValueError(structured_error.to_error_message()) from e
 
         # Success
         job.status = "completed"
@@ -1496,15 +1750,56 @@ async def _execute_sync_job(job_id: str, image_id: str, image: dict, host: model
         session.close()
 
 
+def _parse_range_start(value: str | None) -> int:
+    """Parse an open-ended `Range: bytes=N-` header; other forms are ignored."""
+    if not value or not value.startswith("bytes="):
+        return 0
+    start, sep, end = value[len("bytes="):].partition("-")
+    if not sep or end or not start.isdigit():
+        return 0
+    return int(start)
+
+
+def _codec_stream_response(
+    chunks: AsyncGenerator[bytes, None],
+    content_length: int | None,
+    http_request: Request,
+    extra_headers: dict[str, str] | None = None,
+    status_code: int = 200,
+) -> StreamingResponse:
+    """Build an image stream response, compressed if the agent accepts it.
+
+    With compression the final size is unknown, so Content-Length is
+    replaced by X-Uncompressed-Length for agent-side progress reporting.
+    """
+    codec = image_codec.negotiate_codec(
+        image_codec.parse_codec_list(http_request.headers.get(image_codec.ACCEPT_CODECS_HEADER))
+    )
+    headers = dict(extra_headers or {})
+    if codec != image_codec.CODEC_IDENTITY:
+        headers[image_codec.CODEC_HEADER] = codec
+        if content_length:
+            headers[image_codec.UNCOMPRESSED_LENGTH_HEADER] = str(content_length)
+        chunks = image_codec.compress_stream(chunks, codec)
+    elif content_length:
+        headers["Content-Length"] = str(content_length)
+
+    return StreamingResponse(
+        chunks, status_code=status_code, media_type="application/x-tar", headers=headers
+    )
+
+
 @router.get("/library/{image_id}/stream")
 async def stream_image(
     image_id: str,
+    http_request: Request,
     current_user: models.User = Depends(get_current_user),
 ) -> StreamingResponse:
     """Stream a Docker image tar for agents to pull.
 
     This endpoint streams the output of `docker save` for the specified image.
     Used by agents in pull mode to fetch images from the controller.
+    The stream is compressed when the agent advertises a codec.
     """
     from urllib.parse import unquote
     image_id = unquote(image_id)
@@ -1564,17 +1859,117 @@ async def stream_image(
             proc.kill()
             raise
 
-    headers = {"Content-Type": "application/x-tar"}
-    if content_length:
-        headers["Content-Length"] = str(content_length)
+    return _codec_stream_response(generate(), content_length, http_request)
 
-    return StreamingResponse(
-        generate(),
-        media_type="application/x-tar",
-        headers=headers,
+
+class LayerDeltaRequest(BaseModel):
+    """Agent -> Controller: layers already present on the requesting agent."""
+    have_chain_ids: list[str] = Field(default_factory=list)
+
+
+@router.post("/library/{image_id}/stream/delta")
+async def stream_image_delta(
+    image_id: str,
+    request: LayerDeltaRequest,
+    http_request: Request,
+    current_user: models.User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Stream a Docker image tar omitting layers the agent already has.
+
+    The archive is reassembled from the controller's content-addressed
+    layer cache, so `docker save` runs at most once per image. Layers whose
+    chain ID the agent reports are left out; `docker load` on the agent
+    resolves them from its local layer store.
+
+    The archive is byte-stable (identified by X-Artifact-Id), so an
+    interrupted transfer can resume with `Range: bytes=N-`; offsets refer
+    to the uncompressed archive.
+    """
+    from urllib.parse import unquote
+    image_id = unquote(image_id)
+
+    manifest = load_manifest()
+    image = find_image_by_id(manifest, image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found in library")
+
+    if image.get("kind") != "docker":
+        raise HTTPException(status_code=400, detail="Only Docker images can be streamed")
+
+    reference = image.get("reference", "")
+    if not reference:
+        raise HTTPException(status_code=400, detail="Image has no Docker reference")
+
+    if not settings.image_sync_layer_cache:
+        raise HTTPException(status_code=404, detail="Layer cache is disabled")
+
+    try:
+        recipe = await asyncio.to_thread(image_layers.ensure_layer_cache, reference)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    exclude = image_layers.excluded_layer_paths(recipe, set(request.have_chain_ids))
+    size = image_layers.archive_size(recipe, exclude)
+    headers = {
+        "X-Layers-Total": str(len(recipe.get("layers", []))),
+        "X-Layers-Skipped": str(len(exclude)),
+        "X-Artifact-Id": image_layers.artifact_id(recipe, exclude),
+        "Accept-Ranges": "bytes",
+    }
+
+    start = _parse_range_start(http_request.headers.get("range"))
+    if start >= size and start:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    status_code = 200
+    if start:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+
+    return _codec_stream_response(
+        _iter_archive_async(recipe, exclude, start),
+        size - start,
+        http_request,
+        extra_headers=headers,
+        status_code=status_code,
     )
 
 
+@router.post("/library/{image_id}/stream/manifest")
+async def get_image_stream_manifest(
+    image_id: str,
+    request: LayerDeltaRequest,
+    current_user: models.User = Depends(get_current_user),
+) -> dict:
+    """Get the chunk manifest of the archive /stream/delta would send.
+
+    Lists sha256 hashes of fixed-size chunks so the agent can verify data
+    before `docker load` and resume from the last verified chunk.
+    """
+    from urllib.parse import unquote
+    image_id = unquote(image_id)
+
+    manifest = load_manifest()
+    image = find_image_by_id(manifest, image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found in library")
+    if image.get("kind") != "docker" or not image.get("reference"):
+        raise HTTPException(status_code=400, detail="Only Docker images can be streamed")
+    if not settings.image_sync_layer_cache:
+        raise HTTPException(status_code=404, detail="Layer cache is disabled")
+
+    try:
+        recipe = await asyncio.to_thread(image_layers.ensure_layer_cache, image["reference"])
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    exclude = image_layers.excluded_layer_paths(recipe, set(request.have_chain_ids))
+    return await asyncio.to_thread(image_layers.build_chunk_manifest, recipe, exclude)
+
+
 @router.get("/sync-jobs")
 def list_sync_jobs(
     status: str | None = None,
@@ -1614,6 +2009,7 @@ def list_sync_jobs(
             image_id=job.image_id,
             host_id=job.host_id,
             host_name=host_names.get(job.host_id),
+            source_host_id=job.source_host_id,
             status=job.status,
             progress_percent=job.progress_percent,
             bytes_transferred=job.bytes_transferred,
@@ -1645,6 +2041,7 @@ def get_sync_job(
         image_id=job.image_id,
         host_id=job.host_id,
         host_name=host.name if host else None,
+        source_host_id=job.source_host_id,
         status=job.status,
         progress_percent=job.progress_percent,
         bytes_transferred=job.bytes_transferred,
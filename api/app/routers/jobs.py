@@ -1,7 +1,7 @@
 """Lab lifecycle and job management endpoints."""
 from __future__ import annotations
 
-import asyncio
+import json
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
@@ -11,11 +11,16 @@ from sqlalchemy.orm import Session
 
 from app import agent_client, db, models, schemas
 from app.auth import get_current_user
-from app.db import SessionLocal
 from app.netlab import run_netlab_command
 from app.services.topology import TopologyService
 from app.storage import lab_workspace
-from app.tasks.jobs import run_agent_job, run_multihost_deploy, run_multihost_destroy
+from app.tasks.executor import submit_job
+from app.tasks.jobs import (
+    run_agent_job,
+    run_lab_restart,
+    run_multihost_deploy,
+    run_multihost_destroy,
+)
 from app.topology import analyze_topology
 from app.config import settings
 from app.utils.job import get_job_timeout_at, is_job_stuck
@@ -201,9 +206,15 @@ def _enrich_job_output(job: models.Job) -> schemas.JobOut:
 @router.post("/labs/{lab_id}/up")
 async def lab_up(
     lab_id: str,
+    checkpoint_id: str | None = None,
     database: Session = Depends(db.get_db),
     current_user: models.User = Depends(get_current_user),
 ) -> schemas.JobOut:
+    """Deploy a lab, optionally restoring nodes from a checkpoint.
+
+    With checkpoint_id, nodes captured in the checkpoint start from their
+    saved state; nodes added since the checkpoint cold-boot as usual.
+    """
     lab = get_lab_or_404(lab_id, database, current_user)
 
     # Check for conflicting jobs before proceeding
@@ -214,6 +225,18 @@ async def lab_up(
             detail=f"Cannot start lab: '{conflicting_action}' operation already in progress"
         )
 
+    restore: dict[str, str] = {}
+    if checkpoint_id:
+        checkpoint = database.get(models.LabCheckpoint, checkpoint_id)
+        if not checkpoint or checkpoint.lab_id != lab.id:
+            raise HTTPException(status_code=404, detail="Checkpoint not found")
+        if checkpoint.status != "ready":
+            raise HTTPException(
+                status_code=409,
+                detail=f"Checkpoint is not ready (status: {checkpoint.status})",
+            )
+        restore["checkpoint_id"] = checkpoint.id
+
     # Use TopologyService for analysis (database is source of truth)
     service = TopologyService(database)
     is_multihost = False
@@ -335,21 +358,29 @@ async def lab_up(
                     )
 
     # Create job record
-    job = models.Job(lab_id=lab.id, user_id=current_user.id, action="up", status="queued")
+    job = models.Job(
+        lab_id=lab.id,
+        user_id=current_user.id,
+        action="up",
+        status="queued",
+        params_json=json.dumps(restore) if restore else None,
+    )
     database.add(job)
     database.commit()
     database.refresh(job)
 
-    # Start background task - choose deployment method based on topology
+    # Enqueue for a worker - choose deployment method based on topology
     # Deploy functions build topology from database (source of truth)
     if is_multihost:
-        asyncio.create_task(run_multihost_deploy(
-            job.id, lab.id, provider=lab_provider
-        ))
+        submit_job(
+            run_multihost_deploy, job.id, lab.id,
+            action="up", provider=lab_provider, **restore,
+        )
     else:
-        asyncio.create_task(run_agent_job(
-            job.id, lab.id, "up", provider=lab_provider
-        ))
+        submit_job(
+            run_agent_job, job.id, lab.id, "up",
+            action="up", agent_id=agent.id, provider=lab_provider, **restore,
+        )
 
     # Build response with image sync events
     job_out = schemas.JobOut.model_validate(job)
@@ -393,16 +424,15 @@ async def lab_down(
     database.commit()
     database.refresh(job)
 
-    # Start background task - choose destroy method based on topology
+    # Enqueue for a worker - choose destroy method based on topology
     # Destroy functions use database for host analysis (source of truth)
     if is_multihost:
-        asyncio.create_task(run_multihost_destroy(
-            job.id, lab.id, provider=lab_provider
-        ))
+        submit_job(run_multihost_destroy, job.id, lab.id, action="down", provider=lab_provider)
     else:
-        asyncio.create_task(run_agent_job(
-            job.id, lab.id, "down", provider=lab_provider
-        ))
+        submit_job(
+            run_agent_job, job.id, lab.id, "down",
+            action="down", agent_id=agent.id, provider=lab_provider,
+        )
 
     return schemas.JobOut.model_validate(job)
 
@@ -457,26 +487,10 @@ async def lab_restart(
     database.refresh(up_job)
 
     # For restart, we do down then up sequentially with separate jobs
-    async def restart_sequence():
-        await run_agent_job(down_job.id, lab.id, "down", provider=lab_provider)
-        # Check if down succeeded before starting up
-        session = SessionLocal()
-        try:
-            dj = session.get(models.Job, down_job.id)
-            uj = session.get(models.Job, up_job.id)
-            if dj and dj.status == "failed":
-                # Mark up job as cancelled since down failed
-                if uj:
-                    uj.status = "failed"
-                    uj.log = "Cancelled: down phase failed"
-                    session.commit()
-                return
-            # Proceed with up phase (topology is built from database)
-            await run_agent_job(up_job.id, lab.id, "up", provider=lab_provider)
-        finally:
-            session.close()
-
-    asyncio.create_task(restart_sequence())
+    submit_job(
+        run_lab_restart, down_job.id, lab.id, up_job.id,
+        action="restart", agent_id=agent.id, provider=lab_provider,
+    )
 
     return schemas.JobOut.model_validate(down_job)
 
@@ -509,8 +523,11 @@ async def node_action(
     database.commit()
     database.refresh(job)
 
-    # Start background task
-    asyncio.create_task(run_agent_job(job.id, lab.id, f"node:{action}:{node}", provider=lab_provider))
+    # Enqueue on the priority lane for node actions
+    submit_job(
+        run_agent_job, job.id, lab.id, job.action,
+        action=job.action, agent_id=agent.id, provider=lab_provider,
+    )
 
     return schemas.JobOut.model_validate(job)
 
@@ -10,6 +10,8 @@ from typing import Literal
 import yaml
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import agent_client, db, models, schemas
@@ -303,6 +305,9 @@ async def delete_lab(
     database.query(models.NodeState).filter(models.NodeState.lab_id == lab_id).delete()
     database.query(models.LinkState).filter(models.LinkState.lab_id == lab_id).delete()
     database.query(models.ConfigSnapshot).filter(models.ConfigSnapshot.lab_id == lab_id).delete()
+    for checkpoint in database.query(models.LabCheckpoint).filter(models.LabCheckpoint.lab_id == lab_id):
+        await _delete_checkpoint_artifacts(database, checkpoint)
+    database.query(models.LabCheckpoint).filter(models.LabCheckpoint.lab_id == lab_id).delete()
 
     # Delete workspace files
     workspace = lab_workspace(lab.id)
@@ -482,29 +487,19 @@ def remove_layout(
 # ============================================================================
 
 
-@router.get("/labs/{lab_id}/nodes/states")
-async def list_node_states(
-    lab_id: str,
-    database: Session = Depends(db.get_db),
-    current_user: models.User = Depends(get_current_user),
-) -> schemas.NodeStatesResponse:
-    """Get all node states for a lab.
+def _load_node_states(
+    database: Session, lab_id: str, user: models.User
+) -> tuple[models.Lab, list[models.NodeState], bool]:
+    """Sync a lab's NodeState records from its topology and load them.
 
-    Returns the desired and actual state for each node in the topology.
-    Auto-creates missing NodeState records for labs with existing topologies.
-    Auto-refreshes stale pending states if no active jobs are running.
-    """
-    from app import agent_client
-    from app.utils.lab import get_lab_provider
-
-    lab = get_lab_or_404(lab_id, database, current_user)
+    Runs through `AsyncSession.run_sync` from list_node_states.
 
-    # Sync NodeState records from database topology
-    service = TopologyService(database)
-    if service.has_nodes(lab.id):
-        graph = service.export_to_graph(lab.id)
-        _upsert_node_states(database, lab.id, graph)
-        database.commit()
+    Returns:
+        Tuple of (lab, node states ordered by name, whether any state is
+        pending with no active job to resolve it)
+    """
+    lab = get_lab_or_404(lab_id, database, user)
+    _ensure_node_states_exist(database, lab.id)
 
     states = (
         database.query(models.NodeState)
@@ -512,11 +507,8 @@ async def list_node_states(
         .order_by(models.NodeState.node_name)
         .all()
     )
-
-    # Auto-fix stale pending states: if any node is "pending" but no active job exists,
-    # refresh from actual container status
-    has_pending = any(s.actual_state == "pending" for s in states)
-    if has_pending:
+    stale_pending = False
+    if any(s.actual_state == "pending" for s in states):
         active_job = (
             database.query(models.Job)
             .filter(
@@ -525,46 +517,69 @@ async def list_node_states(
             )
             .first()
         )
-        if not active_job:
-            # No active job but states are pending - refresh from container status
-            try:
-                lab_provider = get_lab_provider(lab)
-                agent = await agent_client.get_agent_for_lab(
-                    database, lab, required_provider=lab_provider
-                )
-                if agent:
-                    result = await agent_client.get_lab_status_from_agent(agent, lab.id)
-                    nodes = result.get("nodes", [])
-                    container_status_map = {
-                        n.get("name", ""): n.get("status", "unknown") for n in nodes
-                    }
-                    for ns in states:
-                        if ns.actual_state == "pending":
-                            container_status = container_status_map.get(ns.node_name)
-                            if container_status == "running":
-                                ns.actual_state = "running"
-                                ns.error_message = None
-                                if not ns.boot_started_at:
-                                    ns.boot_started_at = datetime.now(timezone.utc)
-                            elif container_status in ("stopped", "exited"):
-                                ns.actual_state = "stopped"
-                                ns.error_message = None
-                                ns.boot_started_at = None
-                            elif not container_status:
-                                # Container doesn't exist - mark as undeployed
-                                ns.actual_state = "undeployed"
-                                ns.error_message = None
-                    database.commit()
-            except Exception:
-                pass  # Best effort - don't fail the request if refresh fails
+        stale_pending = active_job is None
+    return lab, states, stale_pending
+
+
+@router.get("/labs/{lab_id}/nodes/states")
+async def list_node_states(
+    lab_id: str,
+    database: AsyncSession = Depends(db.get_async_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.NodeStatesResponse:
+    """Get all node states for a lab.
+
+    Returns the desired and actual state for each node in the topology.
+    Auto-creates missing NodeState records for labs with existing topologies.
+    Auto-refreshes stale pending states if no active jobs are running.
+
+    Runs on the async session; synchronous helpers go through run_sync.
+    """
+    lab, states, stale_pending = await database.run_sync(
+        _load_node_states, lab_id, current_user
+    )
+
+    # Auto-fix stale pending states: if any node is "pending" but no active job exists,
+    # refresh from actual container status
+    if stale_pending:
+        try:
+            lab_provider = get_lab_provider(lab)
+            agent = await database.run_sync(
+                agent_client.select_agent_for_lab, lab, lab_provider
+            )
+            if agent:
+                result = await agent_client.get_lab_status_from_agent(agent, lab.id)
+                nodes = result.get("nodes", [])
+                container_status_map = {
+                    n.get("name", ""): n.get("status", "unknown") for n in nodes
+                }
+                for ns in states:
+                    if ns.actual_state == "pending":
+                        container_status = container_status_map.get(ns.node_name)
+                        if container_status == "running":
+                            ns.actual_state = "running"
+                            ns.error_message = None
+                            if not ns.boot_started_at:
+                                ns.boot_started_at = datetime.now(timezone.utc)
+                        elif container_status in ("stopped", "exited"):
+                            ns.actual_state = "stopped"
+                            ns.error_message = None
+                            ns.boot_started_at = None
+                        elif not container_status:
+                            # Container doesn't exist - mark as undeployed
+                            ns.actual_state = "undeployed"
+                            ns.error_message = None
+                await database.commit()
+        except Exception:
+            pass  # Best effort - don't fail the request if refresh fails
 
     # Enrich states with host information
     # 1. Query NodePlacement records for node -> host mapping
     placements = (
-        database.query(models.NodePlacement)
-        .filter(models.NodePlacement.lab_id == lab_id)
-        .all()
-    )
+        await database.execute(
+            select(models.NodePlacement).where(models.NodePlacement.lab_id == lab_id)
+        )
+    ).scalars().all()
     placement_by_node = {p.node_name: p.host_id for p in placements}
 
     # 2. Get all relevant host IDs (from placements or lab's default agent)
@@ -576,10 +591,8 @@ async def list_node_states(
     hosts = {}
     if host_ids:
         host_records = (
-            database.query(models.Host)
-            .filter(models.Host.id.in_(host_ids))
-            .all()
-        )
+            await database.execute(select(models.Host).where(models.Host.id.in_(host_ids)))
+        ).scalars().all()
         hosts = {h.id: h.name for h in host_records}
 
     # 4. Build enriched response
@@ -787,8 +800,8 @@ async def sync_node(
     This will reconcile the node's actual state with its desired state.
     If the node is already in sync, no job is created.
     """
-    import asyncio
     from app import agent_client
+    from app.tasks.executor import submit_job
     from app.tasks.jobs import run_node_sync
     from app.utils.lab import get_lab_provider
 
@@ -827,8 +840,11 @@ async def sync_node(
     database.commit()
     database.refresh(job)
 
-    # Start background sync task
-    asyncio.create_task(run_node_sync(job.id, lab.id, [node_id], provider=lab_provider))
+    # Enqueue sync on the priority lane
+    submit_job(
+        run_node_sync, job.id, lab.id, [node_id],
+        action=job.action, agent_id=agent.id, provider=lab_provider,
+    )
 
     return schemas.SyncResponse(
         job_id=job.id,
@@ -848,8 +864,8 @@ async def sync_lab(
     This will reconcile all nodes' actual states with their desired states.
     If all nodes are already in sync, no job is created.
     """
-    import asyncio
     from app import agent_client
+    from app.tasks.executor import submit_job
     from app.tasks.jobs import run_node_sync
     from app.utils.lab import get_lab_provider
 
@@ -895,8 +911,11 @@ async def sync_lab(
     database.commit()
     database.refresh(job)
 
-    # Start background sync task
-    asyncio.create_task(run_node_sync(job.id, lab.id, node_ids, provider=lab_provider))
+    # Enqueue sync on the priority lane
+    submit_job(
+        run_node_sync, job.id, lab.id, node_ids,
+        action=job.action, agent_id=agent.id, provider=lab_provider,
+    )
 
     return schemas.SyncResponse(
         job_id=job.id,
@@ -996,7 +1015,7 @@ async def poll_nodes_ready(
     lab_id: str,
     timeout: int = 300,
     interval: int = 10,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: models.User = Depends(get_current_user),
 ) -> schemas.LabReadinessResponse:
     """Long-poll until all running nodes are ready or timeout.
@@ -1014,6 +1033,8 @@ async def poll_nodes_ready(
 
     Response Headers:
         X-Readiness-Status: "complete" if all ready, "timeout" if timed out
+
+    Polls on the async session so waiting clients never block the event loop.
     """
     import asyncio
     from fastapi.responses import JSONResponse
@@ -1023,25 +1044,26 @@ async def poll_nodes_ready(
     timeout = min(max(timeout, 10), 600)  # 10s to 10min
     interval = min(max(interval, 5), 60)  # 5s to 60s
 
-    lab = get_lab_or_404(lab_id, database, current_user)
-    _ensure_node_states_exist(database, lab.id)
+    lab = await database.run_sync(
+        lambda session: get_lab_or_404(lab_id, session, current_user)
+    )
+    await database.run_sync(_ensure_node_states_exist, lab.id)
 
     lab_provider = get_lab_provider(lab)
-    agent = await agent_client.get_agent_for_lab(database, lab, required_provider=lab_provider)
+    agent = await database.run_sync(agent_client.select_agent_for_lab, lab, lab_provider)
+    states_query = (
+        select(models.NodeState)
+        .where(models.NodeState.lab_id == lab_id)
+        .order_by(models.NodeState.node_name)
+        .execution_options(populate_existing=True)
+    )
 
     start_time = asyncio.get_event_loop().time()
     end_time = start_time + timeout
 
     while asyncio.get_event_loop().time() < end_time:
-        # Refresh session to get latest state
-        database.expire_all()
-
-        states = (
-            database.query(models.NodeState)
-            .filter(models.NodeState.lab_id == lab_id)
-            .order_by(models.NodeState.node_name)
-            .all()
-        )
+        # Reload to get latest state
+        states = (await database.execute(states_query)).scalars().all()
 
         # Count nodes that should be running
         nodes_should_run = [s for s in states if s.desired_state == "running"]
@@ -1075,7 +1097,7 @@ async def poll_nodes_ready(
                         )
                         if readiness.get("is_ready"):
                             state.is_ready = True
-                            database.commit()
+                            await database.commit()
                         progress_percent = readiness.get("progress_percent")
                         message = readiness.get("message")
                     except Exception as e:
@@ -1120,12 +1142,7 @@ async def poll_nodes_ready(
         await asyncio.sleep(interval)
 
     # Timeout reached - return current state
-    states = (
-        database.query(models.NodeState)
-        .filter(models.NodeState.lab_id == lab_id)
-        .order_by(models.NodeState.node_name)
-        .all()
-    )
+    states = (await database.execute(states_query)).scalars().all()
 
     nodes_out = []
     ready_count = 0
@@ -1980,6 +1997,159 @@ def delete_config_snapshot(
     return {"status": "deleted", "snapshot_id": snapshot_id}
 
 
+# ============================================================================
+# Lab Checkpoint Endpoints
+# ============================================================================
+
+
+def _checkpoint_out(checkpoint: models.LabCheckpoint) -> schemas.LabCheckpointOut:
+    """Convert a LabCheckpoint model to schema with JSON lists parsed."""
+
+    def _list(raw: str | None) -> list[str]:
+        try:
+            return json.loads(raw) if raw else []
+        except (json.JSONDecodeError, TypeError):
+            return []
+
+    return schemas.LabCheckpointOut(
+        id=checkpoint.id,
+        lab_id=checkpoint.lab_id,
+        name=checkpoint.name,
+        provider=checkpoint.provider,
+        status=checkpoint.status,
+        include_memory=checkpoint.include_memory,
+        host_ids=_list(checkpoint.host_ids_json),
+        nodes=_list(checkpoint.nodes_json),
+        stateful_nodes=_list(checkpoint.stateful_nodes_json),
+        size_bytes=checkpoint.size_bytes or 0,
+        error_message=checkpoint.error_message,
+        created_at=checkpoint.created_at,
+        completed_at=checkpoint.completed_at,
+    )
+
+
+async def _delete_checkpoint_artifacts(
+    database: Session, checkpoint: models.LabCheckpoint
+) -> None:
+    """Best-effort removal of a checkpoint's artifacts from its agents."""
+    try:
+        host_ids = json.loads(checkpoint.host_ids_json or "[]")
+    except (json.JSONDecodeError, TypeError):
+        host_ids = []
+    for host_id in host_ids:
+        agent = database.get(models.Host, host_id)
+        if agent and agent_client.is_agent_online(agent):
+            await agent_client.delete_checkpoint_on_agent(
+                agent, checkpoint.lab_id, checkpoint.id, checkpoint.provider
+            )
+
+
+@router.get("/labs/{lab_id}/checkpoints")
+def list_checkpoints(
+    lab_id: str,
+    database: Session = Depends(db.get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.LabCheckpointsResponse:
+    """List a lab's checkpoints, newest first."""
+    lab = get_lab_or_404(lab_id, database, current_user)
+    checkpoints = (
+        database.query(models.LabCheckpoint)
+        .filter(models.LabCheckpoint.lab_id == lab.id)
+        .order_by(models.LabCheckpoint.created_at.desc())
+        .all()
+    )
+    return schemas.LabCheckpointsResponse(
+        checkpoints=[_checkpoint_out(c) for c in checkpoints]
+    )
+
+
+@router.post("/labs/{lab_id}/checkpoints")
+async def create_checkpoint(
+    lab_id: str,
+    payload: schemas.LabCheckpointCreate,
+    database: Session = Depends(db.get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.LabCheckpointOut:
+    """Capture the post-boot state of a running lab.
+
+    Queues a checkpoint job; the returned checkpoint is "creating" until
+    every host has captured its nodes. Deploy from it with
+    POST /labs/{lab_id}/up?checkpoint_id=...
+    """
+    from app.tasks.executor import submit_job
+    from app.tasks.jobs import run_lab_checkpoint
+
+    lab = get_lab_or_404(lab_id, database, current_user)
+    if lab.state != "running":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Lab must be running to checkpoint (current state: {lab.state})",
+        )
+    has_conflict, conflicting_action = has_conflicting_job(lab_id, "checkpoint")
+    if has_conflict:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Cannot checkpoint lab: '{conflicting_action}' operation already in progress",
+        )
+
+    lab_provider = get_lab_provider(lab)
+    now = datetime.now(timezone.utc)
+    checkpoint = models.LabCheckpoint(
+        lab_id=lab.id,
+        name=payload.name or f"checkpoint-{now.strftime('%Y%m%d-%H%M%S')}",
+        provider=lab_provider,
+        include_memory=payload.include_memory,
+        created_by=current_user.id,
+    )
+    database.add(checkpoint)
+    database.flush()
+    job = models.Job(
+        lab_id=lab.id,
+        user_id=current_user.id,
+        action="checkpoint",
+        status="queued",
+        params_json=json.dumps({"checkpoint_id": checkpoint.id}),
+    )
+    database.add(job)
+    database.commit()
+    database.refresh(checkpoint)
+    database.refresh(job)
+
+    submit_job(
+        run_lab_checkpoint, job.id, lab.id, checkpoint.id,
+        action="checkpoint", agent_id=lab.agent_id, provider=lab_provider,
+    )
+    return _checkpoint_out(checkpoint)
+
+
+@router.delete("/labs/{lab_id}/checkpoints/{checkpoint_id}")
+async def delete_checkpoint(
+    lab_id: str,
+    checkpoint_id: str,
+    database: Session = Depends(db.get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> dict:
+    """Delete a checkpoint and its artifacts on the agents."""
+    get_lab_or_404(lab_id, database, current_user)
+    checkpoint = (
+        database.query(models.LabCheckpoint)
+        .filter(
+            models.LabCheckpoint.id == checkpoint_id,
+            models.LabCheckpoint.lab_id == lab_id,
+        )
+        .first()
+    )
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    if checkpoint.status == "creating":
+        raise HTTPException(status_code=409, detail="Checkpoint is still being created")
+
+    await _delete_checkpoint_artifacts(database, checkpoint)
+    database.delete(checkpoint)
+    database.commit()
+    return {"status": "deleted", "checkpoint_id": checkpoint_id}
+
+
 # ============================================================================
 # Hot-Connect Link Management Endpoints
 # ============================================================================
@@ -436,6 +436,37 @@ class ConfigSnapshotCreate(BaseModel):
     node_name: str | None = None  # If None, snapshot all nodes
 
 
+class LabCheckpointCreate(BaseModel):
+    """Input schema for checkpointing a running lab."""
+
+    name: str | None = None  # Defaults to a timestamped name
+    include_memory: bool = True  # Capture process/VM memory where agents support it
+
+
+class LabCheckpointOut(BaseModel):
+    """Output schema for a lab checkpoint."""
+
+    id: str
+    lab_id: str
+    name: str
+    provider: str
+    status: str  # "creating", "ready", "failed"
+    include_memory: bool
+    host_ids: list[str] = Field(default_factory=list)
+    nodes: list[str] = Field(default_factory=list)
+    stateful_nodes: list[str] = Field(default_factory=list)
+    size_bytes: int = 0
+    error_message: str | None = None
+    created_at: datetime
+    completed_at: datetime | None = None
+
+
+class LabCheckpointsResponse(BaseModel):
+    """Response schema for listing lab checkpoints."""
+
+    checkpoints: list[LabCheckpointOut]
+
+
 class ConfigDiffRequest(BaseModel):
     """Input schema for generating a diff between two snapshots."""
 
@@ -115,6 +115,46 @@ def graph_to_deploy_topology(graph: TopologyGraph) -> dict:
     return {"nodes": nodes, "links": links}
 
 
+def diff_deploy_topology(
+    desired: dict,
+    live_nodes: dict[str, str],
+    lab_node_names: set[str],
+    redeploy: set[str] | None = None,
+) -> dict:
+    """Compute the operations that turn an agent's live lab into `desired`.
+
+    Links between nodes that stay deployed are left alone: their up/down
+    state is handled by link state management, not by deploy.
+
+    Args:
+        desired: Deploy topology for one agent (graph_to_deploy_topology output)
+        live_nodes: Node name -> status for the nodes the agent reports
+        lab_node_names: Every node name in the lab topology. Live nodes are
+            only removed once they are gone from the lab entirely, never
+            because they fell outside this agent's subset.
+        redeploy: Nodes to recreate unless already running
+
+    Returns:
+        Dict with add_nodes, remove_nodes and add_links, in the agent's
+        TopologyDiffRequest format
+    """
+    redeploy = redeploy or set()
+    add_nodes = [
+        n for n in desired["nodes"]
+        if n["name"] not in live_nodes
+        or (n["name"] in redeploy and live_nodes[n["name"]] != "running")
+    ]
+    added = {n["name"] for n in add_nodes}
+    return {
+        "add_nodes": add_nodes,
+        "remove_nodes": sorted(name for name in live_nodes if name not in lab_node_names),
+        "add_links": [
+            link for link in desired["links"]
+            if link["source_node"] in added or link["target_node"] in added
+        ],
+    }
+
+
 class TopologyService:
     """Service for topology operations.
 
@@ -0,0 +1,379 @@
+"""Durable execution of lab jobs on RQ workers.
+
+Deploy, destroy, node action and sync jobs used to run as bare asyncio
+tasks inside the API process, where they competed with request handling
+and were lost on restart. The API now only enqueues them; any number of
+`rq worker` processes execute them:
+
+    rq worker --with-scheduler archetype-high archetype
+
+Scheduling rules enforced by the workers:
+- Per-lab serialization: one lab-wide job runs per lab at a time (Redis
+  lock, refreshed while the job runs so a crashed worker releases it by
+  TTL). Node-scoped jobs (node syncs and node actions, which run_node_sync
+  fans out one per agent) lock (lab, agent) instead: they run in parallel
+  across a lab's agents, and never alongside a lab-wide job of that lab.
+- Per-agent concurrency: at most job_queue_per_agent_limit jobs target
+  the same agent (Redis sorted-set semaphore with expiring slots).
+- Priority lanes: node actions and syncs go to archetype-high, which
+  workers drain before full deploys/destroys on archetype.
+
+A job that cannot start yet is re-enqueued after job_queue_retry_delay.
+With job_executor="inprocess", or when Redis is unreachable, jobs run as
+asyncio tasks in the calling process as before.
+
+execute_job drives each job runner with asyncio.run, which needs a
+thread with no running event loop and leaves no loop state behind. That
+holds for RQ's default fork-per-job Worker (each job runs in a fresh
+work horse process); workers that run jobs on a shared event loop or
+thread pool are not supported.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Coroutine
+from uuid import uuid4
+
+import redis
+from rq import Queue
+
+from app import models
+from app.config import settings
+from app.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+LANE_HIGH = "archetype-high"
+LANE_DEFAULT = "archetype"
+
+# Job functions workers may execute, by qualified name
+RUNNABLE_JOBS = {
+    "app.tasks.jobs.run_agent_job",
+    "app.tasks.jobs.run_multihost_deploy",
+    "app.tasks.jobs.run_multihost_destroy",
+    "app.tasks.jobs.run_node_sync",
+    "app.tasks.jobs.run_node_actions",
+    "app.tasks.jobs.run_lab_restart",
+    "app.tasks.jobs.run_lab_checkpoint",
+}
+
+# Hash of job ID -> enqueue time for jobs waiting in the queue. Deferrals
+# re-enqueue and refresh the time; entries older than job_queue_stale_after
+# are treated as lost.
+QUEUED_JOBS_KEY = "archetype:jobs:queued"
+
+# Node-scoped job runners; with a target agent they lock (lab, agent)
+NODE_SCOPED_JOBS = {
+    "app.tasks.jobs.run_node_sync",
+    "app.tasks.jobs.run_node_actions",
+}
+
+# Lab locks. KEYS: lab lock, sorted set of the lab's (lab, agent) locks
+# scored by expiry, and for node-scoped jobs the (lab, agent) lock. A
+# lab-wide job takes the lab lock once no (lab, agent) lock is held; a
+# node-scoped job takes its (lab, agent) lock while the lab lock is free.
+# ARGV: now, token, ttl
+_ACQUIRE_LOCK = """
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+if #KEYS == 2 then
+    if redis.call('ZCARD', KEYS[2]) > 0 then
+        return 0
+    end
+    if redis.call('SET', KEYS[1], ARGV[2], 'NX', 'EX', ARGV[3]) then
+        return 1
+    end
+    return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if not redis.call('SET', KEYS[3], ARGV[2], 'NX', 'EX', ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[3]), KEYS[3])
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[3]) * 2)
+return 1
+"""
+# Release/extend a lock only if we still own it. ARGV: token[, ttl, now]
+_RELEASE_LOCK = """
+local held = KEYS[3] or KEYS[1]
+if redis.call('GET', held) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', held)
+if #KEYS == 3 then
+    redis.call('ZREM', KEYS[2], held)
+end
+return 1
+"""
+_EXTEND_LOCK = """
+local held = KEYS[3] or KEYS[1]
+if redis.call('GET', held) ~= ARGV[1] then
+    return 0
+end
+redis.call('EXPIRE', held, ARGV[2])
+if #KEYS == 3 then
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[3]) + tonumber(ARGV[2]), held)
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]) * 2)
+end
+return 1
+"""
+# Take a slot in an agent's semaphore; expired slots are reclaimed first
+_ACQUIRE_SLOT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZSCORE', KEYS[1], ARGV[3]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[4]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    return 1
+end
+return 0
+"""
+
+_redis: redis.Redis | None = None
+
+
+def _get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.from_url(settings.redis_url)
+    return _redis
+
+
+def _queue(lane: str) -> Queue:
+    return Queue(lane, connection=_get_redis())
+
+
+def _lab_lock_key(lab_id: str) -> str:
+    return f"archetype:lab-lock:{lab_id}"
+
+
+def _lab_lock_keys(spec: dict) -> list[str]:
+    """Lock keys for a job, in the KEYS order of _ACQUIRE_LOCK."""
+    lab_key = _lab_lock_key(spec["lab_id"])
+    keys = [lab_key, f"{lab_key}:agents"]
+    if spec["func"] in NODE_SCOPED_JOBS and spec.get("agent_id"):
+        keys.append(f"{lab_key}:agent:{spec['agent_id']}")
+    return keys
+
+
+def _acquire_lab_lock(r: redis.Redis, keys: list[str], token: str) -> bool:
+    return bool(r.eval(
+        _ACQUIRE_LOCK, len(keys), *keys,
+        time.time(), token, settings.job_queue_lock_ttl,
+    ))
+
+
+def _agent_slots_key(agent_id: str) -> str:
+    return f"archetype:agent-slots:{agent_id}"
+
+
+def lane_for_action(action: str) -> str:
+    """Node-level actions and syncs run ahead of full lab deploys/destroys."""
+    if action.startswith(("node:", "nodes:", "sync:")):
+        return LANE_HIGH
+    return LANE_DEFAULT
+
+
+def submit_job(
+    func: Callable[..., Coroutine[Any, Any, None]],
+    job_id: str,
+    lab_id: str,
+    *args: Any,
+    action: str = "",
+    agent_id: str | None = None,
+    **kwargs: Any,
+) -> None:
+    """Run a lab job function through the job execution tier.
+
+    Must be called from a running event loop. `func` is awaited as
+    func(job_id, lab_id, *args, **kwargs) on a worker.
+
+    Args:
+        func: One of the job runners in RUNNABLE_JOBS
+        job_id: Job record ID (still "queued" until the runner starts)
+        lab_id: Lab the job operates on (serialization key)
+        action: Job action, used to choose the priority lane
+        agent_id: Target agent for per-agent concurrency limits, if known
+    """
+    if settings.job_executor == "queue":
+        spec = {
+            "func": f"{func.__module__}.{func.__qualname__}",
+            "job_id": job_id,
+            "lab_id": lab_id,
+            "args": list(args),
+            "kwargs": kwargs,
+            "lane": lane_for_action(action),
+            "agent_id": agent_id,
+            "attempt": 0,
+        }
+        if spec["func"] not in RUNNABLE_JOBS:
+            raise ValueError(f"{spec['func']} is not a queueable job function")
+        try:
+            _enqueue(spec)
+            logger.info(f"Enqueued job {job_id} ({action or spec['func']}) on {spec['lane']}")
+            return
+        except redis.RedisError as e:
+            logger.warning(f"Job queue unavailable ({e}), running job {job_id} in-process")
+
+    asyncio.create_task(func(job_id, lab_id, *args, **kwargs))
+
+
+def _enqueue(spec: dict, delay: float = 0) -> None:
+    queue = _queue(spec["lane"])
+    options = {
+        "job_id": f"lab-job-{spec['job_id']}-{spec['attempt']}",
+        "job_timeout": settings.job_queue_timeout,
+        "result_ttl": 3600,
+        "failure_ttl": 86400,
+        "description": f"{spec['func'].rsplit('.', 1)[-1]} job={spec['job_id']} lab={spec['lab_id']}",
+    }
+    if delay:
+        queue.enqueue_in(timedelta(seconds=delay), execute_job, spec, **options)
+    else:
+        queue.enqueue(execute_job, spec, **options)
+    _get_redis().hset(QUEUED_JOBS_KEY, spec["job_id"], int(time.time()))
+
+
+def _is_fresh(enqueued_at: bytes | str | None, now: float) -> bool:
+    try:
+        return now - float(enqueued_at) < settings.job_queue_stale_after
+    except (TypeError, ValueError):
+        return False
+
+
+def is_job_enqueued(job_id: str) -> bool:
+    """Whether a job is waiting in the durable queue (not yet started)."""
+    if settings.job_executor != "queue":
+        return False
+    try:
+        return _is_fresh(_get_redis().hget(QUEUED_JOBS_KEY, job_id), time.time())
+    except redis.RedisError:
+        return False
+
+
+def enqueued_job_ids() -> set[str]:
+    """IDs of all jobs waiting in the durable queue (one round trip).
+
+    Entries older than job_queue_stale_after belong to jobs whose queue
+    entry was lost; they are dropped so job_health can recover the job.
+    """
+    if settings.job_executor != "queue":
+        return set()
+    try:
+        r = _get_redis()
+        entries = r.hgetall(QUEUED_JOBS_KEY)
+        now = time.time()
+        fresh, stale = set(), []
+        for key, enqueued_at in entries.items():
+            job_id = key.decode() if isinstance(key, bytes) else key
+            if _is_fresh(enqueued_at, now):
+                fresh.add(job_id)
+            else:
+                stale.append(job_id)
+        if stale:
+            logger.warning(f"Dropping {len(stale)} stale queue entries: {stale[:10]}")
+            r.hdel(QUEUED_JOBS_KEY, *stale)
+        return fresh
+    except redis.RedisError:
+        return set()
+
+
+def _acquire_agent_slot(r: redis.Redis, agent_id: str, job_id: str) -> bool:
+    now = time.time()
+    return bool(r.eval(
+        _ACQUIRE_SLOT, 1, _agent_slots_key(agent_id),
+        now, now + settings.job_queue_lock_ttl, job_id,
+        settings.job_queue_per_agent_limit, settings.job_queue_lock_ttl * 2,
+    ))
+
+
+def _job_still_queued(job_id: str) -> bool:
+    session = SessionLocal()
+    try:
+        job = session.get(models.Job, job_id)
+        return job is not None and job.status == "queued"
+    finally:
+        session.close()
+
+
+def execute_job(spec: dict) -> str:
+    """RQ entry point: run a lab job once its lab and agent are free."""
+    job_id = spec["job_id"]
+    lab_id = spec["lab_id"]
+    agent_id = spec.get("agent_id")
+    r = _get_redis()
+
+    try:
+        if not _job_still_queued(job_id):
+            r.hdel(QUEUED_JOBS_KEY, job_id)
+            logger.info(f"Skipping job {job_id}: no longer queued")
+            return "skipped"
+
+        token = uuid4().hex
+        lock_keys = _lab_lock_keys(spec)
+        if not _acquire_lab_lock(r, lock_keys, token):
+            return _requeue(spec, f"lab {lab_id} busy")
+        if agent_id and not _acquire_agent_slot(r, agent_id, job_id):
+            r.eval(_RELEASE_LOCK, len(lock_keys), *lock_keys, token)
+            return _requeue(spec, f"agent {agent_id} at capacity")
+    except Exception:
+        # Nothing will pick this attempt up again; let job_health see the job
+        _forget_queued(r, job_id)
+        raise
+
+    r.hdel(QUEUED_JOBS_KEY, job_id)
+    try:
+        module_name, func_name = spec["func"].rsplit(".", 1)
+        func = getattr(importlib.import_module(module_name), func_name)
+        # A fresh loop per job; see the module docstring on fork-per-job workers
+        asyncio.run(_run_locked(func, spec, r, lock_keys, token))
+    finally:
+        r.eval(_RELEASE_LOCK, len(lock_keys), *lock_keys, token)
+        if agent_id:
+            r.zrem(_agent_slots_key(agent_id), job_id)
+    return "completed"
+
+
+def _forget_queued(r: redis.Redis, job_id: str) -> None:
+    try:
+        r.hdel(QUEUED_JOBS_KEY, job_id)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to clear queue entry of job {job_id}: {e}")
+
+
+def _requeue(spec: dict, reason: str) -> str:
+    spec = {**spec, "attempt": spec["attempt"] + 1}
+    logger.debug(f"Deferring job {spec['job_id']}: {reason}")
+    _enqueue(spec, delay=settings.job_queue_retry_delay)
+    return "deferred"
+
+
+async def _run_locked(func, spec: dict, r: redis.Redis, lock_keys: list[str], token: str) -> None:
+    """Await the job runner while keeping its lab lock and agent slot alive."""
+    agent_id = spec.get("agent_id")
+
+    async def keep_alive():
+        while True:
+            await asyncio.sleep(settings.job_queue_lock_ttl / 3)
+            try:
+                r.eval(
+                    _EXTEND_LOCK, len(lock_keys), *lock_keys,
+                    token, settings.job_queue_lock_ttl, time.time(),
+                )
+                if agent_id:
+                    r.zadd(
+                        _agent_slots_key(agent_id),
+                        {spec["job_id"]: time.time() + settings.job_queue_lock_ttl},
+                    )
+            except redis.RedisError as e:
+                logger.warning(f"Failed to refresh locks for job {spec['job_id']}: {e}")
+
+    keeper = asyncio.create_task(keep_alive())
+    try:
+        await func(spec["job_id"], spec["lab_id"], *spec["args"], **spec["kwargs"])
+    finally:
+        keeper.cancel()
@@ -1,7 +1,8 @@
 """Image synchronization tasks for multi-agent deployments.
 
 This module provides functions for synchronizing Docker images between
-the controller and agents. It supports multiple sync strategies:
+the controller and agents. Agents that already have an image can serve it
+to other agents (peer-to-peer fan-out). It supports multiple sync strategies:
 - push: Automatically push images to agents when uploaded
 - pull: Agents pull missing images when they come online
 - on_demand: Sync images only when needed for deployment
@@ -9,18 +10,21 @@ the controller and agents. It supports multiple sync strategies:
 from __future__ import annotations
 
 import asyncio
+import logging
 from datetime import datetime, timezone
 from uuid import uuid4
 
 import httpx
 from sqlalchemy.orm import Session
 
-from app import models
+from app import agent_client, models
 from app.config import settings
 from app.db import SessionLocal
 from app.image_store import find_image_by_id, load_manifest
 from app.services.topology import TopologyService
 
+logger = logging.getLogger(__name__)
+
 
 async def sync_image_to_agent(
     image_id: str,
@@ -29,6 +33,9 @@ async def sync_image_to_agent(
 ) -> tuple[bool, str | None]:
     """Sync a single image to a specific agent.
 
+    The image is pulled from a peer agent that already has it when one is
+    available, otherwise streamed from the controller.
+
     Args:
         image_id: Image ID from the library (e.g., "docker:ceos:4.28.0F")
         host_id: Target agent's host ID
@@ -68,47 +75,297 @@ async def sync_image_to_agent(
         if image_host and image_host.status == "synced":
             return True, None
 
-        # Create or update ImageHost record
-        if not image_host:
-            image_host = models.ImageHost(
-                id=str(uuid4()),
-                image_id=image_id,
-                host_id=host_id,
-                reference=image.get("reference", ""),
-                status="syncing",
-            )
-            database.add(image_host)
-        else:
-            image_host.status = "syncing"
-            image_host.error_message = None
+        results = await distribute_image(image_id, [host_id], database)
+        return results.get(host_id, (False, "Sync did not run"))
 
-        # Create sync job
-        job = models.ImageSyncJob(
+    except Exception as e:
+        return False, str(e)
+    finally:
+        if own_session:
+            database.close()
+
+
+def _create_sync_job(
+    database: Session,
+    image: dict,
+    image_id: str,
+    host_id: str,
+    source_host_id: str | None,
+) -> models.ImageSyncJob:
+    """Create a pending ImageSyncJob and mark the ImageHost as syncing."""
+    image_host = database.query(models.ImageHost).filter(
+        models.ImageHost.image_id == image_id,
+        models.ImageHost.host_id == host_id
+    ).first()
+    if not image_host:
+        image_host = models.ImageHost(
             id=str(uuid4()),
             image_id=image_id,
             host_id=host_id,
-            status="pending",
+            reference=image.get("reference", ""),
+            status="syncing",
         )
-        database.add(job)
-        database.commit()
+        database.add(image_host)
+    else:
+        image_host.status = "syncing"
+        image_host.error_message = None
+
+    job = models.ImageSyncJob(
+        id=str(uuid4()),
+        image_id=image_id,
+        host_id=host_id,
+        source_host_id=source_host_id,
+        status="pending",
+    )
+    database.add(job)
+    database.commit()
+    return job
 
-        # Import the sync execution function
-        from app.routers.images import _execute_sync_job
 
-        # Execute sync
-        await _execute_sync_job(job.id, image_id, image, host)
+def _finish_peer_sync(
+    database: Session,
+    job: models.ImageSyncJob,
+    success: bool,
+    error: str | None = None,
+) -> None:
+    """Record the outcome of a peer transfer on the job and ImageHost."""
+    now = datetime.now(timezone.utc)
+    job.status = "completed" if success else "failed"
+    job.error_message = error
+    job.completed_at = now
+    if success:
+        job.progress_percent = 100
+
+    image_host = database.query(models.ImageHost).filter(
+        models.ImageHost.image_id == job.image_id,
+        models.ImageHost.host_id == job.host_id
+    ).first()
+    if image_host:
+        image_host.status = "synced" if success else "failed"
+        image_host.error_message = error
+        if success:
+            image_host.synced_at = now
+            image_host.size_bytes = job.total_bytes or image_host.size_bytes
+    database.commit()
 
-        # Check result
-        job = database.get(models.ImageSyncJob, job.id)
-        database.refresh(job)
 
-        if job and job.status == "completed":
-            return True, None
-        else:
-            return False, job.error_message if job else "Sync job disappeared"
+async def _execute_peer_sync_job(
+    job_id: str,
+    image_id: str,
+    reference: str,
+    target: models.Host,
+    source: models.Host,
+) -> None:
+    """Have `target` pull an image from peer agent `source`.
+
+    The target agent pulls the source's /images/export archive into
+    `docker load`, verifying each chunk against the export manifest and
+    resuming from its last verified offset after dropped connections.
+    Progress reported by the target is mirrored into the ImageSyncJob
+    until it finishes. There is no overall deadline: like job health, the
+    transfer fails only when its status and verified byte count stop
+    changing for image_sync_timeout seconds.
+    """
+    session = SessionLocal()
+    try:
+        job = session.get(models.ImageSyncJob, job_id)
+        if not job:
+            return
+        job.status = "transferring"
+        job.started_at = datetime.now(timezone.utc)
+        session.commit()
+
+        try:
+            pull_job_id = await agent_client.start_image_pull_on_agent(
+                target, image_id, reference, source_agent=source
+            )
+        except agent_client.AgentError as e:
+            _finish_peer_sync(session, job, False, e.message)
+            return
+
+        loop = asyncio.get_running_loop()
+        last_seen: tuple = ()
+        last_progress_at = loop.time()
+        while True:
+            await asyncio.sleep(settings.image_sync_peer_poll_interval)
+            progress = await agent_client.get_image_pull_progress(target, pull_job_id)
+            status = progress.get("status")
+
+            session.refresh(job)
+            if job.status == "cancelled":
+                return
+
+            if status == "completed":
+                job.bytes_transferred = progress.get("bytes_transferred", 0)
+                job.total_bytes = progress.get("total_bytes") or job.bytes_transferred
+                _finish_peer_sync(session, job, True)
+                logger.info(f"Peer sync {image_id}: {source.name} -> {target.name} completed")
+                return
+            if status in ("failed", "unknown"):
+                error = progress.get("error") or f"Pull from {source.name} failed"
+                _finish_peer_sync(session, job, False, error)
+                return
+            seen = (status, progress.get("bytes_transferred", 0))
+            if seen != last_seen:
+                last_seen = seen
+                last_progress_at = loop.time()
+            elif loop.time() - last_progress_at > settings.image_sync_timeout:
+                _finish_peer_sync(
+                    session, job, False,
+                    f"Pull from {source.name} stalled at {seen[1]} bytes for "
+                    f"{settings.image_sync_timeout}s",
+                )
+                return
+
+            if status in ("transferring", "loading"):
+                job.status = status
+                job.progress_percent = progress.get("progress_percent", job.progress_percent)
+                job.bytes_transferred = progress.get("bytes_transferred", job.bytes_transferred)
+                job.total_bytes = progress.get("total_bytes") or job.total_bytes
+                session.commit()
 
     except Exception as e:
-        return False, str(e)
+        logger.error(f"Peer sync job {job_id} failed: {e}")
+        job = session.get(models.ImageSyncJob, job_id)
+        if job:
+            _finish_peer_sync(session, job, False, str(e))
+    finally:
+        session.close()
+
+
+async def distribute_image(
+    image_id: str,
+    host_ids: list[str],
+    database: Session | None = None,
+) -> dict[str, tuple[bool, str | None]]:
+    """Distribute an image to many agents using a fan-out tree.
+
+    The controller and every online agent that already has the image act as
+    sources. Each source serves at most `image_sync_max_concurrent` targets
+    at a time, and every agent that finishes becomes a source itself, so the
+    number of senders doubles each round instead of every transfer going
+    through the controller's NIC. Failed peer transfers are retried from a
+    different source, ending with the controller.
+
+    Args:
+        image_id: Library image ID
+        host_ids: Target host IDs
+        database: Optional database session
+
+    Returns:
+        Dict of host_id -> (success, error_message)
+    """
+    own_session = database is None
+    if own_session:
+        database = SessionLocal()
+
+    results: dict[str, tuple[bool, str | None]] = {}
+    try:
+        manifest = load_manifest()
+        image = find_image_by_id(manifest, image_id)
+        if not image:
+            return {host_id: (False, "Image not found in library") for host_id in host_ids}
+        if image.get("kind") != "docker":
+            return {host_id: (False, "Only Docker images can be synced") for host_id in host_ids}
+        reference = image.get("reference", "")
+
+        targets = {
+            host.id: host
+            for host in database.query(models.Host).filter(
+                models.Host.id.in_(host_ids),
+                models.Host.status == "online",
+            ).all()
+        }
+        for host_id in host_ids:
+            if host_id not in targets:
+                results[host_id] = (False, "Host is not online")
+
+        # Source None is the controller; peers are online agents with the image
+        fanout = max(1, settings.image_sync_max_concurrent)
+        active: dict[str | None, int] = {None: 0}
+        hosts_by_id: dict[str, models.Host] = dict(targets)
+        if settings.image_sync_peer_enabled:
+            peers = (
+                database.query(models.Host)
+                .join(models.ImageHost, models.ImageHost.host_id == models.Host.id)
+                .filter(
+                    models.ImageHost.image_id == image_id,
+                    models.ImageHost.status == "synced",
+                    models.Host.status == "online",
+                )
+                .all()
+            )
+            for peer in peers:
+                if peer.id not in targets:
+                    active[peer.id] = 0
+                    hosts_by_id[peer.id] = peer
+
+        pending = list(targets)
+        tried: dict[str, set[str | None]] = {host_id: set() for host_id in targets}
+        running: dict[asyncio.Task, tuple[str, str | None, str]] = {}
+
+        def pick_source(target_id: str) -> str | None | bool:
+            candidates = [
+                source for source, count in active.items()
+                if count < fanout and source not in tried[target_id]
+            ]
+            if not candidates:
+                return False
+            # Prefer idle peers so the controller is the source of last resort
+            candidates.sort(key=lambda source: (source is None, active[source]))
+            return candidates[0]
+
+        while pending or running:
+            for target_id in list(pending):
+                source_id = pick_source(target_id)
+                if source_id is False:
+                    continue
+                pending.remove(target_id)
+                tried[target_id].add(source_id)
+                active[source_id] += 1
+
+                job = _create_sync_job(database, image, image_id, target_id, source_id)
+                if source_id is None:
+                    from app.routers.images import _execute_sync_job
+                    coro = _execute_sync_job(job.id, image_id, image, targets[target_id])
+                else:
+                    coro = _execute_peer_sync_job(
+                        job.id, image_id, reference, targets[target_id], hosts_by_id[source_id]
+                    )
+                running[asyncio.create_task(coro)] = (target_id, source_id, job.id)
+
+            if not running:
+                # Every remaining target has exhausted its sources
+                for target_id in pending:
+                    results[target_id] = (False, "No image source available")
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                target_id, source_id, job_id = running.pop(task)
+                active[source_id] -= 1
+
+                database.expire_all()
+                job = database.get(models.ImageSyncJob, job_id)
+                if job and job.status == "completed":
+                    results[target_id] = (True, None)
+                    if settings.image_sync_peer_enabled:
+                        active[target_id] = 0  # New source for the next round
+                elif job and job.status == "cancelled":
+                    results[target_id] = (False, "Sync cancelled")
+                elif source_id is not None:
+                    logger.warning(
+                        f"Peer transfer of {image_id} to {target_id} from {source_id} failed, "
+                        f"retrying from another source"
+                    )
+                    pending.append(target_id)
+                else:
+                    results[target_id] = (
+                        False, job.error_message if job else "Sync job disappeared"
+                    )
+
+        return results
+
     finally:
         if own_session:
             database.close()
@@ -284,9 +541,8 @@ async def push_image_on_upload(image_id: str, database: Session | None = None):
 
         print(f"Pushing image {image_id} to {len(hosts)} agents")
 
-        # Start sync tasks for each host
-        for host in hosts:
-            asyncio.create_task(sync_image_to_agent(image_id, host.id))
+        # Fan out through agents that receive the image first
+        asyncio.create_task(distribute_image(image_id, [host.id for host in hosts]))
 
     finally:
         if own_session:
@@ -5,111 +5,271 @@ This task runs periodically to detect and handle stuck jobs:
 2. Jobs stuck in "queued" state without agent assignment
 3. Jobs assigned to offline agents
 
-Stuck jobs are either retried (with agent failover) or marked as failed.
+The three job rules are evaluated together by sweep_jobs() from a single
+query over active jobs joined with their agent's status. Stuck jobs are
+either retried (with agent failover) or marked as failed; agent lock
+releases needed before retries run concurrently, grouped by agent.
+Per-rule counters and sweep latency are available via
+get_job_health_stats().
 """
 from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
 from app import agent_client, models
 from app.config import settings
 from app.db import SessionLocal
-from app.utils.job import get_job_timeout, is_job_stuck
+from app.tasks.executor import enqueued_job_ids
+from app.utils.job import get_job_params, get_job_timeout, is_job_stuck
 
 logger = logging.getLogger(__name__)
 
+RULE_STUCK = "stuck"
+RULE_ORPHANED = "orphaned"
+RULE_OFFLINE_AGENT = "offline_agent"
+RULE_STUCK_LOCK = "stuck_lock"
+JOB_RULES = (RULE_OFFLINE_AGENT, RULE_ORPHANED, RULE_STUCK)
+
+# Failure reason recorded when a job has no retries left, by rule
+_FAIL_REASONS = {
+    RULE_STUCK: "Job timed out after maximum retries",
+    RULE_ORPHANED: "No agent available to process job",
+    RULE_OFFLINE_AGENT: "Agent went offline during job execution",
+}
+
+# Queued jobs without an agent for this long are orphaned
+ORPHAN_AGE = timedelta(minutes=2)
+
+# Cumulative job-health counters since process start
+_stats: dict = {
+    "sweeps": 0,
+    "last_sweep_at": None,
+    "last_sweep_seconds": None,
+    "max_sweep_seconds": 0.0,
+    "last_sweep_jobs": 0,
+    "rules": {rule: 0 for rule in (*JOB_RULES, RULE_STUCK_LOCK)},
+    "retried": 0,
+    "failed": 0,
+}
+
+# Last observed (bytes_transferred, time) per active ImageSyncJob. Transfers
+# resume after dropped connections, so a job is only stuck once it stops
+# making progress, not when a large image simply takes a long time.
+_image_sync_progress: dict[str, tuple[int, datetime]] = {}
+
+
+def _last_image_sync_progress(job: models.ImageSyncJob, now: datetime) -> datetime | None:
+    """Record a job's progress and return when it last moved forward."""
+    transferred = job.bytes_transferred or 0
+    previous = _image_sync_progress.get(job.id)
+    if previous is None or transferred > previous[0]:
+        _image_sync_progress[job.id] = (transferred, now)
+        return now if previous is not None else None
+    return previous[1]
+
+
+def get_job_health_stats() -> dict:
+    """Snapshot of job-health rule counters and sweep latency."""
+    return {**_stats, "rules": dict(_stats["rules"])}
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _classify_job(
+    job: models.Job,
+    agent_status: str | None,
+    now: datetime,
+    rules: frozenset[str],
+    enqueued: set[str],
+) -> tuple[str, str | None] | None:
+    """Decide whether an active job needs action.
+
+    Returns:
+        (rule, agent to exclude on retry), or None if the job is healthy
+    """
+    # Jobs waiting in the durable queue for their lab or agent are healthy
+    if job.status == "queued" and job.id in enqueued:
+        return None
+
+    if RULE_OFFLINE_AGENT in rules and job.agent_id and agent_status == "offline":
+        logger.warning(
+            f"Job {job.id} is on offline agent {job.agent_id}, "
+            f"retry_count={job.retry_count}"
+        )
+        return RULE_OFFLINE_AGENT, job.agent_id
+
+    if (
+        RULE_ORPHANED in rules
+        and job.status == "queued"
+        and job.agent_id is None
+        and _as_utc(job.created_at) < now - ORPHAN_AGE
+    ):
+        logger.warning(f"Found orphaned queued job {job.id} (created {job.created_at})")
+        return RULE_ORPHANED, None
+
+    if RULE_STUCK in rules and is_job_stuck(
+        job.action, job.status, job.started_at, job.created_at, job.last_heartbeat
+    ):
+        logger.warning(
+            f"Detected stuck job {job.id}: action={job.action}, status={job.status}, "
+            f"started_at={job.started_at}, last_heartbeat={job.last_heartbeat}, agent_id={job.agent_id}"
+        )
+        agent_offline = bool(job.agent_id) and agent_status not in (None, "online")
+        if agent_offline:
+            logger.warning(f"Job {job.id} agent {job.agent_id} is offline")
+        return RULE_STUCK, job.agent_id if agent_offline else None
 
-async def check_stuck_jobs():
-    """Find and handle jobs that are stuck.
+    return None
+
+
+async def sweep_jobs(rules: frozenset[str] = frozenset(JOB_RULES)) -> dict[str, int]:
+    """Evaluate job-health rules over all active jobs in one pass.
 
-    This function:
-    1. Finds jobs in 'running' state past their timeout
-    2. Finds jobs in 'queued' state for too long without starting
-    3. Finds jobs assigned to offline agents
-    4. Either retries the job (if under max_retries) or marks it as failed
+    Active jobs are loaded once together with their agent's status. Each
+    job triggers at most one action (offline agent, then orphaned, then
+    stuck). Lock releases required before retrying run concurrently,
+    grouped by agent, before the retries themselves.
+
+    Args:
+        rules: Subset of JOB_RULES to evaluate
+
+    Returns:
+        Number of jobs acted on, by rule
     """
+    started = time.monotonic()
+    counts = {rule: 0 for rule in rules}
     session = SessionLocal()
+    rows = []
     try:
         now = datetime.now(timezone.utc)
-
-        # Find all active jobs (queued or running)
-        active_jobs = (
-            session.query(models.Job)
+        rows = (
+            session.query(models.Job, models.Host.status)
+            .outerjoin(models.Host, models.Job.agent_id == models.Host.id)
             .filter(models.Job.status.in_(["queued", "running"]))
             .all()
         )
 
-        if not active_jobs:
-            return
-
-        # Check each job for stuck state
-        for job in active_jobs:
+        enqueued = enqueued_job_ids() if any(job.status == "queued" for job, _ in rows) else set()
+        actions: list[tuple[models.Job, str, str | None, str | None]] = []
+        for job, agent_status in rows:
             try:
-                await _check_single_job(session, job, now)
+                decision = _classify_job(job, agent_status, now, rules, enqueued)
             except Exception as e:
                 logger.error(f"Error checking job {job.id}: {e}")
+                continue
+            if decision:
+                actions.append((job, *decision, agent_status))
+
+        if actions:
+            await _release_locks_before_retry(session, actions)
+
+        for job, rule, exclude_agent, _ in actions:
+            counts[rule] += 1
+            _stats["rules"][rule] += 1
+            try:
+                if job.retry_count < settings.job_max_retries:
+                    await _retry_job(session, job, exclude_agent=exclude_agent, release_lock=False)
+                    _stats["retried"] += 1
+                else:
+                    await _fail_job(session, job, reason=_FAIL_REASONS[rule])
+                    _stats["failed"] += 1
+            except Exception as e:
+                logger.error(f"Error handling {rule} job {job.id}: {e}")
 
     except Exception as e:
-        logger.error(f"Error in job health check: {e}")
+        logger.error(f"Error in job health sweep: {e}")
     finally:
         session.close()
+        elapsed = time.monotonic() - started
+        _stats["sweeps"] += 1
+        _stats["last_sweep_at"] = datetime.now(timezone.utc).isoformat()
+        _stats["last_sweep_seconds"] = round(elapsed, 4)
+        _stats["max_sweep_seconds"] = max(_stats["max_sweep_seconds"], round(elapsed, 4))
+        _stats["last_sweep_jobs"] = len(rows)
+        if any(counts.values()):
+            logger.info(f"Job health sweep over {len(rows)} jobs in {elapsed:.3f}s: {counts}")
 
+    return counts
 
-async def _check_single_job(session, job: models.Job, now: datetime):
-    """Check if a single job is stuck and handle it."""
-    # Check if job is stuck (considers last_heartbeat if present)
-    if not is_job_stuck(job.action, job.status, job.started_at, job.created_at, job.last_heartbeat):
+
+async def _release_locks_before_retry(session, actions) -> None:
+    """Force-release agent deploy locks for jobs about to be retried.
+
+    Without this the retry would block on the stuck job's lock. Releases
+    are grouped by agent and run concurrently.
+    """
+    labs_by_agent: dict[str, set[str]] = {}
+    for job, _, _, agent_status in actions:
+        if (
+            job.retry_count < settings.job_max_retries
+            and job.agent_id and job.lab_id and agent_status == "online"
+        ):
+            labs_by_agent.setdefault(job.agent_id, set()).add(job.lab_id)
+    if not labs_by_agent:
         return
 
-    logger.warning(
-        f"Detected stuck job {job.id}: action={job.action}, status={job.status}, "
-        f"started_at={job.started_at}, last_heartbeat={job.last_heartbeat}, agent_id={job.agent_id}"
+    agents = (
+        session.query(models.Host)
+        .filter(models.Host.id.in_(list(labs_by_agent)))
+        .all()
     )
+    await asyncio.gather(*(
+        _release_lab_lock(agent, lab_id)
+        for agent in agents
+        for lab_id in labs_by_agent[agent.id]
+    ))
 
-    # Check if assigned agent is offline
-    agent_offline = False
-    if job.agent_id:
-        agent = session.get(models.Host, job.agent_id)
-        if agent and agent.status != "online":
-            agent_offline = True
-            logger.warning(f"Job {job.id} agent {job.agent_id} is offline")
 
-    # Determine if we should retry or fail
-    if job.retry_count < settings.job_max_retries:
-        await _retry_job(session, job, exclude_agent=job.agent_id if agent_offline else None)
-    else:
-        await _fail_job(session, job, reason="Job timed out after maximum retries")
+async def _release_lab_lock(agent: models.Host, lab_id: str) -> None:
+    try:
+        result = await agent_client.release_agent_lock(agent, lab_id)
+        if result.get("status") == "cleared":
+            logger.info(f"Force-released lock for lab {lab_id} on agent {agent.id} before retry")
+        elif result.get("status") == "not_found":
+            logger.debug(f"No lock found for lab {lab_id} on agent {agent.id}")
+        else:
+            logger.warning(f"Could not release lock for lab {lab_id}: {result}")
+    except Exception as e:
+        logger.warning(f"Failed to force-release lock for lab {lab_id}: {e}")
+
+
+async def check_stuck_jobs():
+    """Find and handle jobs stuck past their timeout (single rule sweep)."""
+    await sweep_jobs(frozenset({RULE_STUCK}))
 
 
-async def _retry_job(session, old_job: models.Job, exclude_agent: str | None = None):
+async def _retry_job(
+    session,
+    old_job: models.Job,
+    exclude_agent: str | None = None,
+    release_lock: bool = True,
+):
     """Create a new job to retry the failed operation.
 
     Args:
         session: Database session
         old_job: The stuck job to retry
         exclude_agent: Agent ID to exclude from selection (failed agent)
+        release_lock: Force-release the old job's agent lock first
+            (sweep_jobs releases locks in bulk beforehand)
     """
     logger.info(
         f"Retrying job {old_job.id} (attempt {old_job.retry_count + 1}/{settings.job_max_retries})"
     )
 
     # Force-release lock on agent before retry to prevent new job from blocking
-    if old_job.agent_id and old_job.lab_id:
+    if release_lock and old_job.agent_id and old_job.lab_id:
         agent = session.get(models.Host, old_job.agent_id)
         if agent and agent.status == "online":
-            try:
-                result = await agent_client.release_agent_lock(agent, old_job.lab_id)
-                if result.get("status") == "cleared":
-                    logger.info(f"Force-released lock for lab {old_job.lab_id} on agent {old_job.agent_id} before retry")
-                elif result.get("status") == "not_found":
-                    logger.debug(f"No lock found for lab {old_job.lab_id} on agent {old_job.agent_id}")
-                else:
-                    logger.warning(f"Could not release lock for lab {old_job.lab_id}: {result}")
-            except Exception as e:
-                logger.warning(f"Failed to force-release lock for lab {old_job.lab_id}: {e}")
+            await _release_lab_lock(agent, old_job.lab_id)
 
     # Mark old job as failed
     old_job.status = "failed"
@@ -132,6 +292,7 @@ async def _retry_job(session, old_job: models.Job, exclude_agent: str | None = N
         action=old_job.action,
         status="queued",
         retry_count=old_job.retry_count + 1,
+        params_json=old_job.params_json,
     )
     session.add(new_job)
     session.commit()
@@ -141,6 +302,24 @@ async def _retry_job(session, old_job: models.Job, exclude_agent: str | None = N
 
     # Trigger the job execution (similar to how jobs.py does it)
     await _trigger_job_execution(session, new_job, exclude_agent)
+    if new_job.status == "failed":
+        _fail_checkpoint(session, new_job, new_job.log_path or "Retry failed")
+        session.commit()
+
+
+def _fail_checkpoint(session, job: models.Job, reason: str) -> None:
+    """Fail the checkpoint a failed "checkpoint" job was capturing.
+
+    Otherwise it stays "creating" forever and can't be deleted.
+    """
+    if job.action != "checkpoint":
+        return
+    checkpoint_id = get_job_params(job).get("checkpoint_id")
+    checkpoint = session.get(models.LabCheckpoint, checkpoint_id) if checkpoint_id else None
+    if checkpoint and checkpoint.status == "creating":
+        checkpoint.status = "failed"
+        checkpoint.error_message = reason
+        checkpoint.completed_at = datetime.now(timezone.utc)
 
 
 async def _trigger_job_execution(session, job: models.Job, exclude_agent: str | None = None):
@@ -148,7 +327,8 @@ async def _trigger_job_execution(session, job: models.Job, exclude_agent: str |
 
     This imports and calls the appropriate task runner based on the job action.
     """
-    from app.tasks.jobs import run_agent_job, run_node_sync
+    from app.tasks.executor import submit_job
+    from app.tasks.jobs import run_agent_job, run_lab_checkpoint, run_node_actions, run_node_sync
     from app.services.topology import TopologyService
     from app.utils.lab import get_lab_provider
 
@@ -177,14 +357,18 @@ async def _trigger_job_execution(session, job: models.Job, exclude_agent: str |
         session.commit()
         return
 
+    params = get_job_params(job)
+
     # Trigger the appropriate task based on action
     if job.action == "up":
         # run_agent_job builds topology from database internally
         topo_service = TopologyService(session)
         if topo_service.has_nodes(lab.id):
-            asyncio.create_task(run_agent_job(
-                job.id, lab.id, "up", provider=provider
-            ))
+            submit_job(
+                run_agent_job, job.id, lab.id, "up",
+                action="up", agent_id=agent.id, provider=provider,
+                checkpoint_id=params.get("checkpoint_id"),
+            )
         else:
             logger.error(f"Cannot retry deploy job {job.id}: no topology in database")
             job.status = "failed"
@@ -192,11 +376,32 @@ async def _trigger_job_execution(session, job: models.Job, exclude_agent: str |
             session.commit()
 
     elif job.action == "down":
-        asyncio.create_task(run_agent_job(job.id, lab.id, "down", provider=provider))
+        submit_job(
+            run_agent_job, job.id, lab.id, "down",
+            action="down", agent_id=agent.id, provider=provider,
+        )
 
     elif job.action.startswith("node:"):
         # Node action: node:start:nodename or node:stop:nodename
-        asyncio.create_task(run_agent_job(job.id, lab.id, job.action, provider=provider))
+        submit_job(
+            run_agent_job, job.id, lab.id, job.action,
+            action=job.action, agent_id=agent.id, provider=provider,
+        )
+
+    elif job.action.startswith("nodes:"):
+        # Bulk node actions on the agent the nodes live on
+        node_agent_id = params.get("agent_id")
+        node_ids = params.get("node_ids") or []
+        if node_agent_id and node_ids:
+            submit_job(
+                run_node_actions, job.id, lab.id, node_agent_id, node_ids,
+                action=job.action, agent_id=node_agent_id, provider=provider,
+            )
+        else:
+            logger.error(f"Cannot retry job {job.id}: no target nodes recorded")
+            job.status = "failed"
+            job.log_path = "Retry failed: no target nodes recorded"
+            session.commit()
 
     elif job.action.startswith("sync:"):
         # Sync action: sync:node:nodeid or sync:lab
@@ -212,7 +417,23 @@ async def _trigger_job_execution(session, job: models.Job, exclude_agent: str |
             node_ids = [ns.node_id for ns in node_states]
 
         if node_ids:
-            asyncio.create_task(run_node_sync(job.id, lab.id, node_ids, provider))
+            submit_job(
+                run_node_sync, job.id, lab.id, node_ids,
+                action=job.action, agent_id=agent.id, provider=provider,
+            )
+
+    elif job.action == "checkpoint":
+        checkpoint_id = params.get("checkpoint_id")
+        if checkpoint_id and session.get(models.LabCheckpoint, checkpoint_id):
+            submit_job(
+                run_lab_checkpoint, job.id, lab.id, checkpoint_id,
+                action="checkpoint", agent_id=lab.agent_id, provider=provider,
+            )
+        else:
+            logger.error(f"Cannot retry checkpoint job {job.id}: checkpoint not found")
+            job.status = "failed"
+            job.log_path = "Retry failed: checkpoint not found"
+            session.commit()
 
     else:
         logger.warning(f"Unknown action type for retry: {job.action}")
@@ -236,6 +457,8 @@ async def _fail_job(session, job: models.Job, reason: str):
     else:
         job.log_path = reason
 
+    _fail_checkpoint(session, job, reason)
+
     # Update lab state to error
     if job.lab_id:
         lab = session.get(models.Lab, job.lab_id)
@@ -256,79 +479,12 @@ async def check_orphaned_queued_jobs():
     - Agent went offline before job was picked up
     - Race conditions in job assignment
     """
-    session = SessionLocal()
-    try:
-        now = datetime.now(timezone.utc)
-        orphan_cutoff = now - timedelta(minutes=2)
-
-        # Find queued jobs older than 2 minutes without an agent
-        orphaned_jobs = (
-            session.query(models.Job)
-            .filter(
-                models.Job.status == "queued",
-                models.Job.agent_id.is_(None),
-                models.Job.created_at < orphan_cutoff,
-            )
-            .all()
-        )
-
-        for job in orphaned_jobs:
-            logger.warning(f"Found orphaned queued job {job.id} (created {job.created_at})")
-
-            if job.retry_count < settings.job_max_retries:
-                # Try to assign to an available agent
-                await _retry_job(session, job)
-            else:
-                await _fail_job(session, job, reason="No agent available to process job")
-
-    except Exception as e:
-        logger.error(f"Error checking orphaned jobs: {e}")
-    finally:
-        session.close()
+    await sweep_jobs(frozenset({RULE_ORPHANED}))
 
 
 async def check_jobs_on_offline_agents():
     """Find running jobs assigned to agents that have gone offline."""
-    session = SessionLocal()
-    try:
-        # Find all offline agents
-        offline_agents = (
-            session.query(models.Host)
-            .filter(models.Host.status == "offline")
-            .all()
-        )
-
-        if not offline_agents:
-            return
-
-        offline_agent_ids = [a.id for a in offline_agents]
-
-        # Find active jobs on offline agents
-        stranded_jobs = (
-            session.query(models.Job)
-            .filter(
-                models.Job.status.in_(["queued", "running"]),
-                models.Job.agent_id.in_(offline_agent_ids),
-            )
-            .all()
-        )
-
-        for job in stranded_jobs:
-            logger.warning(
-                f"Job {job.id} is on offline agent {job.agent_id}, "
-                f"retry_count={job.retry_count}"
-            )
-
-            if job.retry_count < settings.job_max_retries:
-                # Retry on a different agent
-                await _retry_job(session, job, exclude_agent=job.agent_id)
-            else:
-                await _fail_job(session, job, reason="Agent went offline during job execution")
-
-    except Exception as e:
-        logger.error(f"Error checking jobs on offline agents: {e}")
-    finally:
-        session.close()
+    await sweep_jobs(frozenset({RULE_OFFLINE_AGENT}))
 
 
 async def check_stuck_image_sync_jobs():
@@ -336,8 +492,9 @@ async def check_stuck_image_sync_jobs():
 
     This function monitors ImageSyncJob records for stuck jobs:
     1. Jobs in 'pending' state older than image_sync_job_pending_timeout (2 min)
-    2. Jobs in 'transferring' or 'loading' state past image_sync_timeout (10 min)
-    3. Jobs assigned to hosts that have gone offline
+    2. Jobs in 'transferring' or 'loading' state with no progress for
+       image_sync_timeout (10 min)
+    3. Jobs assigned to hosts that have gone offline and stopped progressing
 
     Stuck jobs are marked as failed with detailed error messages.
     """
@@ -352,6 +509,11 @@ async def check_stuck_image_sync_jobs():
             .all()
         )
 
+        active_ids = {job.id for job in active_jobs}
+        for job_id in list(_image_sync_progress):
+            if job_id not in active_ids:
+                del _image_sync_progress[job_id]
+
         if not active_jobs:
             return
 
@@ -375,15 +537,20 @@ async def check_stuck_image_sync_jobs():
                             error_reason += f" (target host {host.name if host else job.host_id} is offline)"
 
                 elif job.status in ["transferring", "loading"]:
-                    # Active jobs should complete within image_sync_timeout
+                    # Active jobs must make progress within image_sync_timeout;
+                    # interrupted transfers resume, so elapsed time alone is fine
+                    last_progress = _last_image_sync_progress(job, now)
                     if job.started_at:
+                        last_activity = job.started_at.replace(tzinfo=timezone.utc)
+                        if last_progress and last_progress > last_activity:
+                            last_activity = last_progress
                         timeout_cutoff = now - timedelta(seconds=settings.image_sync_timeout)
-                        if job.started_at.replace(tzinfo=timezone.utc) < timeout_cutoff:
+                        if last_activity < timeout_cutoff:
                             is_stuck = True
-                            error_reason = f"Job timed out after {settings.image_sync_timeout}s in {job.status} state"
+                            error_reason = f"Job made no progress for {settings.image_sync_timeout}s in {job.status} state"
 
-                    # Also check for offline host
-                    if host_offline:
+                    # Also check for offline host, unless the transfer is still moving
+                    if host_offline and last_progress != now:
                         is_stuck = True
                         error_reason = f"Target host {host.name if host else job.host_id} went offline during transfer"
 
@@ -427,6 +594,7 @@ async def check_stuck_locks():
     This function queries the /locks/status endpoint on each online agent
     to find locks that have been held longer than the configured threshold.
     When stuck locks are found, they are released via /locks/{lab_id}/release.
+    Agents are queried concurrently.
 
     This helps recover from scenarios where:
     - Deploy operations hang indefinitely
@@ -451,52 +619,58 @@ async def check_stuck_locks():
         if not online_agents:
             return
 
-        for agent in online_agents:
-            try:
-                status = await agent_client.get_agent_lock_status(agent)
+        released = await asyncio.gather(*(_clear_stuck_locks(agent) for agent in online_agents))
+        _stats["rules"][RULE_STUCK_LOCK] += sum(released)
 
-                # Check for errors from the agent
-                if status.get("error"):
-                    logger.debug(f"Could not get lock status from agent {agent.id}: {status.get('error')}")
-                    continue
+    except Exception as e:
+        logger.error(f"Error in stuck lock check: {e}")
+    finally:
+        session.close()
 
-                # Check each lock
-                for lock in status.get("locks", []):
-                    if lock.get("is_stuck"):
-                        lab_id = lock.get("lab_id")
-                        age_seconds = lock.get("age_seconds", 0)
 
-                        logger.warning(
-                            f"Found stuck lock on agent {agent.id} ({agent.name}) "
-                            f"for lab {lab_id} (held for {age_seconds:.0f}s)"
-                        )
+async def _clear_stuck_locks(agent: models.Host) -> int:
+    """Release an agent's stuck deploy locks; returns how many were cleared."""
+    try:
+        status = await agent_client.get_agent_lock_status(agent)
 
-                        # Release the stuck lock
-                        result = await agent_client.release_agent_lock(agent, lab_id)
+        # Check for errors from the agent
+        if status.get("error"):
+            logger.debug(f"Could not get lock status from agent {agent.id}: {status.get('error')}")
+            return 0
 
-                        if result.get("status") == "cleared":
-                            logger.info(f"Successfully released stuck lock for lab {lab_id} on agent {agent.id}")
-                        else:
-                            logger.warning(f"Failed to release stuck lock for lab {lab_id}: {result}")
+        stuck = [lock for lock in status.get("locks", []) if lock.get("is_stuck")]
+        for lock in stuck:
+            logger.warning(
+                f"Found stuck lock on agent {agent.id} ({agent.name}) "
+                f"for lab {lock.get('lab_id')} (held for {lock.get('age_seconds', 0):.0f}s)"
+            )
 
-            except Exception as e:
-                logger.error(f"Failed to check locks on agent {agent.id}: {e}")
+        results = await asyncio.gather(
+            *(agent_client.release_agent_lock(agent, lock.get("lab_id")) for lock in stuck),
+            return_exceptions=True,
+        )
+        cleared = 0
+        for lock, result in zip(stuck, results):
+            lab_id = lock.get("lab_id")
+            if isinstance(result, dict) and result.get("status") == "cleared":
+                logger.info(f"Successfully released stuck lock for lab {lab_id} on agent {agent.id}")
+                cleared += 1
+            else:
+                logger.warning(f"Failed to release stuck lock for lab {lab_id}: {result}")
+        return cleared
 
     except Exception as e:
-        logger.error(f"Error in stuck lock check: {e}")
-    finally:
-        session.close()
+        logger.error(f"Failed to check locks on agent {agent.id}: {e}")
+        return 0
 
 
 async def job_health_monitor():
     """Background task to periodically check job health.
 
     Runs every job_health_check_interval seconds and:
-    1. Checks for stuck running jobs
-    2. Checks for orphaned queued jobs
-    3. Checks for jobs on offline agents
-    4. Checks for stuck image sync jobs
-    5. Checks for stuck deploy locks on agents
+    1. Sweeps active jobs for stuck, orphaned and offline-agent jobs
+    2. Checks for stuck image sync jobs
+    3. Checks for stuck deploy locks on agents
     """
     logger.info(
         f"Job health monitor started "
@@ -509,9 +683,7 @@ async def job_health_monitor():
             await asyncio.sleep(settings.job_health_check_interval)
 
             # Run all health checks
-            await check_stuck_jobs()
-            await check_orphaned_queued_jobs()
-            await check_jobs_on_offline_agents()
+            await sweep_jobs()
             await check_stuck_image_sync_jobs()
             await check_stuck_locks()
 
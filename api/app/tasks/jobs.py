@@ -16,12 +16,15 @@ import asyncio
 import json
 import logging
 import re
+import time
 from datetime import datetime, timezone
 
 from app import agent_client, models, webhooks
 from app.agent_client import AgentJobError, AgentUnavailableError
+from app.config import settings
 from app.db import SessionLocal
-from app.services.topology import TopologyService, graph_to_deploy_topology
+from app.tasks.executor import submit_job
+from app.services.topology import TopologyService, diff_deploy_topology, graph_to_deploy_topology
 from app.utils.lab import update_lab_state
 
 logger = logging.getLogger(__name__)
@@ -262,6 +265,7 @@ async def run_agent_job(
     action: str,
     node_name: str | None = None,
     provider: str = "docker",
+    checkpoint_id: str | None = None,
 ):
     """Run a job on an agent in the background.
 
@@ -276,6 +280,7 @@ async def run_agent_job(
         action: Action to perform (up, down, node:start:name, etc.)
         node_name: Node name for node actions
         provider: Provider for the job (default: docker)
+        checkpoint_id: For "up", restore nodes from this checkpoint
     """
     session = SessionLocal()
     try:
@@ -370,6 +375,7 @@ async def run_agent_job(
                     agent, job_id, lab_id,
                     topology=topology_json,  # Use JSON, not YAML
                     provider=provider,
+                    checkpoint_id=checkpoint_id,
                 )
             elif action == "down":
                 result = await agent_client.destroy_on_agent(agent, job_id, lab_id)
@@ -491,6 +497,7 @@ async def run_multihost_deploy(
     job_id: str,
     lab_id: str,
     provider: str = "docker",
+    checkpoint_id: str | None = None,
 ):
     """Deploy a lab across multiple hosts.
 
@@ -507,6 +514,7 @@ async def run_multihost_deploy(
         job_id: The job ID
         lab_id: The lab ID
         provider: Provider for the job
+        checkpoint_id: Restore nodes from this checkpoint on each host
     """
     session = SessionLocal()
     try:
@@ -625,6 +633,7 @@ async def run_multihost_deploy(
                 agent_client.deploy_to_agent(
                     agent, job_id, lab_id,
                     topology=topology_json,  # New: structured JSON
+                    checkpoint_id=checkpoint_id,
                 )
             )
 
@@ -794,6 +803,43 @@ async def run_multihost_deploy(
         session.close()
 
 
+async def _teardown_on_agent(
+    agent: models.Host,
+    job_id: str,
+    lab_id: str,
+    cleanup_overlay: bool,
+) -> dict:
+    """Run one agent's share of a lab destroy, timing each phase.
+
+    Returns:
+        Dict with 'overlay' (cleanup result or None), 'destroy' (agent
+        result, or the exception raised) and 'timings' (seconds per phase,
+        including the agent's own breakdown of the destroy)
+    """
+    timings: dict[str, float] = {}
+    overlay = None
+    if cleanup_overlay:
+        started = time.monotonic()
+        overlay = await agent_client.cleanup_overlay_on_agent(agent, lab_id)
+        timings["overlay"] = time.monotonic() - started
+
+    started = time.monotonic()
+    try:
+        destroy: dict | Exception = await agent_client.destroy_on_agent(agent, job_id, lab_id)
+    except Exception as e:
+        destroy = e
+    timings["destroy"] = time.monotonic() - started
+    if isinstance(destroy, dict):
+        for phase, seconds in (destroy.get("timings") or {}).items():
+            timings[f"destroy.{phase}"] = seconds
+
+    return {"overlay": overlay, "destroy": destroy, "timings": timings}
+
+
+def _format_timings(timings: dict[str, float]) -> str:
+    return ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in timings.items()) or "-"
+
+
 async def run_multihost_destroy(
     job_id: str,
     lab_id: str,
@@ -806,8 +852,9 @@ async def run_multihost_destroy(
 
     Steps:
     1. Analyze placements from database (not YAML)
-    2. Clean up overlay networks on each agent
-    3. Destroy containers on each agent
+    2. On every agent concurrently: clean up overlay networks, then
+       destroy containers and local networking
+    3. Record a per-agent, per-phase timing breakdown in the job log
 
     Args:
         job_id: The job ID
@@ -868,33 +915,32 @@ async def run_multihost_destroy(
             logger.error(f"Job {job_id} failed: {error_msg}")
             return
 
-        # First, clean up overlay networks on all agents
-        if analysis.cross_host_links:
-            log_parts.append("=== Cleaning up overlay networks ===")
-            for host_id, agent in host_to_agent.items():
-                result = await agent_client.cleanup_overlay_on_agent(agent, lab_id)
+        # Tear down every host concurrently; each agent runs its own
+        # overlay-cleanup -> destroy pipeline so a slow host doesn't hold
+        # up the others between phases
+        cleanup_overlay = bool(analysis.cross_host_links)
+        for agent in host_to_agent.values():
+            logger.info(f"Destroying on host {agent.name} (agent {agent.id})")
+        started = time.monotonic()
+        teardowns = await asyncio.gather(*(
+            _teardown_on_agent(agent, job_id, lab_id, cleanup_overlay)
+            for agent in host_to_agent.values()
+        ))
+        total = time.monotonic() - started
+
+        log_parts.append("=== Destroying lab ===")
+        all_success = True
+        for agent, teardown in zip(host_to_agent.values(), teardowns):
+            overlay = teardown["overlay"]
+            if overlay is not None:
                 log_parts.append(
-                    f"{agent.name}: {result.get('tunnels_deleted', 0)} tunnels, "
-                    f"{result.get('bridges_deleted', 0)} bridges deleted"
+                    f"{agent.name}: {overlay.get('tunnels_deleted', 0)} tunnels, "
+                    f"{overlay.get('bridges_deleted', 0)} bridges deleted"
                 )
-                if result.get("errors"):
-                    log_parts.append(f"  Errors: {result['errors']}")
+                if overlay.get("errors"):
+                    log_parts.append(f"  Errors: {overlay['errors']}")
 
-        # Destroy containers on each host in parallel
-        log_parts.append("\n=== Destroying containers ===")
-        destroy_tasks = []
-
-        for host_id, agent in host_to_agent.items():
-            logger.info(f"Destroying on host {agent.name} (agent {agent.id})")
-            destroy_tasks.append(
-                agent_client.destroy_on_agent(agent, job_id, lab_id)
-            )
-
-        # Wait for all destroys
-        results = await asyncio.gather(*destroy_tasks, return_exceptions=True)
-
-        all_success = True
-        for (host_id, agent), result in zip(host_to_agent.items(), results):
+            result = teardown["destroy"]
             if isinstance(result, Exception):
                 log_parts.append(f"{agent.name}: FAILED - {result}")
                 all_success = False
@@ -907,6 +953,16 @@ async def run_multihost_destroy(
                     log_parts.append(f"  STDERR: {result['stderr'][:200]}")
                 if status != "completed":
                     all_success = False
+            log_parts.append(f"  Timings: {_format_timings(teardown['timings'])}")
+
+        log_parts.append(f"\nTotal teardown: {total:.1f}s across {len(host_to_agent)} hosts")
+        logger.info(
+            f"Multi-host destroy for lab {lab_id} took {total:.1f}s: "
+            + "; ".join(
+                f"{agent.name} {_format_timings(t['timings'])}"
+                for agent, t in zip(host_to_agent.values(), teardowns)
+            )
+        )
 
         # Update job status
         if all_success:
@@ -945,6 +1001,218 @@ async def run_multihost_destroy(
         session.close()
 
 
+async def run_lab_restart(
+    job_id: str,
+    lab_id: str,
+    up_job_id: str,
+    provider: str = "docker",
+):
+    """Restart a lab: run the down job, then the up job if down succeeded.
+
+    Both phases run in one execution so no other job for the lab can
+    interleave between them.
+
+    Args:
+        job_id: The down job ID
+        lab_id: The lab ID
+        up_job_id: The up job ID, cancelled if the down phase fails
+        provider: Provider for the job (default: docker)
+    """
+    await run_agent_job(job_id, lab_id, "down", provider=provider)
+    # Check if down succeeded before starting up
+    session = SessionLocal()
+    try:
+        down_job = session.get(models.Job, job_id)
+        up_job = session.get(models.Job, up_job_id)
+        if down_job and down_job.status == "failed":
+            # Mark up job as cancelled since down failed
+            if up_job:
+                up_job.status = "failed"
+                up_job.log = "Cancelled: down phase failed"
+                session.commit()
+            return
+    finally:
+        session.close()
+    # Proceed with up phase (topology is built from database)
+    await run_agent_job(up_job_id, lab_id, "up", provider=provider)
+
+
+async def run_lab_checkpoint(
+    job_id: str,
+    lab_id: str,
+    checkpoint_id: str,
+    provider: str = "docker",
+):
+    """Capture a checkpoint of a running lab on every host it spans.
+
+    Each agent snapshots its own nodes concurrently. The checkpoint is
+    only marked ready if every host succeeded; a partial checkpoint is
+    removed from the agents that did capture it so it can't be deployed.
+
+    Args:
+        job_id: The job ID
+        lab_id: The lab ID
+        checkpoint_id: The LabCheckpoint row to fill in
+        provider: Provider the lab was deployed with
+    """
+    session = SessionLocal()
+    try:
+        job = session.get(models.Job, job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found in database")
+            return
+        checkpoint = session.get(models.LabCheckpoint, checkpoint_id)
+        lab = session.get(models.Lab, lab_id)
+        if not lab or not checkpoint:
+            error_msg = f"Lab {lab_id} not found" if not lab else f"Checkpoint {checkpoint_id} not found"
+            logger.error(error_msg)
+            job.status = "failed"
+            job.completed_at = datetime.utcnow()
+            job.log_path = f"ERROR: {error_msg}"
+            session.commit()
+            return
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        session.commit()
+
+        # Hosts with placed nodes, falling back to the lab's primary agent
+        topo_service = TopologyService(session)
+        host_ids = list(topo_service.analyze_placements(lab_id).placements)
+        if not host_ids and lab.agent_id:
+            host_ids = [lab.agent_id]
+        agents = [a for a in (session.get(models.Host, h) for h in host_ids) if a]
+
+        def fail(error_msg: str, log: str) -> None:
+            checkpoint.status = "failed"
+            checkpoint.error_message = error_msg
+            checkpoint.completed_at = datetime.now(timezone.utc)
+            job.status = "failed"
+            job.completed_at = datetime.utcnow()
+            job.log_path = log
+            session.commit()
+            logger.error(f"Job {job_id} failed: {error_msg}")
+
+        if not agents:
+            fail("No agents found for lab", "ERROR: No agents found for lab")
+            return
+        unsupported = [a.name for a in agents if not agent_client.agent_supports_checkpoints(a)]
+        if unsupported:
+            error_msg = f"Agents do not support checkpoints: {', '.join(unsupported)}"
+            fail(error_msg, f"ERROR: {error_msg}")
+            return
+
+        results = await asyncio.gather(*(
+            agent_client.checkpoint_lab_on_agent(
+                agent, lab_id, checkpoint_id,
+                provider=provider,
+                include_memory=checkpoint.include_memory,
+            )
+            for agent in agents
+        ), return_exceptions=True)
+
+        log_parts = [f"=== Checkpoint {checkpoint.name} ==="]
+        nodes: list[str] = []
+        stateful: list[str] = []
+        size_bytes = 0
+        errors = []
+        for agent, result in zip(agents, results):
+            if isinstance(result, Exception):
+                errors.append(f"{agent.name}: {result}")
+                log_parts.append(f"{agent.name}: FAILED - {result}")
+                continue
+            if not result.get("success"):
+                error = result.get("error") or "unknown error"
+                errors.append(f"{agent.name}: {error}")
+                log_parts.append(f"{agent.name}: FAILED - {error}")
+                continue
+            nodes.extend(result.get("nodes", []))
+            stateful.extend(result.get("stateful_nodes", []))
+            size_bytes += result.get("size_bytes", 0)
+            log_parts.append(
+                f"{agent.name}: {len(result.get('nodes', []))} nodes, "
+                f"{len(result.get('stateful_nodes', []))} with runtime state"
+            )
+
+        checkpoint.host_ids_json = json.dumps([a.id for a in agents])
+        if errors:
+            # Don't leave half a checkpoint behind on the hosts that succeeded
+            await asyncio.gather(*(
+                agent_client.delete_checkpoint_on_agent(agent, lab_id, checkpoint_id, provider)
+                for agent, result in zip(agents, results)
+                if not isinstance(result, Exception) and result.get("success")
+            ))
+            fail("; ".join(errors), "\n".join(log_parts))
+            return
+
+        checkpoint.status = "ready"
+        checkpoint.nodes_json = json.dumps(sorted(nodes))
+        checkpoint.stateful_nodes_json = json.dumps(sorted(stateful))
+        checkpoint.size_bytes = size_bytes
+        checkpoint.completed_at = datetime.now(timezone.utc)
+        job.status = "completed"
+        job.completed_at = datetime.utcnow()
+        job.log_path = "\n".join(log_parts)
+        session.commit()
+        logger.info(f"Job {job_id} completed: checkpoint {checkpoint_id} of lab {lab_id}")
+
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed with unexpected error: {e}")
+        try:
+            session.rollback()
+            job = session.get(models.Job, job_id)
+            if job:
+                job.status = "failed"
+                job.completed_at = datetime.utcnow()
+                job.log_path = f"ERROR: Unexpected error: {e}"
+            checkpoint = session.get(models.LabCheckpoint, checkpoint_id)
+            if checkpoint:
+                checkpoint.status = "failed"
+                checkpoint.error_message = str(e)
+            session.commit()
+        except Exception:
+            logger.exception(f"Failed to record failure for job {job_id}")
+    finally:
+        session.close()
+
+
+async def _plan_incremental_deploy(
+    agent: models.Host,
+    lab_id: str,
+    topology_json: dict,
+    graph,
+    deploy_node_names: set[str],
+    provider: str,
+) -> dict | None:
+    """Diff the desired topology for an agent against what it is running.
+
+    Returns None when a full deploy is needed instead: incremental deploy
+    is disabled or unsupported by the agent/provider, the agent's state
+    can't be read, or nothing of the lab is deployed there yet.
+    """
+    if (
+        not settings.incremental_deploy_enabled
+        or provider != "docker"
+        or not agent_client.agent_supports_incremental_deploy(agent)
+    ):
+        return None
+
+    try:
+        status = await agent_client.get_lab_status_from_agent(agent, lab_id)
+    except Exception as e:
+        logger.warning(f"Could not read lab {lab_id} state from {agent.id}, using full deploy: {e}")
+        return None
+
+    live_nodes = {n["name"]: n.get("status") for n in status.get("nodes", [])}
+    if not live_nodes:
+        return None
+
+    lab_node_names = {n.container_name or n.name for n in graph.nodes}
+    return diff_deploy_topology(
+        topology_json, live_nodes, lab_node_names, redeploy=deploy_node_names
+    )
+
+
 async def run_node_sync(
     job_id: str,
     lab_id: str,
@@ -1146,7 +1414,10 @@ async def run_node_sync(
                 session.add(other_job)
                 session.commit()
                 session.refresh(other_job)
-                asyncio.create_task(run_node_sync(other_job.id, lab_id, other_node_ids, provider=provider))
+                submit_job(
+                    run_node_sync, other_job.id, lab_id, other_node_ids,
+                    action=other_job.action, agent_id=other_agent_id, provider=provider,
+                )
 
         # Handle nodes that couldn't be assigned an agent
         # DON'T spawn separate jobs - that can cause infinite loops if agent lookup keeps failing
@@ -1254,7 +1525,7 @@ async def run_node_sync(
             if ns.desired_state == "running":
                 if ns.actual_state in ("undeployed", "pending"):
                     nodes_need_deploy.append(ns)
-                elif ns.actual_state in ("stopped", "error"):
+                elif ns.actual_state in ("stopped", "exited", "error"):
                     # Both stopped and error states can be started via docker start
                     # Error state may be from intentional stop (exit code 137/143) or crash
                     # Either way, try starting first - if container doesn't exist, it will fail
@@ -1325,20 +1596,20 @@ async def run_node_sync(
 
                     log_parts.append(f"  Stopping {len(node_names)} container(s) on {old_agent.name}...")
 
-                    for node_name in node_names:
-                        container_name = _get_container_name(lab_id, node_name)
-                        try:
-                            result = await agent_client.container_action(
-                                old_agent, container_name, "stop"
-                            )
+                    try:
+                        results = await agent_client.bulk_node_action_on_agent(
+                            old_agent, job_id, lab_id, node_names, "stop"
+                        )
+                        for node_name in node_names:
+                            result = results[node_name]
                             if result.get("success"):
                                 log_parts.append(f"    {node_name}: stopped on {old_agent.name}")
                             else:
                                 # Container might not exist or already stopped - that's OK
                                 error = result.get("error", "unknown")
                                 log_parts.append(f"    {node_name}: {error}")
-                        except Exception as e:
-                            log_parts.append(f"    {node_name}: cleanup failed - {e}")
+                    except Exception as e:
+                        log_parts.append(f"    cleanup failed on {old_agent.name} - {e}")
 
                     # Delete old placement records for migrated nodes
                     for node_name in node_names:
@@ -1555,14 +1826,30 @@ async def run_node_sync(
             else:
                 # Convert filtered graph to JSON deploy topology
                 topology_json = graph_to_deploy_topology(filtered_graph)
-                log_parts.append(f"Deploying {len(filtered_graph.nodes)} node(s) on {agent.name}: {', '.join(deployed_node_names)}")
+                diff = await _plan_incremental_deploy(
+                    agent, lab_id, topology_json, graph, deployed_node_names, provider
+                )
 
                 try:
-                    result = await agent_client.deploy_to_agent(
-                        agent, job_id, lab_id,
-                        topology=topology_json,  # Use JSON, not YAML
-                        provider=provider,
-                    )
+                    if diff is not None:
+                        unchanged = len(topology_json["nodes"]) - len(diff["add_nodes"])
+                        log_parts.append(
+                            f"Incremental deploy on {agent.name}: "
+                            f"adding {', '.join(n['name'] for n in diff['add_nodes']) or 'no nodes'}"
+                            f" ({len(diff['add_links'])} link(s)), {unchanged} node(s) unchanged"
+                        )
+                        if diff["remove_nodes"]:
+                            log_parts.append(f"  Removing: {', '.join(diff['remove_nodes'])}")
+                        result = await agent_client.deploy_incremental_to_agent(
+                            agent, job_id, lab_id, diff, provider=provider,
+                        )
+                    else:
+                        log_parts.append(f"Deploying {len(filtered_graph.nodes)} node(s) on {agent.name}: {', '.join(deployed_node_names)}")
+                        result = await agent_client.deploy_to_agent(
+                            agent, job_id, lab_id,
+                            topology=topology_json,  # Use JSON, not YAML
+                            provider=provider,
+                        )
 
                     if result.get("status") == "completed":
                         log_parts.append("Deploy completed successfully")
@@ -1611,18 +1898,19 @@ async def run_node_sync(
                             log_parts.append("")
                             log_parts.append(f"Stopping {len(nodes_to_stop_after_deploy)} nodes with desired_state=stopped...")
 
+                            stop_results = await agent_client.bulk_node_action_on_agent(
+                                agent, job_id, lab_id,
+                                [ns.node_name for ns in nodes_to_stop_after_deploy], "stop",
+                            )
                             for ns in nodes_to_stop_after_deploy:
-                                container_name = _get_container_name(lab_id, ns.node_name)
-                                stop_result = await agent_client.container_action(
-                                    agent, container_name, "stop"
-                                )
+                                stop_result = stop_results[ns.node_name]
                                 if stop_result.get("success"):
                                     ns.actual_state = "stopped"
                                     ns.boot_started_at = None
                                     log_parts.append(f"  {ns.node_name}: stopped")
                                 else:
                                     ns.actual_state = "error"
-                                    ns.error_message = stop_result.get("error", "Stop failed")
+                                    ns.error_message = stop_result.get("error") or "Stop failed"
                                     ns.boot_started_at = None
                                     log_parts.append(f"  {ns.node_name}: FAILED - {ns.error_message}")
 
@@ -1650,14 +1938,47 @@ async def run_node_sync(
                     session.commit()
                     logger.exception(f"Deploy failed in sync job {job_id}: {e}")
 
-        # Phase 2: Start nodes that are stopped but should be running
-        # For containerlab: docker start doesn't recreate network interfaces,
-        # so we MUST use clab deploy --reconfigure to properly restart nodes.
-        # This redeploys the full topology which recreates all veth pairs.
+        # Phase 2: Start nodes that are stopped but should be running.
+        # Existing containers are started in one batched request (the OVS
+        # plugin re-attaches their interfaces on start); only nodes whose
+        # container is gone fall back to a redeploy.
         if nodes_need_start:
             log_parts.append("")
-            log_parts.append("=== Phase 2: Start Nodes (via redeploy) ===")
-            log_parts.append("Note: Full redeploy required to recreate network interfaces")
+            log_parts.append("=== Phase 2: Start Nodes ===")
+
+            start_names = [ns.node_name for ns in nodes_need_start]
+            try:
+                start_results = await agent_client.bulk_node_action_on_agent(
+                    agent, job_id, lab_id, start_names, "start"
+                )
+            except Exception as e:
+                start_results = {name: {"success": False, "error": str(e)} for name in start_names}
+
+            missing_containers = []
+            for ns in nodes_need_start:
+                start_result = start_results[ns.node_name]
+                error = start_result.get("error") or ""
+                if start_result.get("success"):
+                    ns.actual_state = "running"
+                    ns.error_message = None
+                    if not ns.boot_started_at:
+                        ns.boot_started_at = datetime.now(timezone.utc)
+                    log_parts.append(f"  {ns.node_name}: started")
+                elif "not found" in error.lower():
+                    missing_containers.append(ns)
+                else:
+                    ns.actual_state = "error"
+                    ns.error_message = error or "Start failed"
+                    ns.boot_started_at = None
+                    log_parts.append(f"  {ns.node_name}: FAILED - {ns.error_message}")
+            session.commit()
+            nodes_need_start = missing_containers
+
+        # Nodes without a container: redeploy the agent's topology, which
+        # recreates them (and their links) alongside the nodes already there
+        if nodes_need_start:
+            log_parts.append("")
+            log_parts.append("=== Phase 2b: Recreate Missing Nodes (via redeploy) ===")
 
             # Get topology from database (source of truth)
             if not topo_service.has_nodes(lab_id):
@@ -1819,18 +2140,19 @@ async def run_node_sync(
                                 log_parts.append("")
                                 log_parts.append(f"Stopping {len(nodes_to_stop_after)} nodes with desired_state=stopped...")
 
+                                stop_results = await agent_client.bulk_node_action_on_agent(
+                                    agent, job_id, lab_id,
+                                    [ns.node_name for ns in nodes_to_stop_after], "stop",
+                                )
                                 for ns in nodes_to_stop_after:
-                                    container_name = _get_container_name(lab_id, ns.node_name)
-                                    stop_result = await agent_client.container_action(
-                                        agent, container_name, "stop"
-                                    )
+                                    stop_result = stop_results[ns.node_name]
                                     if stop_result.get("success"):
                                         ns.actual_state = "stopped"
                                         ns.boot_started_at = None
                                         log_parts.append(f"  {ns.node_name}: stopped")
                                     else:
                                         ns.actual_state = "error"
-                                        ns.error_message = stop_result.get("error", "Stop failed")
+                                        ns.error_message = stop_result.get("error") or "Stop failed"
                                         ns.boot_started_at = None
                                         log_parts.append(f"  {ns.node_name}: FAILED - {ns.error_message}")
                         else:
@@ -1860,42 +2182,43 @@ async def run_node_sync(
             log_parts.append("")
             log_parts.append("=== Phase 3: Stop Nodes ===")
 
-            for ns in nodes_need_stop:
-                container_name = _get_container_name(lab_id, ns.node_name)
-                log_parts.append(f"Stopping {ns.node_name} ({container_name})...")
+            # One batched request; the agent stops the nodes concurrently
+            stop_names = [ns.node_name for ns in nodes_need_stop]
+            try:
+                results = await agent_client.bulk_node_action_on_agent(
+                    agent, job_id, lab_id, stop_names, "stop"
+                )
+                # Nodes not found on the target agent may still live on the
+                # lab's default agent (migration scenario)
+                not_found = [
+                    name for name in stop_names
+                    if not results[name].get("success")
+                    and "not found" in (results[name].get("error") or "").lower()
+                ]
+                if not_found and lab.agent_id and lab.agent_id != agent.id:
+                    old_agent = session.get(models.Host, lab.agent_id)
+                    if old_agent and agent_client.is_agent_online(old_agent):
+                        log_parts.append(
+                            f"  {len(not_found)} container(s) not on {agent.name}, "
+                            f"trying {old_agent.name}..."
+                        )
+                        results.update(await agent_client.bulk_node_action_on_agent(
+                            old_agent, job_id, lab_id, not_found, "stop"
+                        ))
+            except Exception as e:
+                results = {name: {"success": False, "error": str(e)} for name in stop_names}
 
-                # For stop operations, try the target agent first, then fall back to
-                # the lab's default agent if container not found (migration scenario)
-                stop_agent = agent
-                try:
-                    result = await agent_client.container_action(
-                        stop_agent, container_name, "stop"
-                    )
-                    # If container not found on target agent, try lab's default agent
-                    if not result.get("success") and "not found" in result.get("error", "").lower():
-                        if lab.agent_id and lab.agent_id != agent.id:
-                            old_agent = session.get(models.Host, lab.agent_id)
-                            if old_agent and agent_client.is_agent_online(old_agent):
-                                log_parts.append(f"    Container not on {agent.name}, trying {old_agent.name}...")
-                                stop_agent = old_agent
-                                result = await agent_client.container_action(
-                                    stop_agent, container_name, "stop"
-                                )
-                    if result.get("success"):
-                        ns.actual_state = "stopped"
-                        ns.error_message = None
-                        ns.boot_started_at = None
-                        log_parts.append(f"  {ns.node_name}: stopped")
-                    else:
-                        ns.actual_state = "error"
-                        ns.error_message = result.get("error", "Stop failed")
-                        ns.boot_started_at = None
-                        log_parts.append(f"  {ns.node_name}: FAILED - {ns.error_message}")
-                except Exception as e:
+            for ns in nodes_need_stop:
+                result = results[ns.node_name]
+                ns.boot_started_at = None
+                if result.get("success"):
+                    ns.actual_state = "stopped"
+                    ns.error_message = None
+                    log_parts.append(f"  {ns.node_name}: stopped")
+                else:
                     ns.actual_state = "error"
-                    ns.error_message = str(e)
-                    ns.boot_started_at = None
-                    log_parts.append(f"  {ns.node_name}: FAILED - {e}")
+                    ns.error_message = result.get("error") or "Stop failed"
+                    log_parts.append(f"  {ns.node_name}: FAILED - {ns.error_message}")
 
             session.commit()
 
@@ -1930,6 +2253,132 @@ async def run_node_sync(
         session.close()
 
 
+async def run_node_actions(
+    job_id: str,
+    lab_id: str,
+    agent_id: str,
+    node_ids: list[str],
+    provider: str = "docker",
+):
+    """Start/stop nodes on one agent to match their desired state.
+
+    Used by state enforcement: nodes that should be running are started and
+    nodes that should be stopped are stopped, each with one request to the
+    agent's bulk /jobs/node-actions endpoint. Unlike run_node_sync this
+    never redeploys, so a crashed node is started in place. Nodes whose
+    container is gone are marked as errors; a sync recreates them.
+
+    Args:
+        job_id: The job ID
+        lab_id: The lab ID
+        agent_id: Agent hosting the nodes
+        node_ids: List of node IDs to correct
+        provider: Provider for the job (default: docker)
+    """
+    session = SessionLocal()
+    try:
+        job = session.get(models.Job, job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found in database")
+            return
+
+        agent = session.get(models.Host, agent_id)
+        if not agent or not agent_client.is_agent_online(agent):
+            job.status = "failed"
+            job.completed_at = datetime.utcnow()
+            job.log_path = f"ERROR: Agent {agent_id} is not available"
+            session.commit()
+            logger.warning(f"Job {job_id} failed: agent {agent_id} not available")
+            return
+
+        node_states = (
+            session.query(models.NodeState)
+            .filter(
+                models.NodeState.lab_id == lab_id,
+                models.NodeState.node_id.in_(node_ids),
+            )
+            .all()
+        )
+        # Skip nodes whose mismatch was resolved while the job was queued
+        to_start = [
+            ns for ns in node_states
+            if ns.desired_state == "running" and ns.actual_state != "running"
+        ]
+        to_stop = [
+            ns for ns in node_states
+            if ns.desired_state == "stopped" and ns.actual_state == "running"
+        ]
+
+        job.status = "running"
+        job.agent_id = agent.id
+        job.started_at = datetime.utcnow()
+        session.commit()
+
+        log_parts = [f"Correcting {len(to_start) + len(to_stop)} node(s) on {agent.name}"]
+        for action, targets in (("start", to_start), ("stop", to_stop)):
+            if not targets:
+                continue
+            names = [ns.node_name for ns in targets]
+            log_parts.append("")
+            log_parts.append(f"=== {action.capitalize()} Nodes ===")
+            try:
+                results = await agent_client.bulk_node_action_on_agent(
+                    agent, job_id, lab_id, names, action
+                )
+            except AgentUnavailableError as e:
+                results = {name: {"success": False, "error": e.message} for name in names}
+                await agent_client.mark_agent_offline(session, agent.id)
+            except Exception as e:
+                results = {name: {"success": False, "error": str(e)} for name in names}
+
+            for ns in targets:
+                result = results[ns.node_name]
+                if result.get("success"):
+                    ns.error_message = None
+                    if action == "start":
+                        ns.actual_state = "running"
+                        if not ns.boot_started_at:
+                            ns.boot_started_at = datetime.now(timezone.utc)
+                    else:
+                        ns.actual_state = "stopped"
+                        ns.boot_started_at = None
+                    log_parts.append(f"  {ns.node_name}: {ns.actual_state}")
+                else:
+                    ns.actual_state = "error"
+                    ns.error_message = result.get("error") or f"{action.capitalize()} failed"
+                    ns.boot_started_at = None
+                    log_parts.append(f"  {ns.node_name}: FAILED - {ns.error_message}")
+            session.commit()
+
+        error_count = sum(1 for ns in to_start + to_stop if ns.actual_state == "error")
+        if error_count > 0:
+            job.status = "failed"
+            log_parts.append(f"\nCompleted with {error_count} error(s)")
+        else:
+            job.status = "completed"
+            log_parts.append("\nAll nodes corrected successfully")
+
+        job.completed_at = datetime.utcnow()
+        job.log_path = "\n".join(log_parts)
+        session.commit()
+
+        logger.info(f"Job {job_id} completed with status: {job.status}")
+
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed with unexpected error: {e}")
+        try:
+            job = session.get(models.Job, job_id)
+            if job:
+                job.status = "failed"
+                job.completed_at = datetime.utcnow()
+                job.log_path = f"ERROR: Unexpected error: {e}"
+                session.commit()
+        except Exception:
+            pass
+    finally:
+        session.close()
+
+
 def _get_container_name(lab_id: str, node_name: str, provider: str = "docker") -> str:
     """Get the container name for a node based on the provider.
 
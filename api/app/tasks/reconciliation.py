@@ -24,7 +24,7 @@ import redis
 
 from app import agent_client, models
 from app.config import settings
-from app.db import SessionLocal
+from app.db import AsyncSessionLocal, SessionLocal
 from app.services.topology import TopologyService
 from app.utils.job import is_job_within_timeout
 
@@ -176,117 +176,142 @@ def _backfill_placement_node_ids(session, lab_id: str) -> int:
     return count
 
 
-async def reconcile_lab_states():
-    """Query agents and reconcile lab/node states with actual container status.
+def _find_reconcile_targets(session) -> tuple[set[str], list[str]]:
+    """Find labs that need reconciliation and nodes awaiting readiness.
 
-    This function:
-    1. Finds labs in transitional states (starting, stopping)
-    2. Finds nodes in "pending" state with no active job
-    3. Queries agents for actual container status
-    4. Updates NodeState.actual_state to match reality
-    5. Updates Lab.state based on aggregated node states
+    Runs through `AsyncSession.run_sync` from reconcile_lab_states, so the
+    sweep that runs every interval never blocks the event loop.
+
+    Returns:
+        Tuple of (lab IDs to reconcile, IDs of running NodeStates that have
+        not passed their readiness check)
     """
-    session = SessionLocal()
-    try:
-        # Find labs that need reconciliation:
-        # - Labs in transitional states (starting, stopping, unknown)
-        # - Labs where state has been stuck for too long
-        now = datetime.now(timezone.utc)
-        stale_cutoff = now - timedelta(seconds=settings.stale_starting_threshold)
-
-        transitional_labs = (
-            session.query(models.Lab)
-            .filter(
-                models.Lab.state.in_(["starting", "stopping", "unknown"]),
-            )
-            .all()
+    # Find labs that need reconciliation:
+    # - Labs in transitional states (starting, stopping, unknown)
+    # - Labs where state has been stuck for too long
+    now = datetime.now(timezone.utc)
+
+    transitional_labs = (
+        session.query(models.Lab.id)
+        .filter(
+            models.Lab.state.in_(["starting", "stopping", "unknown"]),
         )
+        .all()
+    )
 
-        # Also find labs with nodes in "pending" state for too long
-        pending_threshold = now - timedelta(seconds=settings.stale_pending_threshold)
-        stale_pending_nodes = (
-            session.query(models.NodeState)
-            .filter(
-                models.NodeState.actual_state == "pending",
-                models.NodeState.updated_at < pending_threshold,
-            )
-            .all()
+    # Also find labs with nodes in "pending" state for too long
+    pending_threshold = now - timedelta(seconds=settings.stale_pending_threshold)
+    stale_pending_nodes = (
+        session.query(models.NodeState.lab_id)
+        .filter(
+            models.NodeState.actual_state == "pending",
+            models.NodeState.updated_at < pending_threshold,
         )
+        .all()
+    )
 
-        # Find running nodes that haven't completed boot readiness check
-        unready_running_nodes = (
-            session.query(models.NodeState)
-            .filter(
-                models.NodeState.actual_state == "running",
-                models.NodeState.is_ready == False,
-            )
-            .all()
+    # Find running nodes that haven't completed boot readiness check
+    unready_running_nodes = (
+        session.query(models.NodeState.id, models.NodeState.lab_id)
+        .filter(
+            models.NodeState.actual_state == "running",
+            models.NodeState.is_ready == False,
         )
+        .all()
+    )
 
-        # Find nodes in error state - they may have recovered
-        error_nodes = (
-            session.query(models.NodeState)
-            .filter(models.NodeState.actual_state == "error")
-            .all()
+    # Find nodes in error state - they may have recovered
+    error_nodes = (
+        session.query(models.NodeState.lab_id)
+        .filter(models.NodeState.actual_state == "error")
+        .all()
+    )
+
+    # Find nodes where desired=running but actual=stopped/undeployed
+    # These may have been started by state enforcement and need reconciliation
+    stale_stopped_nodes = (
+        session.query(models.NodeState.lab_id)
+        .filter(
+            models.NodeState.desired_state == "running",
+            models.NodeState.actual_state.in_(["stopped", "undeployed", "exited"]),
         )
+        .all()
+    )
 
-        # Find nodes where desired=running but actual=stopped/undeployed
-        # These may have been started by state enforcement and need reconciliation
-        stale_stopped_nodes = (
-            session.query(models.NodeState)
-            .filter(
-                models.NodeState.desired_state == "running",
-                models.NodeState.actual_state.in_(["stopped", "undeployed", "exited"]),
-            )
-            .all()
+    # Find running nodes that are missing NodePlacement records
+    # This handles cases where deploy jobs failed after containers were created
+    from sqlalchemy.sql import select
+
+    placement_exists_subquery = (
+        select(models.NodePlacement.id)
+        .where(
+            models.NodePlacement.lab_id == models.NodeState.lab_id,
+            models.NodePlacement.node_name == models.NodeState.node_name,
         )
+        .exists()
+    )
 
-        # Find running nodes that are missing NodePlacement records
-        # This handles cases where deploy jobs failed after containers were created
-        from sqlalchemy import and_, exists
-        from sqlalchemy.sql import select
-
-        placement_exists_subquery = (
-            select(models.NodePlacement.id)
-            .where(
-                models.NodePlacement.lab_id == models.NodeState.lab_id,
-                models.NodePlacement.node_name == models.NodeState.node_name,
-            )
-            .exists()
+    running_nodes_without_placement = (
+        session.query(models.NodeState.lab_id)
+        .filter(
+            models.NodeState.actual_state == "running",
+            ~placement_exists_subquery,
         )
+        .all()
+    )
 
-        running_nodes_without_placement = (
-            session.query(models.NodeState)
-            .filter(
-                models.NodeState.actual_state == "running",
-                ~placement_exists_subquery,
+    # Collect unique lab IDs that need reconciliation
+    labs_to_reconcile = {row.id for row in transitional_labs}
+    for rows in (
+        stale_pending_nodes,
+        unready_running_nodes,
+        error_nodes,
+        running_nodes_without_placement,
+        stale_stopped_nodes,
+    ):
+        labs_to_reconcile.update(row.lab_id for row in rows)
+
+    return labs_to_reconcile, [row.id for row in unready_running_nodes]
+
+
+async def reconcile_lab_states():
+    """Query agents and reconcile lab/node states with actual container status.
+
+    This function:
+    1. Finds labs in transitional states (starting, stopping)
+    2. Finds nodes in "pending" state with no active job
+    3. Queries agents for actual container status
+    4. Updates NodeState.actual_state to match reality
+    5. Updates Lab.state based on aggregated node states
+
+    The periodic sweep runs on the async session. Readiness checks and
+    per-lab reconciliation interleave agent calls with writes through
+    helpers that take a sync Session, so they still use one.
+    """
+    try:
+        async with AsyncSessionLocal() as async_session:
+            labs_to_reconcile, unready_node_ids = await async_session.run_sync(
+                _find_reconcile_targets
             )
-            .all()
-        )
+    except Exception as e:
+        logger.error(f"Error in state reconciliation: {e}")
+        return
 
-        # Collect unique lab IDs that need reconciliation
-        labs_to_reconcile = set()
-        for lab in transitional_labs:
-            labs_to_reconcile.add(lab.id)
-        for node in stale_pending_nodes:
-            labs_to_reconcile.add(node.lab_id)
-        for node in unready_running_nodes:
-            labs_to_reconcile.add(node.lab_id)
-        for node in error_nodes:
-            labs_to_reconcile.add(node.lab_id)
-        for node in running_nodes_without_placement:
-            labs_to_reconcile.add(node.lab_id)
-        for node in stale_stopped_nodes:
-            labs_to_reconcile.add(node.lab_id)
+    if not labs_to_reconcile:
+        return  # Nothing to reconcile
 
+    session = SessionLocal()
+    try:
         # FIRST: Always check readiness for running nodes (this doesn't interfere with jobs)
         # This is separate because readiness checks should happen even when jobs are running
-        if unready_running_nodes:
+        if unready_node_ids:
+            unready_running_nodes = (
+                session.query(models.NodeState)
+                .filter(models.NodeState.id.in_(unready_node_ids))
+                .all()
+            )
             await _check_readiness_for_nodes(session, unready_running_nodes)
 
-        if not labs_to_reconcile:
-            return  # Nothing to reconcile
-
         logger.info(f"Reconciling state for {len(labs_to_reconcile)} lab(s)")
 
         for lab_id in labs_to_reconcile:
@@ -3,26 +3,35 @@
 This task periodically checks for nodes where desired_state != actual_state and
 triggers corrective actions (start/stop) to bring actual state in line with desired.
 
+Each pass is planned in bulk: one query for mismatches, one for active jobs,
+one Redis MGET for cooldowns and one load of nodes/placements/hosts. The
+corrections are then dispatched as one job per (lab, agent) rather than
+one job per node; jobs are serialized per lab, so per-node jobs would run
+one after another. Each job starts and stops its nodes through the agent's
+bulk /jobs/node-actions endpoint, so a crashed node is started in place
+rather than redeployed.
+
 Unlike the reconciliation task (which is read-only and just updates the database),
 this task takes corrective action by triggering jobs.
 """
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Set
-
 import redis
 from sqlalchemy.orm import Session
 
 from app import models
 from app.config import settings
-from app.db import SessionLocal
+from app.db import AsyncSessionLocal
 from app import agent_client
 
 logger = logging.getLogger(__name__)
 
+# Job action of enforcement jobs; the agent and node IDs are in params_json
+ENFORCE_ACTION = "nodes:enforce"
+
 # Redis client for persistent cooldown storage
 _redis: redis.Redis | None = None
 
@@ -44,202 +53,156 @@ def _cooldown_key(lab_id: str, node_name: str) -> str:
     return f"enforcement_cooldown:{lab_id}:{node_name}"
 
 
-def _is_on_cooldown(lab_id: str, node_name: str) -> bool:
-    """Check if a node is still on cooldown from a recent enforcement attempt.
+def _nodes_on_cooldown(keys: list[tuple[str, str]]) -> set[tuple[str, str]]:
+    """Return the (lab_id, node_name) pairs still on enforcement cooldown.
 
-    Uses Redis EXIST to check if the cooldown key exists (TTL handles expiry).
+    Checks every candidate with a single MGET (TTL handles expiry).
     """
+    if not keys:
+        return set()
     try:
-        return _get_redis().exists(_cooldown_key(lab_id, node_name)) > 0
+        values = _get_redis().mget([_cooldown_key(lab_id, name) for lab_id, name in keys])
     except redis.RedisError as e:
-        logger.warning(f"Redis error checking cooldown: {e}")
+        logger.warning(f"Redis error checking cooldowns: {e}")
         # On Redis error, assume not on cooldown to avoid blocking enforcement
-        return False
+        return set()
+    return {key for key, value in zip(keys, values) if value is not None}
 
 
-def _set_cooldown(lab_id: str, node_name: str):
-    """Mark a node as having a recent enforcement attempt.
+def _set_cooldowns(keys: list[tuple[str, str]]):
+    """Mark nodes as having a recent enforcement attempt.
 
-    Uses Redis SETEX with TTL equal to the cooldown period.
+    Uses one pipelined SETEX per node with TTL equal to the cooldown period.
     """
+    if not keys:
+        return
     try:
-        _get_redis().setex(
-            _cooldown_key(lab_id, node_name),
-            settings.state_enforcement_cooldown,
-            "1"
-        )
+        pipe = _get_redis().pipeline(transaction=False)
+        for lab_id, node_name in keys:
+            pipe.setex(_cooldown_key(lab_id, node_name), settings.state_enforcement_cooldown, "1")
+        pipe.execute()
     except redis.RedisError as e:
-        logger.warning(f"Redis error setting cooldown: {e}")
+        logger.warning(f"Redis error setting cooldowns: {e}")
         # Continue even if Redis fails - enforcement will still work, just might retry sooner
 
 
-def _cleanup_old_cooldowns():
-    """Cleanup is handled automatically by Redis TTL.
-
-    This function is kept for interface compatibility but is now a no-op.
-    """
-    pass
-
-
-def _has_active_job(session: Session, lab_id: str, node_name: str | None = None) -> bool:
-    """Check if there's an active job for this lab/node."""
-    query = session.query(models.Job).filter(
-        models.Job.lab_id == lab_id,
-        models.Job.status.in_(["queued", "running"]),
-    )
-
-    if node_name:
-        # Check for node-specific jobs
-        query = query.filter(
-            models.Job.action.like(f"node:%:{node_name}")
-        )
-
-    return query.first() is not None
-
-
-async def _get_agent_for_node(
-    session: Session, lab: models.Lab, node_state: models.NodeState
-) -> models.Host | None:
-    """Get the agent that should handle actions for a node.
-
-    Uses FK-first lookup strategy for reliability, falls back to string matching.
-
-    Priority order:
-    1. Node definition's host_id (via FK, then string match)
-    2. NodePlacement record (via FK, then string match)
-    3. Lab's default agent
-    """
-    node_def = None
-
-    # 1. Try FK lookup first (most reliable)
-    if node_state.node_definition_id:
-        node_def = session.get(models.Node, node_state.node_definition_id)
-
-    # 2. Fall back to string matching
-    if not node_def:
-        node_def = session.query(models.Node).filter(
-            models.Node.lab_id == lab.id,
-            models.Node.container_name == node_state.node_name,
-        ).first()
-
-        # Link for future lookups
-        if node_def and not node_state.node_definition_id:
-            node_state.node_definition_id = node_def.id
-            logger.info(f"Linked NodeState {node_state.node_id} to Node {node_def.id}")
-
-    if node_def and node_def.host_id:
-        agent = session.get(models.Host, node_def.host_id)
-        if agent and agent_client.is_agent_online(agent):
-            return agent
-
-    # 3. Check NodePlacement (FK-first, then string)
-    placement = None
-    if node_state.node_definition_id:
-        placement = session.query(models.NodePlacement).filter(
-            models.NodePlacement.lab_id == lab.id,
-            models.NodePlacement.node_definition_id == node_state.node_definition_id,
-        ).first()
-
-    if not placement:
-        placement = session.query(models.NodePlacement).filter(
-            models.NodePlacement.lab_id == lab.id,
-            models.NodePlacement.node_name == node_state.node_name,
-        ).first()
-
-    if placement and placement.host_id:
-        agent = session.get(models.Host, placement.host_id)
-        if agent and agent_client.is_agent_online(agent):
-            return agent
-
-    # 4. Fall back to lab's default agent
-    if lab.agent_id:
-        agent = session.get(models.Host, lab.agent_id)
-        if agent and agent_client.is_agent_online(agent):
-            return agent
-
-    # No suitable agent found
+def _enforcement_action(desired: str, actual: str) -> str | None:
+    """Corrective action for a desired/actual mismatch, if there is a clear one."""
+    if desired == "running" and actual in ("stopped", "undeployed", "exited"):
+        return "start"
+    if desired == "stopped" and actual == "running":
+        return "stop"
+    # No clear action for this mismatch (e.g., error states)
     return None
 
 
-async def enforce_node_state(
-    session: Session,
-    lab: models.Lab,
-    node_state: models.NodeState,
-) -> bool:
-    """Attempt to correct a single node's state mismatch.
+def _active_job_targets(
+    session: Session, lab_ids: set[str]
+) -> tuple[set[str], set[tuple[str, str]], set[tuple[str, str]]]:
+    """Load active jobs for the affected labs in one query.
 
-    Returns True if an enforcement job was started, False otherwise.
+    Returns:
+        Tuple of (labs with an active deploy/destroy, (lab_id, node_name) pairs
+        with an active node action, (lab_id, node_id) pairs in an active sync
+        or bulk node action)
+    """
+    busy_labs: set[str] = set()
+    busy_names: set[tuple[str, str]] = set()
+    busy_ids: set[tuple[str, str]] = set()
+    active_jobs = (
+        session.query(models.Job.lab_id, models.Job.action, models.Job.params_json)
+        .filter(
+            models.Job.lab_id.in_(lab_ids),
+            models.Job.status.in_(["queued", "running"]),
+        )
+        .all()
+    )
+    for lab_id, action, params_json in active_jobs:
+        if action in ("up", "down"):
+            busy_labs.add(lab_id)
+        elif action.startswith("node:"):
+            # "node:start:nodename"
+            busy_names.add((lab_id, action.split(":", 2)[-1]))
+        elif action == ENFORCE_ACTION:
+            for node_id in json.loads(params_json or "{}").get("node_ids", []):
+                busy_ids.add((lab_id, node_id))
+        elif action.startswith("sync:"):
+            # "sync:node:id", "sync:lab:id1,id2", "sync:agent:agent_id:id1,id2"
+            for node_id in action.rsplit(":", 1)[-1].split(","):
+                busy_ids.add((lab_id, node_id))
+    return busy_labs, busy_names, busy_ids
+
+
+class _PlacementIndex:
+    """Nodes, placements and hosts for the affected labs, loaded once.
+
+    Resolves the agent for each node with the same priority as a per-node
+    lookup (node definition's host_id, then NodePlacement, then the lab's
+    default agent) without issuing queries per node.
     """
-    from app.tasks.jobs import run_agent_job
 
-    lab_id = lab.id
-    node_name = node_state.node_name
-    desired = node_state.desired_state
-    actual = node_state.actual_state
+    def __init__(self, session: Session, lab_ids: set[str]):
+        nodes = session.query(models.Node).filter(models.Node.lab_id.in_(lab_ids)).all()
+        self.nodes_by_id = {n.id: n for n in nodes}
+        self.nodes_by_name = {(n.lab_id, n.container_name): n for n in nodes}
 
-    # Determine what action is needed
-    if desired == "running" and actual in ("stopped", "undeployed", "exited"):
-        action = "start"
-    elif desired == "stopped" and actual == "running":
-        action = "stop"
-    else:
-        # No clear action for this mismatch (e.g., error states)
-        logger.debug(
-            f"No enforcement action for {node_name}: desired={desired}, actual={actual}"
-        )
-        return False
-
-    # Check cooldown
-    if _is_on_cooldown(lab_id, node_name):
-        logger.debug(f"Node {node_name} in lab {lab_id} is on enforcement cooldown")
-        return False
-
-    # Check for active jobs
-    if _has_active_job(session, lab_id, node_name):
-        logger.debug(f"Node {node_name} in lab {lab_id} has active job, skipping enforcement")
-        return False
-
-    # Check for lab-wide active jobs (deploy/destroy)
-    lab_job = session.query(models.Job).filter(
-        models.Job.lab_id == lab_id,
-        models.Job.status.in_(["queued", "running"]),
-        models.Job.action.in_(["up", "down"]),
-    ).first()
-    if lab_job:
-        logger.debug(f"Lab {lab_id} has active deploy/destroy job, skipping enforcement")
-        return False
-
-    # Get agent for this node
-    agent = await _get_agent_for_node(session, lab, node_state)
-    if not agent:
-        logger.warning(
-            f"Cannot enforce state for {node_name} in lab {lab_id}: no healthy agent"
+        placements = (
+            session.query(models.NodePlacement)
+            .filter(models.NodePlacement.lab_id.in_(lab_ids))
+            .all()
         )
-        return False
+        self.placements_by_def = {
+            (p.lab_id, p.node_definition_id): p for p in placements if p.node_definition_id
+        }
+        self.placements_by_name = {(p.lab_id, p.node_name): p for p in placements}
 
-    # Ensure placement record matches the agent we're using
-    if action == "start":
-        # Get node_definition_id for FK-based placement
+        self.hosts = {h.id: h for h in session.query(models.Host).all()}
+
+    def node_definition(self, node_state: models.NodeState) -> models.Node | None:
         node_def = None
         if node_state.node_definition_id:
-            node_def = session.get(models.Node, node_state.node_definition_id)
+            node_def = self.nodes_by_id.get(node_state.node_definition_id)
         if not node_def:
-            node_def = session.query(models.Node).filter(
-                models.Node.lab_id == lab_id,
-                models.Node.container_name == node_name,
-            ).first()
+            node_def = self.nodes_by_name.get((node_state.lab_id, node_state.node_name))
+            # Link for future lookups
+            if node_def and not node_state.node_definition_id:
+                node_state.node_definition_id = node_def.id
+                logger.info(f"Linked NodeState {node_state.node_id} to Node {node_def.id}")
+        return node_def
+
+    def placement(self, node_state: models.NodeState) -> models.NodePlacement | None:
+        placement = None
+        if node_state.node_definition_id:
+            placement = self.placements_by_def.get(
+                (node_state.lab_id, node_state.node_definition_id)
+            )
+        return placement or self.placements_by_name.get((node_state.lab_id, node_state.node_name))
 
-        placement = session.query(models.NodePlacement).filter(
-            models.NodePlacement.lab_id == lab_id,
-            models.NodePlacement.node_name == node_name,
-        ).first()
+    def _online(self, host_id: str | None) -> models.Host | None:
+        agent = self.hosts.get(host_id) if host_id else None
+        if agent and agent_client.is_agent_online(agent):
+            return agent
+        return None
+
+    def agent_for(self, lab: models.Lab, node_state: models.NodeState) -> models.Host | None:
+        """Get the online agent that should handle actions for a node."""
+        node_def = self.node_definition(node_state)
+        placement = self.placement(node_state)
+        return (
+            self._online(node_def.host_id if node_def else None)
+            or self._online(placement.host_id if placement else None)
+            or self._online(lab.agent_id)
+        )
 
+    def ensure_placement(self, session: Session, node_state: models.NodeState, agent_id: str):
+        """Make the node's placement record match the agent we're starting it on."""
+        lab_id, node_name = node_state.lab_id, node_state.node_name
+        node_def = self.node_definition(node_state)
+        placement = self.placements_by_name.get((lab_id, node_name))
         if placement:
-            if placement.host_id != agent.id:
-                logger.info(
-                    f"Updating placement for {node_name}: {placement.host_id} -> {agent.id}"
-                )
-                placement.host_id = agent.id
+            if placement.host_id != agent_id:
+                logger.info(f"Updating placement for {node_name}: {placement.host_id} -> {agent_id}")
+                placement.host_id = agent_id
             # Backfill node_definition_id if missing
             if node_def and not placement.node_definition_id:
                 placement.node_definition_id = node_def.id
@@ -248,96 +211,173 @@ async def enforce_node_state(
                 lab_id=lab_id,
                 node_name=node_name,
                 node_definition_id=node_def.id if node_def else None,
-                host_id=agent.id,
+                host_id=agent_id,
                 status="deployed",
             )
             session.add(placement)
-            logger.info(f"Created placement for {node_name} on agent {agent.id}")
-
-    # Create enforcement job
-    job = models.Job(
-        lab_id=lab_id,
-        user_id=None,  # System-initiated
-        action=f"node:{action}:{node_name}",
-        status="queued",
-    )
-    session.add(job)
-    session.commit()
-    session.refresh(job)
+            self.placements_by_name[(lab_id, node_name)] = placement
+            logger.info(f"Created placement for {node_name} on agent {agent_id}")
+
+
+def plan_enforcement(
+    session: Session, mismatched_states: list[models.NodeState]
+) -> dict[tuple[str, str], list[models.NodeState]]:
+    """Decide which mismatched nodes to correct and where.
+
+    Filters out nodes with no clear action, nodes on cooldown and nodes
+    (or labs) with an active job, then groups the rest by (lab_id, agent_id)
+    so each group can be corrected by one batched job.
+    """
+    candidates = [
+        ns for ns in mismatched_states
+        if _enforcement_action(ns.desired_state, ns.actual_state)
+    ]
+    if not candidates:
+        return {}
+
+    cooling = _nodes_on_cooldown([(ns.lab_id, ns.node_name) for ns in candidates])
+    lab_ids = {ns.lab_id for ns in candidates}
+    busy_labs, busy_names, busy_ids = _active_job_targets(session, lab_ids)
+
+    candidates = [
+        ns for ns in candidates
+        if (ns.lab_id, ns.node_name) not in cooling
+        and ns.lab_id not in busy_labs
+        and (ns.lab_id, ns.node_name) not in busy_names
+        and (ns.lab_id, ns.node_id) not in busy_ids
+    ]
+    if not candidates:
+        return {}
+
+    labs = {
+        lab.id: lab
+        for lab in session.query(models.Lab).filter(models.Lab.id.in_(lab_ids)).all()
+    }
+    index = _PlacementIndex(session, lab_ids)
+
+    plan: dict[tuple[str, str], list[models.NodeState]] = {}
+    for ns in candidates:
+        lab = labs.get(ns.lab_id)
+        if not lab:
+            continue
+        agent = index.agent_for(lab, ns)
+        if not agent:
+            logger.warning(
+                f"Cannot enforce state for {ns.node_name} in lab {ns.lab_id}: no healthy agent"
+            )
+            continue
+        if _enforcement_action(ns.desired_state, ns.actual_state) == "start":
+            index.ensure_placement(session, ns, agent.id)
+        plan.setdefault((ns.lab_id, agent.id), []).append(ns)
+    return plan
 
-    logger.info(
-        f"State enforcement: {action} node {node_name} in lab {lab_id} "
-        f"(desired={desired}, actual={actual}, job={job.id})"
-    )
 
-    # Set cooldown before starting job
-    _set_cooldown(lab_id, node_name)
+def _record_enforcement_jobs(session: Session) -> list[tuple[str, str, str, list[str], str]]:
+    """Plan corrections for all mismatched nodes and record their jobs.
 
-    # Get lab provider
+    Runs through `AsyncSession.run_sync` from enforce_lab_states.
+
+    Returns:
+        List of (job_id, lab_id, agent_id, node_ids, provider) to submit
+    """
     from app.utils.lab import get_lab_provider
-    provider = get_lab_provider(lab)
 
-    # Start the job
-    asyncio.create_task(run_agent_job(
-        job.id, lab_id, f"node:{action}:{node_name}", provider=provider
-    ))
+    # Find all node_states where desired != actual for running labs
+    mismatched_states = (
+        session.query(models.NodeState)
+        .join(models.Lab, models.NodeState.lab_id == models.Lab.id)
+        .filter(
+            models.NodeState.desired_state != models.NodeState.actual_state,
+            # Only consider labs that are in a stable state (not transitioning)
+            models.Lab.state.in_(["running", "stopped", "error"]),
+        )
+        .all()
+    )
 
-    return True
+    if not mismatched_states:
+        return []
+
+    logger.debug(f"Found {len(mismatched_states)} nodes with state mismatches")
+
+    plan = plan_enforcement(session, mismatched_states)
+    if not plan:
+        session.commit()
+        return []
+
+    jobs: list[tuple[models.Job, str, list[str]]] = []
+    for (lab_id, agent_id), node_states in plan.items():
+        node_ids = [ns.node_id for ns in node_states]
+        job = models.Job(
+            lab_id=lab_id,
+            user_id=None,  # System-initiated
+            action=ENFORCE_ACTION,
+            status="queued",
+            params_json=json.dumps({"agent_id": agent_id, "node_ids": node_ids}),
+        )
+        session.add(job)
+        jobs.append((job, agent_id, node_ids))
+        logger.info(
+            f"State enforcement: correcting {len(node_ids)} node(s) in lab {lab_id} "
+            f"on agent {agent_id}: "
+            + ", ".join(
+                f"{ns.node_name} ({ns.actual_state}->{ns.desired_state})"
+                for ns in node_states
+            )
+        )
+    session.commit()
+
+    # Set cooldowns before starting jobs
+    _set_cooldowns([
+        (ns.lab_id, ns.node_name) for node_states in plan.values() for ns in node_states
+    ])
+
+    labs = {
+        lab.id: lab
+        for lab in session.query(models.Lab).filter(
+            models.Lab.id.in_({lab_id for lab_id, _ in plan})
+        )
+    }
+    return [
+        (job.id, job.lab_id, agent_id, node_ids, get_lab_provider(labs[job.lab_id]))
+        for job, agent_id, node_ids in jobs
+    ]
 
 
 async def enforce_lab_states():
     """Find and correct all state mismatches across labs.
 
-    This is the main entry point called periodically by the monitor.
+    This is the main entry point called periodically by the monitor. All
+    mismatches are planned together and dispatched as one run_node_actions
+    job per (lab, agent), which starts/stops its nodes in bulk on the agent.
+    Planning runs on the async session so the sweep never blocks the event
+    loop on database I/O.
     """
     if not settings.state_enforcement_enabled:
         return
 
-    session = SessionLocal()
+    from app.tasks.executor import submit_job
+    from app.tasks.jobs import run_node_actions
+
     try:
-        # Cleanup old cooldowns periodically
-        _cleanup_old_cooldowns()
-
-        # Find all node_states where desired != actual for running labs
-        mismatched_states = (
-            session.query(models.NodeState)
-            .join(models.Lab, models.NodeState.lab_id == models.Lab.id)
-            .filter(
-                models.NodeState.desired_state != models.NodeState.actual_state,
-                # Only consider labs that are in a stable state (not transitioning)
-                models.Lab.state.in_(["running", "stopped", "error"]),
+        async with AsyncSessionLocal() as session:
+            jobs = await session.run_sync(_record_enforcement_jobs)
+
+        for job_id, lab_id, agent_id, node_ids, provider in jobs:
+            # Enqueue the job on the priority lane
+            submit_job(
+                run_node_actions, job_id, lab_id, agent_id, node_ids,
+                action=ENFORCE_ACTION, agent_id=agent_id, provider=provider,
             )
-            .all()
-        )
-
-        if not mismatched_states:
-            return
 
-        logger.debug(f"Found {len(mismatched_states)} nodes with state mismatches")
-
-        # Process each mismatch
-        enforced_count = 0
-        for node_state in mismatched_states:
-            lab = session.get(models.Lab, node_state.lab_id)
-            if not lab:
-                continue
-
-            try:
-                if await enforce_node_state(session, lab, node_state):
-                    enforced_count += 1
-            except Exception as e:
-                logger.error(
-                    f"Error enforcing state for {node_state.node_name} "
-                    f"in lab {node_state.lab_id}: {e}"
-                )
-
-        if enforced_count > 0:
-            logger.info(f"State enforcement triggered {enforced_count} corrective actions")
+        if jobs:
+            enforced_count = sum(len(node_ids) for _, _, _, node_ids, _ in jobs)
+            logger.info(
+                f"State enforcement triggered {enforced_count} corrective actions "
+                f"in {len(jobs)} job(s)"
+            )
 
     except Exception as e:
         logger.error(f"Error in state enforcement: {e}")
-    finally:
-        session.close()
 
 
 async def state_enforcement_monitor():
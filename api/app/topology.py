@@ -852,6 +852,10 @@ def graph_to_containerlab_yaml(
     if links:
         topology["topology"]["links"] = links
 
+    # Lab-wide KSM memory sharing for VM nodes (read by the libvirt provider)
+    if graph.defaults and "ksm" in graph.defaults:
+        topology["ksm"] = bool(graph.defaults["ksm"])
+
     # Add external network configurations for agent's VLAN setup
     # This is a custom section that containerlab ignores but the agent uses
     if external_network_configs:
@@ -1,6 +1,7 @@
 """Job utility functions."""
 from __future__ import annotations
 
+import json
 from datetime import datetime, timedelta, timezone
 
 from app.config import settings
@@ -10,7 +11,8 @@ def get_job_timeout(action: str) -> int:
     """Get timeout in seconds based on job action.
 
     Args:
-        action: Job action string (e.g., "up", "down", "sync:node:xxx", "node:start:xxx")
+        action: Job action string (e.g., "up", "down", "sync:node:xxx", "node:start:xxx",
+            "nodes:enforce")
 
     Returns:
         Timeout in seconds for the given action type.
@@ -21,7 +23,7 @@ def get_job_timeout(action: str) -> int:
         return settings.job_timeout_destroy
     elif action.startswith("sync:"):
         return settings.job_timeout_sync
-    elif action.startswith("node:"):
+    elif action.startswith(("node:", "nodes:")):
         return settings.job_timeout_node
     else:
         # Default to longest timeout for unknown actions
@@ -146,3 +148,14 @@ def is_job_within_timeout(
         return now <= deadline
 
     return True  # Default to giving benefit of doubt
+
+
+def get_job_params(job) -> dict:
+    """Runner arguments stored with a job (Job.params_json), or {}."""
+    if not job.params_json:
+        return {}
+    try:
+        params = json.loads(job.params_json)
+    except ValueError:
+        return {}
+    return params if isinstance(params, dict) else {}
@@ -4,8 +4,9 @@ from __future__ import annotations
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app import db, models
 from app.auth import create_access_token, hash_password
@@ -13,16 +14,40 @@ from app.config import settings
 from app.main import app
 
 
+@pytest.fixture(autouse=True)
+def inprocess_job_executor(monkeypatch):
+    """Run lab jobs as in-process tasks; tests have no Redis or RQ workers."""
+    monkeypatch.setattr(settings, "job_executor", "inprocess")
+
+
 @pytest.fixture(scope="function")
-def test_engine():
-    """Create an in-memory SQLite database engine for testing."""
+def test_engine(tmp_path):
+    """Create a per-test SQLite database engine for testing.
+
+    The database lives in a temporary file (rather than :memory:) so the
+    async engine used by event/heartbeat endpoints can share it.
+    """
     engine = create_engine(
-        "sqlite:///:memory:",
+        f"sqlite:///{tmp_path / 'test.db'}",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
     models.Base.metadata.create_all(bind=engine)
-    return engine
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+async def test_async_sessionmaker(test_engine):
+    """Async sessions bound to the same database file as test_engine."""
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{test_engine.url.database}",
+        poolclass=NullPool,
+    )
+    yield async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+    await async_engine.dispose()
 
 
 @pytest.fixture(scope="function")
@@ -39,7 +64,7 @@ def test_db(test_engine):
 
 
 @pytest.fixture(scope="function")
-def test_client(test_db: Session, monkeypatch):
+def test_client(test_db: Session, test_async_sessionmaker, monkeypatch):
     """Create a FastAPI test client with database override."""
     # Ensure JWT secret is set for testing
     monkeypatch.setattr(settings, "jwt_secret", "test-jwt-secret-key-for-testing")
@@ -51,7 +76,12 @@ def test_client(test_db: Session, monkeypatch):
         finally:
             pass  # Session cleanup handled by test_db fixture
 
+    async def override_get_async_db():
+        async with test_async_sessionmaker() as session:
+            yield session
+
     app.dependency_overrides[db.get_db] = override_get_db
+    app.dependency_overrides[db.get_async_db] = override_get_async_db
     with TestClient(app) as client:
         yield client
     app.dependency_overrides.clear()
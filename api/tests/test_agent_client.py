@@ -605,5 +605,36 @@ async def test_get_agent_for_lab_without_existing_agent():
     assert result == agent1
 
 
+# --- Unit Tests for Bulk Node Actions ---
+
+@pytest.mark.asyncio
+async def test_bulk_node_action_streams_results():
+    """Per-node results are parsed as the agent streams them."""
+    lines = [
+        '{"node_name": "r2", "success": true, "status": "stopped"}',
+        "",
+        '{"node_name": "r1", "success": false, "error": "Container not found"}',
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/jobs/node-actions"
+        return httpx.Response(200, content="\n".join(lines).encode())
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    agent = MagicMock(id="agent-1", address="localhost:8001")
+    seen = []
+
+    with patch.object(agent_client, "get_http_client", return_value=client):
+        results = await agent_client.bulk_node_action_on_agent(
+            agent, "job-1", "lab-1", ["r1", "r2", "r3"], "stop", on_result=seen.append
+        )
+
+    assert [r["node_name"] for r in seen] == ["r2", "r1"]
+    assert results["r2"]["success"] is True
+    assert results["r1"]["error"] == "Container not found"
+    # Nodes the agent never reported are failures, not silently dropped
+    assert results["r3"]["success"] is False
+
+
 # To run these tests:
 # cd api && pytest tests/test_agent_client.py -v
@@ -0,0 +1,164 @@
+"""Tests for shared console sessions (console_hub.py)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app import console_hub as hub_module
+from app.config import settings
+from app.console_hub import INPUT_HELD_NOTICE, ConsoleHub
+
+
+class FakeUpstream:
+    """Stands in for the agent console WebSocket."""
+
+    def __init__(self):
+        self.output: asyncio.Queue = asyncio.Queue()
+        self.sent: list = []
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.output.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+        self.output.put_nowait(None)
+
+
+@pytest.fixture
+def upstreams(monkeypatch):
+    opened: list[FakeUpstream] = []
+
+    async def connect(url):
+        opened.append(FakeUpstream())
+        return opened[-1]
+
+    monkeypatch.setattr(hub_module.websockets, "connect", connect)
+    return opened
+
+
+def drain(viewer) -> list:
+    messages = []
+    while not viewer.queue.empty():
+        messages.append(viewer.queue.get_nowait())
+    return messages
+
+
+async def test_viewers_share_one_upstream_with_scrollback(upstreams, monkeypatch):
+    monkeypatch.setattr(settings, "console_scrollback_bytes", 10)
+    hub = ConsoleHub()
+
+    session, first = await hub.attach("lab1", "r1", "ws://agent/console/lab1/r1")
+    upstreams[0].output.put_nowait(b"boot....")
+    upstreams[0].output.put_nowait(b"login:")
+    await asyncio.sleep(0.01)
+
+    _, second = await hub.attach("lab1", "r1", "ws://agent/console/lab1/r1")
+    upstreams[0].output.put_nowait(b"$ ")
+    await asyncio.sleep(0.01)
+
+    assert len(upstreams) == 1
+    assert drain(first) == [b"boot....", b"login:", b"$ "]
+    # Late joiner gets the bounded scrollback, then live output
+    assert drain(second) == [b"login:", b"$ "]
+    assert hub.stats() == [{"lab_id": "lab1", "node": "r1", "viewers": 2}]
+    await hub.close_all()
+
+
+async def test_input_lease_and_view_only(upstreams, monkeypatch):
+    monkeypatch.setattr(settings, "console_input_lease", 0.05)
+    hub = ConsoleHub()
+    session, instructor = await hub.attach("lab1", "r1", "ws://a")
+    _, student = await hub.attach("lab1", "r1", "ws://a")
+    _, watcher = await hub.attach("lab1", "r1", "ws://a", interactive=False)
+
+    await session.send_input(instructor, "show ver\r")
+    await session.send_input(student, "reload\r")
+    await session.send_input(watcher, "x")
+    assert upstreams[0].sent == ["show ver\r"]
+    assert drain(student) == [INPUT_HELD_NOTICE]
+
+    # Once the holder pauses, another viewer can take over
+    await asyncio.sleep(0.06)
+    await session.send_input(student, "exit\r")
+    assert upstreams[0].sent == ["show ver\r", "exit\r"]
+    await hub.close_all()
+
+
+async def test_idle_session_closes_after_grace(upstreams, monkeypatch):
+    monkeypatch.setattr(settings, "console_idle_grace", 0.05)
+    hub = ConsoleHub()
+    session, viewer = await hub.attach("lab1", "r1", "ws://a")
+
+    # Reattaching within the grace period reuses the session
+    session.detach(viewer)
+    again, viewer = await hub.attach("lab1", "r1", "ws://a")
+    assert again is session and len(upstreams) == 1
+
+    session.detach(viewer)
+    await asyncio.sleep(0.1)
+    assert session.closed and upstreams[0].closed
+    assert hub.stats() == []
+
+
+async def test_upstream_end_ends_viewers(upstreams):
+    hub = ConsoleHub()
+    _, viewer = await hub.attach("lab1", "r1", "ws://a")
+
+    upstreams[0].output.put_nowait(None)
+
+    assert await asyncio.wait_for(viewer.queue.get(), 1) is None
+    assert hub.stats() == []
+
+
+async def test_replay_of_many_small_frames_fits_the_queue(upstreams, monkeypatch):
+    monkeypatch.setattr(settings, "console_viewer_queue", 16)
+    hub = ConsoleHub()
+
+    session, _ = await hub.attach("lab1", "r1", "ws://agent/console/lab1/r1")
+    for i in range(5000):
+        upstreams[0].output.put_nowait(b"%d" % (i % 10))
+    await asyncio.sleep(0.05)
+
+    _, late = await hub.attach("lab1", "r1", "ws://agent/console/lab1/r1")
+    upstreams[0].output.put_nowait(b"!")
+    await asyncio.sleep(0.01)
+
+    assert late in session.viewers
+    replay, live = drain(late)
+    assert replay.endswith(b"789")
+    assert len(replay) == session._scrollback_bytes - 1
+    assert live == b"!"
+    await hub.close_all()
+
+
+async def test_slow_connect_does_not_block_other_nodes(upstreams, monkeypatch):
+    hub = ConsoleHub()
+    opened = asyncio.Event()
+    connect = hub_module.websockets.connect
+
+    async def slow_connect(url):
+        if url.endswith("/r1"):
+            await opened.wait()
+        return await connect(url)
+
+    monkeypatch.setattr(hub_module.websockets, "connect", slow_connect)
+
+    slow = asyncio.create_task(hub.attach("lab1", "r1", "ws://agent/console/lab1/r1"))
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(hub.attach("lab1", "r2", "ws://agent/console/lab1/r2"), 1)
+
+    assert not slow.done()
+    opened.set()
+    await slow
+    await hub.close_all()
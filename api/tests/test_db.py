@@ -354,3 +354,31 @@ class TestSessionBehavior:
             session.rollback()
         finally:
             session.close()
+
+
+class TestAsyncDatabase:
+    """Tests for the asyncio engine used by hot request paths."""
+
+    def test_sqlite_maps_to_aiosqlite(self):
+        from app.db import async_database_url
+
+        assert async_database_url("sqlite:///./archetype.db") == "sqlite+aiosqlite:///./archetype.db"
+
+    def test_postgres_maps_to_psycopg(self):
+        from app.db import async_database_url
+
+        assert async_database_url("postgresql://u:p@db/archetype") == "postgresql+psycopg://u:p@db/archetype"
+        assert async_database_url("postgresql+psycopg2://u:p@db/archetype") == "postgresql+psycopg://u:p@db/archetype"
+
+    @pytest.mark.asyncio
+    async def test_get_async_db_yields_async_session(self):
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        from app.db import get_async_db
+
+        gen = get_async_db()
+        session = await gen.__anext__()
+        try:
+            assert isinstance(session, AsyncSession)
+        finally:
+            await gen.aclose()
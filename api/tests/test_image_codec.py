@@ -0,0 +1,68 @@
+"""Tests for image stream compression negotiation (image_codec.py)."""
+from __future__ import annotations
+
+import gzip
+
+import pytest
+
+from app import image_codec
+from app.config import settings
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+class TestNegotiateCodec:
+    """Tests for codec negotiation."""
+
+    def test_prefers_zstd(self, monkeypatch):
+        monkeypatch.setattr(settings, "image_sync_compression", "auto")
+        monkeypatch.setattr(image_codec, "ZSTD_AVAILABLE", True)
+        assert image_codec.negotiate_codec(["gzip", "zstd"]) == "zstd"
+
+    def test_falls_back_to_gzip_without_zstandard(self, monkeypatch):
+        monkeypatch.setattr(settings, "image_sync_compression", "auto")
+        monkeypatch.setattr(image_codec, "ZSTD_AVAILABLE", False)
+        assert image_codec.negotiate_codec(["zstd", "gzip"]) == "gzip"
+
+    def test_identity_for_old_agents(self, monkeypatch):
+        monkeypatch.setattr(settings, "image_sync_compression", "auto")
+        assert image_codec.negotiate_codec([]) == "identity"
+
+    def test_disabled_by_setting(self, monkeypatch):
+        monkeypatch.setattr(settings, "image_sync_compression", "none")
+        assert image_codec.negotiate_codec(["zstd", "gzip"]) == "identity"
+
+    def test_parse_codec_list(self):
+        assert image_codec.parse_codec_list(" ZSTD, gzip ,") == ["zstd", "gzip"]
+        assert image_codec.parse_codec_list(None) == []
+
+
+class TestCompressStream:
+    """Tests for streaming compression."""
+
+    async def test_gzip_roundtrip(self):
+        data = [b"layer" * 1000, b"\0" * 5000]
+        compressed = await _collect(image_codec.compress_stream(_chunks(*data), "gzip"))
+        assert gzip.decompress(compressed) == b"".join(data)
+
+    async def test_zstd_roundtrip(self):
+        if not image_codec.ZSTD_AVAILABLE:
+            pytest.skip("zstandard not installed")
+        import zstandard
+
+        data = [b"layer" * 1000, b"\0" * 5000]
+        compressed = await _collect(image_codec.compress_stream(_chunks(*data), "zstd"))
+        decompressed = zstandard.ZstdDecompressor().decompressobj().decompress(compressed)
+        assert decompressed == b"".join(data)
+        assert len(compressed) < len(b"".join(data))
+
+    async def test_identity_passthrough(self):
+        compressed = await _collect(image_codec.compress_stream(_chunks(b"a", b"b"), "identity"))
+        assert compressed == b"ab"
@@ -0,0 +1,209 @@
+"""Tests for the content-addressed image layer cache (image_layers.py)."""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import tarfile
+
+import pytest
+
+from app import image_layers
+from app.config import settings
+
+
+def _add_file(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = 1700000000
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _make_docker_save_archive(layer_contents: list[bytes]) -> bytes:
+    """Build a minimal archive in `docker save` layout."""
+    diff_ids = [f"sha256:{hashlib.sha256(c).hexdigest()}" for c in layer_contents]
+    config = json.dumps({"rootfs": {"type": "layers", "diff_ids": diff_ids}}).encode()
+    config_name = f"{hashlib.sha256(config).hexdigest()}.json"
+    layer_paths = [f"layer{i}/layer.tar" for i in range(len(layer_contents))]
+    manifest = json.dumps([{
+        "Config": config_name,
+        "RepoTags": ["test:1.0"],
+        "Layers": layer_paths,
+    }]).encode()
+
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for i, content in enumerate(layer_contents):
+            dir_info = tarfile.TarInfo(f"layer{i}")
+            dir_info.type = tarfile.DIRTYPE
+            dir_info.mode = 0o755
+            tar.addfile(dir_info)
+            _add_file(tar, layer_paths[i], content)
+        _add_file(tar, config_name, config)
+        _add_file(tar, "manifest.json", manifest)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def layer_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "workspace", str(tmp_path))
+    monkeypatch.setattr(settings, "qcow2_store", None)
+    return tmp_path
+
+
+def _read_archive(data: bytes) -> dict[str, bytes]:
+    result = {}
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar:
+        for member in tar:
+            if member.isreg():
+                result[member.name] = tar.extractfile(member).read()
+    return result
+
+
+class TestComputeChainIds:
+    """Tests for compute_chain_ids."""
+
+    def test_first_chain_id_is_diff_id(self):
+        assert image_layers.compute_chain_ids(["sha256:aaa"]) == ["sha256:aaa"]
+
+    def test_chain_ids_include_parent(self):
+        chain_ids = image_layers.compute_chain_ids(["sha256:aaa", "sha256:bbb"])
+        expected = hashlib.sha256(b"sha256:aaa sha256:bbb").hexdigest()
+        assert chain_ids == ["sha256:aaa", f"sha256:{expected}"]
+
+    def test_empty(self):
+        assert image_layers.compute_chain_ids([]) == []
+
+
+class TestBuildRecipe:
+    """Tests for splitting a docker save archive into blobs."""
+
+    def test_stores_blobs_and_layers(self, layer_store):
+        contents = [b"base layer" * 100, b"app layer" * 50]
+        archive = _make_docker_save_archive(contents)
+
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(archive), "test:1.0", "sha256:abc"
+        )
+
+        assert len(recipe["layers"]) == 2
+        for layer, content in zip(recipe["layers"], contents):
+            assert layer["digest"] == f"sha256:{hashlib.sha256(content).hexdigest()}"
+            assert image_layers.blob_path(layer["digest"]).read_bytes() == content
+        assert recipe["layers"][0]["chain_id"] == recipe["layers"][0]["diff_id"]
+
+    def test_identical_layers_are_stored_once(self, layer_store):
+        archive = _make_docker_save_archive([b"same", b"same"])
+
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(archive), "test:1.0", "sha256:abc"
+        )
+
+        digests = {layer["digest"] for layer in recipe["layers"]}
+        assert len(digests) == 1
+        blob_dir = image_layers.layer_cache_root() / "blobs" / "sha256"
+        assert len(list(blob_dir.iterdir())) == 3  # layer, config, manifest
+
+    def test_rejects_archive_without_manifest(self, layer_store):
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            _add_file(tar, "random.txt", b"data")
+
+        with pytest.raises(ValueError, match="manifest.json"):
+            image_layers.build_recipe_from_archive(
+                io.BytesIO(buf.getvalue()), "test:1.0", "sha256:abc"
+            )
+
+
+class TestIterArchive:
+    """Tests for reassembling full and delta archives."""
+
+    def test_full_archive_roundtrip(self, layer_store):
+        contents = [b"x" * 1000, b"y" * 513]
+        original = _make_docker_save_archive(contents)
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(original), "test:1.0", "sha256:abc"
+        )
+
+        rebuilt = b"".join(image_layers.iter_archive(recipe, chunk_size=128))
+
+        assert len(rebuilt) == image_layers.archive_size(recipe)
+        assert recipe["total_bytes"] == len(rebuilt)
+        assert _read_archive(rebuilt) == _read_archive(original)
+
+    def test_delta_archive_omits_present_layers(self, layer_store):
+        contents = [b"base" * 10000, b"top" * 10]
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(_make_docker_save_archive(contents)), "test:1.0", "sha256:abc"
+        )
+        base_chain_id = recipe["layers"][0]["chain_id"]
+
+        exclude = image_layers.excluded_layer_paths(recipe, {base_chain_id})
+        rebuilt = b"".join(image_layers.iter_archive(recipe, exclude))
+
+        files = _read_archive(rebuilt)
+        assert "layer0/layer.tar" not in files
+        assert files["layer1/layer.tar"] == contents[1]
+        assert "manifest.json" in files
+        assert len(rebuilt) == image_layers.archive_size(recipe, exclude)
+        assert len(rebuilt) < recipe["total_bytes"]
+
+    def test_no_exclusions_without_agent_layers(self, layer_store):
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(_make_docker_save_archive([b"a"])), "test:1.0", "sha256:abc"
+        )
+        assert image_layers.excluded_layer_paths(recipe, set()) == set()
+
+
+class TestLoadRecipe:
+    """Tests for recipe persistence."""
+
+    def test_missing_blob_invalidates_recipe(self, layer_store):
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(_make_docker_save_archive([b"a" * 10])), "test:1.0", "sha256:abc"
+        )
+        image_layers._save_recipe(recipe)
+        assert image_layers.load_recipe("sha256:abc") is not None
+
+        image_layers.blob_path(recipe["layers"][0]["digest"]).unlink()
+
+        assert image_layers.load_recipe("sha256:abc") is None
+
+
+class TestResumableArtifacts:
+    """Tests for ranged archives and chunk manifests."""
+
+    def test_iter_archive_from_offset(self, layer_store):
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(_make_docker_save_archive([b"x" * 3000, b"y" * 700])),
+            "test:1.0",
+            "sha256:abc",
+        )
+        full = b"".join(image_layers.iter_archive(recipe))
+
+        for start in (0, 1, 511, 512, 1700, len(full) - 1):
+            assert b"".join(image_layers.iter_archive(recipe, start=start)) == full[start:]
+
+    def test_chunk_manifest_matches_archive(self, layer_store, monkeypatch):
+        recipe = image_layers.build_recipe_from_archive(
+            io.BytesIO(_make_docker_save_archive([b"x" * 3000, b"y" * 700])),
+            "test:1.0",
+            "sha256:abc",
+        )
+        full = b"".join(image_layers.iter_archive(recipe))
+
+        manifest = image_layers.build_chunk_manifest(recipe, chunk_size=1000)
+
+        assert manifest["size"] == len(full)
+        expected = [
+            hashlib.sha256(full[i:i + 1000]).hexdigest() for i in range(0, len(full), 1000)
+        ]
+        assert manifest["chunks"] == expected
+        assert image_layers.manifest_path(manifest["artifact_id"]).exists()
+
+    def test_artifact_id_depends_on_excluded_layers(self, layer_store):
+        recipe = {"docker_image_id": "sha256:abc"}
+        assert image_layers.artifact_id(recipe) == image_layers.artifact_id(recipe, set())
+        assert image_layers.artifact_id(recipe) != image_layers.artifact_id(
+            recipe, {"layer0/layer.tar"}
+        )
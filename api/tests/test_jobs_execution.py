@@ -4,6 +4,7 @@ This module tests the core job execution functions including:
 - run_agent_job: Single-host job execution
 - run_multihost_deploy: Multi-host deployment
 - run_multihost_destroy: Multi-host teardown
+- run_lab_checkpoint: Lab checkpoint capture
 - run_node_sync: Node state synchronization
 """
 from __future__ import annotations
@@ -12,6 +13,8 @@ import asyncio
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import json
+
 import pytest
 from sqlalchemy.orm import Session
 
@@ -19,6 +22,7 @@ from app import models
 from app.tasks.jobs import (
     _get_container_name,
     run_agent_job,
+    run_lab_checkpoint,
     run_multihost_deploy,
     run_multihost_destroy,
     run_node_sync,
@@ -501,6 +505,117 @@ topology:
         assert job.status == "failed"
         assert "No agents found" in job.log_path
 
+    @pytest.mark.asyncio
+    async def test_agents_torn_down_concurrently(
+        self, test_db: Session, sample_lab: models.Lab, multiple_hosts
+    ):
+        """Each agent runs overlay cleanup then destroy without waiting on the others."""
+        job = models.Job(lab_id=sample_lab.id, action="down", status="queued")
+        test_db.add(job)
+        test_db.commit()
+        job_id = job.id
+
+        analysis = MagicMock()
+        analysis.placements = {"agent-1": [], "agent-2": []}
+        analysis.cross_host_links = [MagicMock()]
+        events = []
+
+        async def cleanup_overlay(agent, lab_id):
+            events.append(("overlay", agent.id))
+            await asyncio.sleep(0.2 if agent.id == "agent-1" else 0)
+            return {"tunnels_deleted": 1, "bridges_deleted": 1, "errors": []}
+
+        async def destroy(agent, job_id, lab_id):
+            events.append(("destroy", agent.id))
+            return {"status": "completed", "stdout": "Removed 2 containers",
+                    "timings": {"containers": 0.5}}
+
+        with patch("app.tasks.jobs.SessionLocal", return_value=test_db), \
+                patch("app.tasks.jobs.TopologyService") as mock_topo, \
+                patch("app.tasks.jobs.agent_client.cleanup_overlay_on_agent", side_effect=cleanup_overlay), \
+                patch("app.tasks.jobs.agent_client.destroy_on_agent", side_effect=destroy), \
+                patch("app.tasks.jobs._dispatch_webhook", new_callable=AsyncMock):
+            mock_topo.return_value.analyze_placements.return_value = analysis
+            await run_multihost_destroy(job_id, sample_lab.id)
+
+        # agent-2 finished both phases while agent-1 was still in overlay cleanup
+        assert events.index(("destroy", "agent-2")) < events.index(("destroy", "agent-1"))
+        job = test_db.get(models.Job, job_id)
+        assert job.status == "completed"
+        assert "destroy.containers=0.50s" in job.log_path
+        assert "Total teardown" in job.log_path
+
+
+class TestRunLabCheckpoint:
+    """Tests for run_lab_checkpoint function."""
+
+    def _setup(self, test_db: Session, lab: models.Lab) -> tuple[str, str]:
+        checkpoint = models.LabCheckpoint(lab_id=lab.id, name="ckpt", provider="docker")
+        job = models.Job(lab_id=lab.id, action="checkpoint", status="queued")
+        test_db.add_all([checkpoint, job])
+        test_db.commit()
+        return job.id, checkpoint.id
+
+    async def _run(self, test_db, lab, job_id, checkpoint_id, checkpoint_side_effect, delete=None):
+        analysis = MagicMock()
+        analysis.placements = {"agent-1": [], "agent-2": []}
+        with patch("app.tasks.jobs.SessionLocal", return_value=test_db), \
+                patch("app.tasks.jobs.TopologyService") as mock_topo, \
+                patch("app.tasks.jobs.agent_client.agent_supports_checkpoints", return_value=True), \
+                patch("app.tasks.jobs.agent_client.checkpoint_lab_on_agent",
+                      side_effect=checkpoint_side_effect), \
+                patch("app.tasks.jobs.agent_client.delete_checkpoint_on_agent",
+                      new=delete or AsyncMock(return_value=True)):
+            mock_topo.return_value.analyze_placements.return_value = analysis
+            await run_lab_checkpoint(job_id, lab.id, checkpoint_id)
+
+    @pytest.mark.asyncio
+    async def test_checkpoints_every_host(
+        self, test_db: Session, sample_lab: models.Lab, multiple_hosts
+    ):
+        """A checkpoint is ready once every host has captured its nodes."""
+        job_id, checkpoint_id = self._setup(test_db, sample_lab)
+
+        async def capture(agent, lab_id, ckpt_id, provider, include_memory):
+            node = "r1" if agent.id == "agent-1" else "r2"
+            return {"success": True, "nodes": [node], "stateful_nodes": [node], "size_bytes": 100}
+
+        await self._run(test_db, sample_lab, job_id, checkpoint_id, capture)
+
+        checkpoint = test_db.get(models.LabCheckpoint, checkpoint_id)
+        assert checkpoint.status == "ready"
+        assert json.loads(checkpoint.nodes_json) == ["r1", "r2"]
+        assert set(json.loads(checkpoint.host_ids_json)) == {"agent-1", "agent-2"}
+        assert checkpoint.size_bytes == 200
+        assert test_db.get(models.Job, job_id).status == "completed"
+
+    @pytest.mark.asyncio
+    async def test_partial_failure_discards_checkpoint(
+        self, test_db: Session, sample_lab: models.Lab, multiple_hosts
+    ):
+        """A failed host fails the checkpoint and the others' artifacts are removed."""
+        job_id, checkpoint_id = self._setup(test_db, sample_lab)
+        deleted_on = []
+
+        async def delete(agent, lab_id, ckpt_id, provider):
+            deleted_on.append(agent.id)
+            return True
+
+        async def capture(agent, lab_id, ckpt_id, provider, include_memory):
+            if agent.id == "agent-2":
+                return {"success": False, "error": "disk full"}
+            return {"success": True, "nodes": ["r1"], "stateful_nodes": [], "size_bytes": 100}
+
+        await self._run(
+            test_db, sample_lab, job_id, checkpoint_id, capture, delete=AsyncMock(side_effect=delete)
+        )
+
+        checkpoint = test_db.get(models.LabCheckpoint, checkpoint_id)
+        assert checkpoint.status == "failed"
+        assert "disk full" in checkpoint.error_message
+        assert test_db.get(models.Job, job_id).status == "failed"
+        assert deleted_on == ["agent-1"]
+
 
 class TestRunNodeSync:
     """Tests for run_node_sync function."""
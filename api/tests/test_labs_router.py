@@ -1,6 +1,8 @@
 """Tests for labs router endpoints."""
 from __future__ import annotations
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -487,6 +489,30 @@ class TestNodeStates:
         assert "nodes" in data
         assert len(data["nodes"]) == 2
 
+    def test_poll_nodes_ready_reports_running_nodes(
+        self,
+        test_client: TestClient,
+        test_db: Session,
+        sample_lab_with_nodes: tuple[models.Lab, list[models.NodeState]],
+        auth_headers: dict,
+    ):
+        """Polling returns once every node that should run is ready."""
+        lab, nodes = sample_lab_with_nodes
+        for node in nodes:
+            node.desired_state = "running"
+            node.actual_state = "running"
+            node.is_ready = True
+        test_db.commit()
+
+        response = test_client.get(
+            f"/labs/{lab.id}/nodes/ready/poll", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.headers["X-Readiness-Status"] == "complete"
+        data = response.json()
+        assert data["all_ready"] is True
+        assert data["ready_count"] == 2
+
     def test_get_node_state(
         self,
         test_client: TestClient,
@@ -649,3 +675,37 @@ class TestLayout:
         assert data["version"] == 1
         assert "r1" in data["nodes"]
         assert data["nodes"]["r1"]["x"] == 100
+
+
+class TestCreateCheckpoint:
+    """Tests for POST /labs/{lab_id}/checkpoints."""
+
+    def test_queues_checkpoint_job(
+        self,
+        test_client: TestClient,
+        test_db: Session,
+        sample_lab: models.Lab,
+        auth_headers: dict,
+    ):
+        """The job is submitted from the event loop and records its checkpoint."""
+        from unittest.mock import AsyncMock, patch
+
+        sample_lab.state = "running"
+        test_db.commit()
+
+        with patch("app.routers.labs.has_conflicting_job", return_value=(False, None)), \
+                patch("app.tasks.jobs.run_lab_checkpoint", new_callable=AsyncMock) as mock_run:
+            response = test_client.post(
+                f"/labs/{sample_lab.id}/checkpoints",
+                json={"name": "golden"},
+                headers=auth_headers,
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["name"] == "golden"
+        assert data["status"] == "creating"
+        job = test_db.query(models.Job).filter(models.Job.action == "checkpoint").one()
+        assert json.loads(job.params_json) == {"checkpoint_id": data["id"]}
+        mock_run.assert_called_once()
+        assert mock_run.call_args.args[:3] == (job.id, sample_lab.id, data["id"])
@@ -0,0 +1,241 @@
+"""Query-plan regression tests for the background monitor queries.
+
+Seeds a database at production-like scale (~100k node states) and checks
+via EXPLAIN QUERY PLAN that the queries issued by reconciliation,
+state_enforcement and job_health are served by indexes rather than full
+table scans. Plans are asserted rather than timings, which are too noisy
+under a full parallel test run to gate on.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Query, Session, sessionmaker
+
+from app import models
+
+NUM_LABS = 1000
+NODES_PER_LAB = 100
+LINKS_PER_LAB = 20
+JOBS_PER_LAB = 20
+
+
+@pytest.fixture(scope="module")
+def seeded_session(tmp_path_factory):
+    """A database seeded with NUM_LABS labs of NODES_PER_LAB nodes each."""
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+
+    now = datetime.now(timezone.utc)
+    labs, node_states, placements, link_states, jobs = [], [], [], [], []
+    host_id = "host-1"
+    for lab_index in range(NUM_LABS):
+        lab_id = str(uuid4())
+        labs.append({"id": lab_id, "name": f"lab-{lab_index}", "state": "running"})
+        for node_index in range(NODES_PER_LAB):
+            name = f"n{node_index}"
+            # Mostly converged nodes with a thin tail of interesting states
+            bucket = (lab_index * NODES_PER_LAB + node_index) % 200
+            actual = {0: "pending", 1: "error", 2: "stopped"}.get(bucket, "running")
+            node_states.append({
+                "id": str(uuid4()),
+                "lab_id": lab_id,
+                "node_id": name,
+                "node_name": name,
+                "desired_state": "running",
+                "actual_state": actual,
+                "is_ready": actual == "running" and bucket != 3,
+                "updated_at": now - timedelta(minutes=bucket % 30),
+            })
+            if bucket != 4:
+                placements.append({
+                    "id": str(uuid4()),
+                    "lab_id": lab_id,
+                    "node_name": name,
+                    "host_id": host_id,
+                    "status": "deployed",
+                })
+        for link_index in range(LINKS_PER_LAB):
+            link_states.append({
+                "id": str(uuid4()),
+                "lab_id": lab_id,
+                "link_name": f"n{link_index}:eth1-n{link_index + 1}:eth1",
+                "source_node": f"n{link_index}",
+                "source_interface": "eth1",
+                "target_node": f"n{link_index + 1}",
+                "target_interface": "eth1",
+            })
+        for job_index in range(JOBS_PER_LAB):
+            status = "running" if job_index == 0 and lab_index % 50 == 0 else "completed"
+            jobs.append({
+                "id": str(uuid4()),
+                "lab_id": lab_id,
+                "action": "up" if job_index % 2 else f"node:start:n{job_index}",
+                "status": status,
+                "created_at": now - timedelta(hours=job_index),
+            })
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.Host), [{"id": host_id, "name": "host-1", "address": "h:1"}])
+        conn.execute(insert(models.Lab), labs)
+        conn.execute(insert(models.NodeState), node_states)
+        conn.execute(insert(models.NodePlacement), placements)
+        conn.execute(insert(models.LinkState), link_states)
+        conn.execute(insert(models.Job), jobs)
+    # No ANALYZE: SQLite's stat1 tables only record average selectivity, so
+    # skewed status columns ("almost everything is running/completed") would
+    # look unselective and hide missing indexes. PostgreSQL keeps per-value
+    # histograms and picks these indexes for the rare values monitors query.
+
+    session = sessionmaker(bind=engine)()
+    session.info["lab_id"] = labs[NUM_LABS // 2]["id"]
+    session.info["now"] = now
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _plan(session: Session, query: Query) -> str:
+    """Return SQLite's EXPLAIN QUERY PLAN output for a query."""
+    compiled = query.statement.compile(
+        dialect=session.bind.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.construct_params()
+    args = tuple(params[name] for name in compiled.positiontup)
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", args).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def _assert_indexed(session: Session, query: Query, table: str, index: str | None = None) -> None:
+    plan = _plan(session, query)
+    for line in plan.splitlines():
+        if line.startswith(f"SCAN {table}") and "INDEX" not in line:
+            pytest.fail(f"Full scan of {table}:\n{plan}")
+    if index:
+        assert index in plan, f"Expected {index} in plan:\n{plan}"
+    query.all()  # The query must still execute against the seeded schema
+
+
+class TestReconciliationQueries:
+    """Queries issued by tasks/reconciliation.py."""
+
+    def test_stale_pending_nodes(self, seeded_session):
+        cutoff = seeded_session.info["now"] - timedelta(minutes=5)
+        query = seeded_session.query(models.NodeState).filter(
+            models.NodeState.actual_state == "pending",
+            models.NodeState.updated_at < cutoff,
+        )
+        _assert_indexed(
+            seeded_session, query, "node_states", "ix_node_states_actual_state_updated_at"
+        )
+
+    def test_unready_running_nodes(self, seeded_session):
+        query = seeded_session.query(models.NodeState).filter(
+            models.NodeState.actual_state == "running",
+            models.NodeState.is_ready == False,  # noqa: E712
+        )
+        _assert_indexed(seeded_session, query, "node_states")
+
+    def test_stale_stopped_nodes(self, seeded_session):
+        query = seeded_session.query(models.NodeState).filter(
+            models.NodeState.desired_state == "running",
+            models.NodeState.actual_state.in_(["stopped", "undeployed", "exited"]),
+        )
+        _assert_indexed(
+            seeded_session, query, "node_states", "ix_node_states_desired_state_actual_state"
+        )
+
+    def test_running_nodes_without_placement(self, seeded_session):
+        placement_exists = (
+            select(models.NodePlacement.id)
+            .where(
+                models.NodePlacement.lab_id == models.NodeState.lab_id,
+                models.NodePlacement.node_name == models.NodeState.node_name,
+            )
+            .exists()
+        )
+        query = seeded_session.query(models.NodeState).filter(
+            models.NodeState.actual_state == "running",
+            ~placement_exists,
+        )
+        _assert_indexed(
+            seeded_session, query, "node_placements", "ix_node_placements_lab_id_node_name"
+        )
+
+    def test_active_jobs_for_lab(self, seeded_session):
+        query = seeded_session.query(models.Job).filter(
+            models.Job.lab_id == seeded_session.info["lab_id"],
+            models.Job.status.in_(["pending", "running", "queued"]),
+        )
+        _assert_indexed(seeded_session, query, "jobs", "ix_jobs_lab_id_status")
+
+    def test_lab_node_states(self, seeded_session):
+        query = seeded_session.query(models.NodeState).filter(
+            models.NodeState.lab_id == seeded_session.info["lab_id"]
+        )
+        _assert_indexed(seeded_session, query, "node_states")
+
+    def test_lab_link_states(self, seeded_session):
+        query = seeded_session.query(models.LinkState).filter(
+            models.LinkState.lab_id == seeded_session.info["lab_id"]
+        )
+        _assert_indexed(seeded_session, query, "link_states")
+
+    def test_placement_lookup(self, seeded_session):
+        query = seeded_session.query(models.NodePlacement).filter(
+            models.NodePlacement.lab_id == seeded_session.info["lab_id"],
+            models.NodePlacement.node_name == "n7",
+        )
+        _assert_indexed(
+            seeded_session, query, "node_placements", "ix_node_placements_lab_id_node_name"
+        )
+
+
+class TestStateEnforcementQueries:
+    """Queries issued by tasks/state_enforcement.py."""
+
+    def test_mismatched_states(self, seeded_session):
+        """desired_state != actual_state is served by the partial index over
+        mismatched nodes, with indexed lab lookups."""
+        query = (
+            seeded_session.query(models.NodeState)
+            .join(models.Lab, models.NodeState.lab_id == models.Lab.id)
+            .filter(
+                models.NodeState.desired_state != models.NodeState.actual_state,
+                models.Lab.state.in_(["running", "stopped", "error"]),
+            )
+        )
+        plan = _plan(seeded_session, query)
+        assert "USING INDEX ix_node_states_mismatched" in plan, plan
+        _assert_indexed(seeded_session, query, "labs")
+
+    def test_active_lab_job(self, seeded_session):
+        query = seeded_session.query(models.Job).filter(
+            models.Job.lab_id == seeded_session.info["lab_id"],
+            models.Job.status.in_(["queued", "running"]),
+            models.Job.action.in_(["up", "down"]),
+        )
+        _assert_indexed(seeded_session, query, "jobs")
+
+
+class TestJobHealthQueries:
+    """Queries issued by tasks/job_health.py."""
+
+    def test_active_jobs(self, seeded_session):
+        query = seeded_session.query(models.Job).filter(
+            models.Job.status.in_(["queued", "running"])
+        )
+        _assert_indexed(seeded_session, query, "jobs", "ix_jobs_status_action")
+
+    def test_orphaned_queued_jobs(self, seeded_session):
+        cutoff = seeded_session.info["now"] - timedelta(minutes=2)
+        query = seeded_session.query(models.Job).filter(
+            models.Job.status == "queued",
+            models.Job.agent_id.is_(None),
+            models.Job.created_at < cutoff,
+        )
+        _assert_indexed(seeded_session, query, "jobs", "ix_jobs_status_action")
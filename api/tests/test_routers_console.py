@@ -10,6 +10,12 @@ from sqlalchemy.orm import Session
 from app import models
 
 
+@pytest.fixture(autouse=True)
+def console_async_db(test_async_sessionmaker, monkeypatch):
+    """Resolve console targets against the test database."""
+    monkeypatch.setattr("app.routers.console.AsyncSessionLocal", test_async_sessionmaker)
+
+
 class TestConsoleWebSocket:
     """Tests for WebSocket /labs/{lab_id}/nodes/{node}/console endpoint."""
 
@@ -71,7 +77,7 @@ topology:
         monkeypatch.setattr(storage, "topology_path", lambda lab_id: topo_file)
 
         # Mock agent client to return healthy agent but fail on connect
-        mock_agent_client.get_agent_for_lab = AsyncMock(return_value=sample_host)
+        mock_agent_client.select_agent_for_lab = MagicMock(return_value=sample_host)
         mock_agent_client.get_agent_console_url = MagicMock(
             return_value="ws://agent:8080/console"
         )
@@ -124,7 +130,7 @@ class TestConsoleNodeResolution:
         nodes[0].node_name = "actual-container-name"
         test_db.commit()
 
-        mock_agent_client.get_agent_for_lab = AsyncMock(return_value=sample_host)
+        mock_agent_client.select_agent_for_lab = MagicMock(return_value=sample_host)
 
         captured_node_name = None
 
@@ -174,7 +180,7 @@ class TestConsoleReadinessWarning:
         nodes[0].is_ready = False
         test_db.commit()
 
-        mock_agent_client.get_agent_for_lab = AsyncMock(return_value=sample_host)
+        mock_agent_client.select_agent_for_lab = MagicMock(return_value=sample_host)
         mock_agent_client.get_agent_console_url = MagicMock(
             return_value="ws://agent:8080/console"
         )
@@ -248,7 +254,7 @@ topology:
             return None
 
         mock_agent_client.get_agent_by_name = mock_get_agent_by_name
-        mock_agent_client.get_agent_for_lab = AsyncMock(return_value=multiple_hosts[0])
+        mock_agent_client.select_agent_for_lab = MagicMock(return_value=multiple_hosts[0])
         mock_agent_client.get_agent_console_url = MagicMock(
             return_value="ws://agent:8080/console"
         )
@@ -5,8 +5,9 @@ import json
 import os
 import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -637,3 +638,108 @@ class TestSyncJobs:
         )
         assert response.status_code == 400
         assert "cannot cancel" in response.json()["detail"].lower()
+
+
+class TestSyncDeltaFallback:
+    """Tests for resending full archives when a layer delta can't be loaded."""
+
+    @pytest.mark.asyncio
+    async def test_resumable_push_resends_full_archive(
+        self, test_db: Session, sample_host: models.Host
+    ):
+        """A delta the agent can't load is resent without excluded layers."""
+        from app import image_codec
+        from app.routers import images
+
+        job = models.ImageSyncJob(
+            id="sync-job-delta", image_id="docker:test:1.0", host_id=sample_host.id,
+            status="transferring",
+        )
+        test_db.add(job)
+        test_db.commit()
+
+        manifests = []
+        loads = iter([
+            {"success": False, "error": "layer sha256:abc does not exist"},
+            {"success": True},
+        ])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/session"):
+                manifests.append(json.loads(request.content)["manifest"])
+                return httpx.Response(200, json={"job_id": job.id, "size": 4})
+            request.read()
+            return httpx.Response(200, json=next(loads))
+
+        async def archive(recipe, exclude, start=0):
+            yield b"data"
+
+        recipe = {"layers": ["l1", "l2"]}
+        with patch("app.routers.images._layer_delta_plan",
+                   AsyncMock(return_value=(recipe, {"l1"}))), \
+             patch("app.routers.images.image_layers.ensure_layer_cache",
+                   return_value=recipe) as full_recipe, \
+             patch("app.routers.images.image_layers.build_chunk_manifest",
+                   side_effect=lambda r, exclude: {"size": 4, "exclude": sorted(exclude)}), \
+             patch("app.routers.images._iter_archive_async", archive):
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                await images._push_image_resumable(
+                    client, sample_host, job, test_db, "docker:test:1.0", "test:1.0",
+                    image_codec.CODEC_IDENTITY,
+                )
+
+        assert [m["exclude"] for m in manifests] == [["l1"], []]
+        full_recipe.assert_called_once_with("test:1.0")
+        assert job.bytes_transferred == 4
+
+    @pytest.mark.asyncio
+    async def test_streamed_sync_resends_full_archive(
+        self, test_db: Session, sample_host: models.Host, monkeypatch
+    ):
+        """Agents without resumable receive also get the full archive after a failed delta."""
+        from app.config import settings
+        from app.routers import images
+
+        monkeypatch.setattr(settings, "image_sync_layer_cache", True)
+        job = models.ImageSyncJob(
+            id="sync-job-stream", image_id="docker:test:1.0", host_id=sample_host.id,
+            status="pending",
+        )
+        test_db.add(job)
+        test_db.commit()
+
+        sent = []
+        loads = iter([
+            {"success": False, "error": "layer sha256:abc does not exist"},
+            {"success": True},
+        ])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request.read())
+            return httpx.Response(200, json=next(loads))
+
+        async def archive(recipe, exclude, start=0):
+            yield b"full" if not exclude else b"delta"
+
+        real_client = httpx.AsyncClient
+        recipe = {"layers": ["l1", "l2"]}
+        with patch("app.db.SessionLocal", return_value=test_db), \
+             patch("app.agent_client.agent_supports_resumable_images", return_value=False), \
+             patch("app.agent_client.get_agent_image_codecs", return_value=[]), \
+             patch("app.routers.images.subprocess.run", return_value=MagicMock(returncode=1)), \
+             patch("app.routers.images._layer_delta_plan",
+                   AsyncMock(return_value=(recipe, {"l1"}))), \
+             patch("app.routers.images.image_layers.ensure_layer_cache", return_value=recipe), \
+             patch("app.routers.images.image_layers.archive_size",
+                   side_effect=lambda r, exclude: 5 if exclude else 4), \
+             patch("app.routers.images._iter_archive_async", archive), \
+             patch("app.routers.images.httpx.AsyncClient",
+                   lambda **kw: real_client(transport=httpx.MockTransport(handler))):
+            await images._execute_sync_job(
+                job.id, "docker:test:1.0", {"reference": "test:1.0"}, sample_host
+            )
+
+        job = test_db.get(models.ImageSyncJob, "sync-job-stream")
+        assert sent == [b"delta", b"full"]
+        assert job.status == "completed"
+        assert job.total_bytes == 4
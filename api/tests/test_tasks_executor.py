@@ -0,0 +1,249 @@
+"""Tests for app/tasks/executor.py - Durable job execution tier."""
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import redis
+
+from app.config import settings
+from app.tasks import executor
+
+
+async def _noop_job(job_id: str, lab_id: str, *args, **kwargs):
+    return None
+
+
+class TestLaneForAction:
+    """Tests for priority lane selection."""
+
+    def test_node_actions_use_high_lane(self):
+        assert executor.lane_for_action("node:start:r1") == executor.LANE_HIGH
+        assert executor.lane_for_action("sync:lab:a,b") == executor.LANE_HIGH
+
+    def test_lab_actions_use_default_lane(self):
+        assert executor.lane_for_action("up") == executor.LANE_DEFAULT
+        assert executor.lane_for_action("down") == executor.LANE_DEFAULT
+
+
+class TestSubmitJob:
+    """Tests for submit_job."""
+
+    @pytest.mark.asyncio
+    async def test_enqueues_on_lane(self, monkeypatch):
+        from app.tasks.jobs import run_agent_job
+
+        monkeypatch.setattr(settings, "job_executor", "queue")
+        with patch.object(executor, "_enqueue") as mock_enqueue:
+            executor.submit_job(
+                run_agent_job, "job-1", "lab-1", "node:start:r1",
+                action="node:start:r1", agent_id="agent-1", provider="docker",
+            )
+
+        spec = mock_enqueue.call_args.args[0]
+        assert spec["func"] == "app.tasks.jobs.run_agent_job"
+        assert spec["lane"] == executor.LANE_HIGH
+        assert spec["args"] == ["node:start:r1"]
+        assert spec["kwargs"] == {"provider": "docker"}
+        assert spec["agent_id"] == "agent-1"
+
+    @pytest.mark.asyncio
+    async def test_rejects_unknown_functions(self, monkeypatch):
+        monkeypatch.setattr(settings, "job_executor", "queue")
+        with pytest.raises(ValueError):
+            executor.submit_job(_noop_job, "job-1", "lab-1")
+
+    @pytest.mark.asyncio
+    async def test_runs_in_process_when_redis_unavailable(self, monkeypatch):
+        monkeypatch.setattr(settings, "job_executor", "queue")
+        mock_job = AsyncMock(__module__="app.tasks.jobs", __qualname__="run_agent_job")
+        with patch.object(executor, "_enqueue", side_effect=redis.ConnectionError("down")):
+            executor.submit_job(mock_job, "job-1", "lab-1", "up", action="up")
+            await asyncio.sleep(0)
+
+        mock_job.assert_awaited_once_with("job-1", "lab-1", "up")
+
+    @pytest.mark.asyncio
+    async def test_inprocess_mode_creates_task(self):
+        mock_job = AsyncMock()
+        executor.submit_job(mock_job, "job-1", "lab-1", "down", provider="docker")
+        await asyncio.sleep(0)
+        mock_job.assert_awaited_once_with("job-1", "lab-1", "down", provider="docker")
+
+
+class TestExecuteJob:
+    """Tests for the worker entry point."""
+
+    def _spec(self, **overrides) -> dict:
+        spec = {
+            "func": "app.tasks.jobs.run_agent_job",
+            "job_id": "job-1",
+            "lab_id": "lab-1",
+            "args": ["up"],
+            "kwargs": {"provider": "docker"},
+            "lane": executor.LANE_DEFAULT,
+            "agent_id": "agent-1",
+            "attempt": 0,
+        }
+        spec.update(overrides)
+        return spec
+
+    def test_defers_when_lab_is_busy(self, monkeypatch):
+        fake_redis = MagicMock()
+        fake_redis.eval.return_value = 0
+        monkeypatch.setattr(executor, "_get_redis", lambda: fake_redis)
+        monkeypatch.setattr(executor, "_job_still_queued", lambda job_id: True)
+
+        with patch.object(executor, "_enqueue") as mock_enqueue:
+            assert executor.execute_job(self._spec()) == "deferred"
+
+        spec = mock_enqueue.call_args.args[0]
+        assert spec["attempt"] == 1
+        assert mock_enqueue.call_args.kwargs["delay"] == settings.job_queue_retry_delay
+
+    def test_defers_and_releases_lab_when_agent_at_capacity(self, monkeypatch):
+        fake_redis = MagicMock()
+        # Lab lock acquired, agent slot refused, lab lock released
+        fake_redis.eval.side_effect = [1, 0, 1]
+        monkeypatch.setattr(executor, "_get_redis", lambda: fake_redis)
+        monkeypatch.setattr(executor, "_job_still_queued", lambda job_id: True)
+
+        with patch.object(executor, "_enqueue"):
+            assert executor.execute_job(self._spec()) == "deferred"
+
+        assert fake_redis.eval.call_args.args[0] == executor._RELEASE_LOCK
+
+    def test_runs_job_with_locks(self, monkeypatch):
+        from app.tasks import jobs
+
+        fake_redis = MagicMock()
+        fake_redis.eval.return_value = 1
+        monkeypatch.setattr(executor, "_get_redis", lambda: fake_redis)
+        monkeypatch.setattr(executor, "_job_still_queued", lambda job_id: True)
+        mock_job = AsyncMock()
+        monkeypatch.setattr(jobs, "run_agent_job", mock_job)
+
+        assert executor.execute_job(self._spec()) == "completed"
+
+        mock_job.assert_awaited_once_with("job-1", "lab-1", "up", provider="docker")
+        fake_redis.hdel.assert_called_with(executor.QUEUED_JOBS_KEY, "job-1")
+        fake_redis.zrem.assert_called_once()
+
+    def test_skips_jobs_no_longer_queued(self, monkeypatch):
+        fake_redis = MagicMock()
+        monkeypatch.setattr(executor, "_get_redis", lambda: fake_redis)
+        monkeypatch.setattr(executor, "_job_still_queued", lambda job_id: False)
+
+        assert executor.execute_job(self._spec()) == "skipped"
+        fake_redis.eval.assert_not_called()
+
+    def test_node_scoped_jobs_lock_lab_and_agent(self):
+        lab_key = executor._lab_lock_key("lab-1")
+
+        assert executor._lab_lock_keys(self._spec()) == [lab_key, f"{lab_key}:agents"]
+        assert executor._lab_lock_keys(
+            self._spec(func="app.tasks.jobs.run_node_sync", agent_id="agent-2")
+        ) == [lab_key, f"{lab_key}:agents", f"{lab_key}:agent:agent-2"]
+        # Without a target agent a node job still takes the whole lab
+        assert executor._lab_lock_keys(
+            self._spec(func="app.tasks.jobs.run_node_actions", agent_id=None)
+        ) == [lab_key, f"{lab_key}:agents"]
+
+    def test_clears_queue_entry_when_queued_check_fails(self, monkeypatch):
+        fake_redis = MagicMock()
+        monkeypatch.setattr(executor, "_get_redis", lambda: fake_redis)
+
+        def db_down(job_id):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(executor, "_job_still_queued", db_down)
+
+        with pytest.raises(RuntimeError):
+            executor.execute_job(self._spec())
+        fake_redis.hdel.assert_called_once_with(executor.QUEUED_JOBS_KEY, "job-1")
+
+    def test_clears_queue_entry_when_requeue_fails(self, monkeypatch):
+        fake_redis = MagicMock()
+        fake_redis.eval.return_value = 0
+        monkeypatch.setattr(executor, "_get_redis", lambda: fake_redis)
+        monkeypatch.setattr(executor, "_job_still_queued", lambda job_id: True)
+
+        with patch.object(executor, "_enqueue", side_effect=redis.ConnectionError("down")):
+            with pytest.raises(redis.ConnectionError):
+                executor.execute_job(self._spec())
+        fake_redis.hdel.assert_called_once_with(executor.QUEUED_JOBS_KEY, "job-1")
+
+
+class TestEnqueuedJobIds:
+    """Tests for the queued-job registry read by job_health."""
+
+    def test_stale_entries_are_not_enqueued(self, monkeypatch):
+        import time
+
+        monkeypatch.setattr(settings, "job_executor", "queue")
+        monkeypatch.setattr(settings, "job_queue_stale_after", 600)
+        now = time.time()
+        fake_redis = MagicMock()
+        fake_redis.hgetall.return_value = {
+            b"fresh": str(int(now - 30)).encode(),
+            b"lost": str(int(now - 3600)).encode(),
+        }
+        fake_redis.hget.side_effect = lambda key, job_id: fake_redis.hgetall.return_value.get(
+            job_id.encode()
+        )
+        monkeypatch.setattr(executor, "_get_redis", lambda: fake_redis)
+
+        assert executor.enqueued_job_ids() == {"fresh"}
+        fake_redis.hdel.assert_called_once_with(executor.QUEUED_JOBS_KEY, "lost")
+        assert executor.is_job_enqueued("fresh")
+        assert not executor.is_job_enqueued("lost")
+        assert not executor.is_job_enqueued("unknown")
+
+
+@pytest.fixture
+def lua_redis():
+    """In-memory Redis that executes Lua scripts."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis()
+
+
+class TestLabLockScripts:
+    """Tests for the lab lock Lua scripts."""
+
+    def _keys(self, func: str = "app.tasks.jobs.run_agent_job", agent_id: str | None = None):
+        return executor._lab_lock_keys(
+            {"func": func, "lab_id": "lab-1", "agent_id": agent_id}
+        )
+
+    def test_node_jobs_on_different_agents_run_together(self, lua_redis):
+        sync = "app.tasks.jobs.run_node_sync"
+        agent_1 = self._keys(sync, "agent-1")
+        agent_2 = self._keys(sync, "agent-2")
+
+        assert executor._acquire_lab_lock(lua_redis, agent_1, "t1")
+        assert executor._acquire_lab_lock(lua_redis, agent_2, "t2")
+        assert not executor._acquire_lab_lock(lua_redis, self._keys(sync, "agent-1"), "t3")
+        # A lab-wide job waits for both
+        assert not executor._acquire_lab_lock(lua_redis, self._keys(), "t4")
+
+        lua_redis.eval(executor._RELEASE_LOCK, len(agent_1), *agent_1, "t1")
+        assert not executor._acquire_lab_lock(lua_redis, self._keys(), "t4")
+        lua_redis.eval(executor._RELEASE_LOCK, len(agent_2), *agent_2, "t2")
+        assert executor._acquire_lab_lock(lua_redis, self._keys(), "t4")
+
+    def test_lab_wide_job_excludes_node_jobs(self, lua_redis):
+        lab = self._keys()
+        assert executor._acquire_lab_lock(lua_redis, lab, "t1")
+
+        assert not executor._acquire_lab_lock(
+            lua_redis, self._keys("app.tasks.jobs.run_node_actions", "agent-1"), "t2"
+        )
+        # Only the owner extends and releases
+        assert lua_redis.eval(executor._EXTEND_LOCK, len(lab), *lab, "other", 600, time.time()) == 0
+        assert lua_redis.eval(executor._EXTEND_LOCK, len(lab), *lab, "t1", 600, time.time()) == 1
+        assert lua_redis.ttl(lab[0]) > settings.job_queue_lock_ttl
+        assert lua_redis.eval(executor._RELEASE_LOCK, len(lab), *lab, "other") == 0
+        assert lua_redis.eval(executor._RELEASE_LOCK, len(lab), *lab, "t1") == 1
@@ -296,6 +296,174 @@ class TestPullImagesOnRegistration:
         await pull_images_on_registration("nonexistent-host", test_db)
 
 
+class TestDistributeImage:
+    """Tests for peer-to-peer fan-out in distribute_image."""
+
+    IMAGE = {"id": "docker:test:1.0", "kind": "docker", "reference": "test:1.0"}
+
+    def _make_hosts(self, test_db: Session, count: int) -> list[models.Host]:
+        hosts = []
+        for i in range(count):
+            host = models.Host(
+                id=f"fanout-{i}",
+                name=f"Fanout {i}",
+                address=f"fanout{i}.local:8080",
+                status="online",
+                capabilities="{}",
+                version="1.0.0",
+            )
+            test_db.add(host)
+            hosts.append(host)
+        test_db.commit()
+        return hosts
+
+    def _fake_executor(self, test_db: Session, sources: list, fail_from_peer: bool = False):
+        """Build fake controller and peer transfer coroutines."""
+        def finish(job_id: str, status: str):
+            job = test_db.get(models.ImageSyncJob, job_id)
+            job.status = status
+            test_db.commit()
+
+        async def controller(job_id, image_id, image, host):
+            sources.append((host.id, None))
+            await asyncio.sleep(0)
+            finish(job_id, "completed")
+
+        async def peer(job_id, image_id, reference, target, source):
+            sources.append((target.id, source.id))
+            await asyncio.sleep(0)
+            finish(job_id, "failed" if fail_from_peer else "completed")
+
+        return controller, peer
+
+    @pytest.mark.asyncio
+    async def test_completed_agents_become_sources(self, test_db: Session, monkeypatch):
+        """Targets beyond the controller's fan-out are served by finished agents."""
+        from app.tasks import image_sync
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "image_sync_max_concurrent", 2)
+        monkeypatch.setattr(settings, "image_sync_peer_enabled", True)
+        hosts = self._make_hosts(test_db, 5)
+        sources: list = []
+        controller, peer = self._fake_executor(test_db, sources)
+
+        with patch("app.tasks.image_sync.load_manifest", return_value={"images": [self.IMAGE]}), \
+             patch("app.routers.images._execute_sync_job", controller), \
+             patch("app.tasks.image_sync._execute_peer_sync_job", peer):
+            results = await image_sync.distribute_image(
+                "docker:test:1.0", [h.id for h in hosts], test_db
+            )
+
+        assert all(ok for ok, _ in results.values())
+        from_controller = [target for target, source in sources if source is None]
+        assert len(from_controller) == 2
+        assert len(sources) == 5
+
+        jobs = test_db.query(models.ImageSyncJob).all()
+        assert len(jobs) == 5
+        assert sum(1 for job in jobs if job.source_host_id is not None) == 3
+
+    @pytest.mark.asyncio
+    async def test_prefers_existing_peer_over_controller(self, test_db: Session, monkeypatch):
+        """An online agent that already has the image serves first."""
+        from app.tasks import image_sync
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "image_sync_peer_enabled", True)
+        seed, target = self._make_hosts(test_db, 2)
+        test_db.add(models.ImageHost(
+            image_id="docker:test:1.0", host_id=seed.id, reference="test:1.0", status="synced",
+        ))
+        test_db.commit()
+        sources: list = []
+        controller, peer = self._fake_executor(test_db, sources)
+
+        with patch("app.tasks.image_sync.load_manifest", return_value={"images": [self.IMAGE]}), \
+             patch("app.routers.images._execute_sync_job", controller), \
+             patch("app.tasks.image_sync._execute_peer_sync_job", peer):
+            results = await image_sync.distribute_image("docker:test:1.0", [target.id], test_db)
+
+        assert results[target.id] == (True, None)
+        assert sources == [(target.id, seed.id)]
+
+    @pytest.mark.asyncio
+    async def test_failed_peer_transfer_falls_back_to_controller(self, test_db: Session, monkeypatch):
+        """A target whose peer transfer fails is retried from the controller."""
+        from app.tasks import image_sync
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "image_sync_peer_enabled", True)
+        seed, target = self._make_hosts(test_db, 2)
+        test_db.add(models.ImageHost(
+            image_id="docker:test:1.0", host_id=seed.id, reference="test:1.0", status="synced",
+        ))
+        test_db.commit()
+        sources: list = []
+        controller, peer = self._fake_executor(test_db, sources, fail_from_peer=True)
+
+        with patch("app.tasks.image_sync.load_manifest", return_value={"images": [self.IMAGE]}), \
+             patch("app.routers.images._execute_sync_job", controller), \
+             patch("app.tasks.image_sync._execute_peer_sync_job", peer):
+            results = await image_sync.distribute_image("docker:test:1.0", [target.id], test_db)
+
+        assert results[target.id] == (True, None)
+        assert sources == [(target.id, seed.id), (target.id, None)]
+
+
+class TestExecutePeerSyncJob:
+    """Tests for progress tracking of peer-to-peer transfers."""
+
+    async def _run(self, test_db: Session, progress: list[dict], monkeypatch) -> models.ImageSyncJob:
+        from app.config import settings
+        from app.tasks import image_sync
+
+        monkeypatch.setattr(settings, "image_sync_peer_poll_interval", 0.01)
+        monkeypatch.setattr(settings, "image_sync_timeout", 0.05)
+        source = models.Host(id="peer-src", name="src", address="src:8080", status="online")
+        target = models.Host(id="peer-dst", name="dst", address="dst:8080", status="online")
+        job = models.ImageSyncJob(
+            id=str(uuid4()), image_id="docker:test:1.0", host_id=target.id, status="pending",
+        )
+        test_db.add_all([source, target, job])
+        test_db.commit()
+        job_id = job.id
+
+        polls = iter(progress)
+        with patch("app.tasks.image_sync.SessionLocal", return_value=test_db), \
+             patch("app.tasks.image_sync.agent_client.start_image_pull_on_agent",
+                   AsyncMock(return_value="pull-1")), \
+             patch("app.tasks.image_sync.agent_client.get_image_pull_progress",
+                   AsyncMock(side_effect=lambda *a: next(polls, progress[-1]))):
+            await image_sync._execute_peer_sync_job(
+                job_id, "docker:test:1.0", "test:1.0", target, source
+            )
+        return test_db.get(models.ImageSyncJob, job_id)
+
+    @pytest.mark.asyncio
+    async def test_slow_transfer_that_keeps_progressing_completes(self, test_db: Session, monkeypatch):
+        """Transfers longer than image_sync_timeout succeed while bytes keep arriving."""
+        progress = [
+            {"status": "transferring", "bytes_transferred": n * 100, "total_bytes": 2000}
+            for n in range(20)
+        ] + [{"status": "completed", "bytes_transferred": 2000, "total_bytes": 2000}]
+
+        job = await self._run(test_db, progress, monkeypatch)
+
+        assert job.status == "completed"
+        assert job.bytes_transferred == 2000
+
+    @pytest.mark.asyncio
+    async def test_stalled_transfer_fails(self, test_db: Session, monkeypatch):
+        """A transfer whose verified offset stops moving is failed."""
+        progress = [{"status": "transferring", "bytes_transferred": 500, "total_bytes": 2000}]
+
+        job = await self._run(test_db, progress, monkeypatch)
+
+        assert job.status == "failed"
+        assert "stalled at 500 bytes" in job.error_message
+
+
 class TestGetImagesFromTopology:
     """Tests for the get_images_from_topology function."""
 
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import asyncio
+import json
 from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
@@ -195,6 +196,36 @@ class TestCheckStuckImageSyncJobs:
             test_db.refresh(job)
             assert job.status == "failed"
 
+    @pytest.mark.asyncio
+    async def test_keeps_slow_transfer_that_makes_progress(self, test_db: Session, sample_host: models.Host, monkeypatch):
+        """Should not fail a long-running transfer that is still progressing."""
+        from app.tasks import job_health
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "image_sync_timeout", 300)
+
+        job = models.ImageSyncJob(
+            id=str(uuid4()),
+            image_id="docker:test:1.0",
+            host_id=sample_host.id,
+            status="transferring",
+            bytes_transferred=1000,
+            started_at=datetime.now(timezone.utc) - timedelta(minutes=30),
+        )
+        test_db.add(job)
+        test_db.commit()
+        monkeypatch.setitem(
+            job_health._image_sync_progress,
+            job.id,
+            (500, datetime.now(timezone.utc) - timedelta(minutes=1)),
+        )
+
+        job_id = job.id
+        with patch("app.tasks.job_health.SessionLocal", return_value=test_db):
+            await job_health.check_stuck_image_sync_jobs()
+
+        assert test_db.get(models.ImageSyncJob, job_id).status == "transferring"
+
     @pytest.mark.asyncio
     async def test_marks_job_failed_when_host_offline(self, test_db: Session, offline_host: models.Host):
         """Should mark sync job as failed when target host is offline."""
@@ -226,25 +257,23 @@ class TestJobHealthMonitor:
         """Should run all health check functions each iteration."""
         from app.tasks.job_health import job_health_monitor
 
-        with patch("app.tasks.job_health.check_stuck_jobs", new_callable=AsyncMock) as mock_stuck:
-            with patch("app.tasks.job_health.check_orphaned_queued_jobs", new_callable=AsyncMock) as mock_orphaned:
-                with patch("app.tasks.job_health.check_jobs_on_offline_agents", new_callable=AsyncMock) as mock_offline:
-                    with patch("app.tasks.job_health.check_stuck_image_sync_jobs", new_callable=AsyncMock) as mock_sync:
-                        with patch("app.tasks.job_health.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
-                            call_count = 0
-                            async def sleep_and_cancel(seconds):
-                                nonlocal call_count
-                                call_count += 1
-                                if call_count > 1:
-                                    raise asyncio.CancelledError()
-                            mock_sleep.side_effect = sleep_and_cancel
-
-                            await job_health_monitor()
-
-                            mock_stuck.assert_called_once()
-                            mock_orphaned.assert_called_once()
-                            mock_offline.assert_called_once()
-                            mock_sync.assert_called_once()
+        with patch("app.tasks.job_health.sweep_jobs", new_callable=AsyncMock) as mock_sweep:
+            with patch("app.tasks.job_health.check_stuck_image_sync_jobs", new_callable=AsyncMock) as mock_sync:
+                with patch("app.tasks.job_health.check_stuck_locks", new_callable=AsyncMock) as mock_locks:
+                    with patch("app.tasks.job_health.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+                        call_count = 0
+                        async def sleep_and_cancel(seconds):
+                            nonlocal call_count
+                            call_count += 1
+                            if call_count > 1:
+                                raise asyncio.CancelledError()
+                        mock_sleep.side_effect = sleep_and_cancel
+
+                        await job_health_monitor()
+
+                        mock_sweep.assert_called_once()
+                        mock_sync.assert_called_once()
+                        mock_locks.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_stops_on_cancelled_error(self):
@@ -261,28 +290,120 @@ class TestJobHealthMonitor:
         """Should continue running after handling an exception."""
         from app.tasks.job_health import job_health_monitor
 
-        with patch("app.tasks.job_health.check_stuck_jobs", new_callable=AsyncMock) as mock_stuck:
+        with patch("app.tasks.job_health.sweep_jobs", new_callable=AsyncMock) as mock_sweep:
             call_count = 0
             async def check_with_error():
                 nonlocal call_count
                 call_count += 1
                 if call_count == 1:
                     raise Exception("Test error")
-            mock_stuck.side_effect = check_with_error
+            mock_sweep.side_effect = check_with_error
+
+            with patch("app.tasks.job_health.check_stuck_locks", new_callable=AsyncMock):
+                with patch("app.tasks.job_health.check_stuck_image_sync_jobs", new_callable=AsyncMock):
+                    with patch("app.tasks.job_health.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+                        sleep_count = 0
+                        async def sleep_and_cancel(seconds):
+                            nonlocal sleep_count
+                            sleep_count += 1
+                            if sleep_count > 2:
+                                raise asyncio.CancelledError()
+                        mock_sleep.side_effect = sleep_and_cancel
+
+                        await job_health_monitor()
+
+
+class TestSweepJobs:
+    """Tests for the single-pass sweep_jobs function."""
+
+    def _job(self, test_db, lab, **fields) -> models.Job:
+        job = models.Job(id=str(uuid4()), lab_id=lab.id, action="up", **fields)
+        test_db.add(job)
+        test_db.commit()
+        return job
+
+    @pytest.mark.asyncio
+    async def test_classifies_each_rule_in_one_pass(
+        self, test_db: Session, sample_lab: models.Lab, sample_host: models.Host, offline_host: models.Host
+    ):
+        """Should act on offline-agent, stuck and orphaned jobs, skipping healthy ones."""
+        from app.tasks.job_health import sweep_jobs
+
+        lab_id = sample_lab.id
+        long_ago = datetime.now(timezone.utc) - timedelta(hours=3)
+        self._job(test_db, sample_lab, status="running", agent_id=offline_host.id,
+                  started_at=datetime.now(timezone.utc))
+        self._job(test_db, sample_lab, status="running", agent_id=sample_host.id, started_at=long_ago)
+        self._job(test_db, sample_lab, status="queued", created_at=long_ago)
+        self._job(test_db, sample_lab, status="running", agent_id=sample_host.id,
+                  started_at=datetime.now(timezone.utc))
+
+        with patch("app.tasks.job_health.SessionLocal", return_value=test_db), \
+                patch("app.tasks.job_health.enqueued_job_ids", return_value=set()), \
+                patch("app.tasks.job_health._retry_job", new_callable=AsyncMock) as mock_retry, \
+                patch("app.tasks.job_health.agent_client.release_agent_lock",
+                      new_callable=AsyncMock, return_value={"status": "cleared"}) as mock_release:
+            counts = await sweep_jobs()
+
+        assert counts == {"offline_agent": 1, "orphaned": 1, "stuck": 1}
+        assert mock_retry.await_count == 3
+        assert all(call.kwargs["release_lock"] is False for call in mock_retry.await_args_list)
+        # Only the stuck job on the online agent needs its lock released
+        mock_release.assert_awaited_once()
+        assert mock_release.await_args.args[1] == lab_id
+
+    @pytest.mark.asyncio
+    async def test_releases_locks_concurrently(
+        self, test_db: Session, sample_lab: models.Lab, sample_host: models.Host, test_user: models.User
+    ):
+        """Lock releases for several retried jobs should overlap, not run one by one."""
+        from app.tasks.job_health import sweep_jobs
+
+        other_lab = models.Lab(name="Other Lab", owner_id=test_user.id, provider="docker")
+        test_db.add(other_lab)
+        test_db.commit()
+        long_ago = datetime.now(timezone.utc) - timedelta(hours=3)
+        for lab in (sample_lab, other_lab):
+            self._job(test_db, lab, status="running", agent_id=sample_host.id, started_at=long_ago)
+
+        in_flight = 0
+        peak = 0
+
+        async def slow_release(agent, lab_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return {"status": "cleared"}
+
+        with patch("app.tasks.job_health.SessionLocal", return_value=test_db), \
+                patch("app.tasks.job_health._retry_job", new_callable=AsyncMock), \
+                patch("app.tasks.job_health.agent_client.release_agent_lock", side_effect=slow_release):
+            await sweep_jobs()
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_records_stats(self, test_db: Session, sample_lab: models.Lab):
+        """Should count actions per rule and record sweep latency."""
+        from app.tasks.job_health import get_job_health_stats, sweep_jobs
+
+        before = get_job_health_stats()
+        self._job(test_db, sample_lab, status="queued", retry_count=99,
+                  created_at=datetime.now(timezone.utc) - timedelta(hours=1))
 
-            with patch("app.tasks.job_health.check_orphaned_queued_jobs", new_callable=AsyncMock):
-                with patch("app.tasks.job_health.check_jobs_on_offline_agents", new_callable=AsyncMock):
-                    with patch("app.tasks.job_health.check_stuck_image_sync_jobs", new_callable=AsyncMock):
-                        with patch("app.tasks.job_health.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
-                            sleep_count = 0
-                            async def sleep_and_cancel(seconds):
-                                nonlocal sleep_count
-                                sleep_count += 1
-                                if sleep_count > 2:
-                                    raise asyncio.CancelledError()
-                            mock_sleep.side_effect = sleep_and_cancel
+        with patch("app.tasks.job_health.SessionLocal", return_value=test_db), \
+                patch("app.tasks.job_health.enqueued_job_ids", return_value=set()), \
+                patch("app.tasks.job_health._fail_job", new_callable=AsyncMock):
+            await sweep_jobs()
 
-                            await job_health_monitor()
+        after = get_job_health_stats()
+        assert after["sweeps"] == before["sweeps"] + 1
+        assert after["rules"]["orphaned"] == before["rules"]["orphaned"] + 1
+        assert after["failed"] == before["failed"] + 1
+        assert after["last_sweep_seconds"] is not None
+        assert after["last_sweep_jobs"] == 1
 
 
 class TestRetryJob:
@@ -335,3 +456,97 @@ class TestFailJob:
         test_db.refresh(sample_lab)
         assert sample_lab.state == "error"
         assert sample_lab.state_error is not None
+
+
+class TestCheckpointJobs:
+    """Retries and failures of "checkpoint" jobs resolve their checkpoint."""
+
+    def _checkpoint_job(self, test_db: Session, lab: models.Lab) -> tuple[models.Job, models.LabCheckpoint]:
+        checkpoint = models.LabCheckpoint(lab_id=lab.id, name="ckpt", provider="docker")
+        test_db.add(checkpoint)
+        test_db.flush()
+        job = models.Job(
+            lab_id=lab.id, action="checkpoint", status="running",
+            params_json=json.dumps({"checkpoint_id": checkpoint.id}),
+        )
+        test_db.add(job)
+        test_db.commit()
+        return job, checkpoint
+
+    @pytest.mark.asyncio
+    async def test_retry_resubmits_checkpoint(
+        self, test_db: Session, sample_lab: models.Lab, sample_host: models.Host
+    ):
+        from app.tasks.job_health import _retry_job
+
+        job, checkpoint = self._checkpoint_job(test_db, sample_lab)
+
+        with patch("app.tasks.job_health.agent_client.get_healthy_agent",
+                   new_callable=AsyncMock, return_value=sample_host), \
+                patch("app.tasks.executor.submit_job") as mock_submit:
+            await _retry_job(test_db, job, release_lock=False)
+
+        mock_submit.assert_called_once()
+        assert mock_submit.call_args.args[0].__name__ == "run_lab_checkpoint"
+        assert mock_submit.call_args.args[3] == checkpoint.id
+        retry = test_db.query(models.Job).filter(models.Job.status == "queued").one()
+        assert retry.params_json == job.params_json
+
+    @pytest.mark.asyncio
+    async def test_retry_of_up_keeps_checkpoint_id(
+        self, test_db: Session, sample_lab: models.Lab, sample_host: models.Host
+    ):
+        from app.tasks.job_health import _trigger_job_execution
+
+        job = models.Job(
+            lab_id=sample_lab.id, action="up", status="queued",
+            params_json=json.dumps({"checkpoint_id": "ckpt-1"}),
+        )
+        test_db.add(job)
+        test_db.commit()
+
+        with patch("app.tasks.job_health.agent_client.get_healthy_agent",
+                   new_callable=AsyncMock, return_value=sample_host), \
+                patch("app.services.topology.TopologyService.has_nodes", return_value=True), \
+                patch("app.tasks.executor.submit_job") as mock_submit:
+            await _trigger_job_execution(test_db, job)
+
+        assert mock_submit.call_args.kwargs["checkpoint_id"] == "ckpt-1"
+
+    @pytest.mark.asyncio
+    async def test_failing_job_fails_checkpoint(self, test_db: Session, sample_lab: models.Lab):
+        from app.tasks.job_health import _fail_job
+
+        job, checkpoint = self._checkpoint_job(test_db, sample_lab)
+
+        await _fail_job(test_db, job, reason="Job timed out")
+
+        test_db.refresh(checkpoint)
+        assert checkpoint.status == "failed"
+        assert checkpoint.error_message == "Job timed out"
+
+
+class TestEnforcementJobRetry:
+    """Retries of state enforcement ("nodes:enforce") jobs."""
+
+    @pytest.mark.asyncio
+    async def test_retry_targets_recorded_agent_and_nodes(
+        self, test_db: Session, sample_lab: models.Lab, sample_host: models.Host
+    ):
+        from app.tasks.job_health import _trigger_job_execution
+
+        job = models.Job(
+            lab_id=sample_lab.id, action="nodes:enforce", status="queued",
+            params_json=json.dumps({"agent_id": "agent-9", "node_ids": ["r1", "r2"]}),
+        )
+        test_db.add(job)
+        test_db.commit()
+
+        with patch("app.tasks.job_health.agent_client.get_healthy_agent",
+                   new_callable=AsyncMock, return_value=sample_host), \
+                patch("app.tasks.executor.submit_job") as mock_submit:
+            await _trigger_job_execution(test_db, job)
+
+        assert mock_submit.call_args.args[0].__name__ == "run_node_actions"
+        assert mock_submit.call_args.args[3:] == ("agent-9", ["r1", "r2"])
+        assert mock_submit.call_args.kwargs["agent_id"] == "agent-9"
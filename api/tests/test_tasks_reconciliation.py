@@ -110,15 +110,19 @@ class TestReconcileLabStates:
     """Tests for the reconcile_lab_states function."""
 
     @pytest.mark.asyncio
-    async def test_handles_no_labs_to_reconcile(self, test_db: Session):
+    async def test_handles_no_labs_to_reconcile(self, test_db: Session, test_async_sessionmaker):
         """Should complete without error when no labs need reconciliation."""
         from app.tasks.reconciliation import reconcile_lab_states
 
-        with patch("app.tasks.reconciliation.SessionLocal", return_value=test_db):
+        with patch("app.tasks.reconciliation.AsyncSessionLocal", test_async_sessionmaker), \
+                patch("app.tasks.reconciliation.SessionLocal", return_value=test_db):
             await reconcile_lab_states()
 
     @pytest.mark.asyncio
-    async def test_skips_lab_with_active_job(self, test_db: Session, sample_lab: models.Lab, running_job: models.Job):
+    async def test_skips_lab_with_active_job(
+        self, test_db: Session, test_async_sessionmaker, sample_lab: models.Lab,
+        running_job: models.Job,
+    ):
         """Should skip labs that have active jobs within timeout."""
         from app.tasks.reconciliation import reconcile_lab_states
 
@@ -126,13 +130,41 @@ class TestReconcileLabStates:
         sample_lab.state = "starting"
         test_db.commit()
 
-        with patch("app.tasks.reconciliation.SessionLocal", return_value=test_db):
+        with patch("app.tasks.reconciliation.AsyncSessionLocal", test_async_sessionmaker), \
+                patch("app.tasks.reconciliation.SessionLocal", return_value=test_db):
             with patch("app.tasks.reconciliation._reconcile_single_lab", new_callable=AsyncMock) as mock_reconcile:
                 await reconcile_lab_states()
                 # Should not call reconcile for this lab
                 # (it has an active job)
 
 
+    @pytest.mark.asyncio
+    async def test_sweep_finds_labs_and_unready_nodes(
+        self, test_db: Session, test_async_sessionmaker, sample_lab: models.Lab
+    ):
+        """The async sweep hands lab IDs and unready node IDs to the sync pass."""
+        from app.tasks.reconciliation import reconcile_lab_states
+
+        node = models.NodeState(
+            lab_id=sample_lab.id, node_id="r1", node_name="r1",
+            desired_state="running", actual_state="running", is_ready=False,
+        )
+        test_db.add(node)
+        test_db.commit()
+        lab_id, node_id = sample_lab.id, node.id
+
+        with patch("app.tasks.reconciliation.AsyncSessionLocal", test_async_sessionmaker), \
+                patch("app.tasks.reconciliation.SessionLocal", return_value=test_db), \
+                patch("app.tasks.reconciliation._check_readiness_for_nodes",
+                      new_callable=AsyncMock) as mock_readiness, \
+                patch("app.tasks.reconciliation._reconcile_single_lab",
+                      new_callable=AsyncMock) as mock_reconcile:
+            await reconcile_lab_states()
+
+        assert [ns.id for ns in mock_readiness.call_args.args[1]] == [node_id]
+        mock_reconcile.assert_awaited_once_with(test_db, lab_id)
+
+
 class TestReconcileSingleLab:
     """Tests for the _reconcile_single_lab function."""
 
@@ -0,0 +1,195 @@
+"""Tests for app/tasks/state_enforcement.py - Batched state enforcement."""
+from __future__ import annotations
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def _node(test_db: Session, lab: models.Lab, name: str, desired: str, actual: str,
+          host_id: str | None = None) -> models.NodeState:
+    test_db.add(models.Node(
+        lab_id=lab.id, gui_id=name, display_name=name, container_name=name,
+        device="linux", host_id=host_id,
+    ))
+    state = models.NodeState(
+        lab_id=lab.id, node_id=name, node_name=name,
+        desired_state=desired, actual_state=actual,
+    )
+    test_db.add(state)
+    test_db.commit()
+    return state
+
+
+@pytest.fixture
+def fake_redis():
+    redis_client = MagicMock()
+    redis_client.mget.side_effect = lambda keys: [None] * len(keys)
+    with patch("app.tasks.state_enforcement._get_redis", return_value=redis_client):
+        yield redis_client
+
+
+@pytest.fixture
+def online_agents():
+    with patch(
+        "app.tasks.state_enforcement.agent_client.is_agent_online",
+        side_effect=lambda host: host.status == "online",
+    ):
+        yield
+
+
+@pytest.mark.usefixtures("online_agents")
+class TestEnforceLabStates:
+    """Tests for enforce_lab_states."""
+
+    @pytest.mark.asyncio
+    async def test_one_sync_job_per_agent(
+        self, test_db: Session, test_async_sessionmaker, sample_lab: models.Lab,
+        multiple_hosts, fake_redis,
+    ):
+        """Mismatches on the same agent are corrected by a single job."""
+        from app.tasks.state_enforcement import enforce_lab_states
+
+        lab_id = sample_lab.id
+        for name in ("r1", "r2", "r3"):
+            _node(test_db, sample_lab, name, "running", "stopped", host_id="agent-1")
+        _node(test_db, sample_lab, "r4", "stopped", "running", host_id="agent-2")
+        _node(test_db, sample_lab, "r5", "running", "error", host_id="agent-1")
+
+        with patch("app.tasks.state_enforcement.AsyncSessionLocal", test_async_sessionmaker), \
+                patch("app.tasks.executor.submit_job") as mock_submit:
+            await enforce_lab_states()
+
+        jobs = test_db.query(models.Job).filter(models.Job.lab_id == lab_id).all()
+        assert {job.action for job in jobs} == {"nodes:enforce"}
+        assert sorted(json.loads(job.params_json)["node_ids"] for job in jobs) == [
+            ["r1", "r2", "r3"],
+            ["r4"],
+        ]
+        assert mock_submit.call_count == 2
+        assert {call.args[0].__name__ for call in mock_submit.call_args_list} == {"run_node_actions"}
+        submitted = {call.args[3]: call.args[4] for call in mock_submit.call_args_list}
+        assert submitted == {"agent-1": ["r1", "r2", "r3"], "agent-2": ["r4"]}
+
+        # One MGET for all cooldowns, one pipeline to set them
+        fake_redis.mget.assert_called_once()
+        assert len(fake_redis.mget.call_args.args[0]) == 4
+        fake_redis.pipeline.return_value.execute.assert_called_once()
+
+        # Starts get a placement on the chosen agent
+        placements = test_db.query(models.NodePlacement).filter(
+            models.NodePlacement.lab_id == lab_id
+        ).all()
+        assert {p.node_name: p.host_id for p in placements} == {
+            "r1": "agent-1", "r2": "agent-1", "r3": "agent-1",
+        }
+
+    @pytest.mark.asyncio
+    async def test_skips_cooldowns_and_busy_nodes(
+        self, test_db: Session, test_async_sessionmaker, sample_lab: models.Lab,
+        multiple_hosts, fake_redis,
+    ):
+        """Nodes on cooldown or with an active job are left alone."""
+        from app.tasks.state_enforcement import _cooldown_key, enforce_lab_states
+
+        lab_id = sample_lab.id
+        for name in ("r1", "r2", "r3"):
+            _node(test_db, sample_lab, name, "running", "stopped", host_id="agent-1")
+        _node(test_db, sample_lab, "r4", "running", "stopped", host_id="agent-1")
+        test_db.add(models.Job(lab_id=lab_id, action="node:start:r2", status="running"))
+        test_db.add(models.Job(
+            lab_id=lab_id, action="nodes:enforce", status="queued",
+            params_json=json.dumps({"agent_id": "agent-1", "node_ids": ["r4"]}),
+        ))
+        test_db.commit()
+        cooling = _cooldown_key(lab_id, "r1").encode()
+        fake_redis.mget.side_effect = lambda keys: [
+            b"1" if key.encode() == cooling else None for key in keys
+        ]
+
+        with patch("app.tasks.state_enforcement.AsyncSessionLocal", test_async_sessionmaker), \
+                patch("app.tasks.executor.submit_job") as mock_submit:
+            await enforce_lab_states()
+
+        mock_submit.assert_called_once()
+        assert mock_submit.call_args.args[4] == ["r3"]
+
+    @pytest.mark.asyncio
+    async def test_skips_lab_with_active_deploy(
+        self, test_db: Session, test_async_sessionmaker, sample_lab: models.Lab,
+        multiple_hosts, fake_redis,
+    ):
+        """A lab-wide deploy/destroy blocks enforcement for the whole lab."""
+        from app.tasks.state_enforcement import enforce_lab_states
+
+        _node(test_db, sample_lab, "r1", "running", "stopped", host_id="agent-1")
+        test_db.add(models.Job(lab_id=sample_lab.id, action="up", status="queued"))
+        test_db.commit()
+
+        with patch("app.tasks.state_enforcement.AsyncSessionLocal", test_async_sessionmaker), \
+                patch("app.tasks.executor.submit_job") as mock_submit:
+            await enforce_lab_states()
+
+        mock_submit.assert_not_called()
+        fake_redis.pipeline.assert_not_called()
+
+
+@pytest.mark.usefixtures("online_agents")
+class TestRunNodeActions:
+    """Tests for the run_node_actions job used by enforcement."""
+
+    @pytest.mark.asyncio
+    async def test_starts_and_stops_in_bulk(
+        self, test_db: Session, sample_lab: models.Lab, multiple_hosts
+    ):
+        """Crashed nodes are started in place and running ones stopped, without a redeploy."""
+        from unittest.mock import AsyncMock
+
+        from app.tasks.jobs import run_node_actions
+
+        lab_id = sample_lab.id
+        _node(test_db, sample_lab, "r1", "running", "exited", host_id="agent-1")
+        _node(test_db, sample_lab, "r2", "running", "stopped", host_id="agent-1")
+        _node(test_db, sample_lab, "r3", "stopped", "running", host_id="agent-1")
+        job = models.Job(lab_id=lab_id, action="nodes:enforce", status="queued")
+        test_db.add(job)
+        test_db.commit()
+        job_id = job.id
+
+        async def bulk(agent, job_id, lab_id, names, action):
+            return {
+                name: {"success": name != "r2", "error": None if name != "r2" else "boom"}
+                for name in names
+            }
+
+        with patch("app.tasks.jobs.SessionLocal", return_value=test_db), \
+                patch("app.tasks.jobs.agent_client.bulk_node_action_on_agent",
+                      side_effect=bulk) as mock_bulk, \
+                patch("app.tasks.jobs.agent_client.deploy_to_agent",
+                      new_callable=AsyncMock) as mock_deploy:
+            await run_node_actions(job_id, lab_id, "agent-1", ["r1", "r2", "r3"])
+
+        assert [(c.args[3], c.args[4]) for c in mock_bulk.call_args_list] == [
+            (["r1", "r2"], "start"),
+            (["r3"], "stop"),
+        ]
+        mock_deploy.assert_not_called()
+
+        states = {
+            ns.node_name: ns
+            for ns in test_db.query(models.NodeState).filter(
+                models.NodeState.lab_id == lab_id
+            )
+        }
+        assert states["r1"].actual_state == "running"
+        assert states["r1"].boot_started_at is not None
+        assert states["r2"].actual_state == "error"
+        assert states["r2"].error_message == "boom"
+        assert states["r3"].actual_state == "stopped"
+        job = test_db.get(models.Job, job_id)
+        assert job.status == "failed"
+        assert job.agent_id == "agent-1"
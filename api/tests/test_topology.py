@@ -1001,3 +1001,55 @@ def test_external_network_node_in_topology():
 
 # To run these tests:
 # cd api && pytest tests/test_topology.py -v
+
+
+# --- Incremental Deploy Diff Tests ---
+
+def _deploy_topology(names: list[str], links: list[tuple[str, str]]) -> dict:
+    return {
+        "nodes": [{"name": name, "kind": "linux"} for name in names],
+        "links": [
+            {"source_node": a, "source_interface": "eth1", "target_node": b, "target_interface": "eth2"}
+            for a, b in links
+        ],
+    }
+
+
+def test_diff_deploy_topology_adds_only_new_nodes_and_links():
+    """Adding a router to a running lab touches only that router and its links."""
+    from app.services.topology import diff_deploy_topology
+
+    desired = _deploy_topology(["r1", "r2", "r3"], [("r1", "r2"), ("r2", "r3")])
+    live = {"r1": "running", "r2": "running"}
+
+    diff = diff_deploy_topology(desired, live, {"r1", "r2", "r3"}, redeploy={"r3"})
+
+    assert [n["name"] for n in diff["add_nodes"]] == ["r3"]
+    assert [(l["source_node"], l["target_node"]) for l in diff["add_links"]] == [("r2", "r3")]
+    assert diff["remove_nodes"] == []
+
+
+def test_diff_deploy_topology_recreates_stopped_redeploy_nodes():
+    """A node being deployed whose container exists but isn't running is recreated."""
+    from app.services.topology import diff_deploy_topology
+
+    desired = _deploy_topology(["r1", "r2"], [("r1", "r2")])
+    live = {"r1": "running", "r2": "stopped"}
+
+    diff = diff_deploy_topology(desired, live, {"r1", "r2"}, redeploy={"r1", "r2"})
+
+    assert [n["name"] for n in diff["add_nodes"]] == ["r2"]
+    assert len(diff["add_links"]) == 1
+
+
+def test_diff_deploy_topology_removes_only_nodes_gone_from_lab():
+    """Live nodes outside this agent's subset are kept unless deleted from the lab."""
+    from app.services.topology import diff_deploy_topology
+
+    desired = _deploy_topology(["r1"], [])
+    live = {"r1": "running", "r2": "running", "old": "running"}
+
+    diff = diff_deploy_topology(desired, live, {"r1", "r2"})
+
+    assert diff["add_nodes"] == []
+    assert diff["remove_nodes"] == ["old"]
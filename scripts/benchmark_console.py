@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Benchmark the agent's docker console output path.
+
+Compares the previous transport (a reader woken by wait_for() every
+console_read_timeout, one WebSocket frame per read) with the event-driven
+path using OutputCoalescer, over socketpairs standing in for docker exec
+sockets:
+
+- idle: CPU time per idle console session per second
+- bulk: throughput and frame count for `show tech`-sized output written
+  in small pieces, as devices do
+
+Usage:
+    cd agent
+    python ../scripts/benchmark_console.py
+    python ../scripts/benchmark_console.py --sessions 300 --idle-seconds 10 --bulk-mb 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add repo root to path for agent imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.config import settings  # noqa: E402
+from agent.console.coalesce import OutputCoalescer  # noqa: E402
+
+LINE = b"GigabitEthernet0/0/1 is up, line protocol is up (connected)\r\n"
+
+
+class FrameSink:
+    """Counts frames, standing in for WebSocket.send_bytes."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.frames += 1
+        self.bytes += len(data)
+        await asyncio.sleep(0)
+
+
+async def polling_reader(sock: socket.socket, sink: FrameSink, stop: asyncio.Event) -> None:
+    """The previous docker console reader: timed wakeups, one frame per read."""
+    loop = asyncio.get_running_loop()
+    data_available = asyncio.Event()
+    loop.add_reader(sock.fileno(), data_available.set)
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(data_available.wait(), timeout=settings.console_read_timeout)
+            except asyncio.TimeoutError:
+                continue
+            data_available.clear()
+            try:
+                data = sock.recv(4096)
+            except BlockingIOError:
+                continue
+            if not data:
+                break
+            await sink.send_bytes(data)
+    finally:
+        loop.remove_reader(sock.fileno())
+
+
+async def event_reader(sock: socket.socket, sink: FrameSink, stop: asyncio.Event) -> None:
+    """The event-driven reader used by _console_websocket_docker."""
+    loop = asyncio.get_running_loop()
+    closed = loop.create_future()
+
+    def on_readable():
+        try:
+            data = sock.recv(settings.console_read_size)
+        except BlockingIOError:
+            return
+        if not data:
+            loop.remove_reader(sock.fileno())
+            if not closed.done():
+                closed.set_result(None)
+        else:
+            output.feed(data)
+
+    output = OutputCoalescer(
+        sink.send_bytes,
+        on_pause=lambda: loop.remove_reader(sock.fileno()),
+        on_resume=lambda: loop.add_reader(sock.fileno(), on_readable),
+    )
+    sender = asyncio.create_task(output.run())
+    loop.add_reader(sock.fileno(), on_readable)
+    stopped = asyncio.ensure_future(stop.wait())
+    try:
+        await asyncio.wait([closed, stopped], return_when=asyncio.FIRST_COMPLETED)
+        output.close()
+        await sender
+    finally:
+        loop.remove_reader(sock.fileno())
+        stopped.cancel()
+
+
+async def measure_idle(reader, sessions: int, seconds: float) -> float:
+    """CPU milliseconds per idle session per second."""
+    pairs = [socket.socketpair() for _ in range(sessions)]
+    for ours, _ in pairs:
+        ours.setblocking(False)
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(reader(ours, FrameSink(), stop)) for ours, _ in pairs]
+    await asyncio.sleep(0.2)  # Let every reader settle
+    cpu_start = time.process_time()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    stop.set()
+    await asyncio.gather(*tasks)
+    for a, b in pairs:
+        a.close()
+        b.close()
+    return cpu * 1000 / sessions / seconds
+
+
+async def measure_bulk(reader, size_mb: int, piece: int) -> tuple[float, int]:
+    """Throughput (MB/s) and frames sent for size_mb written in small pieces."""
+    ours, device = socket.socketpair()
+    ours.setblocking(False)
+    sink = FrameSink()
+    stop = asyncio.Event()
+    total = size_mb * 1024 * 1024
+    payload = (LINE * (piece // len(LINE) + 1))[:piece]
+
+    def write_output():
+        sent = 0
+        while sent < total:
+            device.sendall(payload)
+            sent += len(payload)
+        device.shutdown(socket.SHUT_WR)
+
+    started = time.perf_counter()
+    task = asyncio.create_task(reader(ours, sink, stop))
+    writer = threading.Thread(target=write_output)
+    writer.start()
+    while sink.bytes < total and not task.done():
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await task
+    writer.join()
+    ours.close()
+    device.close()
+    return sink.bytes / (1024 * 1024) / elapsed, sink.frames
+
+
+async def run(args: argparse.Namespace) -> int:
+    print(f"Idle CPU ({args.sessions} sessions, {args.idle_seconds}s)")
+    for name, reader in (("polling", polling_reader), ("event-driven", event_reader)):
+        ms = await measure_idle(reader, args.sessions, args.idle_seconds)
+        print(f"  {name:<13} {ms:8.3f} ms CPU per session per second")
+
+    print(f"Bulk output ({args.bulk_mb} MiB in {args.piece}-byte writes)")
+    for name, reader in (("polling", polling_reader), ("event-driven", event_reader)):
+        mb_s, frames = await measure_bulk(reader, args.bulk_mb, args.piece)
+        print(f"  {name:<13} {mb_s:8.1f} MiB/s  {frames:>9} frames")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100, help="Idle console sessions")
+    parser.add_argument("--idle-seconds", type=float, default=5.0, help="Idle measurement time")
+    parser.add_argument("--bulk-mb", type=int, default=20, help="Bulk output size in MiB")
+    parser.add_argument("--piece", type=int, default=512, help="Bytes per device write")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark image sync compression codecs on representative archives.
+
+Measures compression throughput and wire size for each codec/level the
+controller can use when streaming images to agents, so the defaults in
+image_sync_compression / image_sync_zstd_level can be tuned per site.
+
+Inputs can be existing `docker save` archives, images saved on the fly,
+or a synthetic archive that mimics a vrnetlab image (incompressible
+layers, sparse qcow2-like data and text/config files).
+
+Usage:
+    cd api
+    python ../scripts/benchmark_image_compression.py                 # synthetic
+    python ../scripts/benchmark_image_compression.py image.tar
+    python ../scripts/benchmark_image_compression.py --image ceos:4.28.0F
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+# Add api directory to path for imports
+api_dir = Path(__file__).parent.parent / "api"
+sys.path.insert(0, str(api_dir))
+
+from app.image_codec import (  # noqa: E402
+    CODEC_GZIP,
+    CODEC_ZSTD,
+    ZSTD_AVAILABLE,
+    StreamCompressor,
+)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def build_synthetic_archive(path: Path, size_mb: int) -> None:
+    """Write a tar resembling a VM image: random, sparse disk, and text data."""
+    random_bytes = size_mb * CHUNK_SIZE // 4
+    disk_bytes = size_mb * CHUNK_SIZE // 2
+    text_bytes = size_mb * CHUNK_SIZE // 4
+
+    def add(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+    with tarfile.open(path, "w") as tar:
+        add(tar, "layer0/layer.tar", os.urandom(random_bytes))
+        # qcow2-like: mostly zero clusters with scattered data clusters
+        disk = bytearray(disk_bytes)
+        cluster = 64 * 1024
+        for offset in range(0, disk_bytes, cluster * 8):
+            disk[offset:offset + cluster] = os.urandom(min(cluster, disk_bytes - offset))
+        add(tar, "layer1/layer.tar", bytes(disk))
+        line = b"interface Ethernet1\n   description uplink\n   no shutdown\n"
+        add(tar, "layer2/layer.tar", (line * (text_bytes // len(line) + 1))[:text_bytes])
+
+
+def docker_save(reference: str, path: Path) -> None:
+    with open(path, "wb") as f:
+        subprocess.run(["docker", "save", reference], stdout=f, check=True)
+
+
+def run_codec(path: Path, codec: str, level: int, threads: int) -> tuple[int, int, float]:
+    compressor = StreamCompressor(codec, level=level, threads=threads)
+    raw = wire = 0
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            raw += len(chunk)
+            wire += len(compressor.compress(chunk))
+    wire += len(compressor.flush())
+    return raw, wire, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archives", nargs="*", type=Path, help="docker save tar files")
+    parser.add_argument("--image", action="append", default=[], help="Docker reference to save")
+    parser.add_argument("--synthetic-mb", type=int, default=256, help="Synthetic archive size")
+    parser.add_argument("--zstd-levels", default="1,3,6,9", help="Comma-separated zstd levels")
+    parser.add_argument("--gzip-levels", default="1,6", help="Comma-separated gzip levels")
+    parser.add_argument("--threads", type=int, default=-1, help="zstd threads (-1 = all cores)")
+    args = parser.parse_args()
+
+    matrix = [(CODEC_GZIP, int(level)) for level in args.gzip_levels.split(",") if level]
+    if ZSTD_AVAILABLE:
+        matrix = [(CODEC_ZSTD, int(level)) for level in args.zstd_levels.split(",") if level] + matrix
+    else:
+        print("zstandard not installed - benchmarking gzip only")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = list(args.archives)
+        for reference in args.image:
+            path = Path(tmp) / f"{reference.replace('/', '_').replace(':', '_')}.tar"
+            print(f"Saving {reference}...")
+            docker_save(reference, path)
+            inputs.append(path)
+        if not inputs:
+            path = Path(tmp) / "synthetic.tar"
+            build_synthetic_archive(path, args.synthetic_mb)
+            inputs.append(path)
+
+        print(f"{'archive':<30} {'codec':<8} {'level':>5} {'ratio':>7} {'MB/s':>8} {'wire MB':>9}")
+        for path in inputs:
+            for codec, level in matrix:
+                raw, wire, elapsed = run_codec(path, codec, level, args.threads)
+                print(
+                    f"{path.name[:30]:<30} {codec:<8} {level:>5} "
+                    f"{raw / max(wire, 1):>6.2f}x {raw / CHUNK_SIZE / elapsed:>8.1f} "
+                    f"{wire / CHUNK_SIZE:>9.1f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
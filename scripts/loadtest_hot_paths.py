@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Load test controller hot paths under many concurrent console sessions.
+
+Opens N console WebSockets against a running controller (each one holds a
+request worker for its lifetime, like real users at a terminal), then
+hammers the agent-facing hot paths - node events and heartbeats - and
+reports latency percentiles. Run it before/after database changes to
+check that p99 stays flat as console count grows.
+
+Usage:
+    python scripts/loadtest_hot_paths.py --url http://localhost:8000 \\
+        --lab <lab_id> --node <node_name> --agent <agent_id> \\
+        --consoles 200 --requests 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+import websockets
+
+
+async def hold_console(ws_url: str, stop: asyncio.Event) -> bool:
+    """Keep one console session open until the test finishes."""
+    try:
+        async with websockets.connect(ws_url, open_timeout=30) as ws:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+        return True
+    except Exception:
+        return False
+
+
+def event_payload(args: argparse.Namespace, i: int) -> dict:
+    return {
+        "agent_id": args.agent,
+        "lab_id": args.lab,
+        "node_name": args.node,
+        "container_id": "loadtest",
+        "event_type": "started" if i % 2 else "stopped",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "status": "running" if i % 2 else "stopped",
+    }
+
+
+async def timed_request(client: httpx.AsyncClient, args: argparse.Namespace, i: int) -> float | None:
+    start = time.perf_counter()
+    try:
+        if i % 2:
+            response = await client.post("/events/node", json=event_payload(args, i))
+        else:
+            response = await client.post(
+                f"/agents/{args.agent}/heartbeat",
+                json={"agent_id": args.agent, "status": "online", "resource_usage": {}},
+            )
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return None
+    return time.perf_counter() - start
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(args: argparse.Namespace) -> int:
+    base = args.url.rstrip("/")
+    ws_base = base.replace("http://", "ws://").replace("https://", "wss://")
+    ws_url = f"{ws_base}/labs/{args.lab}/nodes/{args.node}/console"
+
+    stop = asyncio.Event()
+    consoles = [asyncio.create_task(hold_console(ws_url, stop)) for _ in range(args.consoles)]
+    await asyncio.sleep(args.warmup)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30.0) as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(i: int) -> float | None:
+            async with semaphore:
+                return await timed_request(client, args, i)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    stop.set()
+    opened = sum(await asyncio.gather(*consoles))
+
+    latencies = [r for r in results if r is not None]
+    failures = len(results) - len(latencies)
+    if not latencies:
+        print("All requests failed")
+        return 1
+
+    print(f"consoles open:  {opened}/{args.consoles}")
+    print(f"requests:       {len(results)} ({failures} failed) in {elapsed:.1f}s "
+          f"= {len(results) / elapsed:.0f} req/s")
+    print(f"latency mean:   {statistics.mean(latencies) * 1000:.1f} ms")
+    for pct in (50, 90, 99):
+        print(f"latency p{pct}:    {percentile(latencies, pct) * 1000:.1f} ms")
+    return 0 if failures == 0 else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000", help="Controller base URL")
+    parser.add_argument("--lab", required=True, help="Lab ID with a deployed node")
+    parser.add_argument("--node", required=True, help="Node name to attach consoles to")
+    parser.add_argument("--agent", required=True, help="Registered agent ID for heartbeats")
+    parser.add_argument("--consoles", type=int, default=200, help="Concurrent console sessions")
+    parser.add_argument("--requests", type=int, default=5000, help="Event/heartbeat requests")
+    parser.add_argument("--concurrency", type=int, default=50, help="In-flight requests")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds to let consoles attach")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())